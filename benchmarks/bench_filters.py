@@ -0,0 +1,84 @@
+"""
+benchmarks.bench_filters
+------------------------
+スクリーニング判定のマイクロベンチマーク（ネットワーク不要）
+
+* legacy       : StockData 1 件ずつ passes_* を 4 回呼ぶ旧来のループ
+* screen_stocks: 互換ラッパー（StockData → 列配列へ詰め替えてから一括判定）
+* screen_frame : ユニバース全体の DataFrame を列単位で一括判定
+
+    python -m benchmarks.bench_filters --rows 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from gap_bot.filters import (
+    StockData,
+    passes_float_rotation,
+    passes_gap,
+    passes_sentiment,
+    passes_volume,
+    screen_frame,
+    screen_stocks,
+)
+
+
+def make_universe(n: int, seed: int = 0) -> pd.DataFrame:
+    """n 銘柄ぶんの乱数ユニバース（数 % が 4 条件を通る分布）"""
+    rng = np.random.default_rng(seed)
+    prev = rng.uniform(1, 200, n)
+    return pd.DataFrame({
+        "symbol": [f"S{i:06d}" for i in range(n)],
+        "previous_close": prev,
+        "premarket_price": prev * (1 + rng.normal(0.01, 0.04, n)),
+        "premarket_volume": rng.integers(0, 2_000_000, n),
+        "float_shares": rng.integers(100_000, 50_000_000, n),
+        "sentiment_score": rng.uniform(0, 5, n),
+    })
+
+
+def legacy_screen(stocks: List[StockData]) -> List[StockData]:
+    """ベクトル化前の screen_stocks と同じ判定"""
+    return [s for s in stocks
+            if passes_gap(s, 3.0) and passes_volume(s, 100_000)
+            and passes_float_rotation(s, 10.0) and passes_sentiment(s, 3.0)]
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="screen_stocks vs screen_frame")
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    for n in args.rows:
+        df = make_universe(n)
+        stocks = [StockData(*row) for row in zip(*(df[c].tolist() for c in df.columns))]  # Python 型で持つ
+
+        t_legacy, ref = best_of(lambda: legacy_screen(stocks), args.repeat)
+        t_wrap, wrapped = best_of(lambda: screen_stocks(stocks), args.repeat)
+        t_frame, frame = best_of(lambda: screen_frame(df), args.repeat)
+        assert [s.symbol for s in ref] == [s.symbol for s in wrapped] == list(frame["symbol"])
+
+        print(f"rows={n:>7,} passed={len(ref):>5,}  legacy={t_legacy * 1e3:8.2f}ms  "
+              f"screen_stocks={t_wrap * 1e3:8.2f}ms  screen_frame={t_frame * 1e3:7.2f}ms  "
+              f"(frame x{t_legacy / t_frame:,.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+benchmarks.bench_live_tick
+--------------------------
+run_live の 1 tick（気配の一括取得 → 全ポジションの判定・発注）の所要時間をポジション数ごとに計測する。
+
+* serial     : 旧来の main ループと同じく、ポジションを 1 件ずつ on_quote に通す
+* concurrent : QuoteDispatcher（有界スレッドプール + 銘柄ごとの順序保証）で並行に通す
+
+ブローカーは benchmarks.mock_broker.MockBroker（応答遅延つき・ネットワーク不要）。毎 tick すべてのポジションが
+TP/2 に届く気配を当てるので、1 ポジションあたり 半分利確(成行) + (既存があれば STOP 取消) + STOP 発注 が走る。
+
+    python -m benchmarks.bench_live_tick --positions 10 50 200 --latency 0.02 --workers 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+os.environ.pop("DISCORD_WEBHOOK_URL", None)   # 通知は外に出さない
+
+from benchmarks.mock_broker import MockBroker  # noqa: E402
+from scripts import run_live  # noqa: E402
+
+
+def make_positions(n: int) -> List[dict]:
+    """entry=100, TP 7 % のロング n 件（105 の気配で TP/2 に届く）"""
+    return [{"symbol": f"S{i:04d}", "entry": 100.0, "side": "long", "sl": 97.5,
+             "order_id": i, "tp_pct": 0.07, "qty": 100} for i in range(n)]
+
+
+def make_broker(positions: List[dict], latency: float) -> MockBroker:
+    """ポジションを保有済みにし、全銘柄の気配を 105 に置いたモックブローカー"""
+    broker = MockBroker(latency=latency)
+    for pos in positions:
+        broker.seed_position(pos["symbol"], pos["qty"], pos["entry"])
+        broker.set_quote(pos["symbol"], 105.0)
+    return broker
+
+
+def tick_serial(broker: MockBroker, positions: List[dict]) -> None:
+    quotes = broker.get_quotes([p["symbol"] for p in positions])
+    for pos in positions:
+        run_live.on_quote(pos, quotes[pos["symbol"]], client=broker, tp=0.07, paper=False)
+
+
+def tick_concurrent(broker: MockBroker, positions: List[dict], workers: int) -> None:
+    async def tick() -> None:
+        d = run_live.QuoteDispatcher(lambda pos, q: run_live.on_quote(pos, q, client=broker, tp=0.07, paper=False),
+                                     workers=workers)
+        quotes = await asyncio.to_thread(broker.get_quotes, [p["symbol"] for p in positions])
+        for pos in positions:
+            d.submit(pos, quotes[pos["symbol"]])
+        await d.drain()
+        d.close()
+    asyncio.run(tick())
+
+
+def timed(fn, n: int, latency: float, repeat: int) -> tuple[float, int]:
+    """毎回新しいポジション・ブローカーで fn を回し、最短の (秒, ブローカー呼び出し数) を返す"""
+    best, calls = float("inf"), 0
+    for _ in range(repeat):
+        run_live.HALF_TP_DONE.clear()
+        positions = make_positions(n)
+        broker = make_broker(positions, latency)
+        t0 = time.perf_counter()
+        fn(broker, positions)
+        el = time.perf_counter() - t0
+        if el < best:
+            best, calls = el, broker.stats()["calls"]
+    return best, calls
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="run_live tick duration vs position count")
+    p.add_argument("--positions", type=int, nargs="+", default=[10, 50, 200])
+    p.add_argument("--latency", type=float, default=0.02, help="ブローカー 1 呼び出しの遅延 sec")
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-serial", action="store_true", help="serial を省く（ポジションが多いと遅い）")
+    args = p.parse_args()
+
+    def concurrent(b, ps):
+        tick_concurrent(b, ps, args.workers)
+
+    for n in args.positions:
+        t_conc, calls = timed(concurrent, n, args.latency, args.repeat)
+        line = f"positions={n:>4} calls={calls:>5}  concurrent(w={args.workers})={t_conc * 1e3:9.1f}ms"
+        if not args.no_serial:
+            t_ser, _ = timed(tick_serial, n, args.latency, 1)
+            line += f"  serial={t_ser * 1e3:9.1f}ms  (x{t_ser / t_conc:.1f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
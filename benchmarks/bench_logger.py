@@ -0,0 +1,51 @@
+"""
+benchmarks.bench_logger
+-----------------------
+ログ書き込みのマイクロベンチマーク（append_csv の 1 行ごと open/close と EventLogger のまとめ書き）
+
+    python -m benchmarks.bench_logger --rows 5000 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from gap_bot.utils import logger as lg
+
+
+def bench(n: int, repeat: int = 3) -> tuple[float, float]:
+    """n 行を書く最短時間 (append_csv 秒, EventLogger 秒)"""
+    per_row = buffered = float("inf")
+    with tempfile.TemporaryDirectory(prefix="bench_logger_") as tmp:
+        lg.LOG_DIR = Path(tmp)
+        for k in range(repeat):
+            t0 = time.perf_counter()
+            for i in range(n):
+                lg.append_csv(f"raw{k}.csv", ["", f"S{i}", 1.0, 1.1, 100])
+            per_row = min(per_row, time.perf_counter() - t0)
+
+            log = lg.EventLogger("screen", log_dir=Path(tmp) / str(k))
+            t0 = time.perf_counter()
+            for i in range(n):
+                log.log(symbol=f"S{i}", prev_close=1.0, pre_price=1.1, pre_volume=100)
+            log.close()
+            buffered = min(buffered, time.perf_counter() - t0)
+    return per_row, buffered
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="append_csv vs EventLogger")
+    p.add_argument("--rows", type=int, nargs="+", default=[5_000, 50_000])
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+    for n in args.rows:
+        per_row, buffered = bench(n, args.repeat)
+        print(f"{n:>7} rows  append_csv {n / per_row:>10,.0f} rows/s  EventLogger {n / buffered:>10,.0f} rows/s"
+              f"  ({per_row / buffered:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
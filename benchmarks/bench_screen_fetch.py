@@ -0,0 +1,96 @@
+"""
+benchmarks.bench_screen_fetch
+-----------------------------
+run_screen の取得エンジンをローカルモックサーバに対して回し、symbols/sec を計測する。
+
+    python -m benchmarks.bench_screen_fetch --symbols 500 --latency 0.05 --rate 1000
+
+* --latency : モックサーバの応答遅延 (sec)。本番の RTT 相当を入れると差が見える
+* --batch-size : N 銘柄ずつまとめて取得するバッチモード（0 で銘柄ごと）
+* --compare : concurrency=1（旧来の逐次取得相当）も同条件で回して並べて表示
+* --tape data/tape/YYYY-MM-DD : 記録日の 1 分足・気配（gap_bot.tape）をモックから返し、その銘柄で回す
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.mock_server import MockMarketServer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _setup_env() -> None:
+    """run_screen の import 時チェックを通すためのダミー認証情報"""
+    for k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+        os.environ.setdefault(k, "bench")
+    os.environ.pop("FINNHUB_API_KEY", None)          # sentiment は外部に出さない
+
+
+def run_once(rs, symbols: list[str], *, rate: float, burst: float, concurrency: int,
+             batch_size: int = 0) -> tuple[int, float]:
+    """取得エンジンを 1 回回して (合格数, 経過秒) を返す"""
+    t0 = time.perf_counter()
+    out = asyncio.run(rs.fetch_premarket_alpaca_async(
+        symbols, rate=rate, burst=burst, concurrency=concurrency, batch_size=batch_size))
+    return len(out), time.perf_counter() - t0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="screen fetch engine benchmark")
+    p.add_argument("--symbols", type=int, default=300, help="銘柄数")
+    p.add_argument("--latency", type=float, default=0.02, help="モック応答遅延 sec")
+    p.add_argument("--rate", type=float, default=1_000.0, help="token bucket req/sec")
+    p.add_argument("--burst", type=float, default=50.0)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--batch-size", type=int, default=0, help="0=銘柄ごと / N=N 銘柄ずつまとめて取得")
+    p.add_argument("--coverage", type=float, default=0.95, help="grouped-aggs に載る銘柄の割合（残りはフォールバック）")
+    p.add_argument("--compare", action="store_true", help="concurrency=1 でも計測")
+    p.add_argument("--tape", type=Path, default=None, help="記録日のテープディレクトリ（銘柄と値を再生）")
+    args = p.parse_args()
+    tape = args.tape.resolve() if args.tape else None
+
+    _setup_env()
+    sys.path.insert(0, str(ROOT))                          # chdir 後も import できるように
+    os.chdir(tempfile.mkdtemp(prefix="bench_screen_"))   # logs/ をリポジトリに作らない
+
+    server = MockMarketServer(latency=args.latency, tape=tape)
+    symbols = sorted(set(server.tape_bars) | set(server.tape_quotes)) if tape else \
+        [f"S{i:05d}" for i in range(args.symbols)]
+    server.universe = symbols[: int(len(symbols) * args.coverage)]
+    url = server.start()
+    os.environ["ALPACA_DATA_URL"] = url                   # 共有クライアントをモックへ向ける
+    os.environ["POLYGON_BASE_URL"] = url                  # grouped-aggs
+
+    import scripts.run_screen as rs
+    import sdk.quotes_polygon as quotes_polygon
+    from gap_bot.filters import build_filters
+    from gap_bot.utils import refcache
+    from sdk.http_pool import pool_stats, reset_pool_stats
+
+    try:
+        rs.get_float_shares = lambda s: 1_000_000             # yfinance は外に出さない
+        rs.filters = build_filters(ROOT / "screen_config.yaml")
+
+        for conc in [args.concurrency] + ([1] if args.compare else []):
+            quotes_polygon.clear_prev_close_cache()
+            refcache._cache = refcache.RefCache(":memory:")   # 毎回コールドキャッシュで計測
+            reset_pool_stats()
+            served = server.requests
+            n_ok, el = run_once(rs, symbols, rate=args.rate, burst=args.burst, concurrency=conc,
+                                batch_size=args.batch_size)
+            st = next(iter(pool_stats().values()), {})
+            print(f"concurrency={conc:<3} batch={args.batch_size:<4} symbols={len(symbols)} passed={n_ok} "
+                  f"requests={server.requests - served} conns={st.get('connections', 0)} "
+                  f"elapsed={el:.2f}s {len(symbols) / el:,.1f} symbols/sec")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
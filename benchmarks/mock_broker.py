@@ -0,0 +1,312 @@
+"""
+benchmarks.mock_broker
+----------------------
+ベンチマーク / 負荷テスト用のローカル疑似ブローカー（sdk.webull_sdk_wrapper.WebullClient と同じメソッド）
+
+* 注文台帳: 指値 / 逆指値 / 成行 と TP / SL ブラケット（片方が約定したらもう片方を取消 = OCO）
+* 約定: 気配（set_quote / on_quote）が動くたびに、その銘柄の有効注文を突き合わせる
+    - 買い指値は ask <= 指値、売り指値は bid >= 指値 で ask / bid で全量約定
+    - 売り逆指値は bid <= 逆指値、買い逆指値は ask >= 逆指値 で ask / bid で全量約定
+    - 成行は受付と同時に約定
+* latency: 1 呼び出しあたりの応答遅延（sec）
+* rate / burst: サーバ側の上限。超えた呼び出しは待たせずに RateLimited を送出（throttled に数える）
+* 気配の初期値は benchmarks.mock_server と同じ（mock_pre_price。bid は 1 セント下）
+
+    broker = MockBroker(latency=0.02, rate=10, burst=10)
+    run_entry.submit_all(broker, plans, workers=8, bucket=TokenBucket(rate=8))
+    feed = QuoteFeed(scripted_ticks(symbols))          # benchmarks.mock_ws
+    feed.start_quote_stream(symbols, broker.on_quote)  # 気配の変化で TP / SL が約定する
+    broker.get_positions(), broker.fills, broker.stats()
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional
+
+from benchmarks.mock_server import mock_pre_price
+from gap_bot.utils.rate_limit import TokenBucket
+from sdk.order_book import normalize as normalize_order
+
+WORKING = "Working"
+FILLED = "Filled"
+CANCELLED = "Cancelled"
+
+
+class RateLimited(RuntimeError):
+    """MockBroker のレート上限を超えた呼び出し（本番の HTTP 429 相当）"""
+
+
+def _px(v: float) -> float:
+    return float(Decimal(str(v)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+class MockBroker:
+    """ネットワークを使わない WebullClient 互換ブローカー（スレッドセーフ）"""
+
+    def __init__(self, *, latency: float = 0.0, rate: float | None = None, burst: float | None = None,
+                 spread: float = 0.01) -> None:
+        self.latency = latency
+        self.spread = spread
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.calls: Counter[str] = Counter()     # メソッド名 → 呼び出し回数
+        self.throttled = 0                       # レート超過で弾いた回数
+        self.fills: List[Dict[str, Any]] = []    # 約定履歴 {orderId, symbol, side, qty, price, orderType, seq}
+        self._lock = threading.RLock()
+        self._seq = itertools.count(1)
+        self._quotes: Dict[str, tuple[float, float]] = {}        # symbol → (bid, ask)
+        self._orders: Dict[str, Dict[str, Any]] = {}             # orderId → 注文（終了したものも残す）
+        self._working: Dict[str, Dict[str, Dict[str, Any]]] = {}  # symbol → {orderId: 有効な注文}
+        self._brackets: Dict[str, Dict[str, float]] = {}         # 親 orderId → {take_profit, stop_loss}
+        self._positions: Dict[str, Dict[str, Any]] = {}          # symbol → {position, avgPrice, orderId}
+
+    @classmethod
+    def from_env(cls) -> "MockBroker":
+        return cls()
+
+    # ---------- 共通: 遅延・上限 ----------
+    def _io(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if self.bucket is not None and not self.bucket.try_acquire():
+            with self._lock:
+                self.throttled += 1
+            raise RateLimited(f"{name}: rate limit exceeded")
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ---------- 気配 ----------
+    def quote(self, symbol: str) -> tuple[float, float]:
+        """現在の (bid, ask)。未設定の銘柄は mock_pre_price から作る"""
+        sym = symbol.upper()
+        with self._lock:
+            if sym not in self._quotes:
+                ask = mock_pre_price(sym)
+                self._quotes[sym] = (_px(ask - self.spread), ask)
+            return self._quotes[sym]
+
+    def set_quote(self, symbol: str, bid: float, ask: float | None = None) -> None:
+        """気配を更新して、その銘柄の有効注文を約定判定する（ask 省略時は bid + spread）"""
+        sym = symbol.upper()
+        with self._lock:
+            self._quotes[sym] = (float(bid), float(ask if ask is not None else _px(bid + self.spread)))
+            self._match(sym)
+
+    def seed_position(self, symbol: str, qty: int, avg_price: float) -> None:
+        """保有を直接置く（run_live の起動時ポジションを作る用。呼び出し回数には数えない）"""
+        with self._lock:
+            self._positions[symbol.upper()] = {"position": int(qty), "avgPrice": float(avg_price),
+                                               "orderId": f"SEED-{symbol.upper()}"}
+
+    def on_quote(self, q: Dict[str, Any]) -> None:
+        """start_quote_stream の handler として使える形（bidPrice / askPrice を持つ dict）"""
+        bid, ask = q.get("bidPrice"), q.get("askPrice")
+        if q.get("symbol") and (bid or ask):
+            self.set_quote(str(q["symbol"]), float(bid or ask), float(ask or bid))
+
+    def get_quote(self, symbol: str, *, extended: bool = True) -> Dict[str, Any]:
+        self._io("get_quote")
+        return self._quote_dict(symbol)
+
+    def get_quotes(self, symbols: List[str], *, extended: bool = True) -> Dict[str, Dict[str, Any]]:
+        self._io("get_quotes")
+        return {s.upper(): self._quote_dict(s) for s in symbols}
+
+    def _quote_dict(self, symbol: str) -> Dict[str, Any]:
+        bid, ask = self.quote(symbol)
+        return {"bidPrice": bid, "askPrice": ask, "bidSize": 100.0, "askSize": 100.0,
+                "lastPrice": ask, "timestamp": None}
+
+    # ---------- 発注 ----------
+    def _new_order(self, symbol: str, side: str, order_type: str, qty: float, *,
+                   limit: float | None = None, stop: float | None = None, parent: str | None = None) -> Dict[str, Any]:
+        oid = f"M{next(self._seq):07d}"
+        o = {"orderId": oid, "symbol": symbol.upper(), "side": "BUY" if side.upper() in {"BUY", "LONG"} else "SELL",
+             "orderType": order_type, "qty": max(1, int(qty)), "limitPrice": limit, "stopPrice": stop,
+             "status": WORKING, "parentId": parent}
+        self._orders[oid] = o
+        self._working.setdefault(o["symbol"], {})[oid] = o
+        return o
+
+    def _close(self, o: Dict[str, Any], status: str) -> None:
+        o["status"] = status
+        self._working.get(o["symbol"], {}).pop(o["orderId"], None)
+
+    def place_limit_order(self, symbol: str, side: str, qty: float, price: float, time_in_force: str = "DAY",
+                          extended: bool = False, take_profit: float | None = None,
+                          stop_loss: float | None = None) -> dict:
+        self._io("place_limit_order")
+        with self._lock:
+            o = self._new_order(symbol, side, "LIMIT", qty, limit=_px(price))
+            if take_profit is not None or stop_loss is not None:
+                self._brackets[o["orderId"]] = {"take_profit": take_profit, "stop_loss": stop_loss}
+            self._match(o["symbol"])
+            return {"orderId": o["orderId"], "response": dict(o), "success": True}
+
+    def place_stop_order(self, symbol: str, qty: float, stop_price: float, side: str) -> dict:
+        self._io("place_stop_order")
+        with self._lock:
+            o = self._new_order(symbol, side, "STOP", qty, stop=_px(stop_price))
+            self._match(o["symbol"])
+            return {"orderId": o["orderId"], "success": True}
+
+    def place_market_order(self, symbol: str, qty: float, side: str) -> dict:
+        self._io("place_market_order")
+        with self._lock:
+            o = self._new_order(symbol, side, "MARKET", qty)
+            self._match(o["symbol"])
+            return {"orderId": o["orderId"], "success": True}
+
+    def attach_bracket(self, *, parent_order_id: str, take_profit: float, stop_loss: float,
+                       break_even_distance: float) -> Dict[str, Any]:
+        """親注文に TP / SL を付ける（親が約定済みならその場で子注文を出す）"""
+        self._io("attach_bracket")
+        with self._lock:
+            parent = self._orders.get(str(parent_order_id))
+            if parent is None:
+                raise ValueError(f"unknown order {parent_order_id}")
+            self._brackets[parent["orderId"]] = {"take_profit": take_profit, "stop_loss": stop_loss}
+            if parent["status"] == FILLED:
+                self._spawn_bracket(parent)
+                self._match(parent["symbol"])
+            return {"parentId": parent["orderId"], "success": True}
+
+    def modify_bracket(self, *, order_id: str, stop_loss: float) -> Dict[str, Any]:
+        """SL 子注文（または親 orderId に紐づく SL）の逆指値を変える"""
+        self._io("modify_bracket")
+        with self._lock:
+            for o in [o for w in self._working.values() for o in w.values()]:
+                if o["orderType"] == "SL" and str(order_id) in (o["orderId"], o["parentId"]):
+                    o["stopPrice"] = _px(stop_loss)
+                    self._match(o["symbol"])
+                    return {"orderId": o["orderId"], "success": True}
+        return {"orderId": None, "success": False}
+
+    def cancel_order(self, order_id) -> bool:
+        self._io("cancel_order")
+        with self._lock:
+            o = self._orders.get(str(order_id))
+            if o is None or o["status"] != WORKING:
+                return False
+            self._close(o, CANCELLED)
+            return True
+
+    # ---------- 照会 ----------
+    def _active(self) -> list:
+        with self._lock:
+            return [dict(o) for w in self._working.values() for o in w.values()]
+
+    def get_active_orders(self) -> list:
+        self._io("get_active_orders")
+        return self._active()
+
+    # open_orders / find_orders は WebullClient では注文台帳（ネットワークなし）から引くので遅延・上限に数えない
+    def open_orders(self) -> list:
+        return self._active()
+
+    def find_orders(self, symbol: str, side: str | None = None, kind: str | None = None) -> list:
+        with self._lock:
+            mine = [dict(o) for o in self._working.get(symbol.upper(), {}).values()]
+        out = []
+        for raw in mine:
+            o = normalize_order(raw)
+            if side in (None, o["side"]) and kind in (None, o["kind"]):
+                out.append(raw)
+        return out
+
+    def get_positions(self) -> list:
+        self._io("get_positions")
+        with self._lock:
+            return [dict(p, symbol=s) for s, p in self._positions.items() if p["position"]]
+
+    def get_bracket(self, symbol: str) -> Optional[Dict[str, Any]]:
+        for order in self.find_orders(symbol):
+            if order.get("orderType") in ("TP", "SL"):
+                return order
+        return None
+
+    def order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """終了した注文も含めて 1 件返す（検証用。呼び出し回数・上限には数えない）"""
+        with self._lock:
+            o = self._orders.get(str(order_id))
+            return dict(o) if o else None
+
+    def warm_up(self, symbols=None, keepalive: bool = True) -> Dict[str, Any]:
+        return {"symbols": len(symbols or [])}
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": sum(self.calls.values()), "throttled": self.throttled, "fills": len(self.fills),
+                    "working": sum(len(w) for w in self._working.values())}
+
+    # ---------- 約定エンジン（_lock 保持中に呼ぶ） ----------
+    def _match(self, symbol: str) -> None:
+        """symbol の有効注文を現在の気配で約定させる（子注文の発生・OCO 取消で状態が変わる間は繰り返す）"""
+        bid, ask = self.quote(symbol)
+        changed = True
+        while changed:
+            changed = False
+            for o in list(self._working.get(symbol, {}).values()):
+                if o["status"] != WORKING:              # 同じ周回の OCO で取り消された
+                    continue
+                px = self._fill_price(o, bid, ask)
+                if px is not None:
+                    self._fill(o, px)
+                    changed = True
+
+    @staticmethod
+    def _fill_price(o: Dict[str, Any], bid: float, ask: float) -> Optional[float]:
+        buy = o["side"] == "BUY"
+        if o["orderType"] == "MARKET":
+            return ask if buy else bid
+        if o["orderType"] in ("LIMIT", "TP"):
+            if buy and ask <= o["limitPrice"]:
+                return ask
+            if not buy and bid >= o["limitPrice"]:
+                return bid
+        elif o["orderType"] in ("STOP", "SL"):
+            if buy and ask >= o["stopPrice"]:
+                return ask
+            if not buy and bid <= o["stopPrice"]:
+                return bid
+        return None
+
+    def _fill(self, o: Dict[str, Any], price: float) -> None:
+        self._close(o, FILLED)
+        o["filledPrice"] = price
+        self.fills.append({"orderId": o["orderId"], "symbol": o["symbol"], "side": o["side"], "qty": o["qty"],
+                           "price": price, "orderType": o["orderType"], "seq": len(self.fills) + 1})
+        self._book_position(o, price)
+        if o["parentId"]:                                    # TP / SL の片方が約定 → もう片方を取消
+            for sib in list(self._working.get(o["symbol"], {}).values()):
+                if sib["parentId"] == o["parentId"]:
+                    self._close(sib, CANCELLED)
+        elif o["orderId"] in self._brackets:
+            self._spawn_bracket(o)
+
+    def _spawn_bracket(self, parent: Dict[str, Any]) -> None:
+        b = self._brackets.pop(parent["orderId"])
+        side = "SELL" if parent["side"] == "BUY" else "BUY"
+        if b.get("take_profit") is not None:
+            self._new_order(parent["symbol"], side, "TP", parent["qty"], limit=_px(b["take_profit"]), parent=parent["orderId"])
+        if b.get("stop_loss") is not None:
+            self._new_order(parent["symbol"], side, "SL", parent["qty"], stop=_px(b["stop_loss"]), parent=parent["orderId"])
+
+    def _book_position(self, o: Dict[str, Any], price: float) -> None:
+        p = self._positions.setdefault(o["symbol"], {"position": 0, "avgPrice": 0.0, "orderId": o["orderId"]})
+        signed = o["qty"] if o["side"] == "BUY" else -o["qty"]
+        new = p["position"] + signed
+        if p["position"] == 0 or (p["position"] > 0) == (signed > 0):       # 新規 / 買い増し → 平均単価を更新
+            p["avgPrice"] = (p["avgPrice"] * abs(p["position"]) + price * abs(signed)) / abs(new)
+            p["orderId"] = o["orderId"]
+        elif new and (new > 0) != (p["position"] > 0):                        # ドテン → 残りは約定価格で建つ
+            p["avgPrice"] = price
+            p["orderId"] = o["orderId"]
+        p["position"] = new
@@ -0,0 +1,264 @@
+"""
+benchmarks.mock_server
+----------------------
+ベンチマーク用のローカル Alpaca Market-Data v2 / Polygon モックサーバ。
+
+* /v2/stocks/bars, /v2/stocks/bars/latest, /v2/stocks/quotes/latest を実装
+* Polygon の grouped-aggs (/v2/aggs/grouped/locale/us/market/stocks/{date}) は universe の銘柄だけ返す
+* Polygon の 1 分足 (/v2/aggs/ticker/{symbol}/range/1/minute/{from}/{to}) と snapshot も返す
+  （1 分足は mock_day_path の値動き。benchmarks.mock_ws の台本ティックと同じ経路）
+* 価格・出来高は銘柄名から決まる疑似乱数（実行ごとに同じ値）
+* 日足は取引日ごと（最後の 1 本が当日）。premarket=True なら当日の bar を含めない寄り前の形
+* latency で 1 リクエストあたりの応答遅延を注入できる
+* tape=data/tape/YYYY-MM-DD を渡すと、記録した 1 分足・最新気配（gap_bot.tape）を優先して返す
+  （記録に無い銘柄だけ疑似乱数。latency=0 なら run_screen を記録日の実データで実時間より速く回せる）
+
+使い方:
+    with MockMarketServer(latency=0.02, universe=symbols) as url:
+        client = StockHistoricalDataClient(key, secret, url_override=url)
+        sdk.quotes_polygon._BASE = url
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from aiohttp import web
+
+from gap_bot.utils.market_calendar import previous_trading_day, screen_session
+
+PAGE_SIZE = 10_000          # Alpaca 本番と同じ 1 ページ上限
+SESSION_MINUTES = 390       # 09:30〜16:00 ET
+ET = ZoneInfo("America/New_York")
+
+
+def _rng(sym: str, salt: int = 0) -> float:
+    """銘柄名 → 0.0〜1.0 の決定的な値"""
+    return (zlib.crc32(f"{sym}:{salt}".encode()) % 10_000) / 10_000
+
+
+def _iso(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def mock_prev_close(sym: str) -> float:
+    """前日終値（5〜55 USD）"""
+    return round(5 + _rng(sym, 1) * 50, 2)
+
+
+def mock_pre_price(sym: str) -> float:
+    """プレマーケット価格（前日比 -5 %〜+15 %）"""
+    return round(mock_prev_close(sym) * (0.95 + _rng(sym, 2) * 0.20), 2)
+
+
+def _bar(sym: str, ts: datetime, px: float, vol: int) -> dict:
+    return {"t": _iso(ts), "o": px, "h": px, "l": px, "c": px, "v": vol, "n": 1, "vw": px}
+
+
+def mock_daily_bars(sym: str, limit: int, *, premarket: bool = False) -> list[dict]:
+    """
+    直近 limit 本の日足（取引日だけ、00:00 ET のタイムスタンプ）
+    最後の 1 本がスクリーニング対象日（close = プレマーケット価格）、その 1 本前が前日終値、それより前は前日終値の 9 割
+    premarket=True なら対象日の bar はまだ無い（寄り前の Alpaca と同じく最後の 1 本が前営業日）
+    """
+    session = screen_session()
+    day = previous_trading_day(session) if premarket else session
+    days = []
+    while len(days) < limit:
+        days.append(day)
+        day = previous_trading_day(day)
+    prev = previous_trading_day(session)
+    out = []
+    for d in reversed(days):
+        c = mock_pre_price(sym) if d == session else mock_prev_close(sym) if d == prev else round(mock_prev_close(sym) * 0.9, 2)
+        out.append(_bar(sym, datetime.combine(d, time(0), tzinfo=ET).astimezone(timezone.utc), c, 1_000_000))
+    return out
+
+
+def mock_minute_bars(sym: str, n: int = 30) -> list[dict]:
+    """04:00 以降の 1 分足 n 本（出来高は銘柄ごとに 0〜20 k/本）"""
+    start = datetime.now(tz=timezone.utc).replace(hour=8, minute=0, second=0, microsecond=0)
+    vol = int(_rng(sym, 3) * 20_000)
+    return [_bar(sym, start + timedelta(minutes=i), mock_pre_price(sym), vol) for i in range(n)]
+
+
+def mock_day_path(sym: str, n: int = SESSION_MINUTES) -> list[dict]:
+    """
+    寄付きからの 1 分足 n 本 [{minute, open, high, low, close, volume}]
+    mock_pre_price から始まる銘柄ごとに決まったランダムウォーク（1 分 ±0.5 % 程度）
+    """
+    rnd = random.Random(zlib.crc32(sym.encode()))
+    px = mock_pre_price(sym)
+    vol = 1_000 + int(_rng(sym, 3) * 20_000)
+    out = []
+    for m in range(n):
+        o = px
+        c = max(0.01, round(o * (1 + rnd.gauss(0, 0.005)), 2))
+        out.append({"minute": m, "open": o, "high": round(max(o, c) * (1 + rnd.random() * 0.002), 2),
+                    "low": round(min(o, c) * (1 - rnd.random() * 0.002), 2), "close": c, "volume": vol})
+        px = c
+    return out
+
+
+def mock_quote(sym: str) -> dict:
+    px = mock_pre_price(sym)
+    return {"t": _iso(datetime.now(tz=timezone.utc)), "ax": "V", "ap": px, "as": 1,
+            "bx": "V", "bp": round(px - 0.01, 2), "bs": 1, "c": ["R"], "z": "C"}
+
+
+def load_tape(day_dir: str | Path) -> tuple[dict[str, list[dict]], dict[str, dict]]:
+    """
+    何をする関数? → gap_bot.tape の記録日ディレクトリから
+    (symbol → 1 分足の応答 [{t,o,h,l,c,v,...}], symbol → 最後の気配の応答) を作る
+    """
+    from gap_bot.tape import from_ns, read_bars, read_tape
+
+    day_dir = Path(day_dir)
+    bars: dict[str, list[dict]] = {}
+    if (day_dir / "bar.tape").exists():
+        df = read_bars(day_dir / "bar.tape").drop_duplicates(["symbol", "timestamp"], keep="last")
+        for sym, g in df.sort_values("timestamp").groupby("symbol", sort=False):
+            bars[sym] = [{"t": _iso(ts), "o": o, "h": h, "l": lo, "c": c, "v": int(v), "n": 1, "vw": c}
+                         for ts, o, h, lo, c, v in zip(g["timestamp"], g["open"], g["high"], g["low"],
+                                                      g["close"], g["volume"])]
+    quotes: dict[str, dict] = {}
+    if (day_dir / "quote.tape").exists():
+        for ts, _recv, sym, bid, ask, bs, as_ in read_tape(day_dir / "quote.tape").tolist():
+            quotes[sym.decode()] = {"t": _iso(from_ns(ts)), "ax": "V", "ap": ask, "as": as_ or 1, "bx": "V",
+                                    "bp": bid, "bs": bs or 1, "c": ["R"], "z": "C"}
+    return bars, quotes
+
+
+class MockMarketServer:
+    """aiohttp で立てるモックサーバ。別スレッドのイベントループで動く"""
+
+    def __init__(self, *, latency: float = 0.0, host: str = "127.0.0.1", page_size: int = PAGE_SIZE,
+                 universe: list[str] | None = None, tape: str | Path | None = None,
+                 premarket: bool = False) -> None:
+        self.latency = latency
+        self.premarket = premarket           # True: 日足に当日の bar を含めない（寄り前の形）
+        self.universe = list(universe or [])  # grouped-aggs に載せる銘柄
+        self.page_size = page_size           # 小さくするとページングを試せる
+        self.host = host
+        self.requests = 0                    # 受けたリクエスト総数
+        self.tape_bars, self.tape_quotes = load_tape(tape) if tape else ({}, {})
+        self.url = ""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self._thread: threading.Thread | None = None
+
+    # ---------- ハンドラ ----------
+    async def _pre(self, request: web.Request) -> list[str]:
+        """共通前処理: カウント・遅延注入・symbols 解析"""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [s for s in request.query.get("symbols", "").split(",") if s]
+
+    async def _bars(self, request: web.Request) -> web.Response:
+        syms = await self._pre(request)
+        tf = request.query.get("timeframe", "1Min")
+        limit = int(request.query.get("limit") or self.page_size)
+        offset = int(request.query.get("page_token") or 0)
+
+        rows: list[tuple[str, dict]] = []
+        for s in syms:
+            if tf.endswith("Day"):
+                bars = mock_daily_bars(s, min(limit, 5), premarket=self.premarket)
+            else:
+                bars = self.tape_bars.get(s) or mock_minute_bars(s)
+            rows.extend((s, b) for b in bars)
+
+        page = rows[offset: offset + min(limit, self.page_size)]
+        out: dict[str, list[dict]] = {}
+        for s, b in page:
+            out.setdefault(s, []).append(b)
+        nxt = offset + len(page)
+        return web.json_response({"bars": out, "next_page_token": str(nxt) if nxt < len(rows) else None})
+
+    async def _latest_bars(self, request: web.Request) -> web.Response:
+        syms = await self._pre(request)
+        return web.json_response({"bars": {s: mock_daily_bars(s, 2, premarket=self.premarket)[-1] for s in syms}})
+
+    async def _latest_quotes(self, request: web.Request) -> web.Response:
+        syms = await self._pre(request)
+        return web.json_response({"quotes": {s: self.tape_quotes.get(s) or mock_quote(s) for s in syms}})
+
+    async def _grouped(self, request: web.Request) -> web.Response:
+        await self._pre(request)
+        day = date.fromisoformat(request.match_info["date"])
+        t = int(datetime.combine(day, datetime.min.time(), tzinfo=ET).timestamp() * 1000)   # Polygon と同じく 00:00 ET
+        results = [{"T": s, "c": mock_prev_close(s), "v": 1_000_000, "t": t} for s in self.universe]
+        return web.json_response({"status": "OK", "resultsCount": len(results), "results": results})
+
+    async def _minute_aggs(self, request: web.Request) -> web.Response:
+        await self._pre(request)
+        sym = request.match_info["symbol"]
+        day = date.fromisoformat(request.match_info["start"])
+        open_ms = int(datetime.combine(day, datetime.min.time(), tzinfo=ET).replace(hour=9, minute=30).timestamp() * 1000)
+        results = [{"t": open_ms + b["minute"] * 60_000, "o": b["open"], "h": b["high"], "l": b["low"],
+                    "c": b["close"], "v": b["volume"]} for b in mock_day_path(sym)]
+        return web.json_response({"ticker": sym, "status": "OK", "resultsCount": len(results), "results": results})
+
+    async def _snapshot(self, request: web.Request) -> web.Response:
+        await self._pre(request)
+        sym = request.match_info["symbol"]
+        q = mock_quote(sym)
+        ms = int(datetime.now(tz=timezone.utc).timestamp() * 1000)
+        return web.json_response({"status": "OK", "ticker": {
+            "ticker": sym, "updated": ms, "lastQuote": {"p": q["bp"], "P": q["ap"], "p2": q["ap"]},
+            "day": {"v": int(_rng(sym, 3) * 20_000) * 30}}})
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v2/aggs/grouped/locale/us/market/stocks/{date}", self._grouped)
+        app.router.add_get("/v2/aggs/ticker/{symbol}/range/1/minute/{start}/{end}", self._minute_aggs)
+        app.router.add_get("/v2/snapshot/locale/us/markets/stocks/tickers/{symbol}", self._snapshot)
+        app.router.add_get("/v2/stocks/bars", self._bars)
+        app.router.add_get("/v2/stocks/bars/latest", self._latest_bars)
+        app.router.add_get("/v2/stocks/quotes/latest", self._latest_quotes)
+        return app
+
+    # ---------- 起動 / 停止 ----------
+    def start(self) -> str:
+        """サーバを起動してベース URL を返す（空きポートを自動選択）"""
+        ready = threading.Event()
+
+        async def _serve() -> None:
+            self._runner = web.AppRunner(self._app(), access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, 0)
+            await site.start()
+            port = self._runner.addresses[0][1]
+            self.url = f"http://{self.host}:{port}"
+            ready.set()
+
+        def _run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(_serve())
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="mock-market", daemon=True)
+        self._thread.start()
+        ready.wait(timeout=10)
+        return self.url
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop = None
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
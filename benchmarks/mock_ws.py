@@ -0,0 +1,101 @@
+"""
+benchmarks.mock_ws
+------------------
+ネットワークを使わない WebSocket 気配フィードの代役（sdk.alpaca_ws.start_quote_stream と同じ呼び出し方）
+
+* 台本ティック: scripted_ticks() は benchmarks.mock_server の 1 分足（mock_day_path）から気配を作る
+  （REST モックの 1 分足・MockBroker の約定と同じ値動き）
+* 記録ティック: run_live --record で保存した JSONL（sdk.quote_table.load_recorded）をそのまま流せる
+* speed: 1 = timestamp の間隔どおり / 10 = 10 倍速 / 0 = 待たずに流し切る
+* handler は受信スレッド相当の 1 本のスレッドで、ティック順に呼ばれる
+
+    feed = QuoteFeed(scripted_ticks(symbols, minutes=30), speed=0)
+    feed.start_quote_stream(symbols, table.update)           # run_live の alpaca-ws 経路と同じ
+    feed.join()
+    feed = QuoteFeed(load_recorded("logs/quotes.jsonl"), speed=5)
+
+run_live をそのまま動かすときは sdk.alpaca_ws.start_quote_stream を feed.start_quote_stream に差し替える。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from benchmarks.mock_server import ET, mock_day_path
+
+Quote = Dict[str, object]
+
+
+def scripted_ticks(symbols: Iterable[str], *, minutes: int = 390, per_minute: int = 1,
+                   day: Optional[date] = None, spread: float = 0.01) -> Iterator[Quote]:
+    """
+    何をする関数? → 銘柄ごとの 1 分足を気配に直し、時刻順に並べて返す
+    1 分を per_minute 本に分け、始値 → 終値を線形に動かす（ask = 価格、bid = 価格 − spread）
+    """
+    syms = [s.upper() for s in symbols]
+    paths = {s: mock_day_path(s, minutes) for s in syms}
+    t0 = datetime.combine(day or date.today(), datetime.min.time(), tzinfo=ET).replace(hour=9, minute=30)
+    for m in range(minutes):
+        for k in range(per_minute):
+            frac = (k + 1) / per_minute
+            ts = t0 + timedelta(minutes=m, seconds=60 * k / per_minute)
+            for s in syms:
+                b = paths[s][m]
+                px = round(b["open"] + (b["close"] - b["open"]) * frac, 2)
+                yield {"symbol": s, "bidPrice": round(px - spread, 2), "askPrice": px,
+                       "bidSize": 100.0, "askSize": 100.0, "timestamp": ts}
+
+
+class QuoteFeed:
+    """ticks を start_quote_stream の handler へ再生するフィード（1 回流し切ったら終わる）"""
+
+    def __init__(self, ticks: Iterable[Quote], *, speed: float = 0.0) -> None:
+        self.ticks = ticks
+        self.speed = speed
+        self.sent = 0                        # handler に渡した件数
+        self.errors = 0                      # handler が投げた例外の件数
+        self.done = threading.Event()        # 流し切った / stop() された
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start_quote_stream(self, symbols: List[str], handler: Callable[[Quote], None], *,
+                           reconnect_sec: float = 5.0) -> threading.Thread:
+        """何をする関数? → symbols の気配だけを別スレッドで handler に流す（sdk.alpaca_ws と同じ引数）"""
+        wanted = {s.upper() for s in symbols}
+        self._thread = threading.Thread(target=self._play, args=(wanted, handler), name="mock-ws", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _play(self, wanted: set[str], handler: Callable[[Quote], None]) -> None:
+        first_ts, t_start = None, time.perf_counter()
+        try:
+            for q in self.ticks:
+                if self._stop.is_set():
+                    break
+                if str(q.get("symbol", "")).upper() not in wanted:
+                    continue
+                ts = q.get("timestamp")
+                if self.speed and isinstance(ts, datetime):
+                    first_ts = first_ts or ts
+                    wait = (ts - first_ts).total_seconds() / self.speed - (time.perf_counter() - t_start)
+                    if wait > 0:
+                        self._stop.wait(wait)
+                try:
+                    handler(dict(q))
+                except Exception:
+                    self.errors += 1            # 本物の受信スレッドと同じく、handler の失敗で止めない
+                self.sent += 1
+        finally:
+            self.done.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """流し切るまで待つ（timeout 内に終われば True）"""
+        return self.done.wait(timeout)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
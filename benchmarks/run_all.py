@@ -0,0 +1,250 @@
+"""
+benchmarks.run_all
+------------------
+パイプライン全段のベンチマークをローカルモックに対して回し、JSON に残してベースラインと比べる
+
+* screen_fetch/<n> : run_screen の取得エンジン（MockMarketServer、バッチ取得）
+* filter/<n>       : スクリーニング判定（screen_frame）
+* entry/<n>        : run_entry の指値計画 → 並列発注 + ブラケット（MockBroker）
+* live_tick/<n>    : run_live の 1 tick（気配の一括取得 → QuoteDispatcher で全ポジション判定・発注）
+
+各段は --repeat 回の最短時間（ms）。--baseline と比べて
+  (今回 − 基準) > --threshold × 基準 かつ > --min-delta-ms
+の段があれば regressed として終了コード 1 で終わる（CI で寄り前に遅くなったことに気づく）。
+
+    python -m benchmarks.run_all                                   # 100 / 1k / 10k 銘柄、10 / 50 / 200 ポジション
+    python -m benchmarks.run_all --out bench.json --threshold 0.3
+    python -m benchmarks.run_all --update-baseline                 # 計測マシンを変えたら基準を取り直す
+    python -m benchmarks.run_all --stages filter live_tick --sizes 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Sequence
+
+from benchmarks.bench_filters import best_of, make_universe
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("baseline.json")
+STAGES = ("screen_fetch", "filter", "entry", "live_tick")
+SIZES = (100, 1_000, 10_000)
+POSITIONS = (10, 50, 200)
+THRESHOLD = 0.25        # 基準より 25 % 以上遅ければ regressed
+MIN_DELTA_MS = 5.0      # ただし差が 5ms 未満なら揺らぎとみなす
+
+Result = Dict[str, Any]
+
+
+def _result(sec: float, n: int, **extra: Any) -> Result:
+    return {"ms": round(sec * 1e3, 3), "n": n, "per_item_us": round(sec * 1e6 / n, 3) if n else None, **extra}
+
+
+# ── 各段 ──────────────────────────────────────────────
+def bench_screen_fetch(sizes: Sequence[int], *, latency: float, repeat: int, concurrency: int,
+                       batch_size: int) -> Dict[str, Result]:
+    """run_screen.fetch_premarket_alpaca_async を銘柄数ごとに回す（前日終値キャッシュは毎回コールド）"""
+    from benchmarks.bench_screen_fetch import run_once
+    from benchmarks.mock_server import MockMarketServer
+
+    symbols = [f"S{i:05d}" for i in range(max(sizes))]
+    server = MockMarketServer(latency=latency, universe=symbols[: int(len(symbols) * 0.95)])
+    url = server.start()
+    os.environ["ALPACA_DATA_URL"] = url              # run_screen の共有クライアントを import 前にモックへ向ける
+    os.environ["POLYGON_BASE_URL"] = url
+
+    import scripts.run_screen as rs
+    import sdk.quotes_polygon as quotes_polygon
+    from gap_bot.filters import build_filters
+    from gap_bot.utils import refcache
+
+    out = {}
+    try:
+        rs.get_float_shares = lambda s: 1_000_000
+        rs.filters = build_filters(ROOT / "screen_config.yaml")
+        for n in sizes:
+            best, passed, served = float("inf"), 0, server.requests
+            for _ in range(repeat):
+                quotes_polygon.clear_prev_close_cache()
+                refcache._cache = refcache.RefCache(":memory:")
+                passed, el = run_once(rs, symbols[:n], rate=1e6, burst=1e3, concurrency=concurrency,
+                                      batch_size=batch_size)
+                best = min(best, el)
+            out[f"screen_fetch/{n}"] = _result(best, n, passed=passed,
+                                               requests=(server.requests - served) // repeat)
+    finally:
+        server.stop()
+    return out
+
+
+def bench_filter(sizes: Sequence[int], *, repeat: int) -> Dict[str, Result]:
+    from gap_bot.filters import screen_frame
+
+    out = {}
+    for n in sizes:
+        df = make_universe(n)
+        best, res = best_of(lambda: screen_frame(df), max(repeat, 5))
+        out[f"filter/{n}"] = _result(best, n, passed=len(res))
+    return out
+
+
+def bench_entry(sizes: Sequence[int], *, latency: float, repeat: int, workers: int) -> Dict[str, Result]:
+    """気配の一括取得 → plan_entries → submit_all（指値 + ブラケット）を MockBroker に対して回す"""
+    import scripts.run_entry as re
+    from benchmarks.mock_broker import MockBroker
+    from gap_bot.filters import StockData
+    from gap_bot.utils.rate_limit import TokenBucket
+    from sdk.quote_func import QuoteFunc
+
+    args = SimpleNamespace(equity=1_000_000, kelly=0.2, max_loss_pct=0.02, tp=0.07, sl=0.025)
+    out = {}
+    for n in sizes:
+        df = make_universe(n)
+        stocks = [StockData(*row) for row in zip(*(df[c].tolist() for c in df.columns))]
+        best, ok, calls = float("inf"), 0, 0
+        for _ in range(repeat):
+            broker = MockBroker(latency=latency)
+            qf = QuoteFunc(lambda s: broker.get_quote(s), lambda syms: broker.get_quotes(syms))
+            t0 = time.perf_counter()
+            with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):   # 1 件ごとの表示は捨てる
+                quotes = qf.many(s.symbol for s in stocks)
+                plans = re.plan_entries(stocks, quotes, qf, args)
+                res = re.submit_all(broker, plans, workers=workers, bucket=TokenBucket(rate=1e9, capacity=1e9))
+            el = time.perf_counter() - t0
+            if el < best:
+                best, ok, calls = el, sum(r["status"] == "ok" for r in res), broker.stats()["calls"]
+        out[f"entry/{n}"] = _result(best, n, ok=ok, calls=calls)
+    return out
+
+
+def bench_live_tick(positions: Sequence[int], *, latency: float, repeat: int, workers: int) -> Dict[str, Result]:
+    from benchmarks import bench_live_tick as blt
+
+    out = {}
+    for n in positions:
+        best, calls = blt.timed(lambda b, ps: blt.tick_concurrent(b, ps, workers), n, latency, repeat)
+        out[f"live_tick/{n}"] = _result(best, n, calls=calls)
+    return out
+
+
+# ── 比較 ──────────────────────────────────────────────
+def compare(current: Dict[str, Result], baseline: Dict[str, Result], *, threshold: float = THRESHOLD,
+            min_delta_ms: float = MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """
+    何をする関数? → 段ごとに基準との比 (今回 / 基準) を出し、status を付けて返す
+    status: regressed / improved / ok / new（基準に無い段）
+    """
+    rows = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        row = {"stage": key, "ms": cur["ms"], "base_ms": base["ms"] if base else None, "ratio": None, "status": "new"}
+        if base:
+            delta = cur["ms"] - base["ms"]
+            row["ratio"] = round(cur["ms"] / base["ms"], 3) if base["ms"] else None
+            if delta > max(threshold * base["ms"], min_delta_ms):
+                row["status"] = "regressed"
+            elif -delta > max(threshold * base["ms"], min_delta_ms):
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+    except Exception:
+        rev = ""
+    return {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": rev, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "latency": args.latency, "repeat": args.repeat, "workers": args.workers}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Result]:
+    """選んだ段を順に回して {段/件数: 結果} を返す"""
+    jobs: Dict[str, Callable[[], Dict[str, Result]]] = {
+        "screen_fetch": lambda: bench_screen_fetch(args.sizes, latency=args.latency, repeat=args.repeat,
+                                                   concurrency=args.concurrency, batch_size=args.batch_size),
+        "filter": lambda: bench_filter(args.sizes, repeat=args.repeat),
+        "entry": lambda: bench_entry(args.sizes, latency=args.latency, repeat=args.repeat, workers=args.workers),
+        "live_tick": lambda: bench_live_tick(args.positions, latency=args.latency, repeat=args.repeat,
+                                             workers=args.workers),
+    }
+    results: Dict[str, Result] = {}
+    for stage in args.stages:
+        t0 = time.perf_counter()
+        results.update(jobs[stage]())
+        print(f"[{stage}] done in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return results
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="pipeline benchmark suite with baseline comparison")
+    p.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    p.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="screen_fetch / filter / entry の銘柄数")
+    p.add_argument("--positions", type=int, nargs="+", default=list(POSITIONS), help="live_tick のポジション数")
+    p.add_argument("--latency", type=float, default=0.002, help="モックサーバ / ブローカーの 1 呼び出し遅延 sec")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--workers", type=int, default=16, help="entry / live_tick のスレッド数")
+    p.add_argument("--concurrency", type=int, default=16, help="screen_fetch の同時実行数")
+    p.add_argument("--batch-size", type=int, default=200, help="screen_fetch のバッチ銘柄数")
+    p.add_argument("--out", type=Path, default=None, help="結果 JSON の保存先")
+    p.add_argument("--baseline", type=Path, default=BASELINE)
+    p.add_argument("--threshold", type=float, default=THRESHOLD, help="regressed とみなす悪化率（0.25 = +25 %%）")
+    p.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS)
+    p.add_argument("--update-baseline", action="store_true", help="今回の結果で --baseline を上書き")
+    return p.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    args.out = args.out.resolve() if args.out else None
+    args.baseline = args.baseline.resolve()
+
+    from benchmarks.bench_screen_fetch import _setup_env
+    _setup_env()
+    os.environ.pop("DISCORD_WEBHOOK_URL", None)
+    sys.path.insert(0, str(ROOT))
+    os.chdir(tempfile.mkdtemp(prefix="bench_all_"))       # logs/ / data/ をリポジトリに作らない
+
+    results = run(args)
+    report = {"meta": _meta(args), "results": results}
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    rows = compare(results, baseline, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+    report["comparison"] = rows
+
+    print(f"{'stage':<20} {'ms':>10} {'base_ms':>10} {'ratio':>7}  status")
+    for r in rows:
+        base = f"{r['base_ms']:.1f}" if r["base_ms"] is not None else "-"
+        ratio = f"{r['ratio']:.2f}" if r["ratio"] is not None else "-"
+        print(f"{r['stage']:<20} {r['ms']:>10.1f} {base:>10} {ratio:>7}  {r['status']}")
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        args.baseline.write_text(json.dumps({"meta": report["meta"], "results": merged}, indent=2) + "\n")
+        print(f"baseline updated → {args.baseline}")
+        return 0
+    regressed = [r["stage"] for r in rows if r["status"] == "regressed"]
+    if regressed:
+        print(f"REGRESSED (>{args.threshold:.0%} and >{args.min_delta_ms:g}ms): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+"""
+gap_bot.backtest
+----------------
+ギャップ戦略のヒストリカル・バックテスト（分足を NumPy の 銘柄 × 分 配列で一括シミュレーション）
+
+入力（1 営業日ずつ）:
+    data/universe/universe_YYYYMMDD.jsonl : run_screen が保存したフィルタ前の全銘柄（screened_io.save_universe）
+    data/store/bars/date=YYYY-MM-DD/       : 09:30 ET からの 1 分足（python -m gap_bot.backtest fetch で取得）
+
+ルール（本番スクリプトと同じ）:
+    スクリーニング  gap_bot.filters.screen_mask の 4 条件
+    エントリー      run_entry: 指値 = 仲値(プレマーケット価格) × 1.002、株数 = calc_shares、
+                    ブラケット TP = 指値 × (1+tp) / SL = 指値 × (1−sl)
+    10:00 ET        run_live: 未約定の指値は取消
+    TP/2 到達       run_live: 半分を成行で利確し、SL → 建値（BE スライド）
+    TP 到達         run_live: SL → 建値 × (1+tp/2)（利益ロック）。ブラケットの TP 指値に届けば残りを利確
+    15:45 ET        run_close: 残りを成行でクローズ
+
+1 分足の中の値動きの順序は分からないので、同じ足で逆指値と利確の両方に届いたら逆指値が先とみなす（保守的）。
+ギャップで逆指値を飛び越えた足は始値で約定する。
+
+    python -m gap_bot.backtest fetch --start 2025-01-02 --end 2025-06-30     # 候補銘柄の分足をストアへ
+    python -m gap_bot.backtest run --start 2025-01-02 --end 2025-06-30 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from gap_bot.filters import SCREEN_COLUMNS, gap_and_rotation, screen_mask
+from gap_bot.position_sizer import LIMIT_PREMIUM, calc_shares_array
+from gap_bot.screened_io import UNIVERSE_DIR, load_universe, universe_path
+from gap_bot.store import STORE_DIR, EventStore
+from gap_bot.utils.market_calendar import is_trading_day
+
+CANCEL_MIN = 30        # 10:00 ET（これより前の足でだけ指値が約定する）
+CLOSE_MIN = 375        # 15:45 ET（この足の直前の終値でクローズ）
+
+# exit_reason
+SL, BE, LOCK, TP, CLOSE = "sl", "be", "lock", "tp", "close"
+
+
+@dataclass(frozen=True)
+class Params:
+    """1 回のバックテストのパラメータ（既定は run_entry / screen_stocks の既定値）"""
+    gap: float = 3.0                 # ギャップ率 (%)
+    min_volume: float = 100_000
+    min_rotation: float = 10.0       # Float Rotation (%)
+    min_sentiment: float = 3.0
+    equity: float = 100_000.0
+    kelly: float = 0.2
+    max_loss_pct: float = 0.02
+    tp: float = 0.07
+    sl: float = 0.025
+
+
+@dataclass
+class DayData:
+    """1 営業日ぶんの入力を配列にしたもの（パラメータに依らないので使い回せる）"""
+    day: dt.date
+    symbols: np.ndarray              # (N,) ユニバースの銘柄
+    prev: np.ndarray                 # (N,) 前日終値
+    pre: np.ndarray                  # (N,) プレマーケット価格（= エントリー時の仲値とみなす）
+    vol: np.ndarray
+    flt: np.ndarray
+    sent: np.ndarray
+    bar_row: np.ndarray              # (N,) 分足配列の行番号（分足が無い銘柄は -1）
+    open: np.ndarray                 # (K, CLOSE_MIN) 分足。足の無い分は NaN
+    high: np.ndarray
+    low: np.ndarray
+    last: np.ndarray                 # (K,) 15:45 直前の終値
+
+
+# ── 入力 ──────────────────────────────────────────────
+def day_from_frames(day: dt.date, universe: pd.DataFrame, bars: pd.DataFrame) -> DayData:
+    """
+    何をする関数? → ユニバース（SCREEN_COLUMNS）と分足（symbol, minute, open, high, low, close）を配列にまとめる
+    分足は 銘柄 × 分 の密な配列にし、15:45 以降の足は捨てる
+    """
+    bars = bars[(bars["minute"] >= 0) & (bars["minute"] < CLOSE_MIN)]
+    codes, bar_syms = pd.factorize(bars["symbol"], sort=True)
+    k = len(bar_syms)
+    minute = bars["minute"].to_numpy(dtype=np.int64)
+    arrs = {}
+    for col in ("open", "high", "low", "close"):
+        a = np.full((k, CLOSE_MIN), np.nan)
+        a[codes, minute] = bars[col].to_numpy(dtype=float)
+        arrs[col] = a
+    # 15:45 直前の終値: 各行の最後の非 NaN
+    valid = ~np.isnan(arrs["close"])
+    last_k = CLOSE_MIN - 1 - np.argmax(valid[:, ::-1], axis=1)
+    last = np.where(valid.any(axis=1), arrs["close"][np.arange(k), last_k], np.nan)
+
+    syms = universe["symbol"].astype(str).to_numpy()
+    row_of = {s: i for i, s in enumerate(bar_syms)}
+    bar_row = np.fromiter((row_of.get(s, -1) for s in syms), dtype=np.int64, count=len(syms))
+    prev, pre, vol, flt, sent = (universe[c].to_numpy(dtype=float) for c in SCREEN_COLUMNS[1:])
+    return DayData(day, syms, prev, pre, vol, flt, sent, bar_row, arrs["open"], arrs["high"], arrs["low"], last)
+
+
+def load_day(
+    day: dt.date,
+    universe_root: Union[str, Path] = UNIVERSE_DIR,
+    store: Optional[EventStore] = None,
+) -> Optional[DayData]:
+    """ユニバースと分足を読み込む（ユニバースが無い日は None）"""
+    if not universe_path(day, universe_root).exists():
+        return None
+    store = store or EventStore(STORE_DIR)
+    bars = store.read("bars", start=day, end=day, columns=["symbol", "minute", "open", "high", "low", "close"])
+    return day_from_frames(day, load_universe(day, universe_root), bars)
+
+
+# ── シミュレーション ───────────────────────────────────
+def _first(mask: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """各行で start 以降に mask が最初に True になる列（無ければ列数）"""
+    m = mask & (np.arange(mask.shape[1]) >= start[:, None])
+    return np.where(m.any(axis=1), m.argmax(axis=1), mask.shape[1])
+
+
+def _at(a: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """各行の k 列目（k = 列数 のときは NaN）"""
+    pad = np.concatenate([a, np.full((a.shape[0], 1), np.nan)], axis=1)
+    return pad[np.arange(a.shape[0]), k]
+
+
+def simulate_bars(
+    limit: np.ndarray,
+    qty: np.ndarray,
+    o: np.ndarray,
+    h: np.ndarray,
+    lo: np.ndarray,
+    last: np.ndarray,
+    tp: float,
+    sl: float,
+) -> Dict[str, np.ndarray]:
+    """
+    何をする関数? → 指値 limit / 株数 qty の買いを 分足（K, CLOSE_MIN）に当てて、約定と決済を一括で求める
+    戻り値は行ごとの配列の dict（filled が False の行は約定なし）
+    """
+    n = len(limit)
+    zero = np.zeros(n, dtype=np.int64)
+
+    # エントリー: 10:00 までに安値が指値以下になった最初の足（始値が指値より下ならその始値で約定）
+    k_fill = _first(lo[:, :CANCEL_MIN] <= limit[:, None], zero)
+    filled = k_fill < CANCEL_MIN
+    k_fill = np.where(filled, k_fill, CLOSE_MIN)
+    entry = np.fmin(_at(o, k_fill), limit)
+
+    sl0 = limit * (1 - sl)
+    half_px = entry * (1 + tp / 2)            # TP/2 トリガー = 利益ロックの SL 価格
+    full_px = entry * (1 + tp)                # run_live の TP 到達判定
+    tp_px = limit * (1 + tp)                  # ブラケットの TP 指値
+
+    k_sl0 = _first(lo <= sl0[:, None], k_fill)
+    k_half = _first(h >= half_px[:, None], k_fill)
+    stopped = filled & (k_sl0 <= k_half) & (k_sl0 < CLOSE_MIN)      # 同じ足なら逆指値が先
+    halved = filled & ~stopped & (k_half < CLOSE_MIN)
+
+    # TP/2 以降: SL=建値（TP 到達の次の足からは 建値+TP/2）、ブラケット TP 指値は出たまま
+    k_full = _first(h >= full_px[:, None], k_half)
+    k_be = _first(lo <= entry[:, None], np.minimum(k_half + 1, CLOSE_MIN))
+    k_lock = _first(lo <= half_px[:, None], np.minimum(k_full + 1, CLOSE_MIN))
+    be_first = k_be <= k_full
+    k_stop = np.where(be_first, k_be, k_lock)
+    stop_px = np.where(be_first, np.fmin(_at(o, k_be), entry), np.fmin(_at(o, k_lock), half_px))
+    k_tp = _first(h >= tp_px[:, None], k_half)
+    tp_fill = np.fmax(_at(o, k_tp), tp_px)
+
+    half_qty = np.where(halved & (qty > 1), qty // 2, 0)
+    half_fill = np.fmax(_at(o, k_half), half_px)
+
+    exit_k = np.full(n, CLOSE_MIN)
+    exit_px = last.copy()
+    reason = np.full(n, CLOSE, dtype=object)
+
+    exit_k = np.where(stopped, k_sl0, exit_k)
+    exit_px = np.where(stopped, np.fmin(_at(o, k_sl0), sl0), exit_px)
+    reason = np.where(stopped, SL, reason)
+
+    stop_hit = halved & (k_stop < CLOSE_MIN) & (k_stop <= k_tp)
+    tp_hit = halved & ~stop_hit & (k_tp < CLOSE_MIN)
+    exit_k = np.where(stop_hit, k_stop, np.where(tp_hit, k_tp, exit_k))
+    exit_px = np.where(stop_hit, stop_px, np.where(tp_hit, tp_fill, exit_px))
+    reason = np.where(stop_hit, np.where(be_first, BE, LOCK), np.where(tp_hit, TP, reason))
+
+    rest = qty - half_qty
+    pnl = half_qty * np.nan_to_num(half_fill - entry) + rest * (exit_px - entry)
+    risk = qty * (limit - sl0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(risk > 0, pnl / risk, 0.0)
+    return {"filled": filled, "entry": entry, "fill_minute": np.where(filled, k_fill, -1),
+            "half_qty": half_qty, "half_px": np.where(half_qty > 0, half_fill, np.nan),
+            "exit_minute": exit_k, "exit_px": exit_px, "exit_reason": reason, "pnl": pnl, "R": r}
+
+
+TRADE_COLUMNS = ["date", "symbol", "gap_pct", "limit", "qty", "entry", "fill_minute", "half_qty", "half_px",
+                 "exit_minute", "exit_px", "exit_reason", "pnl", "R"]
+
+
+def select(data: DayData, p: Params) -> np.ndarray:
+    """スクリーニングを通り、分足がある銘柄のユニバース上の行番号"""
+    mask = screen_mask(data.prev, data.pre, data.vol, data.flt, data.sent,
+                       p.gap, p.min_volume, p.min_rotation, p.min_sentiment)
+    return np.flatnonzero(mask & (data.bar_row >= 0))
+
+
+def screen_key(p: Params) -> Tuple[float, float, float, float]:
+    """スクリーニング結果を左右するパラメータだけの組（同じ組なら select の結果を使い回せる）"""
+    return (p.gap, p.min_volume, p.min_rotation, p.min_sentiment)
+
+
+def simulate_day(data: DayData, p: Params, idx: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    何をする関数? → 1 営業日ぶんを p で回し、約定した取引を 1 行 1 取引の DataFrame で返す
+    idx（select の結果）を渡すとスクリーニングを省く
+    """
+    if idx is None:
+        idx = select(data, p)
+    limit = np.round(data.pre[idx] * LIMIT_PREMIUM, 2)
+    qty = calc_shares_array(p.equity, limit, p.kelly, p.max_loss_pct)
+    keep = qty > 0
+    idx, limit, qty = idx[keep], limit[keep], qty[keep]
+    rows = data.bar_row[idx]
+    res = simulate_bars(limit, qty, data.open[rows], data.high[rows], data.low[rows], data.last[rows], p.tp, p.sl)
+
+    f = res.pop("filled")
+    gap, _ = gap_and_rotation(data.prev[idx], data.pre[idx], data.vol[idx], data.flt[idx])
+    out = pd.DataFrame({"date": pd.Timestamp(data.day), "symbol": data.symbols[idx][f], "gap_pct": gap[f],
+                        "limit": limit[f], "qty": qty[f], **{k: v[f] for k, v in res.items()}})
+    return out[TRADE_COLUMNS]
+
+
+# ── 期間の実行（日付ごとにプロセスへ分配） ─────────────
+def trading_days(start: dt.date, end: dt.date, universe_root: Union[str, Path] = UNIVERSE_DIR) -> List[dt.date]:
+    """start〜end の営業日のうち、ユニバースのスナップショットがある日"""
+    days, d = [], start
+    while d <= end:
+        if is_trading_day(d) and universe_path(d, universe_root).exists():
+            days.append(d)
+        d += dt.timedelta(days=1)
+    return days
+
+
+def _each_day(days: List[dt.date], params: Tuple[Params, ...], universe_root: str, store_root: str):
+    """日付の塊を読み込み、各パラメータで回して (日付, パラメータ番号, 取引) を順に返す（1 日の入力を読むのは 1 回）"""
+    store = EventStore(store_root)
+    for d in days:
+        data = load_day(d, universe_root, store)
+        if data is None:
+            continue
+        screened: Dict[tuple, np.ndarray] = {}        # 同じ閾値のパラメータ同士でスクリーニングを共有
+        for i, p in enumerate(params):
+            key = screen_key(p)
+            if key not in screened:
+                screened[key] = select(data, p)
+            yield d, i, simulate_day(data, p, screened[key])
+
+
+def _run_days(days: List[dt.date], params: Tuple[Params, ...], universe_root: str, store_root: str) -> List[pd.DataFrame]:
+    """ワーカー: パラメータごとの取引一覧"""
+    out = [[] for _ in params]
+    for _, i, trades in _each_day(days, params, universe_root, store_root):
+        out[i].append(trades)
+    return [pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRADE_COLUMNS)
+            for frames in out]
+
+
+STAT_COLUMNS = ("total_R", "trades", "wins", "win_R", "pnl")
+
+
+def _score_days(days: List[dt.date], params: Tuple[Params, ...], universe_root: str,
+                store_root: str) -> Dict[dt.date, np.ndarray]:
+    """ワーカー: 日付 → (パラメータ数, STAT_COLUMNS) の集計だけを返す（取引一覧を親へ送らない）"""
+    out: Dict[dt.date, np.ndarray] = {}
+    for d, i, t in _each_day(days, params, universe_root, store_root):
+        a = out.setdefault(d, np.zeros((len(params), len(STAT_COLUMNS))))
+        r = t["R"].to_numpy(dtype=float)
+        a[i] = (r.sum(), len(r), (r > 0).sum(), r[r > 0].sum(), t["pnl"].sum())
+    return out
+
+
+def _fan_out(fn, days: List[dt.date], args: tuple, workers: int) -> list:
+    """days をワーカー数ぶんの塊に分けて fn(chunk, *args) をプロセスプールで回す"""
+    if workers <= 1 or len(days) <= 1:
+        return [fn(days, *args)]
+    chunks = [days[i::workers] for i in range(workers) if days[i::workers]]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as ex:
+        return list(ex.map(fn, chunks, *[[a] * len(chunks) for a in args]))
+
+
+def evaluate(
+    days: Iterable[dt.date],
+    params: Iterable[Params],
+    *,
+    workers: int = 1,
+    universe_root: Union[str, Path] = UNIVERSE_DIR,
+    store_root: Union[str, Path] = STORE_DIR,
+) -> Tuple[List[dt.date], np.ndarray]:
+    """
+    何をする関数? → 多数のパラメータを日付並列で回し、(日付, 配列[パラメータ, 日付, STAT_COLUMNS]) を返す
+    最適化用。データのある日だけが日付に入る
+    """
+    plist = tuple(params)
+    merged: Dict[dt.date, np.ndarray] = {}
+    for part in _fan_out(_score_days, sorted(days), (plist, str(universe_root), str(store_root)), workers):
+        merged.update(part)
+    used = sorted(merged)
+    stats = np.stack([merged[d] for d in used], axis=1) if used else np.zeros((len(plist), 0, len(STAT_COLUMNS)))
+    return used, stats
+
+
+def run_backtest(
+    days: Iterable[dt.date],
+    params: Union[Params, Iterable[Params]] = Params(),
+    *,
+    workers: int = 1,
+    universe_root: Union[str, Path] = UNIVERSE_DIR,
+    store_root: Union[str, Path] = STORE_DIR,
+) -> Union[pd.DataFrame, List[pd.DataFrame]]:
+    """
+    何をする関数? → days をプロセス数ぶんの塊に分けて並列に回し、取引の DataFrame を返す
+    params にリストを渡すと、1 日の入力を 1 回だけ読んでパラメータごとの結果をリストで返す
+    """
+    single = isinstance(params, Params)
+    plist = (params,) if single else tuple(params)
+    parts = _fan_out(_run_days, sorted(days), (plist, str(universe_root), str(store_root)), workers)
+    results = []
+    for i in range(len(plist)):
+        frames = [part[i] for part in parts if not part[i].empty]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRADE_COLUMNS)
+        results.append(df.sort_values(["date", "symbol"], ignore_index=True))
+    return results[0] if single else results
+
+
+def daily_kpi(trades: pd.DataFrame) -> pd.DataFrame:
+    """取引 → 日次 KPI（ストアの strategy テーブルと同じ列: date, total_R, winrate_%, avg_R）"""
+    if trades.empty:
+        return pd.DataFrame(columns=["date", "total_R", "winrate_%", "avg_R"])
+    g = trades.groupby("date")["R"]
+    return pd.DataFrame({"total_R": g.sum(), "winrate_%": g.apply(lambda r: (r > 0).mean() * 100),
+                         "avg_R": g.mean()}).reset_index()
+
+
+def summarize(trades: pd.DataFrame) -> Dict[str, float]:
+    """期間全体の成績"""
+    n = len(trades)
+    r = trades["R"].astype(float) if n else pd.Series(dtype=float)
+    equity = r.groupby(trades["date"]).sum().cumsum() if n else pd.Series(dtype=float)
+    return {
+        "trades": n,
+        "days": int(trades["date"].nunique()) if n else 0,
+        "total_R": float(r.sum()),
+        "avg_R": float(r.mean()) if n else 0.0,
+        "winrate_%": float((r > 0).mean() * 100) if n else 0.0,
+        "max_dd_R": float((equity.cummax() - equity).max()) if n else 0.0,
+        "pnl": float(trades["pnl"].sum()) if n else 0.0,
+    }
+
+
+# ── 分足の取得 ────────────────────────────────────────
+def fetch_bars(days: Iterable[dt.date], min_gap: float, store: EventStore,
+               universe_root: Union[str, Path] = UNIVERSE_DIR) -> Dict[dt.date, int]:
+    """
+    何をする関数? → 各日のユニバースで gap >= min_gap の銘柄だけ分足を Polygon から取り、ストアへ保存する
+    （バックテストで使う gap の下限以上を取っておけば、gap を変えても取り直さない）。取得済みの日は飛ばす
+    """
+    from sdk.quotes_polygon import get_minute_bars   # 取得するときだけ読む（バックテスト本体はネットワーク不要）
+
+    done = set(store.partitions("bars"))
+    counts = {}
+    for d in days:
+        if d in done or not universe_path(d, universe_root).exists():
+            continue
+        u = load_universe(d, universe_root)
+        gap, _ = gap_and_rotation(u["previous_close"], u["premarket_price"], u["premarket_volume"], u["float_shares"])
+        rows = []
+        for sym in u["symbol"][gap >= min_gap]:
+            rows += [{"symbol": sym, **b} for b in get_minute_bars(sym, d)]
+        store.append("bars", rows, date=d)
+        counts[d] = len(rows)
+    return counts
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="gap strategy backtest")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    for name in ("run", "fetch"):
+        s = sub.add_parser(name)
+        s.add_argument("--start", required=True, help="YYYY-MM-DD")
+        s.add_argument("--end", required=True, help="YYYY-MM-DD")
+        s.add_argument("--universe", type=Path, default=UNIVERSE_DIR)
+    r = sub.choices["run"]
+    for f in ("gap", "kelly", "tp", "sl", "equity", "max_loss_pct", "min_volume", "min_rotation", "min_sentiment"):
+        r.add_argument(f"--{f.replace('_', '-')}", dest=f, type=float, default=getattr(Params(), f))
+    r.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="日付を分けて回すプロセス数")
+    r.add_argument("--out", type=Path, default=None, help="取引一覧の CSV")
+    sub.choices["fetch"].add_argument("--min-gap", type=float, default=1.0, help="分足を取る銘柄の gap 下限 (%)")
+    args = p.parse_args()
+
+    start, end = dt.date.fromisoformat(args.start), dt.date.fromisoformat(args.end)
+    days = trading_days(start, end, args.universe)
+    store = EventStore(STORE_DIR)
+    if args.cmd == "fetch":
+        for d, n in fetch_bars(days, args.min_gap, store, args.universe).items():
+            print(f"{d}: {n} bars")
+        return
+
+    params = Params(**{k: getattr(args, k) for k in asdict(Params())})
+    t0 = time.perf_counter()
+    trades = run_backtest(days, params, workers=args.workers, universe_root=args.universe)
+    el = time.perf_counter() - t0
+    if args.out:
+        trades.to_csv(args.out, index=False)
+    print(f"{len(days)} days in {el:.1f}s ({len(days) / el if el else 0:.1f} days/s, workers={args.workers})")
+    for k, v in summarize(trades).items():
+        print(f"{k:10}: {v:,.2f}" if isinstance(v, float) else f"{k:10}: {v}")
+
+
+if __name__ == "__main__":
+    main()
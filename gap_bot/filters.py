@@ -1,8 +1,11 @@
 from pathlib import Path
 import yaml
 import logging
+import numpy as np
+import pandas as pd
+from operator import attrgetter
 from dataclasses import dataclass            # ── データ保持用クラスに必要
-from typing import List                      # ── リスト型ヒントで使用
+from typing import List, Sequence            # ── リスト型ヒントで使用
 # 共通ロガー
 logger = logging.getLogger("gap_bot.filters")
 
@@ -16,9 +19,9 @@ def _load_cfg(cfg_path: str | Path) -> dict:
 from dataclasses import dataclass            # ── データ保持用クラスに必要
 from typing import List                      # ── リスト型ヒントで使用
 
-@dataclass
+@dataclass(slots=True)
 class StockData:
-    """1 銘柄のプレマーケット情報を保持する箱"""
+    """1 銘柄のプレマーケット情報を保持する箱（__slots__ で 1 件あたりのメモリを抑える。dict 化は dataclasses.asdict）"""
     symbol: str
     previous_close: float                    # 前日終値
     premarket_price: float                   # プレマーケット価格
@@ -51,6 +54,72 @@ def passes_sentiment(stock: StockData, min_score: float) -> bool:
     """SNS／News スコアが min_score 以上か判定"""
     return stock.sentiment_score >= min_score
 
+# ────────── 列指向スクリーニング ──────────
+# ユニバース全体を 1 つの表（1 行 = 1 銘柄）として扱うときの列名
+SCREEN_COLUMNS = ("symbol", "previous_close", "premarket_price",
+                  "premarket_volume", "float_shares", "sentiment_score")
+
+
+def to_frame(stocks: Sequence[StockData]) -> pd.DataFrame:
+    """StockData のリスト → SCREEN_COLUMNS の DataFrame"""
+    return pd.DataFrame({c: [getattr(s, c) for s in stocks] for c in SCREEN_COLUMNS},
+                        columns=list(SCREEN_COLUMNS))
+
+
+def gap_and_rotation(prev, pre, vol, flt) -> tuple[np.ndarray, np.ndarray]:
+    """ギャップ率(%) と Float Rotation(%) を配列で計算（prev<=0 の行は gap=NaN、float=0 の行は rotation=0）"""
+    prev = np.asarray(prev, dtype=float)
+    pre = np.asarray(pre, dtype=float)
+    vol = np.asarray(vol, dtype=float)
+    flt = np.asarray(flt, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = np.where(prev > 0, (pre - prev) / prev * 100, np.nan)
+        rot = np.where(flt > 0, vol / flt * 100, 0.0)
+    return gap, rot
+
+
+def screen_mask(
+    prev, pre, vol, flt, sent,
+    gap_threshold: float = 3.0,
+    min_volume: int = 100_000,
+    min_rotation: float = 10.0,
+    min_sentiment: float = 3.0,
+) -> np.ndarray:
+    """4 条件すべて通過した行が True の bool 配列（NaN は不合格）"""
+    gap, rot = gap_and_rotation(prev, pre, vol, flt)
+    return (
+        (gap >= gap_threshold)
+        & (np.asarray(vol, dtype=float) >= min_volume)
+        & (rot >= min_rotation)
+        & (np.asarray(sent, dtype=float) >= min_sentiment)
+    )
+
+
+def screen_frame(
+    df: pd.DataFrame,
+    gap_threshold: float = 3.0,
+    min_volume: int = 100_000,
+    min_rotation: float = 10.0,
+    min_sentiment: float = 3.0,
+) -> pd.DataFrame:
+    """
+    ユニバース全体の DataFrame（SCREEN_COLUMNS）を一括で判定し、
+    通過した行だけを gap_pct / float_rotation 列付きで返す
+    """
+    gap, rot = gap_and_rotation(df["previous_close"], df["premarket_price"],
+                                df["premarket_volume"], df["float_shares"])
+    mask = (
+        (gap >= gap_threshold)
+        & (df["premarket_volume"].to_numpy(dtype=float) >= min_volume)
+        & (rot >= min_rotation)
+        & (df["sentiment_score"].to_numpy(dtype=float) >= min_sentiment)
+    )
+    out = df.loc[mask].copy()
+    out["gap_pct"] = gap[mask]
+    out["float_rotation"] = rot[mask]
+    return out
+
+
 # ────────── 総合スクリーニング ──────────
 def screen_stocks(
     stocks: List[StockData],
@@ -59,17 +128,14 @@ def screen_stocks(
     min_rotation: float = 10.0,
     min_sentiment: float = 3.0,
 ) -> List[StockData]:
-    """4 条件すべて通過した銘柄だけを返す"""
-    screened: List[StockData] = []
-    for stk in stocks:
-        if (
-            passes_gap(stk, gap_threshold)
-            and passes_volume(stk, min_volume)
-            and passes_float_rotation(stk, min_rotation)
-            and passes_sentiment(stk, min_sentiment)
-        ):
-            screened.append(stk)
-    return screened
+    """4 条件すべて通過した銘柄だけを返す（判定は screen_mask で一括）"""
+    if not stocks:
+        return []
+    prev, pre, vol, flt, sent = (np.fromiter(map(attrgetter(c), stocks), dtype=float, count=len(stocks))
+                                 for c in SCREEN_COLUMNS[1:])
+    mask = screen_mask(prev, pre, vol, flt, sent,
+                       gap_threshold, min_volume, min_rotation, min_sentiment)
+    return [stocks[i] for i in np.flatnonzero(mask)]
 
 
 def build_filters(cfg_path: str | Path):
@@ -1 +1,38 @@
+"""
+gap_bot.position_sizer
+----------------------
+エントリーの指値と株数のルール（run_entry とバックテストで共有）
 
+* entry_limit : 仲値 +0.2% の指値
+* calc_shares : 口座資金 × 最大損失率 × Kelly を上限に、1 銘柄 資金 5 % までの株数
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+LIMIT_PREMIUM = 1.002      # 仲値に乗せる割合
+MAX_POSITION_PCT = 0.05    # 1 銘柄に使える資金の上限
+
+
+def entry_limit(bid: float, ask: float) -> float:
+    """仲値 +0.2% の指値"""
+    return (bid + ask) / 2 * LIMIT_PREMIUM
+
+
+def calc_shares(equity: float, price: float, kelly: float, max_loss_pct: float) -> int:
+    risk_cap = equity * max_loss_pct * kelly
+    size_risk = risk_cap / price
+    size_cap  = (equity * MAX_POSITION_PCT) / price
+    return int(math.floor(min(size_risk, size_cap)))
+
+
+def calc_shares_array(equity: float, price: np.ndarray, kelly: float, max_loss_pct: float) -> np.ndarray:
+    """calc_shares の配列版（price<=0 / NaN は 0 株）"""
+    price = np.asarray(price, dtype=float)
+    cap = min(equity * max_loss_pct * kelly, equity * MAX_POSITION_PCT)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = np.floor(np.where(price > 0, cap / price, 0.0))
+    return np.nan_to_num(shares).astype(np.int64)
@@ -0,0 +1,117 @@
+"""
+gap_bot.screened_io
+-------------------
+スクリーニング結果 / ユニバーススナップショットの一括読み書き
+
+ファイル形式 (JSON Lines, 拡張子 .jsonl):
+    1 行目   : ヘッダ {"format": "gap_bot.screened", "version": 1, "kind": ..., "columns": [...], ...}
+    2 行目〜 : 1 銘柄 1 行の JSON 配列（columns の順）
+
+* 列名は 1 回だけ書くので、全銘柄ぶん（数千〜数万行）でも小さく速い
+* 読み込みは本文をまとめて 1 回の json.loads で配列化 → DataFrame / StockData
+* 旧形式（run_screen が書いていた list[dict] の .json）も自動判別して読める
+
+    write_screened("screened_20250804.jsonl", screened_df)
+    stocks = read_screened("screened_20250804.jsonl")          # List[StockData]
+    save_universe(raw_df, date(2025, 8, 4))                    # data/universe/universe_20250804.jsonl
+    df = load_universe(date(2025, 8, 4))                       # バックテスト用
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+from gap_bot.filters import SCREEN_COLUMNS, StockData, to_frame
+
+FORMAT = "gap_bot.screened"
+VERSION = 1
+UNIVERSE_DIR = Path("data/universe")
+
+
+# ── 書き込み ───────────────────────────────────────────
+def write_screened(
+    path: str | Path,
+    data: pd.DataFrame | Sequence[StockData],
+    *,
+    kind: str = "screened",
+    session: date | None = None,
+) -> Path:
+    """
+    何をする関数? → DataFrame（または StockData のリスト）をヘッダ付き JSONL で書き出す
+    DataFrame に SCREEN_COLUMNS 以外の列（gap_pct など）があればそれも保存する
+    """
+    df = data if isinstance(data, pd.DataFrame) else to_frame(data)
+    cols = list(df.columns)
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "kind": kind,
+        "session": session.isoformat() if session else None,
+        "created": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "rows": len(df),
+        "columns": cols,
+    }
+    rows = zip(*(df[c].tolist() for c in cols))          # tolist() で numpy 型 → Python 型
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        f.writelines(json.dumps(list(r), separators=(",", ":")) + "\n" for r in rows)
+    return path
+
+
+# ── 読み込み ───────────────────────────────────────────
+def read_header(path: str | Path) -> Dict[str, Any]:
+    """ヘッダ dict を返す（旧形式 .json は {"format": FORMAT, "version": 0}）"""
+    with Path(path).open(encoding="utf-8") as f:
+        first = f.readline().strip()
+    if first.startswith("{"):
+        head = json.loads(first)
+        if head.get("format") == FORMAT:
+            return head
+    return {"format": FORMAT, "version": 0, "kind": "screened", "columns": list(SCREEN_COLUMNS)}
+
+
+def read_frame(path: str | Path) -> pd.DataFrame:
+    """何をする関数? → スクリーニング結果 / スナップショットを DataFrame で返す（旧形式も可）"""
+    text = Path(path).read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):                     # 旧形式: list[dict]
+        return pd.DataFrame(json.loads(text), columns=list(SCREEN_COLUMNS))
+    head, _, body = text.partition("\n")
+    header = json.loads(head)
+    if header.get("format") != FORMAT:
+        raise ValueError(f"not a screened file: {path}")
+    if header.get("version", 0) > VERSION:
+        raise ValueError(f"unsupported screened version {header['version']} (max {VERSION}): {path}")
+    lines = [ln for ln in body.splitlines() if ln]
+    rows = json.loads("[" + ",".join(lines) + "]")        # 本文をまとめて 1 回でパース
+    return pd.DataFrame(rows, columns=header["columns"])
+
+
+def frame_to_stocks(df: pd.DataFrame) -> List[StockData]:
+    """DataFrame → StockData のリスト（SCREEN_COLUMNS 以外の列は無視）"""
+    return [StockData(*r) for r in zip(*(df[c].tolist() for c in SCREEN_COLUMNS))]
+
+
+def read_screened(path: str | Path) -> List[StockData]:
+    """何をする関数? → スクリーニング結果ファイルを StockData のリストで返す"""
+    return frame_to_stocks(read_frame(path))
+
+
+# ── ユニバーススナップショット ─────────────────────────
+def universe_path(session: date, root: str | Path = UNIVERSE_DIR) -> Path:
+    return Path(root) / f"universe_{session:%Y%m%d}.jsonl"
+
+
+def save_universe(df: pd.DataFrame, session: date, root: str | Path = UNIVERSE_DIR) -> Path:
+    """フィルタ前の全銘柄（取得できたもの全部）を session 単位で保存する"""
+    return write_screened(universe_path(session, root), df, kind="universe", session=session)
+
+
+def load_universe(session: date, root: str | Path = UNIVERSE_DIR) -> pd.DataFrame:
+    return read_frame(universe_path(session, root))
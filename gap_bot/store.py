@@ -0,0 +1,270 @@
+"""
+gap_bot.store
+-------------
+取引・イベントの列指向ストア（日付パーティションの Parquet、追記のみ）
+
+    data/store/<table>/date=YYYY-MM-DD/part-<ns>-<pid>.parquet
+
+* 書き込みは常に新しい part ファイルを作るだけ（既存ファイルは書き換えない）
+* 読み出しは日付範囲に入るパーティションだけを開く（全履歴の CSV を毎回読み直さない）
+* 列と型は gap_bot.utils.logger.SCHEMAS（+ 日次 KPI の strategy）に揃える
+
+    store = EventStore()
+    store.append("order", rows)                               # rows: list[dict] / DataFrame
+    store.read("strategy", start=date(2025, 1, 1))            # DataFrame
+    store.read("order", start=d, end=d, columns=["symbol", "limit", "sl"])
+
+既存の CSV（logs/<name>_YYYYMMDD.csv, strategy.csv）は ingest_csv_logs() で取り込める:
+
+    python -m gap_bot.store ingest
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from gap_bot.utils.logger import LOG_DIR, SCHEMAS, Schema, read_events
+
+_env = os.getenv("GAP_BOT_STORE", "")
+STORE_DIR = Path(_env if _env and _env.lower() != "off" else "data/store")   # off = イベントログから書かない
+STRATEGY_CSV = Path("strategy.csv")   # 旧形式の日次 KPI（ストアに無い日だけ読む）
+
+# テーブルごとの列と型（イベントログと同じ + 日次 KPI + バックテスト用の分足）
+TABLES: Dict[str, Schema] = {
+    **SCHEMAS,
+    "strategy": (("date", str), ("total_R", float), ("winrate_%", float), ("avg_R", float)),
+    # minute = 09:30 ET からの経過分（0〜389）
+    "bars": (("symbol", str), ("minute", int), ("open", float), ("high", float), ("low", float),
+             ("close", float), ("volume", int)),
+}
+
+_DTYPES = {str: "object", float: "float64", int: "Int64"}   # int は欠損ありでも整数のまま
+
+Rows = Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+
+
+def _as_date(v: Union[str, dt.date, dt.datetime]) -> dt.date:
+    if isinstance(v, dt.datetime):
+        return v.date()
+    if isinstance(v, dt.date):
+        return v
+    return dt.date.fromisoformat(str(v)[:10])
+
+
+class EventStore:
+    """日付パーティションの列指向ストア"""
+
+    def __init__(self, root: Union[str, Path] = STORE_DIR) -> None:
+        self.root = Path(root)
+
+    # ---------- 型 ----------
+    def _conform(self, table: str, df: pd.DataFrame) -> pd.DataFrame:
+        """スキーマの列順・型へ揃える（スキーマ外の列はエラー、足りない列は欠損）"""
+        schema = TABLES[table]
+        cols = [c for c, _ in schema]
+        extra = set(df.columns) - set(cols) - {"date"}
+        if extra:
+            raise ValueError(f"{table}: unknown columns {sorted(extra)}")
+        out = pd.DataFrame(index=df.index)
+        for c, typ in schema:
+            s = df[c] if c in df.columns else pd.Series(None, index=df.index, dtype="object")
+            if typ is str:
+                out[c] = s.map(lambda v: None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+            else:
+                out[c] = pd.to_numeric(s, errors="coerce").astype(_DTYPES[typ])
+        return out.reset_index(drop=True)
+
+    def _part_dir(self, table: str, day: dt.date) -> Path:
+        return self.root / table / f"date={day.isoformat()}"
+
+    # ---------- 書き込み ----------
+    def append(self, table: str, data: Rows, *, date: Union[str, dt.date, None] = None) -> List[Path]:
+        """
+        何をする関数? → 行をテーブルへ追記し、作った part ファイルのパスを返す
+        パーティションの日付は date 引数 > "date" 列 > "ts" 列（ISO 文字列の先頭 10 文字）の順で決める
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data), dtype=object)   # 欠損で int が float にならないように
+        if df.empty:
+            return []
+        if date is not None:
+            days = pd.Series([_as_date(date)] * len(df), index=df.index)
+        elif "date" in df.columns:
+            days = df["date"].map(_as_date)
+        elif "ts" in df.columns:
+            days = df["ts"].map(_as_date)
+        else:
+            raise ValueError(f"{table}: no date / ts column to partition by")
+
+        written = []
+        for day, part in df.groupby(days, sort=True):
+            d = self._part_dir(table, day)
+            d.mkdir(parents=True, exist_ok=True)
+            path = d / f"part-{time.time_ns()}-{os.getpid()}.parquet"
+            tmp = path.with_suffix(".tmp")
+            self._conform(table, part).to_parquet(tmp, index=False)
+            os.replace(tmp, path)                  # 読み手に書きかけのファイルを見せない
+            written.append(path)
+        return written
+
+    # ---------- 読み出し ----------
+    def partitions(self, table: str, start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> List[dt.date]:
+        """start〜end（両端含む）に入るパーティションの日付"""
+        base = self.root / table
+        if not base.exists():
+            return []
+        days = sorted(_as_date(p.name.split("=", 1)[1]) for p in base.glob("date=*") if p.is_dir())
+        return [d for d in days if (start is None or d >= start) and (end is None or d <= end)]
+
+    def read(
+        self,
+        table: str,
+        start: Union[str, dt.date, None] = None,
+        end: Union[str, dt.date, None] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[tuple]] = None,
+    ) -> pd.DataFrame:
+        """
+        何をする関数? → start〜end のパーティションだけを読み、1 つの DataFrame にして返す
+        各行に partition の "date"（datetime64）列が付く。該当なしでもスキーマの列を持つ空 DataFrame
+        filters は pyarrow の行フィルタ（例: [("symbol", "in", ["AAPL", "TSLA"])]）
+        """
+        s = _as_date(start) if start is not None else None
+        e = _as_date(end) if end is not None else None
+        cols = list(columns) if columns is not None else None
+        frames = []
+        for day in self.partitions(table, s, e):
+            for f in sorted(self._part_dir(table, day).glob("*.parquet")):
+                df = pd.read_parquet(f, columns=[c for c in cols if c != "date"] if cols else None, filters=filters)
+                if "date" not in df.columns:
+                    df["date"] = pd.Timestamp(day)
+                frames.append(df)
+        if not frames:
+            empty = self._conform(table, pd.DataFrame())
+            if "date" not in empty.columns:
+                empty["date"] = pd.Series(dtype="datetime64[ns]")
+            return empty[cols] if cols else empty
+        out = pd.concat(frames, ignore_index=True)
+        out["date"] = pd.to_datetime(out["date"])
+        return out[cols] if cols else out
+
+    def compact(self, table: str, day: Union[str, dt.date]) -> Optional[Path]:
+        """1 日ぶんの part を 1 ファイルにまとめる（part が 1 つ以下なら何もしない）"""
+        d = self._part_dir(table, _as_date(day))
+        parts = sorted(d.glob("*.parquet"))
+        if len(parts) <= 1:
+            return parts[0] if parts else None
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        path = d / f"part-{time.time_ns()}-{os.getpid()}.parquet"
+        tmp = path.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        for p in parts:
+            p.unlink()
+        return path
+
+
+_default: Optional[EventStore] = None
+
+
+def default_store() -> EventStore:
+    """GAP_BOT_STORE（既定 data/store）の共有ストア"""
+    global _default
+    if _default is None:
+        _default = EventStore()
+    return _default
+
+
+# ── レポート用ヘルパ ──────────────────────────────────
+def _legacy_strategy(path: Path, done: Iterable[dt.date]) -> pd.DataFrame:
+    """旧 strategy.csv のうち、ストアにパーティションが無い日の行だけ"""
+    df = pd.read_csv(path)
+    return df[~df["date"].map(_as_date).isin(set(done))]
+
+
+def load_strategy(days: Optional[int] = None, store: Optional[EventStore] = None) -> pd.DataFrame:
+    """
+    何をする関数? → 日次 KPI（date, total_R, winrate_%, avg_R）の直近 days 日（None: 全期間）を返す
+    ストアは該当日のパーティションだけを読み、ストアに無い日は旧 strategy.csv の行で補う
+    （ingest 前にストアへ書き始めても、それ以前の履歴が消えない）
+    """
+    store = store or default_store()
+    start = dt.date.today() - dt.timedelta(days=days) if days else None
+    df = store.read("strategy", start=start)
+    if not STRATEGY_CSV.exists():
+        return df
+    legacy = _legacy_strategy(STRATEGY_CSV, store.partitions("strategy"))
+    legacy = store._conform("strategy", legacy)
+    legacy["date"] = pd.to_datetime(legacy["date"])
+    if start:
+        legacy = legacy[legacy["date"] >= pd.Timestamp(start)]
+    if legacy.empty:
+        return df
+    if df.empty:
+        return legacy.reset_index(drop=True)
+    return pd.concat([legacy, df], ignore_index=True).sort_values("date", kind="stable", ignore_index=True)
+
+
+def read_day(table: str, day: dt.date, store: Optional[EventStore] = None) -> pd.DataFrame:
+    """1 日ぶんのイベント。ストアに無い日は logs/<table>_YYYYMMDD.csv から読む"""
+    store = store or default_store()
+    df = store.read(table, start=day, end=day)
+    if df.empty:
+        rows = read_events(table, day)
+        if rows:
+            df = store._conform(table, pd.DataFrame(rows))
+    return df
+
+
+# ── 既存 CSV の取り込み ─────────────────────────────────
+def ingest_csv_logs(
+    store: EventStore,
+    log_dir: Path = LOG_DIR,
+    strategy_csv: Path = STRATEGY_CSV,
+) -> Dict[str, int]:
+    """
+    何をする関数? → logs/<name>_YYYYMMDD.csv と strategy.csv をストアへ取り込み、テーブルごとの行数を返す
+    取り込み済みの日付（パーティションが既にある日）は飛ばすので、何度実行してもよい
+    """
+    counts: Dict[str, int] = {}
+    for name in SCHEMAS:
+        done = set(store.partitions(name))
+        for f in sorted(Path(log_dir).glob(f"{name}_[0-9]*.csv")):
+            day = dt.datetime.strptime(f.stem.rsplit("_", 1)[1], "%Y%m%d").date()
+            if day in done:
+                continue
+            rows = read_events(name, day, Path(log_dir))
+            store.append(name, rows, date=day)
+            counts[name] = counts.get(name, 0) + len(rows)
+    if strategy_csv.exists():
+        df = _legacy_strategy(strategy_csv, store.partitions("strategy"))
+        store.append("strategy", df)
+        counts["strategy"] = len(df)
+    return counts
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="columnar event store")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("ingest", help="既存の logs/*.csv と strategy.csv を取り込む")
+    c = sub.add_parser("compact", help="1 日ぶんの part を 1 ファイルにまとめる")
+    c.add_argument("table")
+    c.add_argument("date", help="YYYY-MM-DD")
+    args = p.parse_args()
+
+    store = default_store()
+    if args.cmd == "ingest":
+        for table, n in ingest_csv_logs(store).items():
+            print(f"{table:<14} {n:>7} rows")
+    else:
+        print(store.compact(args.table, args.date))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+gap_bot.tape
+------------
+プロバイダから受け取った気配・1 分足・注文イベントをすべて残す追記専用のバイナリ記録
+
+    data/tape/YYYY-MM-DD/quote.tape | bar.tape | order.tape
+
+* 1 件 = 固定長レコード（RECORDS の numpy dtype。quote 48 byte / bar 56 byte / order 64 byte）
+* 先頭 HEADER_SIZE byte はヘッダ（magic / 種類 / レコード長）。以降はレコードを並べるだけなので
+  read_tape() は np.memmap でそのまま構造化配列として開く（書きかけの末尾 1 件は読まない）
+* 書き込みは struct.pack してバッファ付きファイルへ追記するだけ（1 件数 µs）。
+  flush は FLUSH_SEC ごと・日付が変わったとき・終了時
+* GAP_BOT_TAPE=off で無効、GAP_BOT_TAPE=<dir> で保存先を変える
+
+    tape = get_tape()
+    tape.quote(q)                     # sdk.alpaca_ws の気配 dict（symbol / bidPrice / askPrice / ...）
+    tape.quotes({"AAPL": q, ...})     # QuoteFunc.many() の戻り値
+    tape.bars(df)                     # Alpaca の bars DataFrame（(symbol, timestamp) の MultiIndex）
+    tape.order("placed", o)           # sdk.order_book.normalize() の注文 dict
+
+再生:
+    arr = read_tape("data/tape/2025-08-01/quote.tape")    # 構造化配列（memmap）
+    for q in iter_quotes(path): table.update(q)            # LatestQuotes / benchmarks.mock_ws.QuoteFeed
+    read_bars(path)                                        # DataFrame（benchmarks.mock_server の tape= で配信）
+
+    python -m gap_bot.tape info data/tape/2025-08-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import datetime as dt
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+_env = os.getenv("GAP_BOT_TAPE", "")
+TAPE_DIR = Path(_env if _env and _env.lower() != "off" else "data/tape")   # off = 記録しない
+FLUSH_SEC = 1.0
+
+MAGIC = b"GBTAPE01"
+HEADER = struct.Struct("<8s8sI44x")          # magic / 種類 / レコード長（計 64 byte）
+HEADER_SIZE = HEADER.size
+
+# 種類ごとのレコード（numpy dtype と struct の書式は同じ並び）
+RECORDS: Dict[str, np.dtype] = {
+    "quote": np.dtype([("ts", "<i8"), ("recv", "<i8"), ("symbol", "S8"), ("bid", "<f8"), ("ask", "<f8"),
+                       ("bid_size", "<f4"), ("ask_size", "<f4")]),
+    "bar": np.dtype([("ts", "<i8"), ("symbol", "S8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                     ("close", "<f8"), ("volume", "<f8")]),
+    "order": np.dtype([("ts", "<i8"), ("symbol", "S8"), ("order_id", "S24"), ("event", "u1"), ("side", "u1"),
+                       ("kind", "u1"), ("_pad", "u1"), ("qty", "<f4"), ("price", "<f8"), ("stop", "<f8")]),
+}
+_PACK = {
+    "quote": struct.Struct("<qq8sddff"),
+    "bar": struct.Struct("<q8sddddd"),
+    "order": struct.Struct("<q8s24sBBBxfdd"),
+}
+
+# order レコードのコード（0 = 不明）
+ORDER_EVENTS = ("", "placed", "canceled", "filled", "modified", "rejected", "expired", "closed", "seen")
+ORDER_SIDES = ("", "buy", "sell")
+ORDER_KINDS = ("other", "limit", "stop", "market", "tp", "sl")
+
+NAN = float("nan")
+_UTC = dt.timezone.utc
+_syms: Dict[str, bytes] = {}
+
+
+# ── 変換 ──────────────────────────────────────────
+def _sym(s: Any) -> bytes:
+    b = _syms.get(s)
+    if b is None:
+        b = _syms[s] = str(s or "").upper().encode()[:8]
+    return b
+
+
+def _f(v: Any) -> float:
+    return NAN if v is None or v == "" else float(v)
+
+
+def to_ns(ts: Any, default: int) -> int:
+    """datetime / pd.Timestamp / ISO 文字列 / epoch（秒・ミリ秒・ナノ秒）→ UTC のエポックナノ秒"""
+    if ts is None:
+        return default
+    if isinstance(ts, pd.Timestamp):
+        return ts.tz_localize("UTC").value if ts.tzinfo is None else ts.value
+    if isinstance(ts, dt.datetime):
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=_UTC)
+        return int(ts.timestamp()) * 1_000_000_000 + ts.microsecond * 1_000
+    if isinstance(ts, str):
+        if not ts:
+            return default
+        return to_ns(dt.datetime.fromisoformat(ts.replace("Z", "+00:00")), default)
+    v = float(ts)
+    return int(v * 1e9) if v < 1e11 else int(v * 1e6) if v < 1e14 else int(v)
+
+
+def from_ns(ns: int) -> dt.datetime:
+    ns = int(ns)
+    return dt.datetime.fromtimestamp(ns // 1_000_000_000, tz=_UTC).replace(microsecond=ns % 1_000_000_000 // 1_000)
+
+
+def _code(table: tuple, v: Any) -> int:
+    try:
+        return table.index(str(v or "").lower())
+    except ValueError:
+        return 0
+
+
+# ── 書き込み ──────────────────────────────────────
+class Tape:
+    """1 日 1 ディレクトリ・種類ごとに 1 ファイルへ固定長レコードを追記する（スレッドセーフ）"""
+
+    def __init__(self, root: Union[str, Path] = TAPE_DIR, *, flush_sec: float = FLUSH_SEC) -> None:
+        self.root = Path(root)
+        self.flush_ns = int(flush_sec * 1e9)
+        self.counts: Dict[str, int] = {k: 0 for k in RECORDS}
+        self.errors = 0                        # 書けずに捨てた回数（ディスク満杯など。記録の失敗で本処理は止めない）
+        self._lock = threading.Lock()
+        self._fh: Dict[str, Any] = {}
+        self._day: Optional[dt.date] = None
+        self._rollover = 0                     # 次の日付切り替え（time.time_ns）
+        self._last_flush = 0
+
+    def dir_for(self, day: dt.date) -> Path:
+        return self.root / f"{day:%Y-%m-%d}"
+
+    def _open(self, kind: str) -> Any:
+        """その日の kind ファイルを開く（新規ならヘッダを書き、書きかけの末尾レコードは切り詰める）"""
+        path = self.dir_for(self._day) / f"{kind}.tape"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = path.stat().st_size if path.exists() else 0
+        rec = RECORDS[kind].itemsize
+        if size >= HEADER_SIZE:
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // rec * rec
+            if whole != size:
+                os.truncate(path, whole)
+        fh = self._fh[kind] = path.open("ab", buffering=1 << 16)
+        if size < HEADER_SIZE:
+            fh.truncate(0)
+            fh.write(HEADER.pack(MAGIC, kind.encode(), rec))
+        return fh
+
+    def _roll(self, now: int) -> None:
+        self._close_files()
+        self._day = dt.date.today()
+        tomorrow = dt.datetime.combine(self._day + dt.timedelta(days=1), dt.time())
+        self._rollover = int(tomorrow.timestamp() * 1e9)
+
+    def _write(self, kind: str, data: bytes, n: int, now: int) -> None:
+        with self._lock:
+            try:
+                if now >= self._rollover:
+                    self._roll(now)
+                fh = self._fh.get(kind) or self._open(kind)
+                fh.write(data)
+                self.counts[kind] += n
+                if now - self._last_flush >= self.flush_ns:
+                    self._flush_locked(now)
+            except OSError:
+                self.errors += 1
+
+    # ---------- 種類別 ----------
+    def quote(self, q: Dict[str, Any], recv_ns: Optional[int] = None) -> None:
+        """気配 1 件（timestamp が無ければ受信時刻を使う）"""
+        now = time.time_ns()
+        recv = recv_ns or now
+        rec = _PACK["quote"].pack(to_ns(q.get("timestamp"), recv), recv, _sym(q.get("symbol")),
+                                  _f(q.get("bidPrice")), _f(q.get("askPrice")),
+                                  _f(q.get("bidSize")), _f(q.get("askSize")))
+        self._write("quote", rec, 1, now)
+
+    def quotes(self, quotes: Dict[str, Dict[str, Any]]) -> None:
+        """symbol → 気配 の dict をまとめて（1 回のロックで書く）"""
+        if not quotes:
+            return
+        now = time.time_ns()
+        pack = _PACK["quote"].pack
+        data = b"".join(pack(to_ns(q.get("timestamp"), now), now, _sym(s), _f(q.get("bidPrice")),
+                             _f(q.get("askPrice")), _f(q.get("bidSize")), _f(q.get("askSize")))
+                        for s, q in quotes.items() if q)
+        self._write("quote", data, len(data) // RECORDS["quote"].itemsize, now)
+
+    def bar(self, symbol: str, ts: Any, o: float, h: float, l: float, c: float, v: float) -> None:
+        now = time.time_ns()
+        self._write("bar", _PACK["bar"].pack(to_ns(ts, now), _sym(symbol), o, h, l, c, v), 1, now)
+
+    def bars(self, df: pd.DataFrame, symbol: Optional[str] = None) -> None:
+        """
+        何をする関数? → bars DataFrame をまとめて 1 回で書く
+        (symbol, timestamp) の MultiIndex（Alpaca .df）でも、symbol / timestamp 列でもよい
+        （symbol が無い 1 銘柄ぶんの DataFrame は symbol 引数で渡す）
+        """
+        if df is None or len(df) == 0:
+            return
+        d = df.reset_index()
+        if "timestamp" not in d:
+            return
+        arr = np.empty(len(d), RECORDS["bar"])
+        arr["ts"] = pd.DatetimeIndex(pd.to_datetime(d["timestamp"], utc=True)).as_unit("ns").asi8
+        arr["symbol"] = (d["symbol"].astype(str).str.upper() if "symbol" in d else str(symbol or "").upper())
+        for f in ("open", "high", "low", "close", "volume"):
+            arr[f] = d[f].to_numpy(dtype=float) if f in d else NAN
+        self._write("bar", arr.tobytes(), len(arr), time.time_ns())
+
+    def order(self, event: str, o: Dict[str, Any]) -> None:
+        """注文イベント（o は sdk.order_book.normalize() の dict）"""
+        now = time.time_ns()
+        rec = _PACK["order"].pack(now, _sym(o.get("symbol")), str(o.get("oid") or "").encode()[:24],
+                                  _code(ORDER_EVENTS, event), _code(ORDER_SIDES, o.get("side")),
+                                  _code(ORDER_KINDS, o.get("kind")),
+                                  _f(o.get("qty")), _f(o.get("price")), _f(o.get("stop")))
+        self._write("order", rec, 1, now)
+
+    def recorder(self, handler):
+        """何をする関数? → 気配を記録してから handler に渡すハンドラを返す（start_quote_stream 用）"""
+        def _handler(q: Dict[str, Any]) -> None:
+            self.quote(q)
+            handler(q)
+        return _handler
+
+    # ---------- flush / close ----------
+    def _flush_locked(self, now: int) -> None:
+        self._last_flush = now
+        for fh in self._fh.values():
+            fh.flush()
+
+    def _close_files(self) -> None:
+        for fh in self._fh.values():
+            fh.close()
+        self._fh = {}
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked(time.time_ns())
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_files()
+            self._rollover = 0
+
+
+class NullTape(Tape):
+    """GAP_BOT_TAPE=off のときの何もしない記録"""
+
+    def _write(self, kind: str, data: bytes, n: int, now: int) -> None:
+        pass
+
+    def quote(self, q: Dict[str, Any], recv_ns: Optional[int] = None) -> None:
+        pass
+
+    def recorder(self, handler):
+        return handler
+
+
+_tape: Optional[Tape] = None
+_tape_lock = threading.Lock()
+
+
+def get_tape() -> Tape:
+    """プロセス共有の Tape（終了時に flush して閉じる）"""
+    global _tape
+    with _tape_lock:
+        if _tape is None:
+            off = os.getenv("GAP_BOT_TAPE", "").lower() == "off"
+            _tape = NullTape() if off else Tape()
+            atexit.register(_tape.close)
+        return _tape
+
+
+# ── 読み出し ──────────────────────────────────────
+def read_tape(path: Union[str, Path]) -> np.ndarray:
+    """何をする関数? → .tape を np.memmap の構造化配列として開く（コピーしない。書きかけの末尾は含めない）"""
+    path = Path(path)
+    with path.open("rb") as f:
+        magic, kind, rec = HEADER.unpack(f.read(HEADER_SIZE))
+    kind = kind.rstrip(b"\0").decode()
+    if magic != MAGIC or kind not in RECORDS or RECORDS[kind].itemsize != rec:
+        raise ValueError(f"{path}: not a {MAGIC.decode()} file")
+    n = (path.stat().st_size - HEADER_SIZE) // rec
+    if n == 0:
+        return np.zeros(0, RECORDS[kind])
+    return np.memmap(path, dtype=RECORDS[kind], mode="r", offset=HEADER_SIZE, shape=(n,))
+
+
+def iter_quotes(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """quote.tape → sdk.alpaca_ws.quote_to_dict と同じキーの dict（timestamp は UTC datetime）"""
+    for ts, _recv, sym, bid, ask, bs, as_ in read_tape(path).tolist():
+        yield {"symbol": sym.decode(), "bidPrice": bid, "askPrice": ask, "bidSize": bs, "askSize": as_,
+               "timestamp": from_ns(ts)}
+
+
+def read_bars(path: Union[str, Path]) -> pd.DataFrame:
+    """bar.tape → symbol / timestamp / open / high / low / close / volume の DataFrame"""
+    arr = read_tape(path)
+    df = pd.DataFrame({f: np.asarray(arr[f]) for f in ("open", "high", "low", "close", "volume")})
+    df.insert(0, "timestamp", pd.to_datetime(np.asarray(arr["ts"]), utc=True))
+    df.insert(0, "symbol", np.char.decode(np.asarray(arr["symbol"])))
+    return df
+
+
+def read_orders(path: Union[str, Path]) -> pd.DataFrame:
+    """order.tape → コードを名前に戻した DataFrame"""
+    arr = read_tape(path)
+    return pd.DataFrame({
+        "ts": pd.to_datetime(np.asarray(arr["ts"]), utc=True),
+        "symbol": np.char.decode(np.asarray(arr["symbol"])),
+        "order_id": np.char.decode(np.asarray(arr["order_id"])),
+        "event": np.asarray(ORDER_EVENTS, dtype=object)[arr["event"]],
+        "side": np.asarray(ORDER_SIDES, dtype=object)[arr["side"]],
+        "kind": np.asarray(ORDER_KINDS, dtype=object)[arr["kind"]],
+        "qty": np.asarray(arr["qty"], dtype=float),
+        "price": np.asarray(arr["price"]),
+        "stop": np.asarray(arr["stop"]),
+    })
+
+
+# ── CLI ─────────────────────────────────────────────
+def main() -> None:
+    p = argparse.ArgumentParser(description="binary tape (quote / bar / order) utilities")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    info = sub.add_parser("info", help="件数・期間・銘柄数を表示")
+    info.add_argument("path", type=Path, help="data/tape/YYYY-MM-DD か .tape ファイル")
+    args = p.parse_args()
+
+    files = sorted(args.path.glob("*.tape")) if args.path.is_dir() else [args.path]
+    for f in files:
+        arr = read_tape(f)
+        span = f"{from_ns(arr['ts'].min()):%H:%M:%S}–{from_ns(arr['ts'].max()):%H:%M:%S} UTC" if len(arr) else "-"
+        print(f"{f.name:12} {len(arr):>10,} records  {f.stat().st_size / 1e6:8.2f} MB  "
+              f"{len(np.unique(arr['symbol'])):>6} symbols  {span}")
+
+
+if __name__ == "__main__":
+    main()
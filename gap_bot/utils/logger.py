@@ -1,22 +1,45 @@
 """共通 CSV ロガー
 
-append_csv(path, row) を呼ぶだけで logs/ 以下に追記できる。
+append_csv(path, row) を呼ぶだけで logs/ 以下に追記できる（1 行ごとに open/close する。少量向け）。
+
+行数の多いログは EventLogger を使う:
+
+    log = get_event_logger("screen")            # logs/screen_YYYYMMDD.csv（日付が変わると次のファイルへ）
+    log.log(symbol="AAPL", prev_close=190.1, pre_price=195.3, pre_volume=120000)
+    log.flush()                                 # 通常は不要（flush_rows / flush_sec ごと + 終了時に自動）
+
+* ログ名ごとに列と型を SCHEMAS で決めておき、1 行目にヘッダを書く
+* 行はメモリに貯めて flush_rows 行 or flush_sec 秒ごとにまとめて書く（ファイルは開きっぱなし）
+  flush_sec は裏スレッドでも見ているので、log() が止まっても貯まった行は flush_sec 以内に書かれる
+* fsync_sec ごとに fsync してディスクへ確実に落とす
+* store を渡すと、書き出した行を store_sec ごとに裏スレッドで列指向ストア（gap_bot.store）へ 1 part として追記する
+  （Parquet の書き込みは log() の呼び出し元を待たせず、ロックも持たない。落ちた場合もそれまでの行は CSV に残る）
+  日付が変わったとき / close 時に、その日のパーティションの part を 1 ファイルへ compact する
 """
 
+import atexit
 import csv
-from pathlib import Path
+import datetime as dt
 import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
+# 既定は INFO。スクリーニング中の銘柄ごとの debug 行は GAP_BOT_LOG_LEVEL=DEBUG のときだけ組み立てる
+LOG_LEVEL = os.getenv("GAP_BOT_LOG_LEVEL", "INFO").upper()
+
 logging.basicConfig(
-    level=logging.DEBUG,                             # ここでログレベルなどをまとめて設定
+    level=LOG_LEVEL,                                 # ここでログレベルなどをまとめて設定
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 
-logger = logging.getLogger("gap_bot")    
-logger.setLevel(logging.DEBUG)
+logger = logging.getLogger("gap_bot")
+logger.setLevel(LOG_LEVEL)
 
 def append_csv(path: str, row: list[str]) -> None:
     """CSV ファイルに行追記（ヘッダ無し・改行コード自動）"""
@@ -25,3 +48,220 @@ def append_csv(path: str, row: list[str]) -> None:
 
     with file_path.open("a", newline="") as f:
         csv.writer(f).writerow(row)
+
+
+# ── 構造化イベントログ ─────────────────────────────────
+Schema = Tuple[Tuple[str, type], ...]
+
+SCHEMAS: Dict[str, Schema] = {
+    # run_screen: 取得できた銘柄ごとの生データ
+    "screen": (("ts", str), ("symbol", str), ("prev_close", float), ("pre_price", float), ("pre_volume", int)),
+    # run_entry: 受け付けられたエントリー注文
+    "order": (("ts", str), ("symbol", str), ("qty", int), ("limit", float), ("tp", float), ("sl", float),
+              ("order_id", str)),
+    # run_entry: 1 注文ごとの発注レイテンシ (ms)
+    "entry_latency": (("ts", str), ("symbol", str), ("qty", int), ("limit", float), ("order_id", str),
+                      ("queue_ms", float), ("place_ms", float), ("bracket_ms", float), ("total_ms", float),
+                      ("status", str)),
+    # run_close: 引け前の成行クローズ
+    "close": (("ts", str), ("symbol", str), ("qty", int), ("order_id", str)),
+}
+
+
+class EventLogger:
+    """1 種類のイベントを型付き CSV へまとめ書きするロガー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        name: str,
+        schema: Optional[Schema] = None,
+        *,
+        log_dir: Path = LOG_DIR,
+        flush_rows: int = 500,
+        flush_sec: float = 1.0,
+        fsync_sec: float = 5.0,
+        today: Callable[[], dt.date] = dt.date.today,
+        store: Any = None,
+        store_sec: float = 60.0,
+    ) -> None:
+        self.name = name
+        self.schema = schema or SCHEMAS[name]
+        self.fields = [f for f, _ in self.schema]
+        self.log_dir = Path(log_dir)
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.fsync_sec = fsync_sec
+        self._today = today
+        self._store = store                 # gap_bot.store.EventStore（None なら CSV のみ）
+        self.store_sec = store_sec
+        self._store_rows: Dict[dt.date, List[List[Any]]] = {}   # 日付 → CSV へ書き出し済みでストア未追記の行
+        self._compact: Set[dt.date] = set()                     # 追記後に compact するパーティション（前日 / close 時の当日）
+        self._sink_lock = threading.Lock()                      # ストアへの追記は 1 本ずつ（行の順序を保つ）
+        self._last_sink = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None   # flush_sec ごとに貯まった行を書き出す裏スレッド
+        self._buf: List[List[Any]] = []
+        self._day: Optional[dt.date] = None
+        self._fh = None
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+        self.rows = 0            # 書いた行数（累計）
+        self.flushes = 0
+
+    def path_for(self, day: dt.date) -> Path:
+        return self.log_dir / f"{self.name}_{day:%Y%m%d}.csv"
+
+    # ---------- 書き込み ----------
+    def _coerce(self, values: Dict[str, Any]) -> List[Any]:
+        """スキーマの型へ揃えた 1 行（None は空欄。ts が無ければ今の UTC 時刻）"""
+        extra = set(values) - set(self.fields)
+        if extra:
+            raise ValueError(f"{self.name}: unknown fields {sorted(extra)}")
+        row = []
+        for f, typ in self.schema:
+            v = values.get(f)
+            if v is None and f == "ts":
+                v = dt.datetime.utcnow().isoformat()
+            row.append("" if v is None or v == "" else typ(v))
+        return row
+
+    def log(self, **values: Any) -> None:
+        """1 イベントを貯める。flush_rows 行 or flush_sec 秒たまったら書き出す"""
+        row = self._coerce(values)
+        with self._lock:
+            day = self._today()
+            if day != self._day:
+                self._flush_locked()          # 前日分は前日のファイルへ
+                self._open(day)
+            self._buf.append(row)
+            if len(self._buf) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_sec:
+                self._flush_locked()
+            if self._timer is None and self.flush_sec > 0:
+                self._stop.clear()
+                self._timer = threading.Thread(target=self._run_timer, name=f"event-log-{self.name}", daemon=True)
+                self._timer.start()
+
+    def _run_timer(self) -> None:
+        """flush_sec ごとに起きて貯まっている行を書き出し、store_sec ごと（日付が変わったらすぐ）にストアへ追記する"""
+        while not self._stop.wait(self.flush_sec):
+            with self._lock:
+                if self._buf:
+                    self._flush_locked()
+            if self._store is not None and (self._compact or time.monotonic() - self._last_sink >= self.store_sec):
+                self._sink_store()
+
+    def _sink_store(self, compact: Optional[dt.date] = None) -> None:
+        """
+        書き出し済みの行を日付ごとに 1 part としてストアへ追記し、日付の変わったパーティションを compact する
+        self._lock は行の受け渡しの間だけ持つ（Parquet の書き込み中も log() は止まらない）。失敗した行は次回に再試行
+        """
+        if self._store is None:
+            return
+        with self._sink_lock:
+            with self._lock:
+                pending, self._store_rows = self._store_rows, {}
+                days, self._compact = self._compact, set()
+                self._last_sink = time.monotonic()
+            if compact is not None:
+                days.add(compact)
+            failed: Dict[dt.date, List[List[Any]]] = {}
+            for day, rows in pending.items():
+                recs = [{f: (None if v == "" else v) for f, v in zip(self.fields, r)} for r in rows]
+                try:
+                    self._store.append(self.name, recs, date=day)
+                except Exception as e:
+                    logger.warning("%s: store append failed (%d rows kept): %r", self.name, len(recs), e)
+                    failed[day] = rows
+            for day in days - failed.keys():
+                try:
+                    self._store.compact(self.name, day)
+                except Exception as e:
+                    logger.warning("%s: store compact %s failed: %r", self.name, day, e)
+            if failed:
+                with self._lock:
+                    for day, rows in failed.items():
+                        self._store_rows[day] = rows + self._store_rows.get(day, [])
+                    self._compact |= days & failed.keys()
+
+    def _open(self, day: dt.date) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        if self._store is not None and self._day is not None:
+            self._compact.add(self._day)      # 前日分は次の追記のあと 1 ファイルにまとめる
+        path = self.path_for(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not path.exists() or path.stat().st_size == 0
+        self._fh = path.open("a", newline="", buffering=1 << 16)
+        if is_new:
+            csv.writer(self._fh).writerow(self.fields)
+        self._day = day
+
+    def _flush_locked(self) -> None:
+        now = time.monotonic()
+        self._last_flush = now
+        if not self._buf or self._fh is None:
+            return
+        csv.writer(self._fh).writerows(self._buf)
+        if self._store is not None:
+            self._store_rows.setdefault(self._day, []).extend(self._buf)
+        self.rows += len(self._buf)
+        self.flushes += 1
+        self._buf.clear()
+        self._fh.flush()
+        if now - self._last_fsync >= self.fsync_sec:
+            os.fsync(self._fh.fileno())
+            self._last_fsync = now
+
+    def flush(self, fsync: bool = False) -> None:
+        with self._lock:
+            self._flush_locked()
+            if fsync and self._fh is not None:
+                os.fsync(self._fh.fileno())
+                self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        self._stop.set()
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not threading.current_thread():
+            timer.join()
+        with self._lock:
+            self._flush_locked()
+            day = self._day
+            if self._fh is not None:
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+                self._fh, self._day = None, None
+        self._sink_store(compact=day)
+
+
+_loggers: Dict[str, EventLogger] = {}
+_loggers_lock = threading.Lock()
+
+
+def get_event_logger(name: str) -> EventLogger:
+    """
+    ログ名ごとに共有の EventLogger を返す（終了時に flush + fsync して閉じる）
+    GAP_BOT_STORE=off でなければ、行は列指向ストア（data/store）にも入る
+    """
+    with _loggers_lock:
+        lg = _loggers.get(name)
+        if lg is None:
+            store = None
+            if os.getenv("GAP_BOT_STORE", "").lower() != "off":
+                from gap_bot.store import default_store   # store が logger を import するのでここで読む
+                store = default_store()
+            lg = _loggers[name] = EventLogger(name, store=store)
+            atexit.register(lg.close)
+        return lg
+
+
+def read_events(name: str, day: dt.date, log_dir: Path = LOG_DIR) -> List[Dict[str, Any]]:
+    """name_YYYYMMDD.csv をスキーマの型で読み戻す（無ければ空。空欄は None）"""
+    path = log_dir / f"{name}_{day:%Y%m%d}.csv"
+    if not path.exists():
+        return []
+    types = dict(SCHEMAS[name])
+    with path.open(newline="") as f:
+        return [{k: (types.get(k, str)(v) if v != "" else None) for k, v in row.items()}
+                for row in csv.DictReader(f)]
@@ -0,0 +1,120 @@
+"""
+gap_bot.utils.market_calendar
+-----------------------------
+NYSE の取引日カレンダー（外部 API なしで計算）
+
+* 週末と NYSE の祝日（振替含む）を休場として扱う
+* previous_trading_day(d) : d より前の直近取引日
+* screen_session(now)     : いまスクリーニング対象になっている取引日
+                            （引け後〜翌朝は次の取引日を返す）
+
+    >>> previous_trading_day(date(2025, 8, 4))   # 月曜 → 金曜
+    datetime.date(2025, 8, 1)
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+ET = ZoneInfo("America/New_York")
+SESSION_CLOSE = time(16, 0)          # 通常取引の引け (ET)
+
+# 祝日以外の臨時休場（国葬など）
+SPECIAL_CLOSURES = {
+    date(2018, 12, 5),   # George H. W. Bush 国葬
+    date(2025, 1, 9),    # Jimmy Carter 国葬
+}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """month の第 n weekday（Mon=0）を返す"""
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    """month の最終 weekday を返す"""
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """グレゴリオ暦の復活祭（Anonymous Gregorian algorithm）"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(d: date) -> date:
+    """土曜 → 前の金曜、日曜 → 翌月曜に振替"""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=64)
+def nyse_holidays(year: int) -> frozenset[date]:
+    """year の NYSE 休場日（祝日の振替を含む）"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),         # MLK Day
+        _nth_weekday(year, 2, 0, 3),         # Presidents' Day
+        _easter(year) - timedelta(days=2),   # Good Friday
+        _last_weekday(year, 5, 0),           # Memorial Day
+        _observed(date(year, 7, 4)),         # Independence Day
+        _nth_weekday(year, 9, 0, 1),         # Labor Day
+        _nth_weekday(year, 11, 3, 4),        # Thanksgiving
+        _observed(date(year, 12, 25)),       # Christmas
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:              # 土曜の元日は前年末に振替えない（NYSE ルール）
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+def is_trading_day(d: date) -> bool:
+    """d が NYSE の取引日なら True"""
+    return d.weekday() < 5 and d not in nyse_holidays(d.year) and d not in SPECIAL_CLOSURES
+
+
+def previous_trading_day(d: date) -> date:
+    """d より前（d 自身は含まない）の直近取引日"""
+    d -= timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def next_trading_day(d: date) -> date:
+    """d より後（d 自身は含まない）の直近取引日"""
+    d += timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+
+def screen_session(now: datetime | None = None) -> date:
+    """
+    いまスクリーニング対象の取引日を返す
+    * 取引日の引け前 → 当日
+    * 引け後・週末・祝日 → 次の取引日（夜間のキャッシュ温めもこの日付で揃う）
+    """
+    now_et = (now or datetime.now(tz=ET)).astimezone(ET)
+    today = now_et.date()
+    if is_trading_day(today) and now_et.time() < SESSION_CLOSE:
+        return today
+    return next_trading_day(today)
@@ -1,39 +1,225 @@
 # -*- coding: utf-8 -*-
 """
 役割: Discord Webhook へメッセージを送信するユーティリティ関数を提供する
+
+send_discord_message() はキューに積むだけで即座に戻る（取引ループを HTTP で止めない）。
+送信はバックグラウンドスレッドの DiscordNotifier が行い、
+
+* 溜まったメッセージを 2000 文字以内の 1 投稿にまとめる
+* Webhook のレート上限（既定 30 投稿/分）をトークンバケットで守り、429 は retry_after だけ待って再送
+* キューが満杯なら古いものを待たせず新しいメッセージを捨てて dropped を数える
+* プロセス終了時（atexit）に残りを送り切る
+
+    send_discord_message("half TP AAPL")     # ブロックしない
+    notifier_stats()                         # {"queued": .., "sent": .., "dropped": ..}
+    flush_discord(timeout=5)                 # 送り切るまで待つ（スクリプト終了前など）
 """
 
 # ---- import（ファイル冒頭で統一）----
+import atexit
 import os          # 環境変数から Webhook URL を読み取る
-import json        # Discord へ送るペイロードを構築
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 import requests    # HTTP POST を実行
+
+from gap_bot.utils.rate_limit import TokenBucket
+
 try:
     from dotenv import load_dotenv  # .env から環境変数を読み込むためのライブラリ
     load_dotenv()  # 何をする行か：モジュール読み込み時に一度だけ .env を取り込んで DISCORD_WEBHOOK_URL を使えるようにする
 except Exception:
     pass  # ライブラリ未導入でも通知機能自体は動かすために握りつぶす
 
+MAX_CHARS = 2000   # Discord の content 上限
+
+
+# ---- まとめ方 ----
+def pack_messages(messages: List[str], max_chars: int = MAX_CHARS) -> List[str]:
+    """
+    役割: メッセージ列を改行で連結し、max_chars 以内の投稿に詰める（1 件で超えるものは分割）
+    """
+    return [body for body, _ in _pack(messages, max_chars)]
+
+
+def _pack(messages: List[str], max_chars: int) -> List[Tuple[str, int]]:
+    """pack_messages の本体。(投稿本文, 含まれるメッセージ数) を返す（分割した続きは数えない）"""
+    batches: List[Tuple[str, int]] = []
+    cur, n = "", 0
+    for msg in messages:
+        pieces = [msg[i:i + max_chars] for i in range(0, len(msg), max_chars)] or [""]
+        for k, piece in enumerate(pieces):
+            if cur and len(cur) + 1 + len(piece) <= max_chars:
+                cur += "\n" + piece
+            else:
+                if cur:
+                    batches.append((cur, n))
+                cur, n = piece, 0
+            n += k == 0
+    if cur:
+        batches.append((cur, n))
+    return batches
+
+
+# ---- 送信スレッド ----
+class DiscordNotifier:
+    """
+    役割: 有界キュー + 送信スレッドで Discord Webhook へ投稿する（呼び出し側はブロックしない）
+
+    Parameters
+    ----------
+    webhook_url : str
+    maxsize : int
+        キューに溜められるメッセージ数。超えた分は捨てて dropped に数える
+    rate, burst : float
+        Webhook への投稿レート [投稿/秒] と連続で送れる数
+    linger : float
+        最初の 1 件を受けてから、後続をまとめるために待つ秒数
+    post : callable
+        post(url, json=..., timeout=...) → Response 風。テストで差し替える
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        *,
+        maxsize: int = 1000,
+        rate: float = 30 / 60,
+        burst: float = 5,
+        linger: float = 0.1,
+        timeout: float = 5.0,
+        post: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        self.webhook_url = webhook_url
+        self.linger = linger
+        self.timeout = timeout
+        self._post = post or requests.Session().post
+        self._q: "queue.Queue[str]" = queue.Queue(maxsize=maxsize)
+        self._bucket = TokenBucket(rate=rate, capacity=burst)
+        self._stop = threading.Event()
+        self.sent = 0           # 送れたメッセージ数
+        self.batches = 0        # 送った投稿数
+        self.dropped = 0        # キュー満杯で捨てた数
+        self.failed = 0         # 送信に失敗したメッセージ数
+        self._thread = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+        self._thread.start()
+
+    # 何をする関数か: 呼び出し側の入口。キューに積めたら True（満杯なら捨てて False）
+    def send(self, content: str) -> bool:
+        try:
+            self._q.put_nowait(str(content))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _drain(self, first: str) -> List[str]:
+        """最初の 1 件に、linger 秒のあいだに溜まった分を足して返す"""
+        msgs = [first]
+        deadline = time.monotonic() + self.linger
+        while True:
+            left = deadline - time.monotonic()
+            try:
+                msgs.append(self._q.get(timeout=left) if left > 0 else self._q.get_nowait())
+            except queue.Empty:
+                return msgs
+
+    def _deliver(self, body: str) -> bool:
+        """1 投稿を送る。429 は retry_after だけ待って最大 3 回まで再送"""
+        for _ in range(3):
+            self._bucket.acquire_blocking()
+            try:
+                r = self._post(self.webhook_url, json={"content": body}, timeout=self.timeout)
+            except requests.RequestException:
+                return False  # 通知失敗で取引を止めないよう、例外は握りつぶす
+            if getattr(r, "status_code", 204) != 429:
+                return getattr(r, "status_code", 204) < 400
+            try:
+                wait = float(r.json().get("retry_after", 1.0))
+            except Exception:
+                wait = 1.0
+            time.sleep(min(wait, 10.0))
+        return False
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._q.empty()):
+            try:
+                first = self._q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            msgs = self._drain(first)
+            try:
+                for body, n in _pack(msgs, MAX_CHARS):
+                    ok = self._deliver(body)
+                    self.batches += ok
+                    if ok:
+                        self.sent += n
+                    else:
+                        self.failed += n
+            finally:
+                for _ in msgs:
+                    self._q.task_done()
+
+    # 何をする関数か: キューが空になり送信中の投稿が終わるまで待つ（timeout 秒で諦める）
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks:
+            if time.monotonic() >= deadline or not self._thread.is_alive():
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._q.qsize(), "sent": self.sent, "batches": self.batches,
+                "dropped": self.dropped, "failed": self.failed}
+
+
+# ---- モジュール共通の送信口 ----
+_notifier: Optional[DiscordNotifier] = None
+_lock = threading.Lock()
+
+
+def get_notifier() -> Optional[DiscordNotifier]:
+    """役割: DISCORD_WEBHOOK_URL が設定されていれば共有の DiscordNotifier を返す（初回に起動）"""
+    global _notifier
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+    if not webhook_url:
+        return None
+    with _lock:
+        if _notifier is None:
+            _notifier = DiscordNotifier(webhook_url, maxsize=int(os.getenv("DISCORD_QUEUE_MAX", "1000")))
+            atexit.register(_notifier.close)   # 終了時に残りを送り切る
+    return _notifier
+
+
 # ---- 関数定義 ----
 def send_discord_message(content: str) -> None:
     """
-    役割: 引数で受け取った文字列を Discord Webhook へ送信する
+    役割: 引数で受け取った文字列を Discord Webhook 送信キューに積む（送信は裏のスレッド。ブロックしない）
 
     Parameters
     ----------
     content : str
-        投稿したいメッセージ本文 (2000 文字以内推奨)
+        投稿したいメッセージ本文（2000 文字を超える場合は分割して送る）
     """
-    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
-    if not webhook_url:
+    notifier = get_notifier()
+    if notifier is None:
         return  # URL 未設定なら何もしない
+    notifier.send(content)
+
+
+def flush_discord(timeout: float = 5.0) -> bool:
+    """役割: 積まれた通知を送り切るまで待つ（通知が無効なら即 True）"""
+    return _notifier.flush(timeout) if _notifier is not None else True
 
-    payload = {
-        "content": content
-    }
 
-    # 何をするコードか: Discord に JSON ペイロードを POST する
-    try:
-        requests.post(webhook_url, data=json.dumps(payload), timeout=5)
-    except requests.RequestException:
-        # 通知失敗で取引を止めないよう、例外は握りつぶす
-        pass
+def notifier_stats() -> Dict[str, int]:
+    """役割: queued / sent / batches / dropped / failed を返す（通知が無効なら空）"""
+    return _notifier.stats() if _notifier is not None else {}
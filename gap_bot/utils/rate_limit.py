@@ -0,0 +1,68 @@
+"""
+gap_bot.utils.rate_limit
+------------------------
+プロバイダのリクエスト上限を守るためのトークンバケット。
+
+    bucket = TokenBucket(rate=200 / 60, capacity=10)   # Alpaca 無料枠 200 req/min
+    await bucket.acquire()          # asyncio から
+    bucket.acquire_blocking()       # スレッドから
+    bucket.try_acquire()            # 待たない（取れなければ False。サーバ側の上限判定用）
+
+固定 sleep と違い、上限に余裕がある間は待たずに通し、
+超えそうなときだけ必要な分だけ待たせる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """rate [token/sec] で補充され、最大 capacity 個まで貯まるバケット"""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()       # asyncio / スレッド両方から使うため threading.Lock
+        self.waited_sec = 0.0               # 累計待ち時間（計測用）
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def _reserve(self, n: float) -> float:
+        """何をする関数? → n トークンを予約し、使えるようになるまでの待ち秒数を返す"""
+        with self._lock:
+            self._refill()
+            self._tokens -= n               # 先に差し引く（マイナス＝後続の待ち行列）
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited_sec += wait
+            return wait
+
+    async def acquire(self, n: float = 1.0) -> None:
+        """asyncio 用: トークンが取れるまで await で待つ"""
+        wait = self._reserve(n)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, n: float = 1.0) -> None:
+        """スレッド用: トークンが取れるまで time.sleep で待つ"""
+        wait = self._reserve(n)
+        if wait > 0:
+            time.sleep(wait)
+
+    def try_acquire(self, n: float = 1.0) -> bool:
+        """待たずに取れるときだけ n トークンを取って True（足りなければ何も取らずに False）"""
+        with self._lock:
+            self._refill()
+            if self._tokens < n:
+                return False
+            self._tokens -= n
+            return True
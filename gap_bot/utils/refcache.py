@@ -0,0 +1,139 @@
+"""
+gap_bot.utils.refcache
+----------------------
+参照データ（Float・前日終値・Sentiment）の永続キャッシュ（SQLite）
+
+* 1 行 = (field, symbol) → value, expires_at（UNIX 秒）
+* 期限はフィールドごと:
+    float_shares : 数日（めったに変わらない）
+    prev_close   : 次のセッションの引けまで（prev_close_expiry を使う）
+    sentiment    : 数分
+* プロセスをまたいで残るので、夜間に scripts/warm_cache.py で温めておけば
+  04:00 ET のスクリーニングは変化するデータだけを取りに行けばよい
+
+    cache = get_cache()
+    v = cache.get("float_shares", "AAPL")        # 期限切れ / 未登録なら None
+    cache.put("float_shares", "AAPL", 1.5e10)    # 既定の TTL で保存
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable
+
+from gap_bot.utils.market_calendar import ET, SESSION_CLOSE
+
+DB_PATH = Path(os.getenv("GAP_BOT_CACHE_DB", "cache/refdata.sqlite"))
+
+# フィールドごとの既定 TTL（prev_close は固定 TTL ではなくセッション基準）
+TTL: Dict[str, timedelta] = {
+    "float_shares": timedelta(days=5),
+    "sentiment": timedelta(minutes=15),
+}
+NEGATIVE_TTL = timedelta(hours=12)   # 取得失敗（0 扱い）を覚えておく期間
+
+
+def prev_close_expiry(session: date) -> float:
+    """session 用の前日終値の期限 = session の引け (16:00 ET)。それ以降は新しい終値が出る"""
+    return datetime.combine(session, SESSION_CLOSE, tzinfo=ET).timestamp()
+
+
+class RefCache:
+    """スレッドセーフな SQLite キャッシュ（取得エンジンのワーカースレッドから直接呼べる）"""
+
+    def __init__(self, path: str | Path = DB_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")      # 読み書きの並行性を上げる
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS refdata ("
+            " field TEXT NOT NULL, symbol TEXT NOT NULL,"
+            " value REAL NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (field, symbol)) WITHOUT ROWID"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 読み出し ----------
+    def get(self, field: str, symbol: str) -> float | None:
+        """期限内の値を返す。無ければ None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM refdata WHERE field=? AND symbol=? AND expires_at>?",
+                (field, symbol, time.time()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def get_many(self, field: str, symbols: Iterable[str] | None = None) -> Dict[str, float]:
+        """field の期限内の値をまとめて返す（symbols 省略時は全銘柄）"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT symbol, value FROM refdata WHERE field=? AND expires_at>?",
+                (field, time.time()),
+            ).fetchall()
+        out = dict(rows)
+        if symbols is not None:
+            out = {s: out[s] for s in symbols if s in out}
+        return out
+
+    # ---------- 書き込み ----------
+    def _expiry(self, field: str, ttl: timedelta | None, expires_at: float | None) -> float:
+        if expires_at is not None:
+            return expires_at
+        return time.time() + (ttl or TTL[field]).total_seconds()
+
+    def put(self, field: str, symbol: str, value: float, *,
+            ttl: timedelta | None = None, expires_at: float | None = None) -> None:
+        """1 件保存（ttl / expires_at 省略時は TTL[field]）"""
+        exp = self._expiry(field, ttl, expires_at)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO refdata VALUES (?, ?, ?, ?)",
+                (field, symbol, float(value), exp),
+            )
+
+    def put_many(self, field: str, items: Dict[str, float], *,
+                 ttl: timedelta | None = None, expires_at: float | None = None) -> None:
+        """まとめて保存（1 トランザクション）"""
+        exp = self._expiry(field, ttl, expires_at)
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO refdata VALUES (?, ?, ?, ?)",
+                ((field, s, float(v), exp) for s, v in items.items()),
+            )
+            self._db.execute("COMMIT")
+
+    def purge(self) -> int:
+        """期限切れの行を削除して件数を返す"""
+        with self._lock:
+            return self._db.execute("DELETE FROM refdata WHERE expires_at<=?", (time.time(),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: RefCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> RefCache:
+    """プロセス共通の RefCache を返す（初回呼び出しで DB を開く）"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RefCache()
+        return _cache
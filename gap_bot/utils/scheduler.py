@@ -0,0 +1,185 @@
+"""
+gap_bot.utils.scheduler
+-----------------------
+asyncio 上の小さなタスクスケジューラ（run_live の監視ループ用）
+
+1 本の while + time.sleep で全部を順番に回す代わりに、関心ごとに別タスクにする:
+
+    sch = Scheduler()
+    sch.every("halt_poll", 30, poll_halts, blocking=True)     # 同期 I/O はスレッドで（ループを止めない）
+    sch.at("cancel_10am", cancel_time, cancel_unfilled, blocking=True)
+    sch.loop("quotes", consume_quotes)                        # 常駐コルーチン
+    await sch.run(until=end_time)
+    print("\\n".join(sch.report()))
+
+* every: 固定レート。遅れて間に合わなかった回は詰めて実行せず飛ばす（skipped）
+* 各タスクの実行時間と「予定時刻からの遅れ」(lag) を記録する
+* イベントループ自体の遅れ（loop_lag）も別タスクで測る
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger("gap_bot.scheduler")
+
+Job = Callable[[], Union[Any, Awaitable[Any]]]
+
+LAG_PROBE_SEC = 0.25   # ループ遅延を測る間隔
+
+
+@dataclass
+class TaskStats:
+    """1 タスクぶんの計測値（ms）"""
+    runs: int = 0
+    errors: int = 0
+    skipped: int = 0               # 遅れで飛ばした回数（every のみ）
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    lag_max_ms: float = 0.0        # 予定時刻からの遅れの最大
+    lag_last_ms: float = 0.0
+    last_error: Optional[str] = None
+
+    def record(self, run_ms: float, lag_ms: float = 0.0) -> None:
+        self.runs += 1
+        self.total_ms += run_ms
+        self.last_ms = run_ms
+        self.max_ms = max(self.max_ms, run_ms)
+        self.lag_last_ms = lag_ms
+        self.lag_max_ms = max(self.lag_max_ms, lag_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg = self.total_ms / self.runs if self.runs else 0.0
+        return {"runs": self.runs, "errors": self.errors, "skipped": self.skipped,
+                "avg_ms": round(avg, 1), "max_ms": round(self.max_ms, 1),
+                "lag_max_ms": round(self.lag_max_ms, 1), "last_error": self.last_error}
+
+
+class Scheduler:
+    """every / at / loop で登録したタスクを 1 つのイベントループで回す"""
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._specs: List[Callable[[], Awaitable[None]]] = []
+        self._stop = asyncio.Event()
+        self.stats: Dict[str, TaskStats] = {"loop_lag": TaskStats()}
+
+    # ---------- 実行の共通部 ----------
+    async def _call(self, name: str, fn: Job, blocking: bool, lag_ms: float = 0.0) -> None:
+        """fn を 1 回実行して計測する。例外は記録して握りつぶす（他のタスクは止めない）"""
+        st = self.stats[name]
+        t0 = self._clock()
+        try:
+            if blocking:
+                res = await asyncio.to_thread(fn)
+            else:
+                res = fn()
+            if inspect.isawaitable(res):
+                await res
+        except Exception as e:
+            st.errors += 1
+            st.last_error = repr(e)
+            logger.warning("task %s failed: %r", name, e)
+        st.record((self._clock() - t0) * 1000, lag_ms)
+
+    # ---------- 登録 ----------
+    def every(self, name: str, interval: float, fn: Job, *, blocking: bool = False, first_delay: float = 0.0) -> None:
+        """interval 秒ごとに fn を実行（blocking=True なら同期関数をスレッドで実行）"""
+        self.stats[name] = TaskStats()
+
+        async def runner() -> None:
+            due = self._clock() + first_delay
+            while not self._stop.is_set():
+                delay = due - self._clock()
+                if delay > 0 and await self._sleep(delay):
+                    return
+                lag_ms = max(0.0, (self._clock() - due) * 1000)
+                await self._call(name, fn, blocking, lag_ms)
+                due += interval
+                now = self._clock()
+                if due < now:                      # 実行が interval を超えた → 取りこぼした回は飛ばす
+                    missed = int((now - due) // interval) + 1
+                    self.stats[name].skipped += missed
+                    due += missed * interval
+
+        self._specs.append(runner)
+
+    def at(self, name: str, when: datetime, fn: Job, *, blocking: bool = False) -> None:
+        """壁時計の when（tz 付き）に 1 回だけ fn を実行。既に過ぎていれば即実行"""
+        self.stats[name] = TaskStats()
+
+        async def runner() -> None:
+            delay = (when - datetime.now(tz=when.tzinfo)).total_seconds()
+            if delay > 0 and await self._sleep(delay):
+                return
+            lag_ms = max(0.0, (datetime.now(tz=when.tzinfo) - when).total_seconds() * 1000)
+            await self._call(name, fn, blocking, lag_ms)
+
+        self._specs.append(runner)
+
+    def loop(self, name: str, fn: Callable[[], Awaitable[Any]]) -> None:
+        """停止まで fn を繰り返し await する常駐タスク（fn 自身が待ち受けを持つこと。1 回ごとに計測）"""
+        self.stats[name] = TaskStats()
+
+        async def runner() -> None:
+            while not self._stop.is_set():
+                await self._call(name, fn, False)
+
+        self._specs.append(runner)
+
+    # ---------- 実行 ----------
+    async def _sleep(self, sec: float) -> bool:
+        """sec 秒待つ。途中で stop されたら True"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=sec)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _probe_lag(self) -> None:
+        """LAG_PROBE_SEC ごとに sleep の超過分を測り、ループが詰まっていないかを見る"""
+        st = self.stats["loop_lag"]
+        while not self._stop.is_set():
+            t0 = self._clock()
+            if await self._sleep(LAG_PROBE_SEC):
+                return
+            lag = max(0.0, (self._clock() - t0 - LAG_PROBE_SEC) * 1000)
+            st.record(0.0, lag)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self, until: Optional[datetime] = None) -> None:
+        """登録済みタスクを起動し、until（tz 付き）または stop() まで回す"""
+        tasks = [asyncio.create_task(spec()) for spec in self._specs]
+        tasks.append(asyncio.create_task(self._probe_lag()))
+        try:
+            if until is not None:
+                delay = (until - datetime.now(tz=until.tzinfo)).total_seconds()
+                await self._sleep(max(delay, 0.0))
+            else:
+                await self._stop.wait()
+        finally:
+            self._stop.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------- 表示 ----------
+    def report(self) -> List[str]:
+        """タスクごとの 1 行サマリ"""
+        out = []
+        for name, st in self.stats.items():
+            d = st.as_dict()
+            out.append(f"{name:<12} runs={d['runs']:<5} err={d['errors']:<3} skip={d['skipped']:<3} "
+                       f"avg={d['avg_ms']:>7.1f}ms max={d['max_ms']:>7.1f}ms lag_max={d['lag_max_ms']:>7.1f}ms")
+        return out
+
+    def log_stats(self, log: Optional[logging.Logger] = None) -> None:
+        for line in self.report():
+            (log or logger).info("sched %s", line)
@@ -0,0 +1,130 @@
+"""
+scripts.replay_quotes
+---------------------
+記録済み気配を run_live の alpaca-ws 経路へ流し直すリプレイハーネス
+
+* run_live --provider alpaca-ws --record logs/quotes.jsonl で保存した JSONL か、
+  gap_bot.tape の quote.tape（run_live / run_entry / run_screen が常時記録）を入力にする
+* 受信スレッドの代わりに LatestQuotes.update() へ気配を書き込み、
+  監視ループと同じ wait_updates() → on_quote() で判定させる
+* 発注はしない（paper 固定・Discord 通知も無効）
+* 受信 → 判断完了までの遅延 (tick-to-decision) を p50 / p95 / max で出力
+
+    python -m scripts.replay_quotes --quotes logs/quotes.jsonl --speed 0
+    python -m scripts.replay_quotes --quotes logs/quotes.jsonl --positions positions.json --speed 1
+    python -m scripts.replay_quotes --quotes data/tape/2025-08-01/quote.tape --speed 20
+"""
+
+# ── import ────────────────────────────────────────────
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from scripts import run_live
+from gap_bot.tape import iter_quotes
+from sdk.quote_table import LatestQuotes, load_recorded
+
+
+# ── ポジション ───────────────────────────────────────
+def positions_from_quotes(quotes: List[Dict], tp: float) -> List[dict]:
+    """--positions 省略時: 各銘柄の最初の気配を建値としたロング 100 株を仮置きする"""
+    out: Dict[str, dict] = {}
+    for q in quotes:
+        sym = str(q["symbol"]).upper()
+        px = run_live.quote_price(q)
+        if sym in out or not px:
+            continue
+        out[sym] = {"symbol": sym, "entry": float(px), "side": "long",
+                    "sl": round(px * (1 - 0.025), 2), "tp_pct": tp, "qty": 100, "order_id": "REPLAY"}
+    return list(out.values())
+
+
+# ── 本体 ─────────────────────────────────────────────
+def replay(quotes: Iterable[Dict], positions: List[dict], *, speed: float = 0.0, tp: float = 0.07) -> dict:
+    """
+    何をする関数? → quotes を記録時刻どおり（speed 倍速, 0 = 待たない）に流し、
+                    監視ループが判断し終えるまでの遅延と判断件数を集計して返す
+    """
+    quotes = list(quotes)
+    table = LatestQuotes()
+    by_sym = {p["symbol"]: p for p in positions}
+    latencies: List[float] = []
+    decisions: Counter = Counter()
+    done = threading.Event()
+
+    def _feed() -> None:
+        t_first = quotes[0].get("timestamp") if quotes else None
+        start = time.perf_counter()
+        for q in quotes:
+            if speed > 0 and t_first is not None and q.get("timestamp") is not None:
+                due = (q["timestamp"] - t_first).total_seconds() / speed
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            table.update(q)
+        done.set()
+
+    feeder = threading.Thread(target=_feed, name="replay-feed", daemon=True)
+    t0 = time.perf_counter()
+    feeder.start()
+    while True:
+        finished = done.is_set()                 # 先に見ておく（最後の更新を取りこぼさない）
+        fresh = table.wait_updates(timeout=0.05)
+        for sym, q in fresh.items():
+            pos = by_sym.get(sym)
+            if pos is None:
+                continue
+            for d in run_live.on_quote(pos, q, client=None, tp=tp, paper=True):
+                decisions[d] += 1
+            latencies.append(time.perf_counter() - q["_recv"])
+        if finished and not fresh:
+            break
+    elapsed = time.perf_counter() - t0
+
+    lat = sorted(latencies)
+    pick = lambda r: lat[min(len(lat) - 1, int(len(lat) * r))] * 1000 if lat else 0.0
+    return {
+        "quotes": len(quotes),
+        "processed": len(lat),
+        "conflated": table.conflated,
+        "decisions": dict(decisions),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "max_ms": lat[-1] * 1000 if lat else 0.0,
+        "elapsed_sec": elapsed,
+    }
+
+
+# ── CLI ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="replay recorded quotes through run_live decisions")
+    p.add_argument("--quotes", type=Path, required=True, help="記録した気配 JSONL / quote.tape")
+    p.add_argument("--positions", type=Path, default=None, help="ポジション JSON（省略時は最初の気配を建値に仮置き）")
+    p.add_argument("--speed", type=float, default=0.0, help="再生速度 (1=実時間, 0=待たずに流す)")
+    p.add_argument("--tp", type=float, default=0.07, help="TP 幅(例 0.07=+7%)")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    os.environ.pop("DISCORD_WEBHOOK_URL", None)          # リプレイで通知を飛ばさない
+    quotes = list(iter_quotes(args.quotes) if args.quotes.suffix == ".tape" else load_recorded(args.quotes))
+    if args.positions:
+        positions = json.loads(args.positions.read_text())
+    else:
+        positions = positions_from_quotes(quotes, args.tp)
+
+    st = replay(quotes, positions, speed=args.speed, tp=args.tp)
+    print(f"quotes={st['quotes']} processed={st['processed']} conflated={st['conflated']} "
+          f"decisions={st['decisions']}")
+    print(f"tick-to-decision p50={st['p50_ms']:.2f}ms p95={st['p95_ms']:.2f}ms max={st['max_ms']:.2f}ms "
+          f"({st['elapsed_sec']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
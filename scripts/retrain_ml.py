@@ -1,6 +1,6 @@
 
 """Step 9  : ML フィードバック β版
-strategy.csv → 特徴量 → LightGBM でオンライン学習し、model.pkl を更新する
+日次 KPI（ストアの strategy テーブル）→ 特徴量 → LightGBM でオンライン学習し、model.pkl を更新する
 """
 
 from __future__ import annotations
@@ -14,16 +14,14 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score
 
-STRATEGY_CSV = Path("strategy.csv")
+from gap_bot.store import load_strategy
+
 MODEL_PATH = Path("gap_bot/ml/model.pkl")
 
 
 def load_dataset(days: int | None = None) -> tuple[pd.DataFrame, pd.Series]:
-    """strategy.csv から直近 days 日 (None: 全期間) を読み出して X, y を返す"""
-    df = pd.read_csv(STRATEGY_CSV, parse_dates=["date"])
-    if days:
-        cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
-        df = df[df["date"] >= cutoff]
+    """日次 KPI から直近 days 日 (None: 全期間) を読み出して X, y を返す（対象日のパーティションだけ読む）"""
+    df = load_strategy(days=days)
     X = df[["total_R", "winrate_%", "avg_R"]]
     y = (df["total_R"] > 0).astype(int)  # 黒字 = 1, 赤字 = 0
     return X, y
@@ -5,7 +5,7 @@
 1. 口座の全オープンポジションを取得
 2. 各ポジションを成行決済
 3. 未約定注文を全てキャンセル
-4. 当日の取引履歴を CSV 追記 (logs/close_log_YYYYMMDD.csv)
+4. 当日の取引履歴を CSV 追記 (logs/close_YYYYMMDD.csv / 注文 ID 一覧は logs/close_log_YYYYMMDD.csv)
 """
 
 # ── import: ファイル冒頭に統一 ──────────────────────────
@@ -16,6 +16,7 @@ import datetime as dt
 
 from typing import List
 from gap_bot.utils.notify import send_discord_message  # 決済イベントを Discord に送信
+from gap_bot.utils.logger import get_event_logger      # クローズ注文の構造化ログ
 
 
 from sdk.webull_sdk_wrapper import WebullClient  # 独自ラッパ
@@ -107,7 +108,7 @@ def main() -> None:
     for pos in positions:
         if not args.dry_run:
             oid = market_close_position(client, pos["symbol"], pos["qty"])
-            log_append_csv(f"close_log_{dt.date.today():%Y%m%d}.csv", [dt.datetime.utcnow().isoformat(), pos["symbol"], pos["qty"], oid])  # クローズ注文を 1 行ずつ追記
+            get_event_logger("close").log(symbol=pos["symbol"], qty=pos["qty"], order_id=oid)  # クローズ注文を 1 行ずつ記録（まとめ書き）
 
 
             order_ids.append(oid)
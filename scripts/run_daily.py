@@ -1,44 +1,30 @@
 """Step 8 日次集計スクリプト
 
-- 前日 or 引数指定の日付の order_log / close_log を読み込み
+- 前日 or 引数指定の日付の order / close イベントを列指向ストア（gap_bot.store）から読み込み
+  （その日のパーティションだけを読む。ストアに無い日は logs/<name>_YYYYMMDD.csv）
 - 各取引の R 値と損益を計算して metrics をまとめる
-- strategy.csv に追記
+- ストアの strategy テーブルに追記
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
 import datetime as dt
-from pathlib import Path
 from typing import List, Tuple
 
-LOG_DIR = Path("logs")
-STRATEGY_CSV = Path("strategy.csv")
+from gap_bot.store import default_store, read_day
 
 
-def read_order_log() -> List[Tuple[str, float, float]]:
-    """order_log.csv → [(symbol, entry, sl)] を返す"""
-    fpath = LOG_DIR / "order_log.csv"
-    out = []
-    if not fpath.exists():
-        return out
-    with fpath.open() as f:
-        for sym, *_rest, entry, sl, _ in csv.reader(f):
-            out.append((sym, float(entry), float(sl)))
-    return out
+def read_order_log(date: dt.date) -> List[Tuple[str, float, float]]:
+    """order_YYYYMMDD.csv → [(symbol, entry, sl)] を返す"""
+    df = read_day("order", date).dropna(subset=["limit", "sl"])
+    return list(zip(df["symbol"], df["limit"].astype(float), df["sl"].astype(float)))
 
 
 def read_close_log(date: dt.date) -> List[Tuple[str, str]]:
-    """close_log_YYYYMMDD.csv → [(symbol, oid)]"""
-    fpath = LOG_DIR / f"close_log_{date:%Y%m%d}.csv"
-    out = []
-    if not fpath.exists():
-        return out
-    with fpath.open() as f:
-        for _ts, sym, qty, _oid in csv.reader(f):
-            out.append((sym, qty))
-    return out
+    """close_YYYYMMDD.csv → [(symbol, qty)]"""
+    df = read_day("close", date)
+    return list(zip(df["symbol"], df["qty"]))
 
 
 def calc_metrics(
@@ -60,13 +46,13 @@ def calc_metrics(
 
 
 def append_strategy(date: dt.date, total_r: float, winrate: float, avg_r: float) -> None:
-    """strategy.csv に日次 KPI を追記"""
-    is_new = not STRATEGY_CSV.exists()
-    with STRATEGY_CSV.open("a", newline="") as f:
-        writer = csv.writer(f)
-        if is_new:
-            writer.writerow(["date", "total_R", "winrate_%", "avg_R"])
-        writer.writerow([date.isoformat(), round(total_r, 3), round(winrate, 1), round(avg_r, 3)])
+    """日次 KPI をストアの strategy テーブル（date=YYYY-MM-DD パーティション）に追記"""
+    default_store().append("strategy", [{
+        "date": date.isoformat(),
+        "total_R": round(total_r, 3),
+        "winrate_%": round(winrate, 1),
+        "avg_R": round(avg_r, 3),
+    }])
 
 
 def main() -> None:
@@ -80,7 +66,7 @@ def main() -> None:
         else (dt.date.today() - dt.timedelta(days=1))
     )
 
-    orders = read_order_log()
+    orders = read_order_log(target_date)
     closes = read_close_log(target_date)
     total_r, winrate, avg_r = calc_metrics(orders, closes)
     append_strategy(target_date, total_r, winrate, avg_r)
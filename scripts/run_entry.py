@@ -5,118 +5,308 @@ Step 2-3 : 指値エントリー & ブラケット注文
 
 * --provider webull | alpaca
     指値価格計算に使う Bid/Ask を Webull SDK または Alpaca REST へ切替
-* --screened screened_YYYYMMDD.json
-    run_screen.py の結果ファイルを入力
+* --screened screened_YYYYMMDD.jsonl
+    run_screen.py の結果ファイルを入力（旧形式の .json も可）
+* --workers / --rate / --burst
+    気配を一括取得 → 指値を並列発注（ブローカーのレート上限はトークンバケットで守る）
+    → 親注文が受け付けられた銘柄から順にブラケットを添付
+    1 件ごとの発注レイテンシは logs/entry_latency_YYYYMMDD.csv に残る
+* --stage --at 09:30:00
+    2 段階モード。事前に銘柄検証・株数・認証/instrument_id を済ませて待機し、
+    トリガー時刻（ET）には気配を 1 回取り直して指値だけ更新して送る
+    （queue_ms = トリガーから送信までの時間）
 """
 
 # ── import ────────────────────────────────────────────
 import argparse
-import csv
-import json
-import math
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 from gap_bot.filters import StockData
+from gap_bot.position_sizer import calc_shares, entry_limit   # 指値・株数のルール（バックテストと共有）
+from gap_bot.screened_io import read_screened
+from gap_bot.tape import get_tape
 from sdk.webull_sdk_wrapper import WebullClient          # 発注は必ず Webull
-from datetime import datetime
-from gap_bot.utils.logger import append_csv
+from gap_bot.utils.logger import get_event_logger
+from gap_bot.utils.rate_limit import TokenBucket
 
 # Alpaca REST Quote
 from sdk.quotes_alpaca import get_quote as alpaca_quote  # type: ignore
+from sdk.quotes_alpaca import get_quotes as alpaca_quotes  # type: ignore
+from sdk.quote_func import QuoteFunc
+
+ET = ZoneInfo("America/New_York")
 
 # ── 共通ヘルパ ───────────────────────────────────────
-def make_quote_func(provider: str) -> Callable[[str], Dict]:
-    """provider に合わせて symbol→Bid/Ask dict を返す関数を生成"""
+def make_quote_func(provider: str) -> QuoteFunc:
+    """provider に合わせて symbol→Bid/Ask dict を返す関数を生成（.many() で一括取得も可）"""
+    record = get_tape().quotes    # 取得した気配はすべてテープに残す
     if provider == "alpaca":
-        return lambda s: alpaca_quote(s)
+        return QuoteFunc(lambda s: alpaca_quote(s), lambda syms: alpaca_quotes(syms), record=record)
     # default webull
-    return lambda s: webull_client.get_quote(s, extended=True)
+    return QuoteFunc(
+        lambda s: webull_client.get_quote(s, extended=True),
+        lambda syms: webull_client.get_quotes(syms, extended=True),
+        record=record,
+    )
 
 
 def load_screened(path: Path) -> List[StockData]:
-    with path.open() as f:
-        return [StockData(**d) for d in json.load(f)]
-
-
-def calc_shares(equity: float, price: float, kelly: float, max_loss_pct: float) -> int:
-    risk_cap = equity * max_loss_pct * kelly
-    size_risk = risk_cap / price
-    size_cap  = (equity * 0.05) / price
-    return int(math.floor(min(size_risk, size_cap)))
+    return read_screened(path)          # JSONL / 旧 JSON を自動判別して一括で読む
 
 
 # ── CLI ───────────────────────────────────────────────
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="limit entry + bracket order")
     p.add_argument("--provider", choices=["webull", "alpaca"], default="webull")
-    p.add_argument("--screened", type=Path, required=True, help="screened_*.json")
+    p.add_argument("--screened", type=Path, required=True, help="screened_*.jsonl")
     p.add_argument("--equity", type=float, required=True, help="口座資金 USD")
     p.add_argument("--kelly", type=float, default=0.2)
     p.add_argument("--max-loss-pct", type=float, default=0.02)
     p.add_argument("--tp", type=float, default=0.07)
     p.add_argument("--sl", type=float, default=0.025)
+    p.add_argument("--workers", type=int, default=4, help="並列発注スレッド数")
+    p.add_argument("--rate", type=float, default=4.0, help="ブローカー API 上限 req/sec（発注・ブラケット共通）")
+    p.add_argument("--burst", type=float, default=4.0, help="上限に余裕があるとき連続で送れる件数")
+    p.add_argument("--stage", action="store_true", help="事前準備して --at の時刻に一斉送信する 2 段階モード")
+    p.add_argument("--at", default="09:30:00", help="--stage の送信時刻 HH:MM[:SS]（ET）")
     return p.parse_args()
 
-# 注文情報をCSVに追記する関数を定義
-def append_csv(order_id, symbol, qty, entry_price, tp_price, sl_price):
-    with open("logs/order_log.csv", "a", newline="") as f:
-        writer = csv.writer(f)
-        # 各注文情報を1行に追記（例: シンボル、数量、エントリー価格、利確価格、損切価格、注文ID）
-        writer.writerow([symbol, qty, entry_price, tp_price, sl_price, order_id])
 
+# ── 発注パイプライン ──────────────────────────────────
+LATENCY_LOG = "entry_latency"   # logs/entry_latency_YYYYMMDD.csv（列は gap_bot.utils.logger.SCHEMAS）
 
-# ── main ─────────────────────────────────────────────
-def main() -> None:
-    args = parse_args()
-    global webull_client
-    webull_client = WebullClient.from_env()
-    quote_func = make_quote_func(args.provider)
-
-    stocks = load_screened(args.screened)
-    print(f"[{datetime.utcnow():%H:%M:%S}] processing {len(stocks)} tickers…")
 
+def plan_entries(stocks: List[StockData], quotes: Dict[str, dict], quote_func, args) -> List[Dict[str, Any]]:
+    """
+    何をする関数? → 気配から指値・株数・TP/SL を決め、発注する銘柄だけの計画を返す（ネットワークは取り損ねた気配の再取得のみ）
+    """
+    plans = []
     for stk in stocks:
-        q = quote_func(stk.symbol)
+        q = quotes.get(stk.symbol) or quote_func(stk.symbol)
         bid, ask = q["bidPrice"], q["askPrice"]
         if not bid or not ask:
             print(f"  {stk.symbol}: Bid/Ask 不正でスキップ")
             continue
 
-        limit_px = (bid + ask) / 2 * 1.002
+        limit_px = entry_limit(bid, ask)
         shares   = calc_shares(args.equity, limit_px, args.kelly, args.max_loss_pct)
         if shares == 0:
             print(f"  {stk.symbol}: 株数 0 → スキップ")
             continue
+        plans.append(price_plan(stk.symbol, shares, limit_px, args))
+    return plans
+
+
+def price_plan(symbol: str, qty: int, limit_px: float, args) -> Dict[str, Any]:
+    """指値から TP / SL を決めた 1 銘柄ぶんの発注内容"""
+    return {
+        "symbol": symbol,
+        "qty": qty,
+        "limit": round(limit_px, 2),
+        "tp": round(limit_px * (1 + args.tp), 2),
+        "sl": round(limit_px * (1 - args.sl), 2),
+        "break_even": args.tp / 2,
+    }
+
+
+# ── 2 段階モード（事前準備 → トリガーで送信） ─────────
+_SYMBOL_RE = re.compile(r"^[A-Z][A-Z.\-]{0,5}$")   # 米国株のティッカー（BRK.B なども可）
+
+
+def stage_entries(stocks: List[StockData], quotes: Dict[str, dict], args) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    何をする関数? → 寄り前に銘柄を検証し、その時点の気配で株数を決めておく
+    戻り値: (準備できた銘柄, symbol → スキップ理由)
+    """
+    staged, skipped = [], {}
+    for stk in stocks:
+        sym = str(stk.symbol).strip().upper()
+        if not _SYMBOL_RE.match(sym):
+            skipped[sym] = "bad_symbol"
+            continue
+        q = quotes.get(sym) or {}
+        bid, ask = q.get("bidPrice"), q.get("askPrice")
+        if not bid or not ask:
+            skipped[sym] = "no_quote"
+            continue
+        px = entry_limit(bid, ask)
+        qty = calc_shares(args.equity, px, args.kelly, args.max_loss_pct)
+        if qty == 0:
+            skipped[sym] = "zero_qty"
+            continue
+        staged.append({"symbol": sym, "qty": qty, "stage_px": round(px, 2)})
+    return staged, skipped
+
+
+def release_staged(client, staged: List[Dict[str, Any]], quote_func, args, *,
+                   workers: int, bucket: TokenBucket) -> List[Dict[str, Any]]:
+    """
+    何をする関数? → トリガー時: 気配を 1 回まとめて取り直し、指値・TP/SL だけ更新して並列送信する
+    株数は準備時より増やさない（値上がりしていればリスク上限に合わせて減らす）
+    """
+    t_trigger = time.perf_counter()
+    quotes = quote_func.many(st["symbol"] for st in staged)
+    plans = []
+    for st in staged:
+        q = quotes.get(st["symbol"]) or {}
+        bid, ask = q.get("bidPrice"), q.get("askPrice")
+        if not bid or not ask:
+            print(f"  {st['symbol']}: トリガー時の気配なし → スキップ")
+            continue
+        px = entry_limit(bid, ask)
+        qty = min(st["qty"], calc_shares(args.equity, px, args.kelly, args.max_loss_pct))
+        if qty > 0:
+            plans.append(price_plan(st["symbol"], qty, px, args))
+    return submit_all(client, plans, workers=workers, bucket=bucket, t_start=t_trigger)
 
-        # --- 指値エントリー ---
-        pid = webull_client.place_limit_order(
-            symbol=stk.symbol,
-            qty=shares,
-            price=round(limit_px, 2),
-            extended_hours=True,
-        )["orderId"]
-        webull_client.attach_bracket(
+
+def release_time(at: str, now: Optional[datetime] = None) -> datetime:
+    """--at（HH:MM[:SS]、ET）→ 今日のその時刻（tz 付き）"""
+    hh, mm, *ss = (int(x) for x in at.split(":"))
+    now = now or datetime.now(tz=ET)
+    return now.astimezone(ET).replace(hour=hh, minute=mm, second=ss[0] if ss else 0, microsecond=0)
+
+
+def wait_until(target: datetime) -> None:
+    """target（tz 付き）まで待つ。最後の 50ms は sleep の粗さを避けて短く刻む"""
+    while True:
+        left = (target - datetime.now(tz=target.tzinfo)).total_seconds()
+        if left <= 0:
+            return
+        time.sleep(min(left - 0.05, 1.0) if left > 0.05 else 0.001)
+
+
+def submit_entry(client, plan: Dict[str, Any], bucket: TokenBucket, t_start: float) -> Dict[str, Any]:
+    """
+    何をする関数? → 1 銘柄の指値を送り、受け付けられたらその場でブラケットを添付する（ワーカースレッドで実行）
+    戻り値: plan + order_id / status / 各段のレイテンシ(ms)
+    """
+    out = dict(plan, order_id=None, status="rejected", place_ms=None, bracket_ms=None)
+    bucket.acquire_blocking()
+    t0 = time.perf_counter()
+    out["queue_ms"] = (t0 - t_start) * 1000          # パイプライン開始からレート待ちを含めて送信までの時間
+    try:
+        res = client.place_limit_order(
+            symbol=plan["symbol"],
+            side="buy",
+            qty=plan["qty"],
+            price=plan["limit"],
+            extended=True,
+        )
+    except Exception as e:
+        out["status"] = f"error:{e!r}"
+        return out
+    t1 = time.perf_counter()
+    out["place_ms"] = (t1 - t0) * 1000
+    pid = (res or {}).get("orderId")
+    if not pid:
+        return out
+    out["order_id"] = pid
+
+    # --- 親注文が受け付けられた銘柄からブラケット添付 ---
+    bucket.acquire_blocking()
+    t2 = time.perf_counter()
+    try:
+        client.attach_bracket(
             parent_order_id=pid,
-            take_profit=round(limit_px * (1 + args.tp), 2),
-            stop_loss=round(limit_px * (1 - args.sl), 2),
-            break_even_distance=args.tp / 2,
+            take_profit=plan["tp"],
+            stop_loss=plan["sl"],
+            break_even_distance=plan["break_even"],
         )
-        # 発注完了後、注文情報をCSVログに追記
-        append_csv("order_log.csv", [
-            datetime.utcnow().isoformat(),
-            stk.symbol,
-            shares,
-            round(limit_px, 2),
-            round(limit_px * (1 + args.tp), 2),
-            round(limit_px * (1 - args.sl), 2),
-            pid                     # ← place_limit_order の戻り値で取得した注文 ID
-        ])
-
-
-        time.sleep(0.25)   # レート制限対策
+        out["status"] = "ok"
+    except Exception as e:
+        out["status"] = f"bracket_error:{e!r}"
+    out["bracket_ms"] = (time.perf_counter() - t2) * 1000
+    return out
+
+
+def submit_all(client, plans: List[Dict[str, Any]], *, workers: int, bucket: TokenBucket,
+               t_start: float | None = None) -> List[Dict[str, Any]]:
+    """
+    何をする関数? → 計画を並列に発注し、終わった順に注文ログ・レイテンシログへ書く（CSV 書き込みはこのスレッドだけ）
+    t_start: レイテンシの起点（省略時は今。2 段階モードではトリガー時刻）
+    """
+    t_start = time.perf_counter() if t_start is None else t_start
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="entry") as pool:
+        futs = [pool.submit(submit_entry, client, plan, bucket, t_start) for plan in plans]
+        for fut in as_completed(futs):
+            r = fut.result()
+            r["total_ms"] = (time.perf_counter() - t_start) * 1000
+            results.append(r)
+            if r["order_id"]:
+                get_event_logger("order").log(**{k: r[k] for k in ("symbol", "qty", "limit", "tp", "sl", "order_id")})
+            get_event_logger(LATENCY_LOG).log(
+                **{k: r.get(k) for k in ("symbol", "qty", "limit", "order_id", "status")},
+                **{k: _round_ms(r.get(k)) for k in ("queue_ms", "place_ms", "bracket_ms", "total_ms")},
+            )
+            print(f"  {r['symbol']}: {r['status']} #{r['order_id']} place={_ms(r['place_ms'])}ms "
+                  f"total={_ms(r['total_ms'])}ms")
+    return results
+
+
+def _ms(v: Optional[float]) -> str:
+    return "" if v is None else f"{v:.1f}"
+
+
+def _round_ms(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v, 1)
+
+
+# ── main ─────────────────────────────────────────────
+def main() -> None:
+    args = parse_args()
+    global webull_client
+    webull_client = WebullClient.from_env()
+    quote_func = make_quote_func(args.provider)
+
+    stocks = load_screened(args.screened)
+    print(f"[{datetime.utcnow():%H:%M:%S}] processing {len(stocks)} tickers…")
+
+    # 認証・接続・instrument_id を発注前に温めておく（最初の発注で再認証を払わない）
+    # --stage は --at まで待つので、待機中もセッション期限前の自動再認証を回しておく（送信後に止める）
+    if hasattr(webull_client, "warm_up"):
+        webull_client.warm_up([stk.symbol for stk in stocks], keepalive=args.stage)
+
+    # 気配は全銘柄ぶんを 1 リクエストで先に取る（取れなかった銘柄だけ個別に取り直す）
+    quotes = quote_func.many(stk.symbol for stk in stocks)
+    bucket = TokenBucket(rate=args.rate, capacity=args.burst)
+
+    if args.stage:
+        # 事前準備: 検証・株数まで済ませ、トリガー時は気配の取り直しと送信だけにする
+        staged, skipped = stage_entries(stocks, quotes, args)
+        for sym, why in skipped.items():
+            print(f"  {sym}: {why} → スキップ")
+        target = release_time(args.at)
+        late = (datetime.now(tz=ET) - target).total_seconds()
+        if late > 0:
+            print(f"[WARN] --at {args.at} ET は {late:.0f}s 前に過ぎています → 待たずに送信します")
+        print(f"[{datetime.utcnow():%H:%M:%S}] staged {len(staged)} entries, release at {target:%H:%M:%S} ET")
+        try:
+            wait_until(target)
+            results = release_staged(webull_client, staged, quote_func, args, workers=args.workers, bucket=bucket)
+        finally:
+            if hasattr(webull_client, "close"):
+                webull_client.close()   # 何をする行か: 待機中だけ回した自動再認証スレッドを止める
+        plans = staged
+    else:
+        # 指値を並列に送り、受け付けられた銘柄から順にブラケットを添付（レート上限はバケットで守る）
+        plans = plan_entries(stocks, quotes, quote_func, args)
+        results = submit_all(webull_client, plans, workers=args.workers, bucket=bucket)
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    sent = sorted(r["queue_ms"] for r in results if r.get("queue_ms") is not None)
+    get_event_logger(LATENCY_LOG).flush(fsync=True)
+    get_event_logger("order").flush(fsync=True)
+    print(f"[{datetime.utcnow():%H:%M:%S}] submitted {ok}/{len(plans)} entries "
+          f"(last send +{_ms(sent[-1] if sent else None)}ms, rate wait {bucket.waited_sec:.2f}s, "
+          f"latency → logs/{LATENCY_LOG}_YYYYMMDD.csv)")
 
 
 if __name__ == "__main__":
@@ -8,21 +8,34 @@ scripts.run_live
 3) TP 到達で SL→TP/2 利確幅へ
 4) REST で Halt 検知 → Unhalt 5 分以内に逆指値(+1 %) を 1 回だけ発注
 
---provider=webull | alpaca で
+--provider=webull | alpaca | alpaca-ws | alpaca-bus で
 Bid/Ask ソースを切替
+
+①〜④ はそれぞれ asyncio の別タスク（gap_bot.utils.scheduler）で、自分の間隔 / 時刻で動く。
+ブローカー呼び出しはスレッドで実行し、気配の判定は銘柄ごとに並行する（遅い発注が他銘柄の判定を待たせない）。
+各タスクの実行時間とループ遅延は 60 秒ごとと終了時に表示する
 """
 
 # ── import（冒頭で統一）────────────────────────
 import argparse
+import asyncio
+import threading
 import time
 import requests
-from datetime import datetime, timedelta
-from typing import Callable, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Callable, ContextManager, Dict, List
 from decimal import Decimal
 from gap_bot.filters import StockData                    # 型利用のみ
 from sdk.webull_sdk_wrapper import WebullClient          # Webull API
 from sdk.quotes_alpaca import get_quote as alpaca_quote  # Alpaca REST
-from gap_bot.utils.notify import send_discord_message  # 取引イベントを Discord へ通知
+from sdk.quotes_alpaca import get_quotes as alpaca_quotes  # Alpaca REST（複数銘柄）
+from sdk.quote_func import QuoteFunc
+from sdk.order_book import normalize as normalize_order
+from gap_bot.utils.notify import flush_discord, notifier_stats, send_discord_message  # 取引イベントを Discord へ通知（裏スレッド送信）
+from gap_bot.utils.scheduler import Scheduler
+from gap_bot.tape import get_tape                        # 気配・注文イベントのバイナリ記録
 from zoneinfo import ZoneInfo  # DST対応の米国東部時間を扱うために使用（importは冒頭に追加）
 
 
@@ -34,7 +47,7 @@ ET = ZoneInfo("America/New_York")  # 何をする行か: DST対応のETに切替
 # ── WebullClient 生成ヘルパ ───────────────────
 def get_client() -> WebullClient:
     """環境変数から初期化して使い回す WebullClient"""
-    global webull_client, next_poll  # 何をする行か: main内で next_poll を更新できるようにグローバル参照にする
+    global webull_client
 
     if webull_client is None:
         try:
@@ -85,6 +98,28 @@ def update_trailing_sl(pos: dict, price: float, tp_pct: float) -> float:
     pos["sl"] = sl
     return sl
 
+# ── 注文検索ヘルパ ────────────────────────────
+def find_orders(client, symbol: str | None = None, side: str | None = None, kind: str | None = None) -> list:
+    """
+    何をする関数? → アクティブ注文を symbol / side(buy/sell) / kind(stop/limit/…) で絞って返す
+    WebullClient の注文台帳（find_orders / open_orders）があればそれを使い、
+    無いクライアントでは get_active_orders() を取り直して同じ条件で絞る
+    """
+    if symbol is not None and hasattr(client, "find_orders"):
+        return client.find_orders(symbol, side=side, kind=kind)
+    if symbol is None and side is None and kind is None and hasattr(client, "open_orders"):
+        return client.open_orders()
+    out = []
+    for raw in client.get_active_orders() or []:
+        o = normalize_order(raw)
+        if symbol is not None and o["symbol"] != symbol.upper():
+            continue
+        if (side is not None and o["side"] != side) or (kind is not None and o["kind"] != kind):
+            continue
+        out.append(raw)
+    return out
+
+
 # ── 逆指値発注ヘルパ ──────────────────────────
 def ensure_stop_at_sl(pos: dict, client, paper: bool = False) -> bool:
     """何をする関数なのか: 現在の pos['sl']（建値など）と同じ価格の逆指値STOPをアクティブに保つ。修正APIが無いSDKもあるため、既存STOPがあればキャンセル→指定価格で再作成する"""
@@ -100,35 +135,20 @@ def ensure_stop_at_sl(pos: dict, client, paper: bool = False) -> bool:
         return False
     new_stop = round(float(pos.get("sl")), 2)
 
-    # 何をする行か: アクティブ注文から、この銘柄のSTOP注文（対側）を1件探す
+    # 何をする行か: 注文台帳から、この銘柄のSTOP注文（対側）を1件探す（台帳が新しければネットワークなし）
     try:
-        orders = client.get_active_orders() or []
+        stops = find_orders(client, symbol, side=side, kind="stop")
     except Exception:
-        orders = []
-    def _get(d, *keys):
-        for k in keys:
-            if isinstance(d, dict) and k in d:
-                return d[k]
-        return None
-
+        stops = []
     target_oid = None
     target_stop = None
-    for o in orders:
-        if str(_get(o, "symbol", "ticker", "sym") or "").upper() != symbol:
-            continue
-        o_side = str(_get(o, "side", "action", "orderSide") or "").lower()
-        if o_side not in {"buy", "sell"} or o_side != side:
-            continue
-        otype = str(_get(o, "orderType", "type", "order_type") or "").lower()
-        if "stop" not in otype and not any(k in o and str(o[k]).lower().startswith("stop") for k in ("flag", "category")):
-            continue
-        target_oid = str(_get(o, "orderId", "id", "oid", "clientOrderId", "cloid") or "")
-        s_px = _get(o, "stopPrice", "stop_price", "triggerPrice", "auxPrice", "stop", "stop_px")
+    if stops:
+        o = normalize_order(stops[0])
+        target_oid = o["oid"] or None
         try:
-            target_stop = float(s_px) if s_px is not None else None
+            target_stop = float(o["stop"]) if o["stop"] is not None else None
         except Exception:
             target_stop = None
-        break
 
     # 何をする行か: 既存STOPの価格が同じなら何もしない
     if target_oid and target_stop is not None and abs(target_stop - new_stop) < 0.005:
@@ -153,7 +173,7 @@ def ensure_stop_at_sl(pos: dict, client, paper: bool = False) -> bool:
 # ── REST Halt ポーリング ──────────────────────
 halt_state: dict[str, bool] = {}                 # symbol → True (=halt中)
 halt_ts:    dict[str, datetime | None] = {}      # symbol → unhalt時刻
-next_poll = datetime.utcnow()                    # 次回ポーリング時刻
+HALT_POLL_SEC = 30                               # Halt ポーリング間隔
 
 HALF_TP_DONE: set[str] = set()  # 何をするコードか: 銘柄ごとの「半分利確済み」を覚えて二重発注を防ぐモジュール共通の状態
 LAST_ET_DATE = None  # 何をする変数か: 前回処理時の ET 日付を記録しておく（切替検知用）
@@ -192,16 +212,16 @@ def execute_half_tp(position, current_price, client, paper: bool = False):
         and position["symbol"] not in HALF_TP_DONE  # 何をする行か: 銘柄ごとの“半分利確済み”集合で未処理かを確認する
     ):
         qty = int(position["qty"] // 2)  # 何をする行か: SDKが整数株数を要求するため、半分の数量を明示的にintへキャストする
-    if not paper:  # 何をする行か: ペーパーモードのときは実発注せず通知だけにする
-        order_side = "sell" if position.get("side", "long") == "long" else "buy"  # 何をする行か: ロングは売り、ショートは買い戻しに切替える
-        client.place_market_order(symbol=position["symbol"], qty=qty, side=order_side)  # 何をする行か: 半分利確の実発注（paper=Falseのときのみ）
-
-
+        if not paper:  # 何をする行か: ペーパーモードのときは実発注せず通知だけにする
+            order_side = "sell" if position.get("side", "long") == "long" else "buy"  # 何をする行か: ロングは売り、ショートは買い戻しに切替える
+            client.place_market_order(symbol=position["symbol"], qty=qty, side=order_side)  # 何をする行か: 半分利確の実発注（paper=Falseのときのみ）
 
         send_discord_message(f"半分利確完了 : {position['symbol']} {qty}株 @ {current_price}")  # 取引イベントを Discord に通知する行
         position["qty"] = max(0, int(position["qty"]) - qty)  # 何をする行か: 半分利確で売った分だけ保有数量を減らし、後続の逆指値やUNHALT発注の数量を正しく保つ
 
         HALF_TP_DONE.add(position["symbol"])  # 何をする行か: この銘柄は本日すでに半分利確を済ませたと記録して二重発注を防ぐ
+        return True
+    return False
 
 
 def fetch_halt_status() -> set[str]:
@@ -214,19 +234,67 @@ def fetch_halt_status() -> set[str]:
     except Exception:
         return set()
 
+
+def _no_lock(symbol: str) -> ContextManager:
+    return nullcontext()
+
+
+def poll_halts(client, lock: Callable[[str], ContextManager] = _no_lock) -> None:
+    """
+    何をする関数? → Halt 一覧を 1 回取得し、新規 HALT 銘柄の未約定を取消 / UNHALT 時刻を記録する
+    lock: 銘柄ごとのロック（QuoteDispatcher.lock）。気配判定の STOP 取消→再発注と取消が交互に走らない
+    """
+    current = fetch_halt_status()
+    now = datetime.utcnow()
+
+    for sym in current - {s for s, v in halt_state.items() if v}:
+        halt_state[sym] = True  # 何をする行か: 先に HALT にしておき、この後の気配判定で発注させない
+        with lock(sym):  # 何をする行か: この銘柄の判定中なら終わるのを待ち、その発注も含めて取り消す
+            for o in find_orders(client, sym):  # 何をする行か: 新規HALTのこの銘柄に紐づく未約定だけ台帳から引く
+                if o.get("status") != "Filled":
+                    try:
+                        client.cancel_order(o["orderId"])  # 何をする行か: 当該銘柄の未約定をキャンセルする
+                        send_discord_message(f"HALT検知→注文取消: {sym} #{o['orderId']}")  # 何をする行か: 成功をDiscordへ通知
+                    except Exception as e:
+                        send_discord_message(f"HALT取消失敗: {sym} #{o.get('orderId')} {e}")  # 何をする行か: 失敗も通知して原因をログ化
+
+        print(f"HALT REST → cancel {sym} orders")  # 何をする行か: この銘柄の取消処理が完了したログ
+
+    for sym, active in list(halt_state.items()):
+        if active and sym not in current:
+            halt_state[sym] = False
+            halt_ts[sym] = now
+            print(f"UNHALT {sym} REST → will set stop")
+
+
+def cancel_unfilled(client, lock: Callable[[str], ContextManager] = _no_lock) -> None:
+    """何をする関数? → 未約定の注文をすべて取り消す（10:00 ET に 1 回。銘柄ごとに lock を取ってから取り直して取り消す）"""
+    symbols = dict.fromkeys(normalize_order(o)["symbol"] for o in find_orders(client))
+    for sym in symbols:
+        with lock(sym):
+            for o in find_orders(client, sym):  # 何をする行か: ロック中に取り直す（判定中に出た STOP も取り消す）
+                if o["status"] != "Filled":
+                    client.cancel_order(o["orderId"])
+                    print(f"CANCEL {o['symbol']} #{o['orderId']}")
+
 # ── Quote 抽象化 ──────────────────────────────
-def make_quote_func(provider: str) -> Callable[[str], Dict]:
+def make_quote_func(provider: str) -> QuoteFunc:
+    record = get_tape().quotes  # 何をする行か: ポーリングした気配はすべてテープ（data/tape）に残す
     if provider == "alpaca":
-        return lambda sym: alpaca_quote(sym)     # Alpaca REST
-    return lambda sym: webull_client.get_quote(sym)  # Webull SDK
+        return QuoteFunc(lambda sym: alpaca_quote(sym), lambda syms: alpaca_quotes(syms), record=record)  # Alpaca REST
+    return QuoteFunc(lambda sym: webull_client.get_quote(sym),
+                     lambda syms: webull_client.get_quotes(syms), record=record)                         # Webull SDK
 
 # ── CLI ──────────────────────────────────────
 def parse_args() -> argparse.Namespace:
     
     p = argparse.ArgumentParser(description="live monitor & BE slide")
-    p.add_argument("--provider", choices=["webull", "alpaca"], default="webull")
+    p.add_argument("--provider", choices=["webull", "alpaca", "alpaca-ws", "alpaca-bus"], default="webull",
+                   help="alpaca-ws = WebSocket 気配で受信ごとに判定 / alpaca-bus = 同じ気配を asyncio の QuoteBus 経由で（--loop は REST 時のみ）")
     p.add_argument("--tp", type=float, default=0.07, help="TP 幅(例 0.07=+7%)")
     p.add_argument("--loop", type=float, default=30.0, help="監視間隔 sec")
+    p.add_argument("--workers", type=int, default=LIVE_WORKERS, help="ポジション判定を並行させるスレッド数（同じ銘柄は常に 1 本ずつ）")
+    p.add_argument("--record", type=str, default=None, help="alpaca-ws / alpaca-bus 受信気配を JSONL で保存（replay_quotes 用）")
     p.add_argument("--paper", action="store_true", help="run in paper-trading mode")  # ペーパートレード切り替え
 
     return p.parse_args()
@@ -261,12 +329,226 @@ def place_entry(webull_client, symbol: str, side: str, qty: int, limit: float, t
 
     return res  # 何をする行か: 上位で orderId や success を確認できるようそのまま返す
 
+# ── 気配 1 件 → 判断 ──────────────────────────
+WS_WAIT_SEC = 1.0   # alpaca-ws: 気配が来なくてもこの間隔で Halt/キャンセル確認に戻る
+
+
+def quote_price(q: Dict) -> float | None:
+    """何をする関数? → プロバイダ差のキーに対応して現在値を取り出す"""
+    return q.get("bidPrice") or q.get("askPrice") or q.get("bid_price") or q.get("ask_price") or q.get("p") or q.get("lastPrice")
+
+
+def on_quote(pos: dict, q: Dict, *, client, tp: float, paper: bool) -> List[str]:
+    """
+    何をする関数? → 1 ポジションに 1 件の気配を当てて、半分利確 / SL 更新 / Unhalt 逆指値を判定・実行する
+    REST ポーリングでも WebSocket 受信でも同じ判定を通す。実行した判断名のリストを返す
+    """
+    cur = quote_price(q)
+    if not cur or halt_state.get(pos["symbol"]):  # 何をする行か: HALT 中は発注しない（取消した注文を出し直さない）
+        return []
+    done: List[str] = []
+    if execute_half_tp(pos, cur, client, paper=paper):  # 何をする行か: CLI引数のpaperフラグを渡し、ペーパーモード時は実発注せず通知だけにする
+        done.append("half_tp")
+
+    tp_ratio = pos.get("tp_pct", tp)  # 何をする行か: ポジション固有TP%が無ければCLI引数--tpを使う
+    prev_sl = pos.get("sl")  # 何をする行か: SL更新前の値を保持して比較に使う
+    new_sl = update_trailing_sl(pos, price=cur, tp_pct=tp_ratio)  # 何をする行か: 半分TP到達ならSLを建値(entry)へ自動移動
+    if new_sl != prev_sl:  # 何をする行か: いまSLが更新されたかどうかを判定
+        synced = ensure_stop_at_sl(pos, client=client, paper=paper)  # 何をする行か: 実際のSTOP注文を建値に同期（paper時は発注せずTrue）
+        send_discord_message(f"TSL→建値移動: {pos.get('symbol','?')} SL={new_sl:.2f} (entry={float(pos.get('entry',0)):.2f}) {'[STOP更新OK]' if synced else '[STOP更新失敗]'}")  # 何をする行か: 同期結果をDiscordへ通知
+        done.append("sl")
+
+    # Unhalt 復帰 5 分以内に逆指値(+1 %) 発注
+    t0 = halt_ts.get(pos["symbol"])
+    if t0 and 0 <= (datetime.utcnow() - t0).total_seconds() <= 300:
+        stop_px = cur * (1.01 if pos["side"] == "long" else 0.99)
+        if not paper:  # 何をする行か: ペーパーモードでは逆指値を出さず通知だけ
+            client.place_stop_order(
+                symbol=pos["symbol"],
+                qty=pos["qty"],
+                stop_price=round(stop_px, 2),
+                side="sell" if pos["side"] == "long" else "buy",
+            )
+        send_discord_message(f"UNHALT逆指値: {pos['symbol']} stop @ {round(stop_px, 2)}")  # 何をする行か: Unhalt直後の逆指値発注をDiscordへ通知
+        halt_ts[pos["symbol"]] = None
+        print(f"UNHALT {pos['symbol']} → stop @ {stop_px:.2f}")
+        done.append("unhalt_stop")
+    return done
+
+
+def _start_ws(symbols: List[str], record: str | None):
+    """alpaca-ws 用: 最新気配テーブルを作り、受信スレッドを起動して返す（受信気配はテープへ、--record 指定時は JSONL にも保存）"""
+    from sdk.alpaca_ws import start_quote_stream   # 関数内 import（REST モードでは websocket 依存を読まない）
+    from sdk.quote_table import LatestQuotes, recording
+
+    table = LatestQuotes()
+    handler = recording(table.update, record) if record else table.update
+    start_quote_stream(symbols, get_tape().recorder(handler))
+    return table
+
+
+def _bus_handler(record: str | None) -> Callable[[Dict[str, Dict]], None]:
+    """alpaca-bus 用: バスから受け取った 1 バッチを記録するハンドラ（テープ + --record 指定時は JSONL）"""
+    from sdk.quote_table import recording
+
+    tape = get_tape()
+    rec = recording(lambda q: None, record) if record else None
+
+    def _handler(batch: Dict[str, Dict]) -> None:
+        tape.quotes(batch)
+        if rec is not None:
+            for q in batch.values():
+                rec(q)
+    return _handler
+
+
+# ── 気配の振り分け ────────────────────────────
+LIVE_WORKERS = 8   # ポジション判定（発注を含む）を同時に走らせるスレッド数の既定
+
+
+class QuoteDispatcher:
+    """
+    何をするクラス? → 気配を銘柄ごとに有界スレッドプールで handle(pos, q) へ渡す（イベントループは止めない）
+    同じ銘柄の処理中に届いた気配は最新 1 件だけ残し、処理が終わったらそれを続けて判定する
+    （古い気配で発注判断しない / 同じ銘柄の判断は順番どおり 1 本ずつ → STOP の取消と再発注が競合しない）
+    判断は銘柄ごとのロック（lock(symbol)）を持って走るので、Halt 取消などスケジューラ側の処理も
+    同じロックを取れば、その銘柄の判断と交互に走らない
+    """
+
+    def __init__(self, handle: Callable[[dict, Dict], object], workers: int = LIVE_WORKERS) -> None:
+        self._handle = handle
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="live-pos")
+        self._pending: Dict[str, tuple] = {}     # symbol → (pos, q)。処理中に届いた最新の気配
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.handled = 0
+        self.conflated = 0                       # 最新で上書きされて判定しなかった気配の数
+        self.max_ms = 0.0                        # 1 判定の最長時間
+
+    def lock(self, symbol: str) -> threading.Lock:
+        """銘柄ごとのロック（判断の実行中は保持される。別スレッドからの取消も同じロックを取る）"""
+        with self._locks_guard:
+            return self._locks.setdefault(str(symbol).upper(), threading.Lock())
+
+    def _locked(self, sym: str, pos: dict, q: Dict) -> None:
+        with self.lock(sym):
+            self._handle(pos, q)
+
+    def submit(self, pos: dict, q: Dict) -> None:
+        """イベントループ上から呼ぶ。処理中の銘柄なら保留（上書き）、そうでなければ判定を開始する"""
+        sym = pos["symbol"]
+        if sym in self._tasks:
+            self.conflated += sym in self._pending
+            self._pending[sym] = (pos, q)
+            return
+        self._tasks[sym] = asyncio.create_task(self._run(sym, pos, q))
+
+    async def _run(self, sym: str, pos: dict, q: Dict) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    await loop.run_in_executor(self._pool, self._locked, sym, pos, q)
+                except Exception as e:
+                    print(f"on_quote {sym} failed: {e!r}")
+                self.max_ms = max(self.max_ms, (time.perf_counter() - t0) * 1000)
+                self.handled += 1
+                nxt = self._pending.pop(sym, None)
+                if nxt is None:
+                    return
+                pos, q = nxt
+        finally:
+            self._tasks.pop(sym, None)
+
+    async def drain(self) -> None:
+        """判定中・保留中の気配を処理し終えるまで待つ（1 tick の終わり / 終了前に呼ぶ）"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
 # ── メイン ────────────────────────────────────
+STATS_SEC = 60   # タスク計測値を表示する間隔
+
+
+async def monitor(args, client, positions: List[dict], quote_func: QuoteFunc, table, cancel_time: datetime, end_time: datetime,
+                  bus=None) -> Scheduler:
+    """
+    何をする関数? → ①10:00 キャンセル ②Halt ポーリング ③気配判定 ④日付切替 を別タスクで end_time まで回す
+    気配は table（alpaca-ws の受信スレッド）/ bus（sdk.quote_bus.QuoteBus）/ REST ポーリングのいずれか
+    終了後の計測値を見られるよう Scheduler を返す
+    """
+    sch = Scheduler()
+    by_symbol = {p["symbol"]: p for p in positions}
+    dispatcher = QuoteDispatcher(lambda pos, q: on_quote(pos, q, client=client, tp=args.tp, paper=args.paper),
+                                 workers=args.workers)
+
+    def dispatch(quotes: Dict[str, Dict]) -> None:
+        for sym, q in quotes.items():
+            pos = by_symbol.get(sym)
+            if pos is not None and q is not None:
+                dispatcher.submit(pos, q)
+
+    # ① 10:00 ET 未約定指値キャンセル（1 回だけ）
+    sch.at("cancel_10am", cancel_time, lambda: cancel_unfilled(client, dispatcher.lock), blocking=True)
+    # ② Halt 状態 REST ポーリング（30 s）
+    sch.every("halt_poll", HALT_POLL_SEC, lambda: poll_halts(client, dispatcher.lock), blocking=True)
+    # ③ 価格更新
+    sub = bus_task = None
+    if bus is not None:
+        sub = bus.subscribe(list(by_symbol))
+        bus_task = asyncio.create_task(bus.run())
+        record = _bus_handler(getattr(args, "record", None))
+
+        async def bus_quotes() -> None:
+            # 何をする行か: 判定が遅れている間に来た気配は銘柄ごとに最新だけがバスに残る → まとめて判定
+            try:
+                batch = await asyncio.wait_for(sub.get_batch(), WS_WAIT_SEC)
+            except asyncio.TimeoutError:
+                return
+            record(batch)
+            dispatch(batch)
+        sch.loop("quotes", bus_quotes)
+    elif table is not None:
+        async def ws_quotes() -> None:
+            # 何をする行か: 届いた銘柄だけを即判定（気配が来なくても WS_WAIT_SEC ごとに戻って停止を確認）
+            dispatch(await asyncio.to_thread(table.wait_updates, WS_WAIT_SEC))
+        sch.loop("quotes", ws_quotes)
+    else:
+        async def rest_quotes() -> None:
+            try:
+                # 何をする行か: 全ポジションの気配を 1 リクエストで取得
+                quotes = await asyncio.to_thread(quote_func.many, list(by_symbol))
+            except Exception as e:
+                print(f"quote batch failed: {e!r}")
+                return
+            dispatch(quotes)
+        sch.every("quotes", args.loop, rest_quotes)
+    # ④ 米国ETで日付が変わっていたら半分利確フラグ(HALF_TP_DONE)をリセットする
+    sch.every("day_reset", 60, reset_half_tp_if_new_day)
+    sch.every("stats", STATS_SEC, lambda: print("\n".join(sch.report())), first_delay=STATS_SEC)
+
+    await sch.run(until=end_time)
+    if bus is not None:
+        sub.close()
+        bus_task.cancel()
+        await asyncio.gather(bus_task, return_exceptions=True)
+        bus.log_stats()
+    await dispatcher.drain()
+    dispatcher.close()
+    print(f"quotes handled={dispatcher.handled} conflated={dispatcher.conflated} max={dispatcher.max_ms:.1f}ms")
+    return sch
+
+
 def main() -> None:
     args = parse_args()
     global webull_client
     webull_client = get_client()
-    quote_func = make_quote_func(args.provider)
+    quote_func = make_quote_func("alpaca" if args.provider.startswith("alpaca") else args.provider)
     client = get_client()  # 何をする行か: 発注も見積もりも同じ認証セッション(WebullClient)を共有して再認証や不整合を防ぐ
 
 
@@ -299,82 +581,27 @@ def main() -> None:
             "qty": abs(qty),  
         })
 
+    # 何をする行か: 認証・注文台帳・instrument_id を先に温め、期限前の自動再認証を開始（発注時に再認証を払わない）
+    if hasattr(webull_client, "warm_up"):
+        print(f"session warm-up: {webull_client.warm_up([p['symbol'] for p in positions])}")
+
+    table = _start_ws([p["symbol"] for p in positions], args.record) if args.provider == "alpaca-ws" else None
+    bus = None
+    if args.provider == "alpaca-bus":
+        from sdk.quote_bus import QuoteBus   # 関数内 import（REST モードでは websocket 依存を読まない）
+        bus = QuoteBus()
+
     print(f"[{datetime.utcnow():%H:%M:%S}] live monitor start ({args.provider})")
     send_discord_message(f"live開始: provider={args.provider}")  # 何をする行か: 監視開始をDiscordへ通知して運用ログを残す
 
-    while datetime.now(tz=ET) < end_time:
-        # ① 10:00 ET 未約定指値キャンセル
-        if datetime.now(tz=ET) >= cancel_time:
-            for o in webull_client.get_active_orders():
-                if o["status"] != "Filled":
-                    webull_client.cancel_order(o["orderId"])
-                    print(f"CANCEL {o['symbol']} #{o['orderId']}")
-            cancel_time = end_time  # 一度だけ
-
-        # ② Halt 状態 REST ポーリング（30 s）
-        now = datetime.utcnow()
-        if now >= next_poll:
-            current = fetch_halt_status()
-            next_poll = now + timedelta(seconds=30)
-
-            for sym in current - {s for s, v in halt_state.items() if v}:
-                halt_state[sym] = True
-                for o in webull_client.get_active_orders():  # 何をする行か: 新規HALTのこの銘柄に紐づく未約定だけ走査（← 'for sym in ...' の中に入れる）
-                    if o.get("symbol") == sym and o.get("status") != "Filled":
-                        try:
-                            webull_client.cancel_order(o["orderId"])  # 何をする行か: 当該銘柄の未約定をキャンセルする
-                            send_discord_message(f"HALT検知→注文取消: {sym} #{o['orderId']}")  # 何をする行か: 成功をDiscordへ通知
-                        except Exception as e:
-                            send_discord_message(f"HALT取消失敗: {sym} #{o.get('orderId')} {e}")  # 何をする行か: 失敗も通知して原因をログ化
-
-                print(f"HALT REST → cancel {sym} orders")  # 何をする行か: この銘柄の取消処理が完了したログ
-
-
-            for sym, active in list(halt_state.items()):
-                if active and sym not in current:
-                    halt_state[sym] = False
-                    halt_ts[sym] = now
-                    print(f"UNHALT {sym} REST → will set stop")
-
-        reset_half_tp_if_new_day()  # 何をする行か: 米国ETで日付が変わっていたら半分利確フラグ(HALF_TP_DONE)をリセットする
-
-        # ③ 価格更新ループ
-        for pos in positions:
-            q = quote_func(pos["symbol"])
-            cur = q.get("bidPrice") or q.get("askPrice") or q.get("bid_price") or q.get("ask_price") or q.get("p") or q.get("lastPrice")  # 何をする行か: プロバイダ差のキーに対応して現在値を安全取得
-
-            if not cur:
-                continue
-            execute_half_tp(pos, cur, client, paper=args.paper)  # 何をする行か: CLI引数のpaperフラグを渡し、ペーパーモード時は実発注せず通知だけにする
-
-
-            tp_ratio = pos.get("tp_pct", getattr(args, "tp", None))  # 何をする行か: ポジション固有TP%が無ければCLI引数--tpを使う
-            prev_sl = pos.get("sl")  # 何をする行か: SL更新前の値を保持して比較に使う
-            new_sl = update_trailing_sl(pos, price=cur, tp_pct=tp_ratio)  # 何をする行か: 半分TP到達ならSLを建値(entry)へ自動移動
-            if new_sl != prev_sl:  # 何をする行か: いまSLが更新されたかどうかを判定
-                synced = ensure_stop_at_sl(pos, client=webull_client, paper=args.paper)  # 何をする行か: 実際のSTOP注文を建値に同期（paper時は発注せずTrue）
-                send_discord_message(f"TSL→建値移動: {pos.get('symbol','?')} SL={new_sl:.2f} (entry={float(pos.get('entry',0)):.2f}) {'[STOP更新OK]' if synced else '[STOP更新失敗]'}")  # 何をする行か: 同期結果をDiscordへ通知
-                ensure_stop_at_sl(pos, client=webull_client, paper=args.paper)  # 何をする行か: 実際のSTOP注文をpos["sl"](建値)へ同期する。paper=Trueなら発注せずスキップ
-
-
-
-            # Unhalt 復帰 5 分以内に逆指値(+1 %) 発注
-            t0 = halt_ts.get(pos["symbol"])
-            if t0 and 0 <= (datetime.utcnow() - t0).total_seconds() <= 300:
-                stop_px = cur * (1.01 if pos["side"] == "long" else 0.99)
-                webull_client.place_stop_order(
-                    symbol=pos["symbol"],
-                    qty=pos["qty"],  
-                    stop_price=round(stop_px, 2),
-                    side="sell" if pos["side"] == "long" else "buy",
-                )
-                send_discord_message(f"UNHALT逆指値: {pos['symbol']} stop @ {round(stop_px, 2)}")  # 何をする行か: Unhalt直後の逆指値発注をDiscordへ通知
-                halt_ts[pos["symbol"]] = None
-                print(f"UNHALT {pos['symbol']} → stop @ {stop_px:.2f}")
-
-        time.sleep(args.loop)
-
-    print("live monitor finished")
+    sch = asyncio.run(monitor(args, client, positions, quote_func, table, cancel_time, end_time, bus=bus))
+    print("\n".join(sch.report()))  # 何をする行か: タスクごとの実行時間・スキップ・遅延を残す
+
+    if hasattr(webull_client, "close"):
+        webull_client.close()  # 何をする行か: 自動再認証スレッドを止める
+    send_discord_message("live終了")
+    flush_discord(timeout=5)  # 何をする行か: 積まれた通知を送り切ってから終わる
+    print(f"live monitor finished (notify {notifier_stats()})")
 
 # ── entrypoint ───────────────────────────────
 if __name__ == "__main__":
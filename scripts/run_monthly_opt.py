@@ -1,7 +1,13 @@
 """Step 11 : Monthly parameter re-optimisation
 
-strategy.csv の 90 day KPI を基に Kelly, Gap%, TP, SL を再計算し
-configs/config.yaml を上書きする
+直近 days 日のユニバース + 1 分足を gap_bot.backtest で再生して Gap%, TP, SL を選び直し、
+Kelly と合わせて configs/config.yaml を上書きする
+
+* 各パラメータの成績はバックテストの日次 R で測る（日付の塊ごとにプロセスへ分配）
+* 1 日ぶんの入力の読み込みと、同じ閾値のスクリーニング結果は全パラメータで共有
+* --search grid（細かいグリッド）/ random（範囲内の一様乱数を --samples 件）
+* walk-forward: 期間を --folds+1 区間に分け、それより前の期間で選んだパラメータを次の区間で評価する
+* Kelly は選んだパラメータの勝率と平均損益比から Kelly 式で出し、KELLY_RANGE に収める
 """
 
 from __future__ import annotations
@@ -9,32 +15,114 @@ from __future__ import annotations
 import argparse
 import datetime as dt
 import itertools
+import os
+import time
+from dataclasses import replace
 from pathlib import Path
-import yaml
-import pandas as pd
-
-STRATEGY_CSV = Path("strategy.csv")
-CONFIG_YAML = Path("configs/config.yaml")
+from typing import Dict, List, Tuple
 
+import numpy as np
+import yaml
 
-def load_kpi(days: int = 90) -> pd.DataFrame:
-    """直近 days 日ぶんの KPI（total_R）を返す関数"""
-    df = pd.read_csv(STRATEGY_CSV, parse_dates=["date"])
-    cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
-    return df[df["date"] >= cutoff]
+from gap_bot.backtest import STAT_COLUMNS, Params, evaluate, trading_days
+from gap_bot.screened_io import UNIVERSE_DIR
+from gap_bot.store import STORE_DIR
 
+CONFIG_YAML = Path("configs/config.yaml")
 
-def grid_search(df: pd.DataFrame) -> dict[str, float]:
-    """粗いグリッド探索で Kelly, Gap, TP, SL を決める関数"""
-    best = {"score": -1e9}
-    for kelly in (0.2, 0.3, 0.4, 0.5):
-        for gap in (0.03, 0.04, 0.05):
-            for tp in (0.05, 0.07, 0.10):
-                for sl in (0.02, 0.025, 0.03):
-                    pl = (df["total_R"] * kelly * (tp / sl)).sum()
-                    if pl > best["score"]:
-                        best.update({"kelly": kelly, "gap": gap, "tp": tp, "sl": sl, "score": pl})
-    return best
+# 探索範囲（gap は %、tp / sl は割合）
+GRID: Dict[str, Tuple[float, ...]] = {
+    "gap": (2.0, 3.0, 4.0, 5.0, 6.0),
+    "tp": tuple(np.round(np.arange(0.04, 0.1201, 0.01), 3)),
+    "sl": tuple(np.round(np.arange(0.015, 0.0401, 0.005), 3)),
+}
+RANGES: Dict[str, Tuple[float, float]] = {"gap": (1.5, 8.0), "tp": (0.03, 0.15), "sl": (0.01, 0.05)}
+KELLY_RANGE = (0.2, 0.5)
+DD_PENALTY = 0.5      # score = total_R − DD_PENALTY × 最大ドローダウン(R)
+
+R, TRADES, WINS, WIN_R = (STAT_COLUMNS.index(c) for c in ("total_R", "trades", "wins", "win_R"))
+
+
+# ── 候補 ──────────────────────────────────────────────
+def candidates(search: str, samples: int = 200, seed: int = 0, base: Params = Params()) -> List[Params]:
+    """grid: GRID の全組み合わせ / random: RANGES 内の一様乱数 samples 件（gap は 0.5 % 刻みにして共有を効かせる）"""
+    if search == "grid":
+        return [replace(base, gap=g, tp=float(t), sl=float(s)) for g, t, s in itertools.product(*GRID.values())]
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(samples):
+        g, t, s = (rng.uniform(*RANGES[k]) for k in ("gap", "tp", "sl"))
+        out.append(replace(base, gap=round(g * 2) / 2, tp=round(t, 3), sl=round(s, 3)))
+    return out
+
+
+# ── 評価 ──────────────────────────────────────────────
+def score(stats: np.ndarray) -> np.ndarray:
+    """(パラメータ, 日付, STAT_COLUMNS) → パラメータごとの score"""
+    daily = stats[..., R]
+    if daily.shape[1] == 0:
+        return np.zeros(daily.shape[0])
+    equity = np.cumsum(daily, axis=1)
+    dd = np.max(np.maximum.accumulate(equity, axis=1) - equity, axis=1)
+    return equity[:, -1] - DD_PENALTY * dd
+
+
+def walk_forward(stats: np.ndarray, folds: int) -> List[Dict[str, float]]:
+    """
+    何をする関数? → 日付を folds+1 区間に分け、k 区間目までで score 最大のパラメータを k+1 区間目で評価する
+    戻り値は区間ごとの {train_days, test_days, best, in_R, out_R}
+    """
+    n = stats.shape[1]
+    cuts = np.linspace(0, n, folds + 2).astype(int)
+    out = []
+    for k in range(1, folds + 1):
+        train, test = stats[:, : cuts[k]], stats[:, cuts[k]: cuts[k + 1]]
+        if train.shape[1] == 0 or test.shape[1] == 0:
+            continue
+        best = int(np.argmax(score(train)))
+        out.append({"train_days": train.shape[1], "test_days": test.shape[1], "best": best,
+                    "in_R": float(train[best, :, R].sum()), "out_R": float(test[best, :, R].sum())})
+    return out
+
+
+def kelly_fraction(stats: np.ndarray) -> float:
+    """1 パラメータぶんの (日付, STAT_COLUMNS) から Kelly 比率 f = W − (1−W)/b を出し KELLY_RANGE に収める"""
+    tot = stats.sum(axis=0)
+    n, wins, win_r, total_r = tot[TRADES], tot[WINS], tot[WIN_R], tot[R]
+    losses = n - wins
+    if wins == 0 or losses == 0:
+        return KELLY_RANGE[0] if wins == 0 else KELLY_RANGE[1]
+    avg_loss = (win_r - total_r) / losses
+    if avg_loss <= 0:
+        return KELLY_RANGE[1]
+    w = wins / n
+    b = (win_r / wins) / avg_loss                         # 平均勝ち R / 平均負け R
+    return float(np.clip(w - (1 - w) / b, *KELLY_RANGE))
+
+
+def optimise(days: List[dt.date], cands: List[Params], *, workers: int, folds: int,
+             universe_root: Path = UNIVERSE_DIR, store_root: Path = STORE_DIR) -> Dict:
+    """候補を全日付で回し、最良パラメータ / Kelly / walk-forward / 速度をまとめて返す"""
+    t0 = time.perf_counter()
+    used, stats = evaluate(days, cands, workers=workers, universe_root=universe_root, store_root=store_root)
+    elapsed = time.perf_counter() - t0
+    if not used:
+        return {}
+    scores = score(stats)
+    best = int(np.argmax(scores))
+    p = cands[best]
+    return {
+        "params": p,
+        "kelly": kelly_fraction(stats[best]),
+        "score": float(scores[best]),
+        "total_R": float(stats[best, :, R].sum()),
+        "trades": int(stats[best, :, TRADES].sum()),
+        "days": len(used),
+        "ranking": [(cands[i], float(scores[i])) for i in np.argsort(-scores)[:5]],
+        "walk_forward": [{**f, "params": cands[f["best"]]} for f in walk_forward(stats, folds)],
+        "evals": len(cands),
+        "elapsed": elapsed,
+    }
 
 
 def update_yaml(params: dict[str, float]) -> None:
@@ -59,19 +147,41 @@ def update_yaml(params: dict[str, float]) -> None:
 def main() -> None:
     p = argparse.ArgumentParser(description="Monthly parameter optimiser")
     p.add_argument("--days", type=int, default=90, help="学習対象日数 (default: 90)")
+    p.add_argument("--search", choices=["grid", "random"], default="grid")
+    p.add_argument("--samples", type=int, default=300, help="random の候補数")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--folds", type=int, default=3, help="walk-forward の検証区間数（0 で省略）")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="日付を分けて回すプロセス数")
+    p.add_argument("--universe", type=Path, default=UNIVERSE_DIR)
     args = p.parse_args()
 
-    df = load_kpi(args.days)
-    if df.empty:
+    end = dt.date.today() - dt.timedelta(days=1)
+    days = trading_days(end - dt.timedelta(days=args.days), end, args.universe)
+    cands = candidates(args.search, args.samples, args.seed)
+    res = optimise(days, cands, workers=args.workers, folds=args.folds, universe_root=args.universe)
+    if not res:
         print("データが不足しています。")
         return
 
-    best = grid_search(df)
-    update_yaml(best)
+    best = res["params"]
+    print(f"{res['evals']} candidates x {res['days']} days in {res['elapsed']:.1f}s "
+          f"({res['evals'] / res['elapsed']:.1f} evals/sec, {res['evals'] * res['days'] / res['elapsed']:.0f} param-days/sec)")
+    print("---- Top 5 ----")
+    for c, s in res["ranking"]:
+        print(f"gap={c.gap:4.1f}% tp={c.tp:.3f} sl={c.sl:.3f}  score={s:8.2f}")
+    if res["walk_forward"]:
+        print("---- Walk-forward ----")
+        for f in res["walk_forward"]:
+            c = f["params"]
+            print(f"train {f['train_days']:>3}d → test {f['test_days']:>3}d  gap={c.gap:4.1f}% tp={c.tp:.3f} sl={c.sl:.3f}  "
+                  f"in_R={f['in_R']:7.2f} out_R={f['out_R']:7.2f}")
+        print(f"out-of-sample total_R: {sum(f['out_R'] for f in res['walk_forward']):.2f}")
+
+    update_yaml({"kelly": round(res["kelly"], 3), "gap": round(best.gap / 100, 4), "tp": best.tp, "sl": best.sl})
     print("---- New Params ----")
-    for k in ("kelly", "gap", "tp", "sl"):
-        print(f"{k:12}: {best[k]:.3f}")
-    print(f"score: {best['score']:.2f}")
+    for k, v in (("kelly", res["kelly"]), ("gap", best.gap / 100), ("tp", best.tp), ("sl", best.sl)):
+        print(f"{k:12}: {v:.3f}")
+    print(f"score: {res['score']:.2f} (total_R={res['total_R']:.2f}, trades={res['trades']})")
 
 
 if __name__ == "__main__":
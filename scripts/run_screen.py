@@ -9,6 +9,7 @@ Step 1  : プレマーケット銘柄スクリーナー
 
 # ── インポート（冒頭で統一） ───────────────────────────
 import argparse
+import asyncio
 import os
 import json
 import pandas as pd
@@ -18,6 +19,8 @@ import yaml
 from pathlib import Path
 from typing import List
 import time 
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env", override=True)
 
@@ -28,7 +31,7 @@ if missing:
     raise RuntimeError(f"未設定の環境変数: {', '.join(missing)}")
 
 from gap_bot.filters import StockData, screen_stocks
-from sdk.quotes_polygon import get_prev_close, get_snapshot
+from sdk.quotes_polygon import get_prev_close, get_snapshot, prefetch_prev_closes, prev_close_from_daily
 from sdk.quotes_alpaca import get_quote as alpaca_quote
 import requests
 from sdk.quotes_polygon import _get 
@@ -36,17 +39,26 @@ from sdk.webull_sdk_wrapper import WebullClient  # type: ignore
 from alpaca.data.timeframe import TimeFrame
 from alpaca.data.historical import StockHistoricalDataClient
 from gap_bot.utils.logger import logger
-from alpaca.data.requests import StockBarsRequest, StockLatestBarRequest
-from gap_bot.utils.logger import append_csv
+from alpaca.data.requests import StockBarsRequest, StockLatestBarRequest, StockLatestQuoteRequest
+from gap_bot.utils.logger import get_event_logger
+from gap_bot.utils.rate_limit import TokenBucket
+from gap_bot.utils.refcache import NEGATIVE_TTL, get_cache
+from sdk.http_pool import ensure_pool_size, get_alpaca_client, get_session, log_pool_stats
 # 追加: import 行
-from gap_bot.filters import StockData, screen_stocks, build_filters  # データ型・総合フィルタ・ビルダー
+from gap_bot.filters import StockData, build_filters, screen_frame, to_frame  # データ型・列指向フィルタ・ビルダー
+from gap_bot.screened_io import save_universe, write_screened                  # 結果 / スナップショットの保存
+from gap_bot.utils.market_calendar import screen_session
+from gap_bot.tape import get_tape                                              # 取得した気配・1 分足の記録
 filters = {}
 
-# Alpaca Market-Data クライアント（IEX 無料フィード）
-client = StockHistoricalDataClient(
-    os.getenv("ALPACA_API_KEY"),
-    os.getenv("ALPACA_SECRET_KEY")
-)
+# 取得エンジンの既定値（screen_config.yaml の rate / burst / concurrency で上書き可）
+DEFAULT_RATE = 200 / 60      # Alpaca 無料枠 200 req/min
+DEFAULT_BURST = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 200     # 0 なら 1 銘柄ずつ取得
+
+# Alpaca Market-Data クライアント（IEX 無料フィード / プロセス共通の接続プールを共有）
+client = get_alpaca_client()
 # Alpaca ラッパー（provider=alpaca の時だけ使う）
 try:
     from sdk.quotes_alpaca import list_premarket_gappers  # type: ignore
@@ -56,34 +68,32 @@ except ImportError:
 def get_float_shares(symbol: str) -> int:
     """
     流通株数 (Float) を取得する関数
-    - メモリキャッシュで同一銘柄の重複アクセスを回避
+    - 永続キャッシュ (refcache, TTL 数日) で同一銘柄の再取得を回避（プロセスをまたいで有効）
     - 未取得なら yfinance で取得し、成功したらキャッシュに入れる
-    - 取得できなければ 0 を返して後段フィルタで弾く
+    - 取得できなければ 0 を返して後段フィルタで弾く（失敗も短い TTL で覚えておく）
     """
-    # ── メモリキャッシュ ─────────────────────
-    if not hasattr(get_float_shares, "_cache"):
-        get_float_shares._cache = {}              # type: ignore[attr-defined]
-    cache: dict[str, int] = get_float_shares._cache  # type: ignore[attr-defined]
-
-    if symbol in cache:                           # キャッシュ HIT
-        return cache[symbol]
+    # ── 永続キャッシュ ─────────────────────
+    cache = get_cache()
+    cached = cache.get("float_shares", symbol)
+    if cached is not None:                        # キャッシュ HIT
+        return int(cached)
 
     # ── API 呼び出し (yfinance) ──────────────
     try:
         import yfinance as yf                     # 関数内 import
     except ImportError:
         logger.debug("yfinance 未インストール→ float_shares を 0 扱い")
-        cache[symbol] = 0
         return 0
 
     try:
         info = yf.Ticker(symbol).fast_info
         shares_float = int(info.get("shares_float", 0))
-        cache[symbol] = shares_float              # キャッシュ保存
+        cache.put("float_shares", symbol, shares_float,     # キャッシュ保存
+                  ttl=None if shares_float else NEGATIVE_TTL)
         return shares_float
     except Exception as e:
         logger.debug("%s float_shares error: %s", symbol, e)
-        cache[symbol] = 0
+        cache.put("float_shares", symbol, 0, ttl=NEGATIVE_TTL)
         return 0
 
 
@@ -93,19 +103,27 @@ def get_sentiment_score(symbol: str) -> float:
     SNS／ニュースのポジティブ度合いを数値で返す関数
     - Finnhub の News-Sentiment API を利用 (要 FINNHUB_API_KEY)
     - スコアは -1.0〜+1.0 程度で返る想定。取得できなければ 0.0
+    - 取得できた値は永続キャッシュに数分だけ保存（再実行時に叩き直さない）
     """
     token = os.getenv("FINNHUB_API_KEY")
     if not token:
         logger.debug("FINNHUB_API_KEY 未設定→ sentiment_score を 0 扱い")
         return 0.0
 
+    cache = get_cache()
+    cached = cache.get("sentiment", symbol)
+    if cached is not None:
+        return cached
+
     url = "https://finnhub.io/api/v1/news-sentiment"
     try:
-        r = requests.get(url, params={"symbol": symbol, "token": token}, timeout=5)
+        r = get_session().get(url, params={"symbol": symbol, "token": token}, timeout=5)
         if r.status_code == 200:
             data = r.json()
             # Finnhub のレスポンス例では `companyNewsScore` が中心値
-            return float(data.get("companyNewsScore", 0.0))
+            score = float(data.get("companyNewsScore", 0.0))
+            cache.put("sentiment", symbol, score)
+            return score
         logger.debug("%s sentiment HTTP %s", symbol, r.status_code)
     except Exception as e:
         logger.debug("%s sentiment error: %s", symbol, e)
@@ -144,140 +162,305 @@ def alpaca_premarket(sym: str) -> tuple[float, int]:
     vol = int(bars["V"].sum()) if not bars.empty else 0
     return pre_price, vol
 
-def _get_close_price(df):
-    for key in ("c", "close", "Close"):
-        if key in df.columns:
-            closes = df[key].replace(0, pd.NA).dropna()
-            if not closes.empty:
-                return float(closes.iloc[0])        # ← 最初の非ゼロ Close
-    return 0.0
 
+# ── Alpaca + Polygon Free 併用データ取得 ──────────────────────
+ET = ZoneInfo("America/New_York")  # DST 対応の米国東部時間
+FINNHUB_RATE = 60 / 60             # Finnhub 無料枠 60 req/min
 
 
+def _premarket_start() -> datetime:
+    """今日 04:00 ET（プレマーケット開始）を返す"""
+    return datetime.now(tz=ET).replace(hour=4, minute=0, second=0, microsecond=0)
 
-# ── Alpaca + Polygon Free 併用データ取得 ──────────────────────
-def fetch_premarket_alpaca(symbols: List[str], args) -> List[StockData]:
-    """
-    Polygon Free で前日終値だけ取得し、
-    Alpaca IEX でプレマーケット価格（最新 Quote）と
-    04:00 ET 以降の出来高を取得して統合する。
 
-    フィルタ条件
-        ・ギャップ率 ±3 % 以上
-        ・プレマーケット出来高 50 k 株 以上
-    """
-    out: List[StockData] = []
+def _pick_pre_price(q: dict) -> float | None:
+    """ask-price / bid-price / last の順でプレマーケット価格を選ぶ"""
+    return q.get("ap") or q.get("askPrice") or q.get("bp") or q.get("bidPrice") or q.get("p")
 
-    for sym in symbols:
-        # --- 前日終値を Polygon Free から取得 (200 OK) ---
-        try:
-            prev_close = get_prev_close(sym)
-            if prev_close == 0:
-                bars = client.get_stock_bars(
-                    StockBarsRequest(symbol_or_symbols=sym, timeframe=TimeFrame.Day, limit=5, feed="iex")
-                ).df
-                if not bars.empty:
-                    logger.debug("%s bars columns %s", sym, list(bars.columns))
 
+def _sum_volume(bars_df) -> int:
+    """1 分足 DataFrame の出来高列を合算する（列名の揺れを吸収）"""
+    vol_col = next((c for c in ("V", "v", "volume", "Volume") if c in bars_df.columns), None)
+    return int(bars_df[vol_col].sum()) if vol_col else 0
 
-                    prev_close = _get_close_price(bars)
 
+_universe: List[StockData] = []   # 直近の取得で値がそろった全銘柄（イベントループのスレッドからだけ追記）
 
 
-            if prev_close == 0:
-                latest = client.get_stock_latest_bar(
-                    StockLatestBarRequest(symbol_or_symbols=sym, feed="iex")
-                )
-                if latest and sym in latest:
-                    prev_close = latest[sym].close
+def _to_stock(sym: str, prev_close: float, pre_price: float, pre_vol: int,
+              float_shares: int, sent_score: float) -> StockData | None:
+    """取得済みの値からギャップ率等を計算し、フィルタを通れば StockData を返す"""
+    if prev_close == 0:
+        logger.debug("%s skip: prev_close zero", sym)
+        return None
 
+    float_rot = pre_vol / float_shares * 100 if float_shares else 0
+    gap_pct = (pre_price - prev_close) / prev_close
+    stk = StockData(
+        symbol=sym,
+        previous_close=prev_close,
+        premarket_price=pre_price,
+        premarket_volume=pre_vol,
+        float_shares=float_shares,          # 取得済みの Float を格納
+        sentiment_score=sent_score,         # SNS／News スコアを格納
+    )
+    _universe.append(stk)                   # フィルタ前の全銘柄（スナップショット用）
 
+    logger.debug("%s prev=%.2f pre=%.2f gap=%+.2f%% vol=%d",
+                 sym, prev_close, pre_price, gap_pct * 100, pre_vol)
+    # 取得できた銘柄の生データ（バッファして logs/screen_YYYYMMDD.csv へまとめ書き）
+    get_event_logger("screen").log(symbol=sym, prev_close=prev_close, pre_price=pre_price, pre_volume=pre_vol)
 
-            if prev_close == 0:
-                logger.debug("%s skip: prev_close still zero", sym)
-                continue
+    # --- フィルタ ---
+    if not (
+        filters["gap_ok"](gap_pct)
+        and filters["vol_ok"](pre_vol)
+        and filters["rot_ok"](float_rot)    # ← float_rot 値をここで渡す
+        and filters["sent_ok"](sent_score)  # ← sent_score 値をここで渡す
+    ):
+        logger.debug("%s skip: filtered-out", sym)
+        return None
 
+    return stk
 
 
+async def _fetch_one_alpaca(sym: str, buckets: dict[str, TokenBucket],
+                            prev_map: dict[str, float]) -> StockData | None:
+    """
+    1 銘柄ぶんの取得 → 判定を行うコルーチン
+    * ブロッキングな SDK 呼び出しはスレッドへ逃がし、その前に必ずバケットでトークンを取る
+    * 前日終値は prev_map（grouped-aggs の全銘柄マップ）を優先し、無い銘柄だけ問い合わせる
+    """
+    alp = buckets["alpaca"]
 
-        except requests.HTTPError as e:
-            print(f"[ERR ] {sym} Polygon prev_close {e.response.status_code}")
-            logger.debug("%s skip: prev_close error %s", sym, e)
+    async def _alpaca(fn, *a):
+        await alp.acquire()
+        return await asyncio.to_thread(fn, *a)
 
-            continue
+    # --- 前日終値 ---
+    try:
+        prev_close = prev_map.get(sym) or await _alpaca(get_prev_close, sym)
+        if prev_close == 0:
+            # 寄り前は当日の日足がまだ無いので、本数ではなく前営業日の日付で bar を選ぶ
+            bars = (await _alpaca(client.get_stock_bars, StockBarsRequest(
+                symbol_or_symbols=sym, timeframe=TimeFrame.Day,
+                start=datetime.now(tz=ET) - timedelta(days=10), feed="iex"))).df
+            prev_close = prev_close_from_daily(bars)
 
-        # --- Alpaca IEX で最新 Quote と出来高を取得 ---
-        q = alpaca_quote(sym)
-        logger.debug("%s raw quote %s", sym, q)
-# ask-price / bid-price / last
-        pre_price = q.get("ap") or q.get("askPrice") or q.get("bp") or q.get("bidPrice") or q.get("p")
+        if prev_close == 0:
+            latest = await _alpaca(client.get_stock_latest_bar,
+                                   StockLatestBarRequest(symbol_or_symbols=sym, feed="iex"))
+            if latest and sym in latest:
+                prev_close = latest[sym].close
 
+        if prev_close == 0:
+            logger.debug("%s skip: prev_close still zero", sym)
+            return None
+    except requests.HTTPError as e:
+        print(f"[ERR ] {sym} Polygon prev_close {e.response.status_code}")
+        logger.debug("%s skip: prev_close error %s", sym, e)
+        return None
+
+    # --- Alpaca IEX で最新 Quote と出来高を取得 ---
+    q = await _alpaca(alpaca_quote, sym)
+    logger.debug("%s raw quote %s", sym, q)
+    get_tape().quote(dict(q, symbol=sym))
+    pre_price = _pick_pre_price(q)
+    if pre_price is None:
+        logger.debug("%s skip: pre_price None", sym)
+        return None                                   # 価格が取れない銘柄は除外
+
+    # 04:00 ET から現在までの 1 分足 volume を合算
+    bars_df = (await _alpaca(client.get_stock_bars, StockBarsRequest(
+        symbol_or_symbols=sym, timeframe=TimeFrame.Minute, start=_premarket_start(), feed="iex"))).df
+    get_tape().bars(bars_df, symbol=sym)
+    if bars_df.empty:
+        logger.debug("%s skip: pre_volume zero (bars empty)", sym)
+        return None
+    pre_vol = _sum_volume(bars_df)
+
+    float_shares = await asyncio.to_thread(get_float_shares, sym)   # yfinance は別プロバイダ
+    if os.getenv("FINNHUB_API_KEY"):                                 # キー未設定なら即 0.0 が返るので待たない
+        await buckets["finnhub"].acquire()
+    sent_score = await asyncio.to_thread(get_sentiment_score, sym)
+
+    return _to_stock(sym, prev_close, pre_price, pre_vol, float_shares, sent_score)
+
+
+def _quote_dict(quote) -> dict:
+    """SDK の Quote モデル → get_quote() と同じキー構造の dict"""
+    return {
+        "bidPrice": quote.bid_price,
+        "askPrice": quote.ask_price,
+        "bidSize": quote.bid_size,
+        "askSize": quote.ask_size,
+        "timestamp": quote.timestamp,
+    }
+
+
+def _split_by_symbol(df) -> dict[str, pd.DataFrame]:
+    """複数銘柄の bars DataFrame を index の symbol レベルで銘柄ごとに分割する"""
+    if df.empty:
+        return {}
+    return {sym: g.droplevel("symbol") for sym, g in df.groupby(level="symbol", sort=False)}
+
+
+async def _fetch_chunk_alpaca(chunk: List[str], buckets: dict[str, TokenBucket],
+                              prev_map: dict[str, float]) -> List[StockData | None]:
+    """
+    chunk 内の銘柄をまとめて取得するバッチ版
+    * 最新 Quote / 04:00 ET 以降の 1 分足をそれぞれ 1 リクエストで取り、symbol レベルで分割
+    * 前日終値は prev_map を優先し、無い銘柄だけ日足 → 最新 bar の順にまとめて取る
+    """
+    alp = buckets["alpaca"]
+
+    async def _alpaca(fn, *a):
+        await alp.acquire()
+        return await asyncio.to_thread(fn, *a)
+
+    quotes = await _alpaca(client.get_stock_latest_quote,
+                           StockLatestQuoteRequest(symbol_or_symbols=chunk, feed="iex"))
+    minute_df = (await _alpaca(client.get_stock_bars, StockBarsRequest(
+        symbol_or_symbols=chunk, timeframe=TimeFrame.Minute, start=_premarket_start(), feed="iex"))).df
+    tape = get_tape()
+    tape.quotes({sym: _quote_dict(q) for sym, q in quotes.items()})
+    tape.bars(minute_df)
+    minute = _split_by_symbol(minute_df)
+
+    prev = {sym: prev_map.get(sym, 0.0) for sym in chunk}
+    need_daily = [sym for sym, v in prev.items() if not v]
+    if need_daily:
+        # limit は全銘柄合計に掛かるので、日足は期間指定で取る（祝日を挟んでも 2 本以上残る長さ）
+        daily = _split_by_symbol((await _alpaca(client.get_stock_bars, StockBarsRequest(
+            symbol_or_symbols=need_daily, timeframe=TimeFrame.Day,
+            start=datetime.now(tz=ET) - timedelta(days=10), feed="iex"))).df)
+        for sym in need_daily:
+            prev[sym] = prev_close_from_daily(daily.get(sym))
+    missing = [sym for sym, v in prev.items() if v == 0]
+    if missing:
+        latest = await _alpaca(client.get_stock_latest_bar,
+                               StockLatestBarRequest(symbol_or_symbols=missing, feed="iex"))
+        for sym in missing:
+            if latest and sym in latest:
+                prev[sym] = latest[sym].close
+
+    # --- 1 次判定（価格・出来高）を通った銘柄だけ Float / Sentiment を取りに行く ---
+    async def _finish(sym: str) -> StockData | None:
+        if prev[sym] == 0:
+            logger.debug("%s skip: prev_close still zero", sym)
+            return None
+        q = _quote_dict(quotes[sym]) if sym in quotes else {}
+        pre_price = _pick_pre_price(q)
         if pre_price is None:
-
             logger.debug("%s skip: pre_price None", sym)
-
-            continue                                    # 価格が取れない銘柄は除外
-
-        # 04:00 ET から現在までの 1 分足 volume を合算
-        et_now  = datetime.now(tz=timezone.utc) - timedelta(hours=4)
-        start   = et_now.replace(hour=4, minute=0, second=0, microsecond=0)
-        bars_df = client.get_stock_bars(
-            StockBarsRequest(symbol_or_symbols=sym, timeframe=TimeFrame.Minute, start=start, feed="iex")
-        ).df
-        if bars_df.empty:
+            return None
+        bars_df = minute.get(sym)
+        if bars_df is None or bars_df.empty:
             logger.debug("%s skip: pre_volume zero (bars empty)", sym)
-            continue
-
-
-        vol_col = next((c for c in ("V", "v", "volume", "Volume") if c in bars_df.columns), None)
-        pre_vol = int(bars_df[vol_col].sum()) if vol_col else 0
-        float_shares = get_float_shares(sym)
-        float_rot = pre_vol / float_shares * 100 if float_shares else 0
-        sent_score = get_sentiment_score(sym)
-
-
-        # --- ギャップ率計算 & デバッグ表示 ---
-        if prev_close == 0:
-            logger.debug("%s skip: prev_close zero", sym)
-            continue
-
-        gap_pct = (pre_price - prev_close) / prev_close
-
-        logger.debug("%s prev=%.2f pre=%.2f gap=%+.2f%% vol=%d",
-                     sym, prev_close, pre_price, gap_pct * 100, pre_vol)
-        Path("logs").mkdir(exist_ok=True)  # ログ用ディレクトリが無ければ作成
-        append_csv("logs/raw_premarket.csv", [sym, prev_close, pre_price, pre_vol])
-
-
-
-        # --- フィルタ ---
-        if not (
-            filters["gap_ok"](gap_pct)
-            and filters["vol_ok"](pre_vol)
-            and filters["rot_ok"](float_rot) # ← float_rot 値をここで渡す
-            and filters["sent_ok"](sent_score)                     # ← sent_score 値をここで渡す
-        ):
-            logger.debug("%s skip: filtered-out", sym)
-            continue
+            return None
+        pre_vol = _sum_volume(bars_df)
 
+        float_shares = await asyncio.to_thread(get_float_shares, sym)
+        if os.getenv("FINNHUB_API_KEY"):
+            await buckets["finnhub"].acquire()
+        sent_score = await asyncio.to_thread(get_sentiment_score, sym)
+        return _to_stock(sym, prev[sym], pre_price, pre_vol, float_shares, sent_score)
 
+    async def _isolated(sym: str) -> StockData | None:
+        try:
+            return await _finish(sym)
+        except Exception as e:                          # 銘柄単位で隔離
+            logger.debug("%s skip: fetch error %r", sym, e)
+            return None
+
+    return await asyncio.gather(*(_isolated(s) for s in chunk))
+
+
+async def fetch_premarket_alpaca_async(
+    symbols: List[str],
+    *,
+    rate: float,
+    burst: float,
+    concurrency: int,
+    batch_size: int = 0,
+) -> List[StockData]:
+    """
+    全銘柄を並行に取得する非同期エンジン
+    * 同時実行数は concurrency（= スレッド数 = 接続プール幅）で頭打ち
+    * Alpaca への総リクエストはトークンバケットで rate [req/sec] 以下に抑える
+    * 1 銘柄の例外は握りつぶしてスキップ（他銘柄へ波及させない）
+    * 前日終値は grouped-aggs で全銘柄ぶんを最初に 1 回だけ取る
+    * batch_size > 0 なら batch_size 銘柄ずつまとめて取得し、
+      バッチごと失敗した chunk だけ 1 銘柄ずつの取得にフォールバックする
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    _universe.clear()
+    ensure_pool_size(concurrency)          # 共有プールを同時実行数以上に
+
+    buckets = {
+        "alpaca": TokenBucket(rate=rate, capacity=burst),
+        "finnhub": TokenBucket(rate=FINNHUB_RATE, capacity=1),
+    }
+    sem = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def _guarded(sym: str) -> StockData | None:
+        nonlocal errors
+        async with sem:
+            try:
+                return await _fetch_one_alpaca(sym, buckets, prev_map)
+            except Exception as e:                      # 銘柄単位で隔離
+                errors += 1
+                logger.debug("%s skip: fetch error %r", sym, e)
+                return None
+
+    async def _chunk(chunk: List[str]) -> List[StockData | None]:
+        nonlocal errors
+        try:
+            return await _fetch_chunk_alpaca(chunk, buckets, prev_map)
+        except Exception as e:                          # 無効銘柄 1 つで 422 等 → この chunk だけ逐次へ
+            errors += 1
+            logger.debug("batch of %d failed (%r) → per-symbol fallback", len(chunk), e)
+            return await asyncio.gather(*(_guarded(s) for s in chunk))
+
+    t0 = time.perf_counter()
+    prev_map = await asyncio.to_thread(prefetch_prev_closes)   # 全銘柄の前日終値を 1 リクエストで
+    logger.info("grouped prev_close: %d symbols", len(prev_map))
+    if batch_size > 0:
+        chunks = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        results = [r for rs in await asyncio.gather(*(_chunk(c) for c in chunks)) for r in rs]
+    else:
+        results = await asyncio.gather(*(_guarded(s) for s in symbols))
+    elapsed = time.perf_counter() - t0
+    logger.info("fetched %d symbols in %.1fs (%.1f sym/s, errors=%d, throttled=%.1fs)",
+                len(symbols), elapsed, len(symbols) / elapsed if elapsed else 0.0,
+                errors, buckets["alpaca"].waited_sec)
+    log_pool_stats(logger)                 # 接続再利用率・レイテンシ
+    return [r for r in results if r is not None]
 
-        # --- 合格銘柄をリストに追加 ---
-        out.append(
-            StockData(
-                symbol=sym,
-                previous_close=prev_close,
-                premarket_price=pre_price,
-                premarket_volume=pre_vol,
-                float_shares=float_shares,            # 取得済みの Float を格納
-                sentiment_score=sent_score,           # SNS／News スコアを格納
 
-            )
-        )
+def fetch_premarket_alpaca(symbols: List[str], args) -> List[StockData]:
+    """
+    Polygon Free で前日終値だけ取得し、
+    Alpaca IEX でプレマーケット価格（最新 Quote）と
+    04:00 ET 以降の出来高を取得して統合する。
 
-        time.sleep(0.25)   # Alpaca 無料枠 5 req/sec を守る
+    フィルタ条件
+        ・ギャップ率 ±3 % 以上
+        ・プレマーケット出来高 50 k 株 以上
 
-    return out
+    取得は fetch_premarket_alpaca_async() で並行実行し、
+    固定 sleep の代わりにトークンバケットで Alpaca の上限を守る。
+    --batch-size > 0 なら複数銘柄まとめてのリクエストに切り替える。
+    """
+    return asyncio.run(fetch_premarket_alpaca_async(
+        symbols,
+        rate=getattr(args, "rate", DEFAULT_RATE),
+        burst=getattr(args, "burst", DEFAULT_BURST),
+        concurrency=getattr(args, "concurrency", DEFAULT_CONCURRENCY),
+        batch_size=getattr(args, "batch_size", DEFAULT_BATCH_SIZE),
+    ))
 
 
 
@@ -293,12 +476,17 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--vol", type=int, default=cfg.get("vol", 100_000), help="Premarket volume threshold")
     p.add_argument("--rot", type=float, default=cfg.get("rot", 50.0), help="Float rotation threshold")
     p.add_argument("--sent", type=float, default=cfg.get("sent", 3.0), help="Sentiment score threshold")
+    p.add_argument("--rate", type=float, default=cfg.get("rate", DEFAULT_RATE), help="Alpaca 上限 req/sec (token bucket)")
+    p.add_argument("--burst", type=float, default=cfg.get("burst", DEFAULT_BURST), help="token bucket 容量")
+    p.add_argument("--concurrency", type=int, default=cfg.get("concurrency", DEFAULT_CONCURRENCY), help="同時取得銘柄数")
+    p.add_argument("--batch-size", type=int, default=cfg.get("batch_size", DEFAULT_BATCH_SIZE), help="1 リクエストにまとめる銘柄数 (0=銘柄ごと)")
     p.add_argument(
         "--out",
         type=Path,
-        default=Path(cfg.get("out", f"screened_{datetime.utcnow():%Y%m%d}.json")),
-        help="Output JSON file",
+        default=Path(cfg.get("out", f"screened_{datetime.utcnow():%Y%m%d}.jsonl")),
+        help="Output file (gap_bot.screened_io の JSONL)",
     )
+    p.add_argument("--no-universe", action="store_true", help="フィルタ前の全銘柄スナップショットを保存しない")
 
     return p.parse_args()
 
@@ -323,19 +511,16 @@ def main() -> None:
         raw_stocks = fetch_premarket_alpaca(symbols, args)
 
     # ▼ ここから追加 ─ プレマーケットの生データを CSV に追記保存する
-    raw_df = pd.DataFrame([s.__dict__ for s in raw_stocks])      # list → DataFrame
+    raw_df = to_frame(raw_stocks)                                # list → DataFrame（列指向）
     csv_path = Path("logs/raw_premarket.csv")                    # 保存パス
     csv_path.parent.mkdir(exist_ok=True)                         # logs/ ディレクトリ確保
     file_exists = csv_path.exists()                              # ヘッダー出力要否
     raw_df.to_csv(csv_path, mode="a", header=not file_exists, index=False)  # 追記保存
     # ▲ 追加はここまで ────────────────
 
-    # 2) フィルタリング
-
-
-    # 2) フィルタリング
-    screened = screen_stocks(
-        raw_stocks,
+    # 2) フィルタリング（ユニバース全体を列単位で一括判定）
+    screened = screen_frame(
+        raw_df,
         gap_threshold=args.gap,
         min_volume=args.vol,
         min_rotation=args.rot,
@@ -343,13 +528,17 @@ def main() -> None:
     )
 
     # 3) 出力
-    for s in screened:
-        gap_pct = (s.premarket_price - s.previous_close) / s.previous_close * 100
-        print(f"{s.symbol:<6}  Gap {gap_pct:>5.2f}%  Vol {s.premarket_volume:,}")
+    for sym, gap_pct, vol in zip(screened["symbol"], screened["gap_pct"], screened["premarket_volume"]):
+        print(f"{sym:<6}  Gap {gap_pct:>5.2f}%  Vol {vol:,}")
 
-    args.out.write_text(json.dumps([s.__dict__ for s in screened], indent=2))
+    write_screened(args.out, screened, session=screen_session())
     print(f"\n{len(screened)} tickers saved → {args.out.resolve()}")
 
+    # 4) フィルタ前の全銘柄をスナップショット保存（バックテスト用）
+    if not args.no_universe and _universe:
+        snap = save_universe(to_frame(_universe), screen_session())
+        print(f"{len(_universe)} universe rows saved → {snap.resolve()}")
+
 
 if __name__ == "__main__":
     main()
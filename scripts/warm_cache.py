@@ -0,0 +1,91 @@
+"""
+scripts.warm_cache
+------------------
+参照データキャッシュ (gap_bot.utils.refcache) の夜間ウォームアップ
+
+* 前日終値 : 次のセッション用の grouped-aggs を 1 リクエストで取得して保存
+* Float    : 期限切れ / 未取得の銘柄だけ yfinance から取得（--rate で間隔を空ける）
+* 期限切れ行の掃除
+
+前夜 (引け後) に cron 等で回しておけば、04:00 ET の run_screen は
+プレマーケットで変化する値（Quote・出来高・Sentiment）だけを取りに行く。
+
+    poetry run python scripts/warm_cache.py --symbols symbols_clean2.txt
+"""
+
+# ── import ────────────────────────────────────────────
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from gap_bot.utils.market_calendar import screen_session
+from gap_bot.utils.rate_limit import TokenBucket
+from gap_bot.utils.refcache import get_cache
+from scripts.run_screen import get_float_shares
+from sdk.quotes_polygon import prefetch_prev_closes
+
+
+# ── CLI ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    cfg_path = Path(__file__).parent.parent / "screen_config.yaml"
+    cfg = yaml.safe_load(cfg_path.read_text()) if cfg_path.exists() else {}
+
+    p = argparse.ArgumentParser(description="reference-data cache warm-up")
+    p.add_argument("--symbols", type=Path, default=Path(cfg.get("symbols", "symbols.txt")), help="ティッカーリスト")
+    p.add_argument("--fields", default="prev_close,float_shares", help="温めるフィールド (カンマ区切り)")
+    p.add_argument("--rate", type=float, default=2.0, help="yfinance 取得間隔 req/sec")
+    p.add_argument("--workers", type=int, default=4, help="Float 取得の並列数")
+    return p.parse_args()
+
+
+# ── 各フィールドのウォームアップ ───────────────────────
+def warm_prev_close() -> int:
+    """次のスクリーニング対象日の前日終値マップを取得・保存し、件数を返す"""
+    session = screen_session()
+    n = len(prefetch_prev_closes(session))
+    print(f"prev_close : {n:,} symbols for session {session}")
+    return n
+
+
+def warm_float_shares(symbols: list[str], rate: float, workers: int) -> int:
+    """キャッシュに無い / 期限切れの銘柄だけ Float を取得し、取得件数を返す"""
+    have = get_cache().get_many("float_shares", symbols)
+    todo = [s for s in symbols if s not in have]
+    print(f"float      : {len(have):,} cached, {len(todo):,} to fetch")
+
+    bucket = TokenBucket(rate=rate, capacity=1)
+    done = 0
+
+    def _one(sym: str) -> None:
+        nonlocal done
+        bucket.acquire_blocking()
+        get_float_shares(sym)                 # 中でキャッシュへ保存される
+        done += 1
+        if done % 500 == 0:
+            print(f"  … {done:,}/{len(todo):,}")
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(_one, todo))
+    return len(todo)
+
+
+# ── メイン ────────────────────────────────────────────
+def main() -> None:
+    args = parse_args()
+    fields = {f.strip() for f in args.fields.split(",") if f.strip()}
+    symbols = [s.strip() for s in args.symbols.read_text().splitlines() if s.strip()]
+
+    t0 = time.perf_counter()
+    if "prev_close" in fields:
+        warm_prev_close()
+    if "float_shares" in fields:
+        warm_float_shares(symbols, args.rate, args.workers)
+    purged = get_cache().purge()
+    print(f"purged {purged:,} expired rows, done in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
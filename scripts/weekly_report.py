@@ -1,7 +1,7 @@
 
 """Step 10 : Weekly KPI Report
 
-直近 7 days の strategy.csv → KPI 集計 → console & CSV
+直近 7 days の日次 KPI（ストアの strategy テーブル）→ KPI 集計 → console & CSV
 """
 
 from __future__ import annotations
@@ -14,14 +14,13 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
-STRATEGY_CSV = Path("strategy.csv")
+from gap_bot.store import load_strategy
+
 LOG_DIR = Path("logs")
 
 
 def load_last_n_days(n: int = 7) -> pd.DataFrame:
-    df = pd.read_csv(STRATEGY_CSV, parse_dates=["date"])
-    cutoff = pd.Timestamp.now() - pd.Timedelta(days=n)
-    return df[df["date"] >= cutoff]
+    return load_strategy(days=n)          # 直近 n 日のパーティションだけ読む
 
 
 def calc_week_metrics(df: pd.DataFrame) -> dict[str, float]:
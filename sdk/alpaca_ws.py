@@ -8,11 +8,20 @@ sdk.alpaca_ws  ― Alpaca Data v2 IEX フィード (WebSocket)
         print(q)
 
     stream_quotes(["AAPL", "TSLA"], printer)   # Ctrl-C で終了
+
+使い方 (バックグラウンド):
+    table = LatestQuotes()
+    start_quote_stream(["AAPL", "TSLA"], table.update)   # 別スレッドで受信し table を更新し続ける
+
+asyncio から複数の購読者で使うときは sdk.quote_bus.QuoteBus を使う。
 """
 
 from __future__ import annotations
 
+import logging
 import os
+import threading
+import time
 from typing import Callable, Dict, List
 
 from alpaca.data.enums import DataFeed
@@ -20,6 +29,8 @@ from alpaca.data.live import StockDataStream
 from alpaca.data.models import Quote
 from dotenv import load_dotenv
 
+logger = logging.getLogger("gap_bot.alpaca_ws")
+
 QuoteHandler = Callable[[Dict], None]
 
 
@@ -31,6 +42,18 @@ def _build_client() -> StockDataStream:
     return StockDataStream(key, sec, feed=DataFeed.IEX)
 
 
+def quote_to_dict(q: Quote) -> Dict:
+    """SDK の Quote モデル → handler に渡す dict"""
+    return {
+        "symbol": q.symbol,
+        "bidPrice": q.bid_price,
+        "askPrice": q.ask_price,
+        "bidSize": q.bid_size,
+        "askSize": q.ask_size,
+        "timestamp": q.timestamp,
+    }
+
+
 def stream_quotes(symbols: List[str], handler: QuoteHandler) -> None:
     """
     symbols の最新 L1 Quote を購読し、受信するたびに handler(dict) を呼び出す。
@@ -39,19 +62,34 @@ def stream_quotes(symbols: List[str], handler: QuoteHandler) -> None:
     client = _build_client()
 
     async def _on_quote(q: Quote) -> None:
-        handler(
-            {
-                "symbol": q.symbol,
-                "bidPrice": q.bid_price,
-                "askPrice": q.ask_price,
-                "bidSize": q.bid_size,
-                "askSize": q.ask_size,
-                "timestamp": q.timestamp,
-            }
-        )
+        handler(quote_to_dict(q))
 
     for sym in symbols:
         client.subscribe_quotes(_on_quote, sym)
 
     # ← 内部で asyncio.run() を呼び出す blocking メソッド
     client.run()
+
+
+def start_quote_stream(
+    symbols: List[str],
+    handler: QuoteHandler,
+    *,
+    reconnect_sec: float = 5.0,
+) -> threading.Thread:
+    """
+    何をする関数? → stream_quotes をデーモンスレッドで動かし、受信した気配で handler を呼び続ける
+    * 接続が切れたら reconnect_sec 後に張り直す
+    * handler は受信スレッドで呼ばれるので LatestQuotes.update のような軽い処理に限る
+    """
+    def _run() -> None:
+        while True:
+            try:
+                stream_quotes(symbols, handler)
+            except Exception as e:  # ネットワーク断など
+                logger.warning("quote stream stopped: %r (reconnect in %.0fs)", e, reconnect_sec)
+            time.sleep(reconnect_sec)
+
+    th = threading.Thread(target=_run, name="alpaca-ws", daemon=True)
+    th.start()
+    return th
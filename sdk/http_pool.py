@@ -0,0 +1,173 @@
+"""
+sdk.http_pool
+-------------
+プロセス共通の HTTP 接続プールとプロバイダクライアント
+
+* get_session()      : keep-alive の requests.Session（Polygon `_get` / Finnhub / Alpaca SDK で共有）
+* get_alpaca_client(): StockHistoricalDataClient を 1 つだけ作って使い回す
+                       （内部の Session も上の共有プールへ差し替える）
+* pool_stats()       : ホストごとの呼び出し数・新規接続数・再利用率・レイテンシ
+
+    from sdk.http_pool import get_session, log_pool_stats
+    get_session().get(url, timeout=5)
+    log_pool_stats()      # → "data.alpaca.markets calls=120 conns=8 reuse=93% avg=41ms p95=88ms"
+
+必要な環境変数 (.env):
+ALPACA_API_KEY / ALPACA_SECRET_KEY （旧名 APCA_API_KEY_ID / APCA_API_SECRET_KEY も可）
+ALPACA_DATA_URL  … 任意。モックサーバ等へ向けるときだけ指定
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = int(os.getenv("GAP_BOT_HTTP_POOL", "32"))   # 1 ホストあたりの最大保持接続数
+_SAMPLES = 2048                                         # レイテンシ分位点用に保持する件数
+
+logger = logging.getLogger("gap_bot.http_pool")
+
+
+# ── 計測付きアダプタ ───────────────────────────────────
+class _HostStats:
+    __slots__ = ("calls", "total_sec", "max_sec", "samples", "pools")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_sec = 0.0
+        self.max_sec = 0.0
+        self.samples: deque[float] = deque(maxlen=_SAMPLES)
+        self.pools: set = set()     # urllib3 の HTTPConnectionPool（新規接続数を持っている）
+
+
+_stats: Dict[str, _HostStats] = {}
+_conn_base: Dict[int, int] = {}     # reset_pool_stats() 時点の接続数（id(pool) → num_connections）
+_stats_lock = threading.Lock()
+
+
+class _InstrumentedAdapter(HTTPAdapter):
+    """send() の所要時間をホスト別に記録する HTTPAdapter"""
+
+    def send(self, request, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            el = time.perf_counter() - t0
+            parts = urlsplit(request.url)
+            host = parts.netloc
+            pools = [self.poolmanager.pools[k] for k in self.poolmanager.pools.keys()
+                     if k.key_host == parts.hostname]          # このホスト向けの既存プール
+            with _stats_lock:
+                st = _stats.setdefault(host, _HostStats())
+                st.calls += 1
+                st.total_sec += el
+                st.max_sec = max(st.max_sec, el)
+                st.samples.append(el)
+                st.pools.update(pools)
+
+
+# ── 共有セッション ─────────────────────────────────────
+_session: requests.Session | None = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def _mount(sess: requests.Session, size: int) -> None:
+    adapter = _InstrumentedAdapter(pool_connections=8, pool_maxsize=size)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+
+
+def get_session() -> requests.Session:
+    """プロセス共通の keep-alive Session を返す（初回だけ生成）"""
+    global _session, _pool_size
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _mount(_session, POOL_SIZE)
+            _pool_size = POOL_SIZE
+        return _session
+
+
+def ensure_pool_size(size: int) -> None:
+    """同時実行数がプール幅を超えるときだけアダプタを張り替える（既存接続は捨てられる）"""
+    global _pool_size
+    sess = get_session()
+    with _lock:
+        if size > _pool_size:
+            _mount(sess, size)
+            _pool_size = size
+
+
+# ── Alpaca クライアント ───────────────────────────────
+_alpaca = None
+
+
+def get_alpaca_client():
+    """StockHistoricalDataClient をプロセスで 1 つだけ作って返す"""
+    global _alpaca
+    with _lock:
+        if _alpaca is not None:
+            return _alpaca
+    from alpaca.data.historical import StockHistoricalDataClient   # 関数内 import（SDK 未使用の経路を軽く保つ）
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    client = StockHistoricalDataClient(
+        os.getenv("ALPACA_API_KEY") or os.getenv("APCA_API_KEY_ID"),
+        os.getenv("ALPACA_SECRET_KEY") or os.getenv("APCA_API_SECRET_KEY"),
+        url_override=os.getenv("ALPACA_DATA_URL") or None,
+    )
+    client._session = get_session()      # SDK 内部の Session を共有プールへ差し替える
+    with _lock:
+        if _alpaca is None:
+            _alpaca = client
+        return _alpaca
+
+
+# ── 計測結果 ─────────────────────────────────────────
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """ホスト別の {calls, connections, reused, reuse_pct, avg_ms, p95_ms, max_ms} を返す"""
+    out: Dict[str, Dict[str, Any]] = {}
+    with _stats_lock:
+        for host, st in _stats.items():
+            conns = sum(getattr(p, "num_connections", 0) - _conn_base.get(id(p), 0) for p in st.pools)
+            samples = sorted(st.samples)
+            p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+            out[host] = {
+                "calls": st.calls,
+                "connections": conns,                     # = TLS ハンドシェイク回数
+                "reused": max(0, st.calls - conns),
+                "reuse_pct": (1 - conns / st.calls) * 100 if st.calls else 0.0,
+                "avg_ms": st.total_sec / st.calls * 1000 if st.calls else 0.0,
+                "p95_ms": p95 * 1000,
+                "max_ms": st.max_sec * 1000,
+            }
+    return out
+
+
+def reset_pool_stats() -> None:
+    """計測値をゼロに戻す（既存プールの接続数はここを基準に数え直す）"""
+    with _stats_lock:
+        for st in _stats.values():
+            for p in st.pools:
+                _conn_base[id(p)] = getattr(p, "num_connections", 0)
+        _stats.clear()
+
+
+def log_pool_stats(log: logging.Logger | None = None) -> None:
+    """pool_stats() を 1 ホスト 1 行で INFO 出力する"""
+    log = log or logger
+    for host, s in pool_stats().items():
+        log.info("%s calls=%d conns=%d reuse=%.0f%% avg=%.0fms p95=%.0fms max=%.0fms",
+                 host, s["calls"], s["connections"], s["reuse_pct"],
+                 s["avg_ms"], s["p95_ms"], s["max_ms"])
@@ -0,0 +1,211 @@
+"""
+sdk.order_book
+--------------
+プロセス内の注文台帳キャッシュ（アクティブ注文を symbol / side / 種別で O(1) 検索）
+
+* 自分の発注・取消のレスポンスで即時に更新する（on_placed / on_canceled）
+* ブローカーの一覧と定期的に突き合わせる（reconcile。間隔は reconcile_sec）
+* 注文イベントのストリームがあれば apply_event() で 1 件ずつ反映できる
+
+    book = OrderBookCache(reconcile_sec=30)
+    book.reconcile(client.get_active_orders())     # 起動時・定期
+    book.find("AAPL", side="sell", kind="stop")      # ネットワークなし
+    book.stats()                                     # {"orders": .., "reconciles": .., "drift": ..}
+
+注文 dict のキー名は SDK ごとに違うので normalize() で揃えてから保持する。
+元の dict は "raw" に残す。
+
+on_event を渡すと、台帳の変化を (イベント名, 注文) で通知する（gap_bot.tape の記録用）:
+placed / canceled（自分の発注・取消）, filled / canceled / rejected / expired / modified（apply_event）,
+closed / seen（reconcile で消えた / 現れた注文）
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+Order = Dict[str, Any]
+
+CLOSED_STATUSES = {"filled", "canceled", "cancelled", "rejected", "expired", "failed"}
+
+
+def _get(d: dict, *keys):
+    for k in keys:
+        if isinstance(d, dict) and d.get(k) not in (None, ""):
+            return d[k]
+    return None
+
+
+def order_kind(o: dict) -> str:
+    """注文種別を stop / limit / market / tp / sl のどれかに寄せる（不明は other）"""
+    t = str(_get(o, "orderType", "type", "order_type") or "").lower()
+    if t in {"tp", "sl"}:
+        return t
+    if "stop" in t or any(str(o.get(k, "")).lower().startswith("stop") for k in ("flag", "category")):
+        return "stop"
+    if "limit" in t:
+        return "limit"
+    if "market" in t:
+        return "market"
+    return "other"
+
+
+def normalize(o: dict) -> Order:
+    """SDK ごとのキー揺れを吸収した注文 dict（oid / symbol / side / kind / status / qty / price / stop / raw）"""
+    side = str(_get(o, "side", "action", "orderSide") or "").lower()
+    side = {"long": "buy", "short": "sell"}.get(side, side)
+    return {
+        "oid": str(_get(o, "orderId", "id", "oid", "clientOrderId", "client_order_id", "cloid") or ""),
+        "symbol": str(_get(o, "symbol", "ticker", "sym") or "").upper(),
+        "side": side,
+        "kind": order_kind(o),
+        "status": str(_get(o, "status") or "").lower(),
+        "qty": _get(o, "qty", "quantity", "totalQuantity"),
+        "price": _get(o, "limitPrice", "limit_price", "price", "lmtPrice"),
+        "stop": _get(o, "stopPrice", "stop_price", "triggerPrice", "auxPrice", "stop", "stop_px"),
+        "raw": o,
+    }
+
+
+class OrderBookCache:
+    """アクティブ注文の台帳（スレッドセーフ）"""
+
+    def __init__(self, reconcile_sec: float = 30.0, on_event: Optional[Callable[[str, Order], None]] = None) -> None:
+        self.reconcile_sec = reconcile_sec
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        self._orders: Dict[str, Order] = {}
+        self._index: Dict[Tuple[str, str, str], set[str]] = defaultdict(set)   # (symbol, side, kind) → oids
+        self._by_symbol: Dict[str, set[str]] = defaultdict(set)
+        self.last_reconcile = 0.0      # time.monotonic()。0 = 未同期
+        self.reconciles = 0
+        self.drift = 0                 # 突き合わせで見つかった差分（追加 + 削除 + 変更）の累計
+        self.events = 0
+
+    # ---------- 内部 ----------
+    def _add(self, o: Order) -> None:
+        self._orders[o["oid"]] = o
+        self._index[(o["symbol"], o["side"], o["kind"])].add(o["oid"])
+        self._by_symbol[o["symbol"]].add(o["oid"])
+
+    def _remove(self, oid: str) -> Optional[Order]:
+        o = self._orders.pop(oid, None)
+        if o is not None:
+            key = (o["symbol"], o["side"], o["kind"])
+            self._index[key].discard(oid)
+            if not self._index[key]:
+                del self._index[key]
+            self._by_symbol[o["symbol"]].discard(oid)
+            if not self._by_symbol[o["symbol"]]:
+                del self._by_symbol[o["symbol"]]
+        return o
+
+    def _upsert(self, raw: dict) -> Optional[Order]:
+        o = normalize(raw)
+        if not o["oid"]:
+            return None
+        self._remove(o["oid"])
+        if o["status"] in CLOSED_STATUSES:
+            return None
+        self._add(o)
+        return o
+
+    # ---------- 自分の発注・取消 ----------
+    def _emit(self, event: str, o: Optional[Order]) -> None:
+        if self.on_event is not None and o is not None:
+            self.on_event(event, o)
+
+    def on_placed(self, raw: dict) -> None:
+        """発注が受け付けられたら呼ぶ（raw は最低限 orderId / symbol / side / orderType を含む dict）"""
+        with self._lock:
+            o = self._upsert(raw)
+        self._emit("placed", o)
+
+    def on_canceled(self, oid: str) -> None:
+        with self._lock:
+            o = self._remove(str(oid))
+        self._emit("canceled", o)
+
+    def apply_event(self, raw: dict) -> None:
+        """注文イベント（約定・取消・変更）を 1 件反映する。終了ステータスなら台帳から外す"""
+        with self._lock:
+            self.events += 1
+            self._upsert(raw)
+        if self.on_event is not None:
+            o = normalize(raw)
+            st = "canceled" if o["status"] == "cancelled" else o["status"]
+            self._emit(st if st in CLOSED_STATUSES else "modified", o)
+
+    # ---------- ブローカーとの突き合わせ ----------
+    def stale(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self.last_reconcile == 0.0 or now - self.last_reconcile >= self.reconcile_sec
+
+    def invalidate(self) -> None:
+        """次の stale() を True にする（ID の分からない発注をした後、次の参照で一覧を取り直させる）"""
+        with self._lock:
+            self.last_reconcile = 0.0
+
+    def reconcile(self, broker_orders: Iterable[dict]) -> int:
+        """
+        何をする関数? → ブローカーのアクティブ注文一覧で台帳を置き換え、差分件数を返す
+        （台帳にあって一覧に無い = 約定・取消済み、逆 = 他端末からの発注など）
+        """
+        fresh = {}
+        for raw in broker_orders:
+            o = normalize(raw)
+            if o["oid"] and o["status"] not in CLOSED_STATUSES:
+                fresh[o["oid"]] = o
+        with self._lock:
+            old = self._orders
+            diff = len(old.keys() ^ fresh.keys())
+            diff += sum(1 for k in old.keys() & fresh.keys()
+                        if {f: old[k][f] for f in ("status", "qty", "price", "stop")}
+                        != {f: fresh[k][f] for f in ("status", "qty", "price", "stop")})
+            self._orders, self._index, self._by_symbol = {}, defaultdict(set), defaultdict(set)
+            for o in fresh.values():
+                self._add(o)
+            self.last_reconcile = time.monotonic()
+            self.reconciles += 1
+            self.drift += diff
+        if self.on_event is not None:
+            for k in old.keys() - fresh.keys():
+                self._emit("closed", old[k])
+            for k in fresh.keys() - old.keys():
+                self._emit("seen", fresh[k])
+        return diff
+
+    # ---------- 参照（ネットワークなし） ----------
+    def find(self, symbol: str, side: str | None = None, kind: str | None = None) -> List[Order]:
+        """symbol の注文（side / kind で絞り込み可）"""
+        sym = symbol.upper()
+        with self._lock:
+            if side is not None and kind is not None:
+                oids = self._index.get((sym, side.lower(), kind), ())
+            else:
+                oids = self._by_symbol.get(sym, ())
+            out = [self._orders[i] for i in oids]
+        if side is not None and kind is None:
+            out = [o for o in out if o["side"] == side.lower()]
+        if kind is not None and side is None:
+            out = [o for o in out if o["kind"] == kind]
+        return out
+
+    def get(self, oid: str) -> Optional[Order]:
+        with self._lock:
+            return self._orders.get(str(oid))
+
+    def active(self) -> List[Order]:
+        with self._lock:
+            return list(self._orders.values())
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"orders": len(self._orders), "reconciles": self.reconciles,
+                "drift": self.drift, "events": self.events,
+                "age_sec": time.monotonic() - self.last_reconcile if self.last_reconcile else None}
@@ -0,0 +1,308 @@
+"""
+sdk.quote_bus
+-------------
+asyncio 上の気配バス（Alpaca WebSocket → 複数の購読者）
+
+* 受信側は publish() で「銘柄ごとの最新値」を各購読者の待ち行列へ置くだけ（await しない）
+  → 遅い購読者（Discord 投稿など）がソケットの読み出しを止めない
+* 購読者が追いつかない間に同じ銘柄が再び来たら古い方を捨てて最新だけ残す（conflation）
+* 待ち行列の銘柄数が maxsize を超えたら新しい銘柄の気配は捨てる（dropped）
+* 銘柄の購読はバス全体で参照カウントし、0→1 / 1→0 のときだけソースへ subscribe / unsubscribe
+* stats() で published / conflated / dropped / 待ち行列の深さを確認できる
+
+    bus = QuoteBus()                              # 既定ソースは Alpaca IEX WebSocket
+    asyncio.create_task(bus.run())
+    sub = bus.subscribe(["AAPL", "TSLA"])
+    async for q in sub:                           # 銘柄ごとに最新の気配だけが届く
+        ...
+    sub.add(["NVDA"]); sub.remove(["TSLA"])       # ポジションの増減に合わせて動的に変更
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol
+
+Quote = Dict[str, Any]
+
+logger = logging.getLogger("gap_bot.quote_bus")
+
+DEFAULT_MAXSIZE = 1000   # 1 購読者が未読のまま抱えられる銘柄数
+
+
+class QuoteSource(Protocol):
+    """バスへ気配を流し込む側（Alpaca WebSocket やリプレイ）"""
+
+    def subscribe(self, symbols: List[str]) -> None: ...
+    def unsubscribe(self, symbols: List[str]) -> None: ...
+    async def run(self, publish: Callable[[Quote], None]) -> None: ...
+
+
+# ── 購読者 ─────────────────────────────────────────────
+class Subscription:
+    """1 購読者ぶんの待ち行列（symbol → 最新 Quote、挿入順に取り出す）"""
+
+    def __init__(self, bus: "QuoteBus", symbols: Optional[Iterable[str]], maxsize: int) -> None:
+        self._bus = bus
+        self.symbols: Optional[set[str]] = None if symbols is None else {s.upper() for s in symbols}
+        self.maxsize = maxsize
+        self._pending: Dict[str, Quote] = {}
+        self._event = asyncio.Event()
+        self.closed = False
+        # 計測用
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    # ---------- バス側から ----------
+    def wants(self, symbol: str) -> bool:
+        return not self.closed and (self.symbols is None or symbol in self.symbols)
+
+    def _offer(self, q: Quote) -> None:
+        sym = q["symbol"]
+        if sym in self._pending:
+            self._pending[sym] = q             # 位置はそのまま・値だけ最新へ
+            self.conflated += 1
+            return
+        if len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            return
+        self._pending[sym] = q
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._event.set()
+
+    # ---------- 購読者側から ----------
+    @property
+    def depth(self) -> int:
+        """未読の銘柄数"""
+        return len(self._pending)
+
+    async def get(self) -> Quote:
+        """何をする関数? → 次の気配（最も長く待っている銘柄の最新値）を返す。close 後は StopAsyncIteration"""
+        while not self._pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self._event.clear()
+            await self._event.wait()
+        sym = next(iter(self._pending))
+        self.delivered += 1
+        return self._pending.pop(sym)
+
+    async def get_batch(self) -> Dict[str, Quote]:
+        """何をする関数? → 未読の気配を全銘柄ぶんまとめて返す（1 件以上たまるまで待つ）"""
+        if not self._pending:
+            await self.get_ready()
+        out, self._pending = self._pending, {}
+        self.delivered += len(out)
+        return out
+
+    async def get_ready(self) -> None:
+        while not self._pending and not self.closed:
+            self._event.clear()
+            await self._event.wait()
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Quote:
+        return await self.get()
+
+    def add(self, symbols: Iterable[str]) -> None:
+        """購読銘柄を増やす（全銘柄購読 symbols=None では何もしない）"""
+        if self.symbols is None:
+            return
+        new = [s.upper() for s in symbols if s.upper() not in self.symbols]
+        self.symbols.update(new)
+        self._bus._retain(new)
+
+    def remove(self, symbols: Iterable[str]) -> None:
+        """購読銘柄を減らす（未読分も捨てる）"""
+        if self.symbols is None:
+            return
+        gone = [s.upper() for s in symbols if s.upper() in self.symbols]
+        self.symbols.difference_update(gone)
+        for s in gone:
+            self._pending.pop(s, None)
+        self._bus._release(gone)
+
+    def close(self) -> None:
+        """購読をやめる。待っている get() は StopAsyncIteration で抜ける"""
+        if self.closed:
+            return
+        self.closed = True
+        self._bus._detach(self)
+        self._event.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {"depth": self.depth, "max_depth": self.max_depth, "delivered": self.delivered,
+                "conflated": self.conflated, "dropped": self.dropped}
+
+
+# ── バス ───────────────────────────────────────────────
+class QuoteBus:
+    """1 つの QuoteSource を複数の Subscription へ配るバス"""
+
+    def __init__(self, source: Optional[QuoteSource] = None, *, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        self.source = source if source is not None else AlpacaQuoteSource()
+        self.maxsize = maxsize
+        self._subs: List[Subscription] = []
+        self._refs: Counter = Counter()         # symbol → 購読している Subscription 数
+        self.published = 0
+        self.unrouted = 0                       # 誰も購読していない銘柄の気配（購読解除直後など）
+
+    # ---------- 購読 ----------
+    def subscribe(self, symbols: Optional[Iterable[str]] = None, *, maxsize: Optional[int] = None) -> Subscription:
+        """
+        何をする関数? → 購読者を追加する
+        symbols=None はバスに流れる全銘柄を受け取る（ソースへの購読は他の購読者の銘柄に従う）
+        """
+        sub = Subscription(self, symbols, maxsize or self.maxsize)
+        self._subs.append(sub)
+        if sub.symbols:
+            self._retain(sub.symbols)
+        return sub
+
+    def _retain(self, symbols: Iterable[str]) -> None:
+        new = []
+        for s in symbols:
+            self._refs[s] += 1
+            if self._refs[s] == 1:
+                new.append(s)
+        if new:
+            self.source.subscribe(new)
+
+    def _release(self, symbols: Iterable[str]) -> None:
+        gone = []
+        for s in symbols:
+            if self._refs[s] <= 0:
+                continue
+            self._refs[s] -= 1
+            if self._refs[s] == 0:
+                del self._refs[s]
+                gone.append(s)
+        if gone:
+            self.source.unsubscribe(gone)
+
+    def _detach(self, sub: Subscription) -> None:
+        if sub in self._subs:
+            self._subs.remove(sub)
+            if sub.symbols:
+                self._release(sub.symbols)
+
+    @property
+    def symbols(self) -> set[str]:
+        """いまソースに購読している銘柄"""
+        return set(self._refs)
+
+    # ---------- 配信 ----------
+    def publish(self, q: Quote) -> None:
+        """何をする関数? → 気配 1 件を該当する購読者の待ち行列へ置く（イベントループのスレッドから呼ぶ）"""
+        q["symbol"] = str(q.get("symbol", "")).upper()
+        self.published += 1
+        routed = False
+        for sub in self._subs:
+            if sub.wants(q["symbol"]):
+                sub._offer(q)
+                routed = True
+        if not routed:
+            self.unrouted += 1
+
+    async def run(self) -> None:
+        """ソースを動かして publish し続ける（タスクとして起動する）"""
+        await self.source.run(self.publish)
+
+    def stats(self) -> Dict[str, Any]:
+        subs = [s.stats() for s in self._subs]
+        return {
+            "published": self.published,
+            "unrouted": self.unrouted,
+            "symbols": len(self._refs),
+            "subscribers": len(subs),
+            "conflated": sum(s["conflated"] for s in subs),
+            "dropped": sum(s["dropped"] for s in subs),
+            "max_depth": max((s["max_depth"] for s in subs), default=0),
+            "per_subscriber": subs,
+        }
+
+    def log_stats(self, log: Optional[logging.Logger] = None) -> None:
+        st = self.stats()
+        (log or logger).info(
+            "quote bus published=%d unrouted=%d conflated=%d dropped=%d max_depth=%d subs=%d symbols=%d",
+            st["published"], st["unrouted"], st["conflated"], st["dropped"], st["max_depth"],
+            st["subscribers"], st["symbols"])
+
+
+# ── Alpaca ソース ───────────────────────────────────────
+class AlpacaQuoteSource:
+    """
+    StockDataStream を専用スレッドの client.run() で動かし、受信した気配をバスのイベントループへ渡すソース
+
+    * alpaca-py の subscribe_quotes / unsubscribe_quotes は接続中だと stream のループへ
+      run_coroutine_threadsafe(...).result() で送信を待つ → stream をバスと同じループで回すと自分を待って固まる
+      → stream は別スレッド・別ループに置き、バス側からは公開 API（subscribe_quotes / run / stop）だけを呼ぶ
+    * 購読銘柄が 1 つもないうちはスレッドを起動しない（空のまま run すると接続待ちで空回りする）
+    """
+
+    def __init__(self, client=None) -> None:
+        if client is None:
+            from sdk.alpaca_ws import _build_client   # 関数内 import（テストや他ソースでは websocket 依存を読まない）
+            client = _build_client()
+        self._client = client
+        self._symbols: set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._publish: Optional[Callable[[Quote], None]] = None
+        self._done: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _on_quote(self, q) -> None:
+        """stream のスレッドで呼ばれる → dict にしてバスのループへ渡すだけ（待たない）"""
+        from sdk.alpaca_ws import quote_to_dict
+        loop, publish = self._loop, self._publish
+        if loop is not None and publish is not None:
+            loop.call_soon_threadsafe(publish, quote_to_dict(q))
+
+    def subscribe(self, symbols: List[str]) -> None:
+        # 何をする行か: 接続中なら stream スレッドが購読メッセージを送り終えるまで待つ（ソケット 1 回の送信ぶん）
+        self._client.subscribe_quotes(self._on_quote, *symbols)
+        self._symbols.update(symbols)
+        self._start()
+
+    def unsubscribe(self, symbols: List[str]) -> None:
+        self._client.unsubscribe_quotes(*symbols)
+        self._symbols.difference_update(symbols)
+
+    def _start(self) -> None:
+        if self._thread is not None or self._loop is None or not self._symbols:
+            return
+        self._thread = threading.Thread(target=self._run_stream, name="alpaca-quote-bus", daemon=True)
+        self._thread.start()
+
+    def _run_stream(self) -> None:
+        try:
+            self._client.run()
+        except Exception:
+            logger.exception("alpaca quote stream stopped")
+        finally:
+            loop, done = self._loop, self._done
+            if loop is not None and done is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(done.set)
+
+    async def run(self, publish: Callable[[Quote], None]) -> None:
+        """stream スレッドが終わるか、タスクがキャンセルされるまで待つ（終了時は stream を止めてスレッドを回収）"""
+        self._loop, self._publish, self._done = asyncio.get_running_loop(), publish, asyncio.Event()
+        self._start()
+        try:
+            await self._done.wait()
+        finally:
+            self._publish = None
+            if self._thread is not None:
+                try:
+                    self._client.stop()
+                except Exception as e:                    # 接続前に止めた場合など
+                    logger.debug("stream stop failed: %r", e)
+                await asyncio.to_thread(self._thread.join, 5.0)
+                self._thread = None
@@ -0,0 +1,50 @@
+"""
+sdk.quote_func
+--------------
+プロバイダ非依存の「気配取得関数」
+
+run_entry / run_live の make_quote_func() が返すオブジェクト。
+従来どおり 1 銘柄で呼べて、.many() で複数銘柄を 1 リクエストにまとめられる。
+
+    qf = make_quote_func("alpaca")
+    qf("AAPL")                    # → {"bidPrice": ..., "askPrice": ...}
+    qf.many(["AAPL", "TSLA"])     # → {"AAPL": {...}, "TSLA": {...}}（取れなかった銘柄は含まれない）
+
+record を渡すと、取れた気配を {symbol: quote} で渡す（gap_bot.tape の get_tape().quotes など）。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+Quote = Dict[str, object]
+
+
+class QuoteFunc:
+    """symbol → Quote として呼べる callable に、一括取得 .many() を足したもの"""
+
+    def __init__(
+        self,
+        one: Callable[[str], Quote],
+        many: Optional[Callable[[List[str]], Dict[str, Quote]]] = None,
+        record: Optional[Callable[[Dict[str, Quote]], None]] = None,
+    ) -> None:
+        self._one = one
+        self._many = many
+        self._record = record
+
+    def __call__(self, symbol: str) -> Quote:
+        q = self._one(symbol)
+        if self._record is not None and q:
+            self._record({symbol: q})
+        return q
+
+    def many(self, symbols: Iterable[str]) -> Dict[str, Quote]:
+        """何をする関数? → 重複を除いた symbols の気配をまとめて返す（一括 API が無ければ 1 銘柄ずつ）"""
+        syms = list(dict.fromkeys(symbols))
+        if not syms:
+            return {}
+        out = self._many(syms) if self._many is not None else {s: self._one(s) for s in syms}
+        if self._record is not None:
+            self._record(out)
+        return out
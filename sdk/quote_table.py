@@ -0,0 +1,104 @@
+"""
+sdk.quote_table
+---------------
+ストリーミング気配の「最新値テーブル」
+
+* WebSocket スレッドが update() で書き込み、監視ループは get() / wait_updates() で読む
+* 同じ銘柄の気配が連続で来たら最新の 1 件だけ残す（ループが遅れても古い値は処理しない）
+* 受信時刻 (perf_counter) を "_recv" に入れておくので、判断までの遅延を測れる
+
+    table = LatestQuotes()
+    start_quote_stream(["AAPL"], table)      # sdk.alpaca_ws（別スレッド）
+    fresh = table.wait_updates(timeout=1.0)  # {symbol: quote}（前回以降に更新された銘柄だけ）
+
+記録と再生（scripts/replay_quotes.py が使う）:
+    handler = recording(table.update, "logs/quotes_20250801.jsonl")   # 受信しつつ JSONL に追記
+    for q in load_recorded("logs/quotes_20250801.jsonl"): ...
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+Quote = Dict[str, object]
+
+
+class LatestQuotes:
+    """symbol → 最新 Quote（スレッドセーフ）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._quotes: Dict[str, Quote] = {}
+        self._dirty: set[str] = set()
+        self.received = 0           # update() の累計回数
+        self.conflated = 0          # 読まれる前に上書きされた件数
+
+    def update(self, quote: Quote) -> None:
+        """何をする関数? → 受信した気配を登録し、待っている監視ループを起こす"""
+        sym = str(quote.get("symbol", "")).upper()
+        if not sym:
+            return
+        quote = dict(quote, _recv=time.perf_counter())
+        with self._lock:
+            self.received += 1
+            if sym in self._dirty:
+                self.conflated += 1
+            self._quotes[sym] = quote
+            self._dirty.add(sym)
+        self._event.set()
+
+    def get(self, symbol: str) -> Optional[Quote]:
+        """最新の気配（未受信なら None）。ブロックしない"""
+        with self._lock:
+            return self._quotes.get(symbol.upper())
+
+    def snapshot(self) -> Dict[str, Quote]:
+        with self._lock:
+            return dict(self._quotes)
+
+    def wait_updates(self, timeout: float) -> Dict[str, Quote]:
+        """
+        何をする関数? → 前回呼び出し以降に更新された銘柄の最新気配を返す
+        何も来ていなければ timeout 秒まで待ち、それでも無ければ {} を返す
+        """
+        self._event.wait(timeout)
+        with self._lock:
+            self._event.clear()
+            dirty, self._dirty = self._dirty, set()
+            return {s: self._quotes[s] for s in dirty}
+
+
+# ── 記録 / 再生 ─────────────────────────────────────
+def recording(handler: Callable[[Quote], None], path: str | Path) -> Callable[[Quote], None]:
+    """何をする関数? → handler を呼んだあと、同じ気配を 1 行 1 JSON で path に追記するハンドラを返す"""
+    f = open(path, "a", encoding="utf-8")
+    lock = threading.Lock()
+
+    def _handler(q: Quote) -> None:
+        handler(q)
+        ts = q.get("timestamp")
+        row = {k: v for k, v in q.items() if not k.startswith("_")}
+        row["timestamp"] = ts.isoformat() if isinstance(ts, datetime) else ts
+        with lock:
+            f.write(json.dumps(row) + "\n")
+            f.flush()
+
+    return _handler
+
+
+def load_recorded(path: str | Path) -> Iterator[Quote]:
+    """何をする関数? → recording() が書いた JSONL を 1 件ずつ返す（timestamp は datetime に戻す）"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            q = json.loads(line)
+            if isinstance(q.get("timestamp"), str):
+                q["timestamp"] = datetime.fromisoformat(q["timestamp"])
+            yield q
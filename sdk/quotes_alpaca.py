@@ -6,13 +6,15 @@ Alpaca Data v2 を使った無料リアルタイム気配ラッパー。
 必要な環境変数 (.env):
 ALPACA_API_KEY
 ALPACA_SECRET_KEY
+
+REST クライアントは sdk.http_pool で 1 つだけ作って使い回す（呼び出しごとに生成しない）。
 """
 
 from __future__ import annotations
 
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.live import StockDataStream
@@ -20,6 +22,8 @@ from alpaca.data.requests import StockBarsRequest, StockLatestQuoteRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 
+from sdk.http_pool import get_alpaca_client
+
 # ────────────────────────────────────────────────────
 # 共通 UTC / ET ヘルパ
 ET = timezone(timedelta(hours=-5))
@@ -34,12 +38,8 @@ def _et_today_0400() -> datetime:
 # ────────────────────────────────────────────────────
 # Alpaca クライアント生成
 def _get_historical_client() -> StockHistoricalDataClient:
-    """何をする関数? → REST 用クライアントを返す"""
-    load_dotenv()
-    return StockHistoricalDataClient(
-        api_key=os.environ["APCA_API_KEY_ID"],
-        secret_key=os.environ["APCA_API_SECRET_KEY"],
-    )
+    """何をする関数? → REST 用クライアントを返す（プロセス共通・keep-alive 接続を共有）"""
+    return get_alpaca_client()
 
 
 
@@ -112,14 +112,11 @@ def list_premarket_gappers(
 
 # ────────────────────────────────────────────────────
 # L1 Bid/Ask 取得
-def get_quote(symbol: str) -> Dict[str, Any]:
-    """何をする関数? → 指定銘柄の最新 Bid / Ask を返す (IEX Top)"""
-    client = _get_historical_client()
-    req = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-    q = client.get_stock_latest_quote(req)
+QUOTES_PER_REQUEST = 200   # 1 リクエストに載せる銘柄数（URL 長の上限に余裕を持たせる）
 
-    quote = q[symbol]
 
+def _quote_dict(quote) -> Dict[str, Any]:
+    """SDK の Quote モデル → bidPrice / askPrice … の dict"""
     return {
         "bidPrice": quote.bid_price,
         "askPrice": quote.ask_price,
@@ -127,3 +124,27 @@ def get_quote(symbol: str) -> Dict[str, Any]:
         "askSize": quote.ask_size,
         "timestamp": quote.timestamp,
     }
+
+
+def get_quote(symbol: str) -> Dict[str, Any]:
+    """何をする関数? → 指定銘柄の最新 Bid / Ask を返す (IEX Top)"""
+    client = _get_historical_client()
+    req = StockLatestQuoteRequest(symbol_or_symbols=symbol)
+    q = client.get_stock_latest_quote(req)
+
+    return _quote_dict(q[symbol])
+
+
+def get_quotes(symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    何をする関数? → 複数銘柄の最新 Bid / Ask を /v2/stocks/quotes/latest でまとめて取る
+    戻り値は symbol → get_quote() と同じ dict。Alpaca が返さなかった銘柄は含まれない
+    """
+    syms = list(dict.fromkeys(symbols))
+    client = _get_historical_client()
+    out: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(syms), QUOTES_PER_REQUEST):
+        chunk = syms[i : i + QUOTES_PER_REQUEST]
+        q = client.get_stock_latest_quote(StockLatestQuoteRequest(symbol_or_symbols=chunk))
+        out.update({sym: _quote_dict(q[sym]) for sym in chunk if sym in q})
+    return out
@@ -4,22 +4,37 @@ Polygon.io Free エンドポイント用の簡易ラッパ
 
 Functions
 ---------
-get_prev_close(symbol) : 前日終値 (float)
+prefetch_prev_closes() : 前営業日の全銘柄終値 {symbol: close}（grouped-aggs 1 リクエスト）
+get_prev_close(symbol) : 前日終値 (float)。上のマップに無い銘柄だけ Alpaca 日足で補完
+                         どちらも gap_bot.utils.refcache に次のセッションの引けまで保存
+prev_close_from_daily(df) : 日足 DataFrame から前営業日の bar の close（寄り前は当日 bar が無いので日付で選ぶ）
 get_snapshot(symbol)   : {'bid': float, 'ask': float, 'volume': int}
+get_minute_bars(symbol, day) : 当日レギュラー時間の 1 分足 [{minute, open, high, low, close, volume}]
 """
 
 # ── import（冒頭で統一）────────────────────────
+import logging
 import os
+import threading
 import requests
-from datetime import datetime, timezone, timedelta
+import pandas as pd
+from datetime import date, datetime, time, timezone, timedelta
 from typing import Dict
 from functools import lru_cache
-from alpaca.data.historical import StockHistoricalDataClient
+from zoneinfo import ZoneInfo
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
-_BASE = "https://api.polygon.io"
+from gap_bot.utils.market_calendar import previous_trading_day, screen_session
+from gap_bot.utils.refcache import get_cache, prev_close_expiry
+from sdk.http_pool import get_alpaca_client, get_session
+_BASE = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
 
-_alp = StockHistoricalDataClient(os.getenv("ALPACA_API_KEY"), os.getenv("ALPACA_SECRET_KEY"))
+logger = logging.getLogger("gap_bot.quotes_polygon")
+_map_lock = threading.Lock()            # grouped-aggs の初回取得を 1 スレッドに絞る
+_maps: dict[date, dict[str, float]] = {}  # session → 前日終値マップ（プロセス内）
+
+_alp = get_alpaca_client()   # 共有クライアント（keep-alive 接続を使い回す）
+_ET = ZoneInfo("America/New_York")
 
 # ── API 呼び出し関数群 ─────────────────────────
 def _get(path: str, params: Dict = None) -> Dict:
@@ -30,34 +45,116 @@ def _get(path: str, params: Dict = None) -> Dict:
         raise RuntimeError("POLYGON_API_KEY is not set")
     params["apiKey"] = api_key
 
-    r = requests.get(f"{_BASE}{path}", params=params, timeout=5)
+    r = get_session().get(f"{_BASE}{path}", params=params, timeout=5)
     r.raise_for_status()
     return r.json()
 
 
-@lru_cache(maxsize=1)
-def _prev_close_map() -> dict[str, float]:
-    """前日終値をまとめて取得して dict で返す（Free でも 1 リクエスト）"""
-    yesterday = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
-    data = _get(f"/v2/aggs/grouped/locale/us/market/stocks/{yesterday}")
-    return {str(r["T"]): float(r["c"]) for r in data.get("results", [])}
+def _prev_close_map(day: date) -> dict[str, float]:
+    """
+    day の全銘柄終値を grouped-aggs 1 リクエストで取得して dict で返す（Free でも 1 リクエスト）
+    * 結果が空（引け直後でまだ公開前など）なら前の日へは遡らず {} を返す
+      → 古い日の終値を day の値としてキャッシュしない。銘柄ごとの取得に任せる
+    * バーの日付（t, ET）が day でない行は使わない
+    * 403 / 429 等で取れなければ {} を返す
+    """
+    try:
+        data = _get(f"/v2/aggs/grouped/locale/us/market/stocks/{day:%Y-%m-%d}", {"adjusted": "true"})
+    except (requests.RequestException, RuntimeError) as e:
+        logger.warning("grouped prev_close %s failed: %s → per-symbol fallback", day, e)
+        return {}
+    results = [r for r in data.get("results") or []
+               if "t" not in r or datetime.fromtimestamp(r["t"] / 1000, tz=_ET).date() == day]
+    if not results:
+        logger.warning("grouped prev_close %s: no bars for that day yet → per-symbol fallback", day)
+        return {}
+    return {str(r["T"]): float(r["c"]) for r in results if r.get("c")}
+
+
+def prefetch_prev_closes(session: date | None = None) -> dict[str, float]:
+    """
+    session（既定: いまのスクリーニング対象日）の前営業日終値を全銘柄ぶん先に取っておく
+    * 永続キャッシュに同じ session のマップがあれば API は叩かない（夜間の warm_cache で温まる）
+    * 複数スレッドから同時に呼ばれても grouped-aggs は 1 回だけ叩く
+    * 取得に失敗した session もプロセス内では覚えておき、再試行しない
+    """
+    session = session or screen_session()
+    with _map_lock:
+        if session not in _maps:
+            cache = get_cache()
+            if cache.get("prev_close_map", session.isoformat()) is not None:
+                _maps[session] = cache.get_many("prev_close")
+            else:
+                m = _prev_close_map(previous_trading_day(session))
+                if m:
+                    exp = prev_close_expiry(session)
+                    cache.put_many("prev_close", m, expires_at=exp)
+                    cache.put("prev_close_map", session.isoformat(), len(m), expires_at=exp)
+                _maps[session] = m
+        return _maps[session]
+
+
+def prev_close_from_daily(df: pd.DataFrame | None, session: date | None = None) -> float:
+    """
+    日足 DataFrame（index は timestamp か (symbol, timestamp)）から session の前営業日の bar の close を返す
+    * 寄り前は当日の bar がまだ無い → 「最後から 2 本目」では 2 営業日前の終値になるので日付（ET）で選ぶ
+    * 前営業日の bar が無ければ 0.0（呼び出し側の次のフォールバックへ）
+    """
+    if df is None or df.empty:
+        return 0.0
+    col = next((c for c in ("close", "c", "Close") if c in df.columns), None)
+    if col is None:
+        return 0.0
+    day = previous_trading_day(session or screen_session())
+    ts = df.index.get_level_values("timestamp") if isinstance(df.index, pd.MultiIndex) else df.index
+    ts = pd.DatetimeIndex(ts)
+    days = (ts.tz_localize("UTC") if ts.tz is None else ts).tz_convert(_ET).date
+    hits = df[col].to_numpy()[days == day]
+    return float(hits[-1]) if len(hits) and hits[-1] else 0.0
+
 
 @lru_cache(maxsize=2048)
-def get_prev_close(symbol: str) -> float:
+def _prev_close_alpaca(symbol: str) -> float:
     """
-    【前日終値を Alpaca 日足で取得】
-    Polygon Free の 403 / 429 を完全回避するため、
-    symbol ごとに 1Day bar を 1 本だけ取り、その close を返す。
+    【前日終値を Alpaca 日足で取得】（grouped-aggs に無かった銘柄用のフォールバック）
+    前営業日 00:00 ET からの 1Day bar を取り、前営業日の bar の close を返す。
+    取れた値は永続キャッシュにも入れる（次のセッションの引けまで有効）。
     """
+    cache = get_cache()
+    cached = cache.get("prev_close", symbol)
+    if cached is not None:
+        return cached
+
+    session = screen_session()
     bars = _alp.get_stock_bars(StockBarsRequest(
         symbol_or_symbols=symbol,
         timeframe=TimeFrame.Day,
-        limit=2,               # 昨日と今日
+        start=datetime.combine(previous_trading_day(session), time(0), tzinfo=_ET),
+        limit=2,               # 前営業日と（寄り後なら）当日
         feed="iex",
     )).df
-    if bars.empty or len(bars) < 2:
-        return 0.0
-    return float(bars.iloc[-2]["c"])       # 昨日の close
+    close = prev_close_from_daily(bars, session)
+    if close:
+        cache.put("prev_close", symbol, close, expires_at=prev_close_expiry(session))
+    return close
+
+
+def get_prev_close(symbol: str) -> float:
+    """
+    前日終値を返す
+    まず grouped-aggs の全銘柄マップ（1 リクエスト）を引き、無い銘柄だけ Alpaca 日足へ 1 件ずつ問い合わせる。
+    """
+    close = prefetch_prev_closes().get(symbol)
+    if close:
+        return close
+    return _prev_close_alpaca(symbol)
+
+
+def clear_prev_close_cache() -> None:
+    """前日終値のプロセス内キャッシュ（grouped / 銘柄ごと）を捨てる（永続キャッシュはそのまま）"""
+    with _map_lock:
+        _maps.clear()
+    _prev_close_alpaca.cache_clear()
 
 
 
@@ -71,3 +168,21 @@ def get_snapshot(symbol: str) -> Dict:
         "volume": int(tkr["day"]["v"]),
         "ts": datetime.fromtimestamp(tkr["updated"]/1000, tz=timezone.utc),
     }
+
+
+
+def get_minute_bars(symbol: str, day: date) -> list[dict]:
+    """
+    day のレギュラー時間（09:30〜16:00 ET）の 1 分足を返す関数
+    minute は 09:30 ET からの経過分（0〜389）。バックテスト用の gap_bot.store "bars" テーブルと同じ列
+    """
+    data = _get(f"/v2/aggs/ticker/{symbol}/range/1/minute/{day:%Y-%m-%d}/{day:%Y-%m-%d}",
+                {"adjusted": "true", "sort": "asc", "limit": 50000})
+    open_ts = datetime.combine(day, datetime.min.time(), tzinfo=_ET).replace(hour=9, minute=30).timestamp()
+    out = []
+    for r in data.get("results") or []:
+        m = int((r["t"] / 1000 - open_ts) // 60)
+        if 0 <= m < 390:
+            out.append({"minute": m, "open": float(r["o"]), "high": float(r["h"]),
+                        "low": float(r["l"]), "close": float(r["c"]), "volume": int(r.get("v", 0))})
+    return out
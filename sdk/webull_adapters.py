@@ -0,0 +1,258 @@
+"""
+sdk.webull_adapters
+-------------------
+WebullClient が使う発注系 SDK メソッドを「起動時に 1 回だけ」決めるための解決層
+
+SDK のバージョンによってメソッド名・引数名・置き場所（trade 直下 / trade.account / trade.order）が違う。
+以前は呼び出しのたびに hasattr と TypeError で総当たりしていたが、ここでは
+
+* inspect.signature で各候補に引数が束縛できるかを起動時に確認し
+* 最初に合った候補を「正規化した引数で呼べる関数」(Adapter) として操作ごとに保存する
+
+ので、発注時は決まった SDK メソッドを 1 回呼ぶだけになる。
+
+    adapters = resolve_adapters(trade_api, account_id)
+    adapters["place_limit_order"].call("AAPL", "BUY", 10, 190.5, "DAY", True, None, None)
+
+操作と正規化した引数:
+    place_limit_order(symbol, action, qty, price, tif, extended, take_profit, stop_loss)
+    place_stop_order(symbol, action, qty, stop_price, tif)
+    get_active_orders()
+    cancel_order(order_id)
+    get_positions()
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("gap_bot.webull")
+
+OPERATIONS = ("place_limit_order", "place_stop_order", "get_active_orders", "cancel_order", "get_positions")
+PAGE_SIZE = 100   # 公式 SDK の一覧系 API に渡す件数
+
+
+@dataclass(frozen=True)
+class Adapter:
+    """1 操作ぶんの解決結果"""
+    op: str                       # 操作名（OPERATIONS のどれか）
+    name: str                     # 選ばれた SDK メソッドと呼び方（ログ用）
+    call: Callable[..., Any]      # 正規化した引数で呼べる関数
+
+
+# ── 判定ヘルパ ─────────────────────────────────────────
+def _binds(fn: Callable, *args, **kwargs) -> bool:
+    """fn に args/kwargs が束縛できるか（シグネチャが取れない C 実装などは呼べるものとして扱う）"""
+    try:
+        inspect.signature(fn).bind(*args, **kwargs)
+        return True
+    except TypeError:
+        return False
+    except ValueError:
+        return True
+
+
+def _owners(trade) -> Iterator[Tuple[str, Any]]:
+    """候補メソッドを探す場所（旧来の探索順: trade 直下 → trade.account）"""
+    yield "trade", trade
+    acc = getattr(trade, "account", None)
+    if acc is not None:
+        yield "trade.account", acc
+
+
+def _method(owner, name: str) -> Optional[Callable]:
+    m = getattr(owner, name, None)
+    return m if callable(m) else None
+
+
+def _json(resp: Any) -> Any:
+    """requests.Response 風なら .json() を、それ以外はそのまま返す"""
+    return resp.json() if hasattr(resp, "json") and callable(resp.json) else resp
+
+
+def _first_list(resp: Any) -> Any:
+    """公式 SDK の一覧レスポンス（{"orders": [...]} など）から list を取り出す。見つからなければそのまま"""
+    if isinstance(resp, dict) and "data" not in resp:
+        for v in resp.values():
+            if isinstance(v, list):
+                return v
+    return resp
+
+
+# ── 操作ごとの候補 ─────────────────────────────────────
+_PLACE_NAMES = ("place_order", "submit_order", "placeOrder", "order_limit", "order", "create_order")
+_DUMMY_ORDER = ("SYM", "BUY", 1, 1.0, "DAY", False, None, None)
+
+
+def _place_candidates(trade, account_id: str, instrument_id: Callable[[str], str]):
+    """place_limit_order の候補を優先順に (名前, SDK メソッド, 正規化関数) で返す"""
+    for where, owner in _owners(trade):
+        for name in _PLACE_NAMES:
+            m = _method(owner, name)
+            if m is None:
+                continue
+            # (A) よくあるキーワード引数
+            kw_a = lambda sym, act, q, px, tif, ext, tp, sl, m=m: m(
+                symbol=sym, action=act, order_type="limit", limit_price=px, qty=q,
+                time_in_force=tif, extended_hours=ext, take_profit=tp, stop_loss=sl)
+            yield f"{where}.{name}[symbol/action/limit_price]", m, kw_a, dict(
+                symbol=1, action=1, order_type=1, limit_price=1, qty=1,
+                time_in_force=1, extended_hours=1, take_profit=1, stop_loss=1)
+            # (B) キーワード名が異なる実装
+            kw_b = lambda sym, act, q, px, tif, ext, tp, sl, m=m: m(
+                symbol=sym, side=act, type="limit", price=px, quantity=q,
+                tif=tif, ext=ext, tp=tp, sl=sl)
+            yield f"{where}.{name}[symbol/side/price]", m, kw_b, dict(
+                symbol=1, side=1, type=1, price=1, quantity=1, tif=1, ext=1, tp=1, sl=1)
+            # (C) 位置引数中心
+            pos_c = lambda sym, act, q, px, tif, ext, tp, sl, m=m: m(sym, act, q, px, "limit", tif, ext)
+            yield f"{where}.{name}[positional]", m, pos_c, (1, 1, 1, 1, 1, 1, 1)
+
+    # 公式 SDK (webullsdktrade.api.API): trade.order.place_order(account_id, instrument_id, ...)
+    order = getattr(trade, "order", None)
+    m = _method(order, "place_order") if order is not None else None
+    if m is not None:
+        def official(sym, act, q, px, tif, ext, tp, sl, m=m):
+            cid = uuid.uuid4().hex
+            resp = _json(m(account_id=account_id, qty=q, instrument_id=instrument_id(sym), side=act,
+                           client_order_id=cid, order_type="LIMIT", extended_hours_trading=ext,
+                           tif=tif, limit_price=px))
+            return {"clientOrderId": cid, **resp} if isinstance(resp, dict) else {"clientOrderId": cid}
+        yield "trade.order.place_order[official]", m, official, dict(
+            account_id=1, qty=1, instrument_id=1, side=1, client_order_id=1, order_type=1,
+            extended_hours_trading=1, tif=1, limit_price=1)
+
+
+def _stop_candidates(trade, account_id: str, instrument_id: Callable[[str], str]):
+    """place_stop_order の候補（place_limit_order と同じ場所・同じ名前で stop_price を受け取れるもの）"""
+    for where, owner in _owners(trade):
+        for name in _PLACE_NAMES:
+            m = _method(owner, name)
+            if m is None:
+                continue
+            # (A) place_limit_order (A) と同じキーワード名
+            kw_a = lambda sym, act, q, sp, tif, m=m: m(
+                symbol=sym, action=act, order_type="stop", stop_price=sp, qty=q, time_in_force=tif)
+            yield f"{where}.{name}[symbol/action/stop_price]", m, kw_a, dict(
+                symbol=1, action=1, order_type=1, stop_price=1, qty=1, time_in_force=1)
+            # (B) side / quantity / tif 系のキーワード名
+            kw_b = lambda sym, act, q, sp, tif, m=m: m(
+                symbol=sym, side=act, type="stop", stop_price=sp, quantity=q, tif=tif)
+            yield f"{where}.{name}[symbol/side/stop_price]", m, kw_b, dict(
+                symbol=1, side=1, type=1, stop_price=1, quantity=1, tif=1)
+
+    # 公式 SDK: 逆指値は order_type="STOP_LOSS" + stop_price
+    order = getattr(trade, "order", None)
+    m = _method(order, "place_order") if order is not None else None
+    if m is not None:
+        def official(sym, act, q, sp, tif, m=m):
+            cid = uuid.uuid4().hex
+            resp = _json(m(account_id=account_id, qty=q, instrument_id=instrument_id(sym), side=act,
+                           client_order_id=cid, order_type="STOP_LOSS", extended_hours_trading=False,
+                           tif=tif, stop_price=sp))
+            return {"clientOrderId": cid, **resp} if isinstance(resp, dict) else {"clientOrderId": cid}
+        yield "trade.order.place_order[official]", m, official, dict(
+            account_id=1, qty=1, instrument_id=1, side=1, client_order_id=1, order_type=1,
+            extended_hours_trading=1, tif=1, stop_price=1)
+
+
+def _noarg_candidates(trade, names_trade: Tuple[str, ...], names_account: Tuple[str, ...]):
+    for name in names_trade:
+        m = _method(trade, name)
+        if m is not None:
+            yield f"trade.{name}", m, (lambda m=m: m()), ()
+    acc = getattr(trade, "account", None)
+    for name in names_account:
+        m = _method(acc, name) if acc is not None else None
+        if m is not None:
+            yield f"trade.account.{name}", m, (lambda m=m: m()), ()
+
+
+def _orders_candidates(trade, account_id: str):
+    yield from _noarg_candidates(trade, ("get_active_orders", "get_open_orders", "orders", "get_orders"),
+                                 ("get_active_orders",))
+    order = getattr(trade, "order", None)
+    m = _method(order, "list_open_orders") if order is not None else None
+    if m is not None:
+        yield ("trade.order.list_open_orders[official]", m,
+               lambda m=m: _first_list(_json(m(account_id=account_id, page_size=PAGE_SIZE))),
+               dict(account_id=1, page_size=1))
+
+
+def _positions_candidates(trade, account_id: str):
+    yield from _noarg_candidates(trade, ("get_positions", "positions"), ("get_positions",))
+    acc = getattr(trade, "account", None)
+    m = _method(acc, "get_account_position") if acc is not None else None
+    if m is not None:
+        yield ("trade.account.get_account_position[official]", m,
+               lambda m=m: _first_list(_json(m(account_id=account_id, page_size=PAGE_SIZE))),
+               dict(account_id=1, page_size=1))
+
+
+def _cancel_candidates(trade, account_id: str):
+    for where, owner in _owners(trade):
+        names = ("cancel_order", "cancelOrder", "cancel", "cancel_orders") if where == "trade" \
+            else ("cancel_order", "cancelOrder")
+        for name in names:
+            m = _method(owner, name)
+            if m is None:
+                continue
+            if name == "cancel_orders":
+                yield f"{where}.{name}[list]", m, (lambda oid, m=m: m([oid])), ([1],)
+                yield f"{where}.{name}[order_ids=]", m, (lambda oid, m=m: m(order_ids=[oid])), dict(order_ids=1)
+                continue
+            yield f"{where}.{name}[id]", m, (lambda oid, m=m: m(oid)), (1,)
+            if name == "cancel":
+                yield f"{where}.{name}[orderId=]", m, (lambda oid, m=m: m(orderId=oid)), dict(orderId=1)
+    order = getattr(trade, "order", None)
+    m = _method(order, "cancel_order") if order is not None else None
+    if m is not None:
+        yield ("trade.order.cancel_order[official]", m,
+               lambda oid, m=m: _json(m(account_id=account_id, client_order_id=oid)),
+               dict(account_id=1, client_order_id=1))
+
+
+# ── 解決 ───────────────────────────────────────────────
+def _pick(op: str, candidates) -> Optional[Adapter]:
+    """候補のうちシグネチャに引数が束縛できる最初の 1 つを Adapter にする"""
+    for name, method, call, probe in candidates:
+        ok = _binds(method, **probe) if isinstance(probe, dict) else _binds(method, *probe)
+        if ok:
+            return Adapter(op, name, call)
+    return None
+
+
+def resolve_adapters(
+    trade,
+    account_id: str,
+    instrument_id: Optional[Callable[[str], str]] = None,
+) -> Dict[str, Adapter]:
+    """
+    何をする関数? → trade API を 1 回だけ調べ、操作名 → Adapter の dict を返す
+    見つからない操作は dict に入らない（呼び出し側で「未対応」として扱う）
+    instrument_id: 公式 SDK 用の symbol → instrument_id 変換（省略時は symbol をそのまま渡す）
+    """
+    to_iid = instrument_id or (lambda s: s)
+    found = {
+        "place_limit_order": _pick("place_limit_order", _place_candidates(trade, account_id, to_iid)),
+        "place_stop_order": _pick("place_stop_order", _stop_candidates(trade, account_id, to_iid)),
+        "get_active_orders": _pick("get_active_orders", _orders_candidates(trade, account_id)),
+        "cancel_order": _pick("cancel_order", _cancel_candidates(trade, account_id)),
+        "get_positions": _pick("get_positions", _positions_candidates(trade, account_id)),
+    }
+    for op in OPERATIONS:
+        ad = found[op]
+        if ad is None:
+            logger.warning("webull adapter %s → (none)", op)
+        else:
+            logger.info("webull adapter %s → %s", op, ad.name)
+    return {op: ad for op, ad in found.items() if ad is not None}
+
+
+def describe(adapters: Dict[str, Adapter]) -> List[str]:
+    """"op → name" の一覧（起動ログや health check 用）"""
+    return [f"{op} → {adapters[op].name if op in adapters else '(none)'}" for op in OPERATIONS]
@@ -17,16 +17,79 @@ WEBULL_APP_KEY, WEBULL_SECRET, ACCOUNT_ID
 from __future__ import annotations
 
 import os
+import time
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from webullsdkcore.client import ApiClient                # 共通 HTTP 基盤
 from webullsdkquotescore.quotes_client import QuotesClient        # 気配
 from webullsdktrade.api import API as TradeApi            # 発注
+from webullsdkmdata.quotes.market_data import MarketData  # スナップショット（複数銘柄）
 from decimal import Decimal, ROUND_HALF_UP  # 何をする行か: 価格をティックサイズ(例:$0.01)へ安全に丸めるために使う
 
+from sdk.order_book import OrderBookCache, order_kind
+from gap_bot.tape import get_tape
+from sdk.webull_session import SessionKeeper
+from sdk.webull_adapters import Adapter, resolve_adapters
+
 __all__ = ["WebullClient"]
 
+_AUTH_ERRORS = ("UNAUTHORIZED", "grpc_status:16", "UNAUTHENTICATED")
+
+
+def _is_auth_error(e: Exception) -> bool:
+    """認証切れを示す例外か（SDK ごとに文言が違うので典型ワードで判定）"""
+    msg = str(e)
+    return any(k in msg for k in _AUTH_ERRORS)
+
+
+def _unwrap_list(resp: Any) -> list:
+    """{"data": [...]} / [...] のどちらでも list を返す（それ以外は空）"""
+    data = resp.get("data", resp) if isinstance(resp, dict) else resp
+    return data if isinstance(data, list) else []
+
+
+def _extract_oid(r: object) -> str | None:
+    """何をする関数なのか: SDKごとに異なるレスポンスから注文ID相当を見つける"""
+    if isinstance(r, dict):
+        for k in ("orderId", "id", "oid", "clientOrderId", "client_order_id", "cloid"):
+            if k in r and r[k]:
+                return str(r[k])
+        d = r.get("data") if "data" in r else None
+        if isinstance(d, dict):
+            for k in ("orderId", "id", "oid", "clientOrderId", "cloid"):
+                if k in d and d[k]:
+                    return str(d[k])
+            sts = d.get("statuses")
+            if isinstance(sts, list) and sts:
+                for item in sts:
+                    for k in ("oid", "orderId", "id", "clientOrderId", "cloid"):
+                        if isinstance(item, dict) and item.get(k):
+                            return str(item[k])
+    return None
+
+
+_LEG_KEYS = {"TP": ("takeProfitOrderId", "take_profit_order_id", "tpOrderId"),
+             "SL": ("stopLossOrderId", "stop_loss_order_id", "slOrderId")}
+
+
+def _bracket_legs(r: object) -> List[tuple]:
+    """何をする関数なのか: ブラケット添付のレスポンスから (TP|SL, 子注文ID) を拾う（見つからなければ空）"""
+    body = r.get("data") if isinstance(r, dict) and isinstance(r.get("data"), (dict, list)) else r
+    legs = []
+    if isinstance(body, dict):
+        for kind, keys in _LEG_KEYS.items():
+            oid = next((body[k] for k in keys if body.get(k)), None)
+            if oid:
+                legs.append((kind, str(oid)))
+        body = next((body[k] for k in ("orders", "legs", "children") if isinstance(body.get(k), list)), [])
+    for item in body if isinstance(body, list) else []:
+        kind = order_kind(item) if isinstance(item, dict) else ""
+        oid = _extract_oid(item)
+        if kind in {"tp", "sl"} and oid:
+            legs.append((kind.upper(), oid))
+    return legs
+
 
 class WebullClient:
     """QuotesClient と TradeClient をまとめた便利クラス"""
@@ -42,7 +105,51 @@ class WebullClient:
         self._api = ApiClient(app_key=app_key, app_secret=secret)
         self.quotes = QuotesClient(app_key=app_key, app_secret=secret)
         self.trade = TradeApi(self._api,)
+        self.market = MarketData(self._api)
         self.account_id = account_id
+        self._instrument_ids: Dict[str, str] = {}
+        # 何をする行か: アクティブ注文の台帳。自分の発注/取消で即更新し、reconcile_sec ごとにブローカーと突き合わせる
+        self.orders = OrderBookCache(reconcile_sec=float(os.getenv("WEBULL_ORDER_RECONCILE_SEC", "30")),
+                                     on_event=get_tape().order)   # 何をする行か: 台帳の変化（発注・取消・約定）をテープに残す
+        # 何をする行か: セッション寿命の見積もり。期限の margin 前に裏で再認証し、発注経路に再認証を持ち込まない
+        self.session = SessionKeeper(
+            self._relogin,
+            ttl_sec=float(os.getenv("WEBULL_TOKEN_TTL_SEC", "1800")),
+            margin_sec=float(os.getenv("WEBULL_TOKEN_REFRESH_MARGIN_SEC", "120")),
+        )
+        self._resolve_adapters()
+
+    def _resolve_adapters(self) -> None:
+        """発注系 SDK メソッドを 1 回だけ解決してキャッシュする（呼び出しごとの総当たりをしない）"""
+        self._adapters: Dict[str, Adapter] = resolve_adapters(self.trade, self.account_id, self._instrument_id)
+
+    def warm_up(self, symbols: List[str] = (), *, keepalive: bool = True) -> Dict[str, Any]:
+        """
+        何をする関数? → 寄り付き前に認証・接続・参照データを温めておく
+        * 再認証ルートがあれば 1 回認証して寿命の計測を始め、keepalive=True なら期限前の自動更新を開始
+        * アクティブ注文を 1 回取得（接続確立 + 注文台帳の初期化）
+        * symbols の instrument_id を先に引いておく（公式 SDK の発注で 1 往復減る）
+        戻り値は session.stats()
+        """
+        if self._can_relogin():
+            self.session.refresh()
+            if keepalive:
+                self.session.start()
+        try:
+            self.get_active_orders()
+        except Exception:
+            pass  # 何をする行か: ウォームアップの失敗で起動は止めない（本番の呼び出しで改めて例外になる）
+        if hasattr(getattr(self.trade, "instrument", None), "get_instrument"):
+            for sym in symbols:
+                try:
+                    self._instrument_id(str(sym).upper())
+                except Exception:
+                    pass
+        return self.session.stats()
+
+    def close(self) -> None:
+        """自動更新スレッドを止める"""
+        self.session.stop()
 
     # ---------- ファクトリ ----------
     @classmethod
@@ -92,6 +199,43 @@ class WebullClient:
         """Bid / Ask を含む最新気配を取得"""
         return self.quotes.get_quote(symbol=symbol, include_pre=extended)
 
+    SNAPSHOT_MAX = 100   # /market-data/snapshot 1 回あたりの銘柄上限
+
+    def get_quotes(self, symbols: List[str], *, extended: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        複数銘柄の最新気配を /market-data/snapshot でまとめて取得
+        戻り値は symbol → {bidPrice, askPrice, bidSize, askSize, lastPrice, timestamp}
+        （スナップショットに載らなかった銘柄は含まれない）
+        """
+        def _pick(d: dict, *keys):
+            for k in keys:
+                if d.get(k) not in (None, ""):
+                    return float(d[k])
+            return None
+
+        syms = list(dict.fromkeys(str(s).strip().upper() for s in symbols))
+        out: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(syms), self.SNAPSHOT_MAX):
+            chunk = syms[i : i + self.SNAPSHOT_MAX]
+            res = self.market.get_snapshot(",".join(chunk), "US_STOCK")
+            rows = res.json() if hasattr(res, "json") else res
+            if isinstance(rows, dict):
+                rows = rows.get("data") or []
+            for r in rows or []:
+                sym = str(r.get("symbol", "")).upper()
+                if not sym:
+                    continue
+                last = _pick(r, "extend_hour_last_price", "price") if extended else _pick(r, "price")
+                out[sym] = {
+                    "bidPrice": _pick(r, "bid", "bid_price", "bidPrice"),
+                    "askPrice": _pick(r, "ask", "ask_price", "askPrice"),
+                    "bidSize": _pick(r, "bid_size", "bidSize"),
+                    "askSize": _pick(r, "ask_size", "askSize"),
+                    "lastPrice": last,
+                    "timestamp": r.get("trade_timestamp") or r.get("timestamp"),
+                }
+        return out
+
     # ======================================================================
     #  -----------  Trading ラッパー  --------------------------------------
     # ======================================================================
@@ -105,114 +249,47 @@ class WebullClient:
         qty_int = max(1, int(qty))  # 何をする行か: 株数は整数に丸め、最低1株を保証
         px = float(Decimal(str(price)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))  # 何をする行か: 価格を$0.01刻みに丸める
 
-        def _extract_oid(r: object) -> str | None:
-            """何をする関数なのか: SDKごとに異なるレスポンスから注文ID相当を見つける"""
-            if isinstance(r, dict):
-                for k in ("orderId", "id", "oid", "clientOrderId", "cloid"):
-                    if k in r and r[k]:
-                        return str(r[k])
-                d = r.get("data") if "data" in r else None
-                if isinstance(d, dict):
-                    for k in ("orderId", "id", "oid", "clientOrderId", "cloid"):
-                        if k in d and d[k]:
-                            return str(d[k])
-                    sts = d.get("statuses")
-                    if isinstance(sts, list) and sts:
-                        for item in sts:
-                            for k in ("oid", "orderId", "id", "clientOrderId", "cloid"):
-                                if isinstance(item, dict) and item.get(k):
-                                    return str(item[k])
-            return None
-
-        def _try_call(method_name: str):
-            """何をする関数なのか: 指定メソッド名で複数の引数バリエーションを順に試す"""
-            if not hasattr(self.trade, method_name):
-                return None
-            m = getattr(self.trade, method_name)
-            # 何をする行か: よくあるキーワード引数パターン(A)
-            try:
-                return m(
-                    symbol=sym, action=action, order_type="limit",
-                    limit_price=px, qty=qty_int, time_in_force=time_in_force,
-                    extended_hours=extended, take_profit=take_profit, stop_loss=stop_loss
-                )
-            except TypeError:
-                pass
-            # 何をする行か: キーワード名が異なるパターン(B)
-            try:
-                return m(
-                    symbol=sym, side=action, type="limit",
-                    price=px, quantity=qty_int, tif=time_in_force,
-                    ext=extended, tp=take_profit, sl=stop_loss
-                )
-            except TypeError:
-                pass
-            # 何をする行か: 位置引数中心のパターン(C)
-            try:
-                return m(sym, action, qty_int, px, "limit", time_in_force, extended)
-            except TypeError:
-                pass
-            return None
-
+        ad = self._adapters.get("place_limit_order")
+        if ad is None:  # 何をする行か: 起動時にどの発注 API も見つからなかった
+            return {"orderId": None, "response": None, "success": False}
         try:
-            resp = None  # 何をする行か: 発注レスポンスの初期化
-
-            # 何をする行か: 代表的なメソッド名から順に試す
-            for name in ("place_order", "submit_order", "placeOrder", "order_limit", "order", "create_order"):
-                resp = _try_call(name)
-                if resp is not None:
-                    break
-
-            # 何をする行か: サブクライアント(account)配下の実装へのフォールバック
-            if resp is None and hasattr(self.trade, "account"):
-                for name in ("place_order", "submit_order", "placeOrder", "order_limit", "order", "create_order"):
-                    try:
-                        acc = self.trade.account
-                        if hasattr(acc, name):
-                            m = getattr(acc, name)
-                            try:
-                                resp = m(
-                                    symbol=sym, action=action, order_type="limit",
-                                    limit_price=px, qty=qty_int, time_in_force=time_in_force,
-                                    extended_hours=extended, take_profit=take_profit, stop_loss=stop_loss
-                                )
-                            except TypeError:
-                                try:
-                                    resp = m(
-                                        symbol=sym, side=action, type="limit",
-                                        price=px, quantity=qty_int, tif=time_in_force,
-                                        ext=extended, tp=take_profit, sl=stop_loss
-                                    )
-                                except TypeError:
-                                    try:
-                                        resp = m(sym, action, qty_int, px, "limit", time_in_force, extended)
-                                    except TypeError:
-                                        resp = None
-                    except Exception:
-                        resp = None
-                    if resp is not None:
-                        break
-
-            # 何をする行か: どのルートでも発注できなければ失敗を返す
-            if resp is None:
-                return {"orderId": None, "response": None, "success": False}
-
-            # 何をする行か: レスポンスから注文IDを抽出し、標準化して返す
-            oid = _extract_oid(resp)
-            return {"orderId": oid, "response": resp, "success": True if oid else False}
+            # 何をする行か: 起動時に決めた SDK メソッドを 1 回だけ呼ぶ（認証切れのときだけ再ログイン→1 回再試行）
+            resp = self._call(ad, sym, action, qty_int, px, time_in_force, extended, take_profit, stop_loss)
+        except Exception:
+            return {"orderId": None, "response": None, "success": False}
 
-        except Exception as e:
-            msg = str(e)
-            # 何をする行か: 認証切れを検知したら1回だけ再ログイン→再試行
-            if "UNAUTHORIZED" in msg or "grpc_status:16" in msg or "UNAUTHENTICATED" in msg:
-                if self._relogin():
-                    try:
-                        return self.place_limit_order(symbol, side, qty, price, time_in_force, extended, take_profit, stop_loss)
-                    except Exception:
-                        return {"orderId": None, "response": None, "success": False}
-                return {"orderId": None, "response": None, "success": False}
-            # 何をする行か: その他の例外は失敗として標準形で返す
+        # 何をする行か: レスポンスから注文IDを抽出し、標準化して返す
+        oid = _extract_oid(resp)
+        if oid:
+            # 何をする行か: 受け付けられた注文を台帳へ即時反映（次の突き合わせまで一覧を取り直さない）
+            self.orders.on_placed({"orderId": oid, "symbol": sym, "side": action, "orderType": "LIMIT",
+                                   "qty": qty_int, "limitPrice": px, "status": "working"})
+            if take_profit is not None or stop_loss is not None:
+                self.orders.invalidate()  # 何をする行か: 同梱した TP/SL の子注文IDは返らないので、次の参照で一覧を取り直す
+        return {"orderId": oid, "response": resp, "success": True if oid else False}
+
+
+    # 逆指値発注 ------------------------------------------------------------
+    def place_stop_order(self, symbol: str, qty: float, stop_price: float, side: str, time_in_force: str = "DAY") -> dict:
+        """何をする関数なのか: 逆指値(STOP)を発注し、受け付けられたら台帳へ即時反映する（SL 移動で重複 STOP を作らないため）"""
+        sym = str(symbol).strip().upper()
+        action = "BUY" if str(side).strip().upper() in {"BUY", "LONG"} else "SELL"
+        qty_int = max(1, int(qty))
+        sp = float(Decimal(str(stop_price)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+        ad = self._adapters.get("place_stop_order")
+        if ad is None:
             return {"orderId": None, "response": None, "success": False}
+        try:
+            resp = self._call(ad, sym, action, qty_int, sp, time_in_force)
+        except Exception:
+            return {"orderId": None, "response": None, "success": False}
+
+        oid = _extract_oid(resp)
+        if oid:
+            self.orders.on_placed({"orderId": oid, "symbol": sym, "side": action, "orderType": "STOP",
+                                   "qty": qty_int, "stopPrice": sp, "status": "working"})
+        return {"orderId": oid, "response": resp, "success": True if oid else False}
 
 
     # ブラケット添付 --------------------------------------------------------
@@ -224,138 +301,140 @@ class WebullClient:
         stop_loss: float,
         break_even_distance: float,
     ) -> Dict[str, Any]:
-        return self.trade.attach_bracket_order(
+        """何をする関数なのか: 親注文に TP/SL を付け、返ってきた子注文を台帳へ即時反映する"""
+        resp = self.trade.attach_bracket_order(
             parent_order_id=parent_order_id,
             take_profit=take_profit,
             stop_loss=stop_loss,
             break_even_distance=break_even_distance,
         )
+        parent = self.orders.get(str(parent_order_id))
+        legs = _bracket_legs(resp)
+        if parent is None or not legs:
+            self.orders.invalidate()  # 何をする行か: 子注文IDが分からなければ、次の参照でブローカー一覧を取り直す
+            return resp
+        side = "SELL" if parent["side"] == "buy" else "BUY"  # 何をする行か: 子注文は親の反対売買
+        for kind, oid in legs:
+            px = {"limitPrice": take_profit} if kind == "TP" else {"stopPrice": stop_loss}
+            self.orders.on_placed({"orderId": oid, "symbol": parent["symbol"], "side": side, "orderType": kind,
+                                   "qty": parent["qty"], "parentId": parent["oid"], "status": "working", **px})
+        return resp
 
     # 注文取得・キャンセル --------------------------------------------------
     def get_active_orders(self) -> list:
         """何をする関数なのか: SDKバージョン差（メソッド名・返却形式）を吸収し、現在アクティブな注文一覧をlistで安全に返す"""
+        ad = self._adapters.get("get_active_orders")
+        if ad is None:
+            return []  # 何をする行か: 取得手段が無ければ空で返す
         try:
-            # 何をする行か: 新系SDKの一般的な名称をまず試す
-            if hasattr(self.trade, "get_active_orders"):
-                resp = self.trade.get_active_orders()  # 何をする行か: 新系メソッドの呼び出し
-
-            # 何をする行か: 旧系/別実装で使われる名称にフォールバック
-            elif hasattr(self.trade, "get_open_orders"):
-                resp = self.trade.get_open_orders()  # 何をする行か: 旧系メソッドの呼び出し
-            elif hasattr(self.trade, "orders"):
-                resp = self.trade.orders()  # 何をする行か: 汎用orders取得の呼び出し
-            elif hasattr(self.trade, "get_orders"):
-                resp = self.trade.get_orders()  # 何をする行か: 別名の呼び出し
-
-            # 何をする行か: サブクライアント(account)経由の最終フォールバック
-            elif hasattr(self.trade, "account") and hasattr(self.trade.account, "get_active_orders"):
-                resp = self.trade.account.get_active_orders()  # 何をする行か: account配下の呼び出し
-            else:
-                return []  # 何をする行か: 取得手段が無ければ空で返す
-
-            # 何をする行か: {"data":[...]} と [...] の両形式に対応
-            data = (resp or {}).get("data", resp)
-            if not isinstance(data, list):
-                return []
-            # 何をする行か: Filled/Canceled等を除外できるなら除外（キーが無い実装もあるため安全に）
-            return [o for o in data if str(o.get("status", "")).lower() not in {"filled", "canceled", "cancelled"}]
+            resp = self._call(ad)
         except Exception as e:
-            msg = str(e)
-            # 何をする行か: 認証切れの典型ワードなら再ログイン→1回だけリトライ
-            if "UNAUTHORIZED" in msg or "grpc_status:16" in msg or "UNAUTHENTICATED" in msg:
-                if self._relogin():
-                    try:
-                        if hasattr(self.trade, "get_active_orders"):
-                            resp = self.trade.get_active_orders()
-                        elif hasattr(self.trade, "get_open_orders"):
-                            resp = self.trade.get_open_orders()
-                        elif hasattr(self.trade, "orders"):
-                            resp = self.trade.orders()
-                        elif hasattr(self.trade, "get_orders"):
-                            resp = self.trade.get_orders()
-                        elif hasattr(self.trade, "account") and hasattr(self.trade.account, "get_active_orders"):
-                            resp = self.trade.account.get_active_orders()
-                        else:
-                            return []
-                        data = (resp or {}).get("data", resp)
-                        if not isinstance(data, list):
-                            return []
-                        return [o for o in data if str(o.get("status", "")).lower() not in {"filled", "canceled", "cancelled"}]
-                    except Exception:
-                        return []
-                return []
+            if _is_auth_error(e):
+                return []  # 何をする行か: 再ログインしても通らなければ空で返す
             raise  # 何をする行か: 認証以外の想定外は上位で処理してもらう
-
-
-    def cancel_order(self, order_id, _retry=False) -> bool:
-        """何をする関数なのか: SDKのメソッド名・引数差・返却形式の違いを吸収し、指定注文IDの取消を確実に試みて成功可否をboolで返す"""
+        data = _unwrap_list(resp)
+        # 何をする行か: Filled/Canceled等を除外できるなら除外（キーが無い実装もあるため安全に）
+        active = [o for o in data if str(o.get("status", "")).lower() not in {"filled", "canceled", "cancelled"}]
+        self.orders.reconcile(active)  # 何をする行か: 取り直したついでに台帳を突き合わせる
+        return active
+
+    def open_orders(self) -> list:
+        """何をする関数なのか: 台帳のアクティブ注文を返す（台帳が reconcile_sec より古いときだけブローカーへ取りに行く）"""
+        if self.orders.stale():
+            self.get_active_orders()
+        return [o["raw"] for o in self.orders.active()]
+
+    def find_orders(self, symbol: str, side: str | None = None, kind: str | None = None) -> list:
+        """何をする関数なのか: symbol（+ side: buy/sell, kind: stop/limit/market/tp/sl）のアクティブ注文を台帳から O(1) で引く"""
+        if self.orders.stale():
+            self.get_active_orders()
+        return [o["raw"] for o in self.orders.find(symbol, side=side, kind=kind)]
+
+
+    def cancel_order(self, order_id) -> bool:
+        """何をする関数なのか: SDKのメソッド名・引数差・返却形式の違いを吸収し、指定注文IDの取消を試みて成功可否をboolで返す"""
         oid = str(order_id)  # 何をする行か: IDを文字列に正規化（SDK実装差の吸収）
+        ad = self._adapters.get("cancel_order")
+        if ad is None:
+            return False
         try:
-            # 何をする行か: 代表的な名称から順にフォールバックして呼び出す
-            if hasattr(self.trade, "cancel_order"):
-                res = self.trade.cancel_order(oid)  # 何をする行か: 新系メソッド
-            elif hasattr(self.trade, "cancelOrder"):
-                res = self.trade.cancelOrder(oid)   # 何をする行か: キャメルケース別名
-            elif hasattr(self.trade, "cancel"):
-                try:
-                    res = self.trade.cancel(oid)    # 何をする行か: 単一引数版
-                except TypeError:
-                    res = self.trade.cancel(orderId=oid)  # 何をする行か: キーワード引数版
-            elif hasattr(self.trade, "cancel_orders"):
-                try:
-                    res = self.trade.cancel_orders([oid])  # 何をする行か: 複数ID対応APIに単一で渡す
-                except TypeError:
-                    res = self.trade.cancel_orders(order_ids=[oid])  # 何をする行か: 別名キーワードに対応
-            elif hasattr(self.trade, "account"):
-                acc = self.trade.account  # 何をする行か: サブクライアント経由の最終フォールバック
-                if hasattr(acc, "cancel_order"):
-                    res = acc.cancel_order(oid)
-                elif hasattr(acc, "cancelOrder"):
-                    res = acc.cancelOrder(oid)
-                else:
-                    return False
-            else:
-                return False
-
-            # 何をする行か: 返却をboolへ正規化（dict/None/リスト等のケースに対応）
-            if res is None:
+            res = self._call(ad, oid)
+        except Exception:
+            return False  # 何をする行か: 認証切れで再試行も失敗 / その他の例外は失敗としてFalse
+        ok = self._cancel_ok(res)
+        if ok:
+            self.orders.on_canceled(oid)  # 何をする行か: 取消できた注文を台帳から外す
+        return ok
+
+    @staticmethod
+    def _cancel_ok(res) -> bool:
+        """何をする関数なのか: 取消レスポンスを成功可否の bool に正規化する"""
+
+        # 何をする行か: 返却をboolへ正規化（dict/None/リスト等のケースに対応）
+        if res is None:
+            return True
+        if isinstance(res, bool):
+            return res
+        if isinstance(res, dict):
+            status = str(res.get("status", "")).lower()
+            if status in {"ok", "success", "canceled", "cancelled"}:
                 return True
-            if isinstance(res, bool):
-                return res
-            if isinstance(res, dict):
-                status = str(res.get("status", "")).lower()
-                if status in {"ok", "success", "canceled", "cancelled"}:
+            data = res.get("data")
+            if isinstance(data, dict):
+                if data.get("success") is True:
                     return True
-                data = res.get("data")
-                if isinstance(data, dict):
-                    if data.get("success") is True:
+                if str(data.get("status", "")).lower() in {"ok", "success", "canceled", "cancelled"}:
+                    return True
+                sts = data.get("statuses")
+                if isinstance(sts, list) and sts:
+                    item = sts[0]
+                    if item.get("error"):
+                        return False
+                    if item.get("success") is True:
                         return True
-                    if str(data.get("status", "")).lower() in {"ok", "success", "canceled", "cancelled"}:
+                    if str(item.get("status", "")).lower() in {"canceled", "cancelled"}:
                         return True
-                    sts = data.get("statuses")
-                    if isinstance(sts, list) and sts:
-                        item = sts[0]
-                        if item.get("error"):
-                            return False
-                        if item.get("success") is True:
-                            return True
-                        if str(item.get("status", "")).lower() in {"canceled", "cancelled"}:
-                            return True
-                if isinstance(data, list):
-                    return True  # 何をする行か: 成功リストのみ返る実装を成功とみなす
-            return True  # 何をする行か: 未知型は成功扱い（上位で実検証される前提）
+            if isinstance(data, list):
+                return True  # 何をする行か: 成功リストのみ返る実装を成功とみなす
+        return True  # 何をする行か: 未知型は成功扱い（上位で実検証される前提）
+
+    # ---------- SDK 呼び出しの共通部 ----------
+    def _call(self, adapter: Adapter, *args):
+        """何をする関数なのか: 解決済みアダプタを呼ぶ。認証切れのときだけ再ログインして 1 回だけ再試行する"""
+        self.session.ensure_fresh()  # 何をする行か: 裏の更新が間に合っていないときだけここで更新（通常は比較 1 回）
+        t0 = time.monotonic()
+        try:
+            return adapter.call(*args)
         except Exception as e:
-            msg = str(e)
-            # 何をする行か: 認証切れは再ログイン→同処理を1回だけ再試行
-            if ("UNAUTHORIZED" in msg or "grpc_status:16" in msg or "UNAUTHENTICATED" in msg) and not _retry:
-                if self._relogin():
-                    try:
-                        return self.cancel_order(order_id, _retry=True)
-                    except Exception:
-                        return False
-                return False
-            return False  # 何をする行か: 認証以外の例外は失敗としてFalse
-
+            if not _is_auth_error(e):
+                raise
+            self.session.on_auth_failure()
+            # 何をする行か: 失敗後に別スレッドが再認証済みならそれを使う（同時失敗でも再認証は 1 回）
+            if self.session.refresh(since=t0):
+                return adapter.call(*args)
+            raise
+
+    def _instrument_id(self, symbol: str) -> str:
+        """何をする関数なのか: 公式 SDK の発注に必要な instrument_id を symbol から引く（1 銘柄 1 回だけ問い合わせ）"""
+        iid = self._instrument_ids.get(symbol)
+        if iid is None:
+            resp = self.trade.instrument.get_instrument(symbol, "US_STOCK")
+            rows = resp.json() if hasattr(resp, "json") else resp
+            rows = _unwrap_list(rows)
+            if not rows:
+                raise LookupError(f"instrument not found: {symbol}")
+            iid = str(rows[0].get("instrument_id") or rows[0].get("instrumentId"))
+            self._instrument_ids[symbol] = iid
+        return iid
+
+
+    def _can_relogin(self) -> bool:
+        """何をする関数なのか: _relogin が使える再認証ルートを持っているか（署名方式の公式 SDK には無い）"""
+        if hasattr(self.trade, "reauth") or hasattr(self.trade, "refresh_token"):
+            return True
+        user = getattr(self, "username", None) or os.getenv("WEBULL_USERNAME") or os.getenv("WEBULL_EMAIL") or os.getenv("WEBULL_PHONE")
+        pwd = getattr(self, "password", None) or os.getenv("WEBULL_PASSWORD")
+        return hasattr(self.trade, "login") and bool(user and pwd)
 
     def _relogin(self) -> bool:
         """何をする関数なのか: UNAUTHORIZED/UNAUTHENTICATED検知時に、SDKの再認証ルートを試してセッションを復旧する"""
@@ -396,58 +475,31 @@ class WebullClient:
     # ポジション & ブラケット ----------------------------------------------
     def get_positions(self) -> list:
         """何をする関数なのか: SDKのバージョン差(メソッド名や返却形式の違い)を吸収して、現在の保有ポジション一覧を安全に返す"""
+        ad = self._adapters.get("get_positions")
+        if ad is None:
+            # 何をする行か: どのAPIも見つからない場合は空配列で返す(上位での再ログインや警告判断に委ねる)
+            return []
         try:
-            # 何をする行か: 新しいSDKで一般的なメソッド名をまず試す
-            if hasattr(self.trade, "get_positions"):
-                resp = self.trade.get_positions()  # 何をする行か: 新系メソッドの呼び出し
-
-            # 何をする行か: 旧SDKで使われることがある別名にフォールバック
-            elif hasattr(self.trade, "positions"):
-                resp = self.trade.positions()  # 何をする行か: 旧系メソッドの呼び出し
-
-            # 何をする行か: サブクライアント(account)配下にある場合の最終フォールバック
-            elif hasattr(self.trade, "account") and hasattr(self.trade.account, "get_positions"):
-                resp = self.trade.account.get_positions()  # 何をする行か: サブクライアント経由で取得
-
-            else:
-                # 何をする行か: どのAPIも見つからない場合は空配列で返す(上位での再ログインや警告判断に委ねる)
-                return []
-
-            # 何をする行か: レスポンスが {"data": [...]} 形式でも [... ] 直でも受け取れるように吸収
-            data = (resp or {}).get("data", resp)  # 何をする行か: キーが無ければ素のrespを使う
-            return data if isinstance(data, list) else []  # 何をする行か: 最終的にlistだけを返す
-        
+            resp = self._call(ad)
         except Exception as e:
-            msg = str(e)
-            # 何をする行か: 認証切れの典型ワードを検知したら再ログイン→同じ取得処理を1回だけリトライ
-            if "UNAUTHORIZED" in msg or "grpc_status:16" in msg or "UNAUTHENTICATED" in msg:
-                if self._relogin():
-                    try:
-                        # 何をする行か: 再ログイン後に同じ分岐ロジックで取得をやり直す
-                        if hasattr(self.trade, "get_positions"):
-                            resp = self.trade.get_positions()
-                        elif hasattr(self.trade, "positions"):
-                            resp = self.trade.positions()
-                        elif hasattr(self.trade, "account") and hasattr(self.trade.account, "get_positions"):
-                            resp = self.trade.account.get_positions()
-                        else:
-                            return []
-                        data = (resp or {}).get("data", resp)
-                        return data if isinstance(data, list) else []
-                    except Exception:
-                        return []
+            if _is_auth_error(e):
                 return []
             raise  # 何をする行か: 認証以外の想定外エラーは上位へ送出
-
-
+        return _unwrap_list(resp)  # 何をする行か: {"data": [...]} 形式でも [...] 直でも最終的にlistだけを返す
 
 
 
     def get_bracket(self, symbol: str) -> Optional[Dict[str, Any]]:
-        for order in self.get_active_orders():
-            if order["symbol"] == symbol and order.get("orderType") in ("TP", "SL"):
+        """symbol の TP / SL 注文を台帳から返す（一覧の再取得は台帳が古いときだけ）"""
+        for order in self.find_orders(symbol):
+            if order.get("orderType") in ("TP", "SL"):
                 return order
         return None
 
     def modify_bracket(self, *, order_id: str, stop_loss: float) -> Dict[str, Any]:
-        return self.trade.modify_order(order_id=order_id, stop_loss=stop_loss)
+        """SL 子注文（または親 orderId に紐づく SL）の逆指値を変え、台帳の SL 価格も合わせる"""
+        resp = self.trade.modify_order(order_id=order_id, stop_loss=stop_loss)
+        for o in self.orders.active():
+            if o["kind"] == "sl" and str(order_id) in (o["oid"], str(o["raw"].get("parentId", ""))):
+                self.orders.apply_event(dict(o["raw"], stopPrice=stop_loss))
+        return resp
@@ -0,0 +1,141 @@
+"""
+sdk.webull_session
+------------------
+WebullClient のセッション（トークン）寿命を管理し、切れる前に裏で更新する
+
+以前は呼び出しが UNAUTHORIZED で失敗してから再ログインしていたため、
+期限切れ直後の最初の発注（多くは寄り付き）が「失敗 1 往復 + 再認証 + 再試行」を払っていた。
+ここでは
+
+* 最後に認証できた時刻から期限（ttl_sec）を見積もり
+* 期限の margin_sec 前にバックグラウンドスレッドで更新し
+* 発注経路では期限内かどうかを見るだけ（時計の比較 1 回）
+
+にする。更新は single-flight（同時に何本来ても再認証は 1 回）。
+
+    keeper = SessionKeeper(client._relogin, ttl_sec=1800, margin_sec=120)
+    keeper.refresh()          # 起動時のウォームアップ
+    keeper.start()            # 以後は期限前に自動更新
+    keeper.stats()            # {"refreshes": .., "auth_failures": .., "refresh_ms_max": ..}
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("gap_bot.webull")
+
+
+class SessionKeeper:
+    """トークン寿命の見積もりと先回り更新（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        refresh: Callable[[], bool],
+        *,
+        ttl_sec: float = 1800.0,
+        margin_sec: float = 120.0,
+        retry_sec: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._refresh_fn = refresh      # 再認証ルート（成功で True）
+        self.ttl_sec = ttl_sec
+        self.margin_sec = margin_sec
+        self.retry_sec = retry_sec      # 更新に失敗したときの再試行間隔
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.expires_at: Optional[float] = None   # None = 寿命不明（まだ一度も認証していない）
+        self.last_refresh = 0.0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.auth_failures = 0
+        self.refresh_ms: deque[float] = deque(maxlen=100)
+
+    # ---------- 状態 ----------
+    def due(self, now: float | None = None) -> bool:
+        """期限の margin_sec 前を過ぎたか（寿命不明のときは False = 何もしない）"""
+        if self.expires_at is None:
+            return False
+        now = self._clock() if now is None else now
+        return now >= self.expires_at - self.margin_sec
+
+    def seconds_left(self) -> Optional[float]:
+        return None if self.expires_at is None else self.expires_at - self._clock()
+
+    # ---------- 更新 ----------
+    def refresh(self, *, since: float | None = None) -> bool:
+        """
+        何をする関数? → 再認証して期限を延ばす。成功なら True
+        since: 呼び出し側が失敗した呼び出しを始めた時刻。その後に別スレッドが更新済みなら再認証せず True
+        """
+        with self._lock:
+            if since is not None and self.last_refresh >= since:
+                return True
+            t0 = self._clock()
+            try:
+                ok = bool(self._refresh_fn())
+            except Exception:
+                ok = False
+            t1 = self._clock()
+            self.refresh_ms.append((t1 - t0) * 1000)
+            if ok:
+                self.refreshes += 1
+                self.last_refresh = t1
+                self.expires_at = t1 + self.ttl_sec
+            else:
+                self.refresh_failures += 1
+            return ok
+
+    def ensure_fresh(self) -> None:
+        """発注経路用: 期限が近いのに裏の更新が間に合っていなければここで更新する（通常は比較 1 回で抜ける）"""
+        if self.due():
+            self.refresh()
+
+    def on_auth_failure(self) -> None:
+        """呼び出しが認証切れで失敗したら数える（先回り更新が効いていれば 0 のまま）"""
+        with self._lock:
+            self.auth_failures += 1
+
+    # ---------- バックグラウンド更新 ----------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            left = self.seconds_left()
+            wait = self.retry_sec if left is None else max(left - self.margin_sec, 0.0)
+            if self._stop.wait(wait):
+                break
+            if self.expires_at is None or self.due():
+                if not self.refresh():
+                    logger.warning("webull session refresh failed (retry in %.0fs)", self.retry_sec)
+                    self._stop.wait(self.retry_sec)
+
+    def start(self) -> None:
+        """期限前の自動更新スレッドを起動する（二重起動しない）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="webull-session", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        ms = sorted(self.refresh_ms)
+        return {
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "auth_failures": self.auth_failures,
+            "refresh_ms_last": round(self.refresh_ms[-1], 1) if ms else None,
+            "refresh_ms_p50": round(ms[len(ms) // 2], 1) if ms else None,
+            "refresh_ms_max": round(ms[-1], 1) if ms else None,
+            "seconds_left": self.seconds_left(),
+        }
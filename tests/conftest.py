@@ -2,11 +2,20 @@
 tests/conftest.py
 ─────────────────
 ・外部 SDK をスタブ化（ネットワーク遮断）
+・参照データキャッシュ (refcache)・列指向ストア・テープを一時ディレクトリへ逃がす
 ・pytest 終了時に “残タスク” を強制キャンセル
 ・websockets の DeprecationWarning 抑制
 """
 
-import sys, types, warnings, asyncio, contextlib
+import os, sys, tempfile, types, warnings, asyncio, contextlib
+
+# ── 参照データキャッシュ ────────────────────────
+# gap_bot.utils.refcache は import 時に DB パスを決めるので、どの import よりも先に設定する
+os.environ["GAP_BOT_CACHE_DB"] = os.path.join(tempfile.mkdtemp(prefix="gap_bot_test_"), "refdata.sqlite")
+# 列指向ストア（gap_bot.store）もリポジトリの data/ に書かない
+os.environ["GAP_BOT_STORE"] = tempfile.mkdtemp(prefix="gap_bot_store_")
+# 気配・注文のバイナリ記録（gap_bot.tape）も同様
+os.environ["GAP_BOT_TAPE"] = tempfile.mkdtemp(prefix="gap_bot_tape_")
 
 # ── Warning 抑制 ────────────────────────────────
 warnings.filterwarnings(
@@ -18,6 +27,7 @@ warnings.filterwarnings(
 # ── Alpaca REST スタブ ──────────────────────────
 stub_alp = types.ModuleType("sdk.quotes_alpaca")
 stub_alp.get_quote = lambda sym: {"bidPrice": 123, "askPrice": 124}
+stub_alp.get_quotes = lambda syms: {s: stub_alp.get_quote(s) for s in syms}
 sys.modules["sdk.quotes_alpaca"] = stub_alp
 
 # Alpaca WS / live モジュールも空スタブ
@@ -28,6 +38,8 @@ sys.modules["alpaca.data.live"] = types.ModuleType("alpaca.data.live")
 class DummyWebull:
     def get_quote(self, sym, extended=True):
         return {"bidPrice": 111, "askPrice": 112}
+    def get_quotes(self, syms, extended=True):
+        return {s: self.get_quote(s, extended) for s in syms}
     def place_limit_order(self, **kw):
         return {"orderId": "TEST"}
     def attach_bracket(self, **kw): return {}
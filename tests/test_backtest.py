@@ -0,0 +1,95 @@
+"""
+gap_bot.backtest（分足の一括シミュレーション）の検証
+
+・run_entry の指値 / 株数、10:00 キャンセル
+・run_live の決済ルール（逆指値 / TP/2 で半分利確 + 建値 / TP 指値 / 15:45 クローズ）
+・ストア + ユニバースからの期間実行（日付ごとのプロセス分割でも結果は同じ）
+"""
+
+import datetime as dt
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gap_bot.backtest import CLOSE_MIN, Params, day_from_frames, run_backtest, simulate_day, summarize, trading_days
+from gap_bot.position_sizer import calc_shares, calc_shares_array
+from gap_bot.screened_io import save_universe
+from gap_bot.store import EventStore
+
+DAY = dt.date(2025, 3, 3)     # 月曜
+P = Params(gap=3.0, min_volume=0, min_rotation=0, min_sentiment=0, equity=100_000, kelly=1.0,
+           max_loss_pct=0.02, tp=0.10, sl=0.05)
+
+
+def _universe(symbols, pre=10.0):
+    return pd.DataFrame({"symbol": symbols, "previous_close": 9.0, "premarket_price": pre,
+                         "premarket_volume": 1_000_000, "float_shares": 1_000_000, "sentiment_score": 5.0})
+
+
+def _bars(symbol, path):
+    """path: [(minute, open, high, low, close)]。間の分は足なし"""
+    return pd.DataFrame([{"symbol": symbol, "minute": m, "open": o, "high": h, "low": lo, "close": c}
+                         for m, o, h, lo, c in path])
+
+
+# 指値 = 10 × 1.002 = 10.02、SL0 = 9.519、TP/2 = 10.5 / 10.521、TP 指値 = 11.022
+PATHS = {
+    "STOP": [(0, 10.0, 10.1, 9.9, 10.0), (5, 9.8, 9.8, 9.4, 9.5)],                                  # 建値 10.0 → 9.519
+    "HALF": [(0, 10.0, 10.1, 9.9, 10.0), (3, 10.3, 10.6, 10.3, 10.5), (9, 10.2, 10.2, 9.9, 10.0)],  # 半分 10.5 → 建値
+    "TP":   [(0, 10.0, 10.1, 9.9, 10.0), (3, 10.3, 10.6, 10.3, 10.5), (9, 10.9, 11.2, 10.9, 11.1)],
+    "LATE": [(0, 10.5, 10.6, 10.3, 10.4), (40, 10.0, 10.0, 9.9, 9.9)],                               # 10:00 後にしか届かない
+    "HOLD": [(0, 10.0, 10.1, 9.9, 10.0), (200, 10.2, 10.3, 10.1, 10.2), (380, 12, 12, 12, 12)],    # 15:45 で 10.2
+}
+
+
+def _day():
+    bars = pd.concat([_bars(s, p) for s, p in PATHS.items()], ignore_index=True)
+    return day_from_frames(DAY, _universe(list(PATHS) + ["NOBARS"]), bars)
+
+
+def test_calc_shares_array_matches_scalar():
+    px = np.array([0.5, 3.3, 10.02, 250.0])
+    assert calc_shares_array(100_000, px, 0.2, 0.02).tolist() == [calc_shares(100_000, x, 0.2, 0.02) for x in px]
+
+
+def test_exit_rules():
+    t = simulate_day(_day(), P).set_index("symbol")
+    assert sorted(t.index) == ["HALF", "HOLD", "STOP", "TP"]         # LATE は 10:00 で取消、NOBARS は分足なし
+    assert t.loc["STOP", "qty"] == calc_shares(100_000, 10.02, 1.0, 0.02)
+    assert t.loc["STOP", "entry"] == 10.0 and t.loc["STOP", "exit_reason"] == "sl"
+    assert t.loc["STOP", "exit_px"] == pytest.approx(9.519) and t.loc["STOP", "R"] < -0.9
+
+    half = t.loc["HALF"]
+    assert half["half_qty"] == half["qty"] // 2 and half["half_px"] == 10.5
+    assert half["exit_reason"] == "be" and half["exit_px"] == 10.0 and half["exit_minute"] == 9
+    assert 0 < half["R"] < 1
+
+    assert t.loc["TP", "exit_reason"] == "tp" and t.loc["TP", "exit_px"] == pytest.approx(11.022)
+    assert t.loc["HOLD", "exit_reason"] == "close" and t.loc["HOLD", "exit_px"] == 10.2
+    assert t.loc["HOLD", "exit_minute"] == CLOSE_MIN
+
+
+def test_screen_threshold_applies():
+    assert simulate_day(_day(), replace(P, gap=20.0)).empty   # gap 11 % < 20 %
+
+
+def test_run_backtest_from_store_parallel(tmp_path):
+    store = EventStore(tmp_path / "store")
+    days = [DAY, DAY + dt.timedelta(days=1), DAY + dt.timedelta(days=2)]
+    for d in days:
+        save_universe(_universe(list(PATHS)), d, tmp_path / "universe")
+        bars = pd.concat([_bars(s, p) for s, p in PATHS.items()], ignore_index=True)
+        store.append("bars", bars, date=d)
+    assert trading_days(DAY, days[-1] + dt.timedelta(days=5), tmp_path / "universe") == days
+
+    kw = dict(universe_root=tmp_path / "universe", store_root=tmp_path / "store")
+    serial = run_backtest(days, P, workers=1, **kw)
+    parallel = run_backtest(days, P, workers=3, **kw)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 12 and summarize(serial)["days"] == 3
+
+    a, b = run_backtest(days, [P, replace(P, tp=0.2)], workers=2, **kw)
+    pd.testing.assert_frame_equal(a, serial)
+    assert (b["exit_reason"] != "tp").all()
@@ -0,0 +1,158 @@
+"""
+run_entry の並列発注パイプラインの検証
+
+・指値は並列に送られ、受け付けられた親注文にだけブラケットが付く
+・ブローカーのレート上限（トークンバケット）を超えない
+・1 件ごとのレイテンシがログに残る
+・--stage は待機中もセッションの自動更新を回し、過ぎた --at には警告してから送る
+"""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import scripts.run_entry as re
+from gap_bot.filters import StockData
+from gap_bot.utils.rate_limit import TokenBucket
+
+
+class SlowBroker:
+    """1 呼び出し 50ms かかり、REJ で始まる銘柄は受け付けないモック"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.placed, self.brackets, self.stamps = [], [], []
+
+    def place_limit_order(self, *, symbol, side, qty, price, extended):
+        with self.lock:
+            self.stamps.append(time.perf_counter())
+        time.sleep(0.05)
+        if symbol.startswith("REJ"):
+            return {"orderId": None, "success": False}
+        with self.lock:
+            self.placed.append(symbol)
+        return {"orderId": f"P-{symbol}", "success": True}
+
+    def attach_bracket(self, *, parent_order_id, take_profit, stop_loss, break_even_distance):
+        with self.lock:
+            self.stamps.append(time.perf_counter())
+            self.brackets.append(parent_order_id)
+
+
+class FakeLog:
+    """get_event_logger の代わり。(ログ名, 行) を rows に貯める"""
+    def __init__(self, rows, name):
+        self.rows, self.name = rows, name
+    def log(self, **row):
+        self.rows.append((self.name, row))
+    def flush(self, fsync=False):
+        pass
+
+
+def _capture(monkeypatch):
+    rows = []
+    monkeypatch.setattr(re, "get_event_logger", lambda name: FakeLog(rows, name))
+    return rows
+
+
+def _plans(n):
+    return [{"symbol": f"S{i}", "qty": 10, "limit": 10.0, "tp": 10.7, "sl": 9.75, "break_even": 0.035}
+            for i in range(n)]
+
+
+def test_parallel_submit_and_brackets(monkeypatch):
+    rows = _capture(monkeypatch)
+    broker = SlowBroker()
+    plans = _plans(8) + [dict(_plans(1)[0], symbol="REJ1")]
+
+    t0 = time.perf_counter()
+    res = re.submit_all(broker, plans, workers=8, bucket=TokenBucket(rate=1_000, capacity=100))
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.3                                     # 逐次なら 9 × 50ms 以上
+    assert sorted(broker.brackets) == sorted(f"P-S{i}" for i in range(8))
+    assert {r["symbol"]: r["status"] for r in res}["REJ1"] == "rejected"
+    lat = [row for name, row in rows if name == re.LATENCY_LOG]
+    assert len(lat) == 9 and all(row["place_ms"] is not None for row in lat)   # place_ms が全件入っている
+    assert sum(1 for name, _ in rows if name == "order") == 8
+
+
+def test_rate_limit_is_respected(monkeypatch):
+    _capture(monkeypatch)
+    broker = SlowBroker()
+    re.submit_all(broker, _plans(4), workers=4, bucket=TokenBucket(rate=40, capacity=1))
+    st = sorted(broker.stamps)
+    assert len(st) == 8                                      # 指値 4 + ブラケット 4
+    assert st[-1] - st[0] >= 7 / 40 * 0.9                    # 40 req/sec を超えて送っていない
+
+
+def test_plan_entries_skips_bad_quotes():
+    args = SimpleNamespace(equity=100_000, kelly=1.0, max_loss_pct=0.5, tp=0.07, sl=0.025)
+    stocks = [StockData("AAA", 1, 2, 1, 1, 0), StockData("BBB", 1, 2, 1, 1, 0)]
+    quotes = {"AAA": {"bidPrice": 9.99, "askPrice": 10.01}, "BBB": {"bidPrice": 0, "askPrice": 0}}
+    plans = re.plan_entries(stocks, quotes, lambda s: quotes[s], args)
+    assert [p["symbol"] for p in plans] == ["AAA"]
+    assert plans[0]["limit"] == 10.02 and plans[0]["qty"] > 0
+
+
+def test_stage_then_release_refreshes_limit(monkeypatch):
+    """事前準備 → トリガーで気配だけ取り直して送る。株数は準備時より増やさない"""
+    _capture(monkeypatch)
+    args = SimpleNamespace(equity=100_000, kelly=1.0, max_loss_pct=0.5, tp=0.07, sl=0.025)
+    stocks = [StockData(s, 1, 2, 1, 1, 0) for s in ("AAA", "BBB", "bad sym")]
+    pre = {"AAA": {"bidPrice": 9.99, "askPrice": 10.01}, "BBB": {"bidPrice": 4.99, "askPrice": 5.01}}
+    staged, skipped = re.stage_entries(stocks, pre, args)
+    assert [st["symbol"] for st in staged] == ["AAA", "BBB"]
+    assert skipped == {"BAD SYM": "bad_symbol"}
+
+    calls = []
+    def many(syms):
+        calls.append(list(syms))
+        return {"AAA": {"bidPrice": 10.49, "askPrice": 10.51}, "BBB": {"bidPrice": 4.79, "askPrice": 4.81}}
+    quote_func = SimpleNamespace(many=many)
+
+    broker = SlowBroker()
+    res = {r["symbol"]: r for r in re.release_staged(broker, staged, quote_func, args, workers=4,
+                                                      bucket=TokenBucket(rate=1_000, capacity=100))}
+    assert len(calls) == 1                                   # トリガー時の気配取得は 1 回
+    assert res["AAA"]["limit"] == 10.52                      # 新しい仲値で指値を更新
+    assert res["AAA"]["qty"] < staged[0]["qty"]              # 値上がり分だけ株数を減らす
+    assert res["BBB"]["qty"] == staged[1]["qty"]             # 値下がりしても増やさない
+    assert all(r["queue_ms"] < 50 for r in res.values())     # トリガー → 送信
+
+
+class StagingBroker(SlowBroker):
+    """main(--stage) 用: warm_up / close の呼ばれ方を記録し、気配は固定値を返す"""
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def warm_up(self, symbols, *, keepalive=True):
+        self.calls.append(("warm_up", keepalive))
+
+    def close(self):
+        self.calls.append(("close",))
+
+    def get_quote(self, sym, extended=True):
+        return {"bidPrice": 9.99, "askPrice": 10.01}
+
+    def get_quotes(self, syms, extended=True):
+        return {s: self.get_quote(s) for s in syms}
+
+
+def test_stage_mode_keeps_session_alive_and_warns_when_late(monkeypatch, capsys):
+    _capture(monkeypatch)
+    broker = StagingBroker()
+    monkeypatch.setattr(re, "WebullClient", SimpleNamespace(from_env=lambda: broker))
+    monkeypatch.setattr(re, "load_screened", lambda path: [StockData("AAA", 1, 2, 1, 1, 0)])
+    monkeypatch.setattr(sys, "argv", ["run_entry", "--screened", "x.jsonl", "--equity", "100000",
+                                      "--stage", "--at", "00:00:01"])
+    re.main()
+    assert broker.calls == [("warm_up", True), ("close",)]   # 待機中は自動再認証、送信後に止める
+    assert broker.placed == ["AAA"]
+    assert "[WARN] --at 00:00:01 ET" in capsys.readouterr().out
+
+
+def test_release_time_is_today_in_et():
+    now = re.datetime(2025, 8, 4, 13, 0, tzinfo=re.ZoneInfo("UTC"))       # 09:00 ET
+    assert re.release_time("09:30", now) == re.datetime(2025, 8, 4, 9, 30, tzinfo=re.ET)
@@ -0,0 +1,47 @@
+"""
+run_screen の非同期取得エンジンの最小テスト
+
+- TokenBucket が rate を超えて通さないか
+- 1 銘柄の例外が他銘柄の結果を巻き込まないか（銘柄単位の隔離）
+"""
+
+import asyncio
+import importlib
+import os
+import time
+
+from gap_bot.filters import StockData
+from gap_bot.utils.rate_limit import TokenBucket
+
+# run_screen は import 時に認証キーの存在をチェックするのでダミーを入れておく
+for _k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+    os.environ.setdefault(_k, "test")
+rs = importlib.import_module("scripts.run_screen")
+
+
+def test_token_bucket_limits_rate():
+    """capacity を使い切った後は rate [token/sec] 以上で通さない"""
+    bucket = TokenBucket(rate=200, capacity=10)
+
+    async def _drain():
+        for _ in range(50):
+            await bucket.acquire()
+
+    t0 = time.perf_counter()
+    asyncio.run(_drain())
+    # 初期 10 個 + 40 個 / 200 per sec = 0.2 sec 以上かかる
+    assert time.perf_counter() - t0 >= 0.18
+
+
+def test_symbol_errors_are_isolated(monkeypatch):
+    """1 銘柄が例外を出しても残りは返り、順序も保たれる"""
+    async def fake_fetch_one(sym, buckets, prev_map):
+        if sym == "BOOM":
+            raise RuntimeError("provider down")
+        return StockData(sym, 10.0, 11.0, 1000, 0, 0.0)
+
+    monkeypatch.setattr(rs, "_fetch_one_alpaca", fake_fetch_one)
+    monkeypatch.setattr(rs, "prefetch_prev_closes", lambda: {})
+    out = asyncio.run(rs.fetch_premarket_alpaca_async(
+        ["AAA", "BOOM", "CCC"], rate=1000, burst=10, concurrency=4))
+    assert [s.symbol for s in out] == ["AAA", "CCC"]
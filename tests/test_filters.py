@@ -59,3 +59,17 @@ def test_screen_stocks_filters_correctly():
     screened = screen_stocks(stocks)
     # 合格は GOOD だけのはず
     assert [s.symbol for s in screened] == ["GOOD"]
+
+
+def test_screen_frame_matches_screen_stocks():
+    """列指向の screen_frame と互換ラッパー screen_stocks が同じ銘柄を返すか"""
+    from gap_bot.filters import screen_frame, to_frame
+
+    zero_prev = StockData("ZERO", 0.0, 5.0, 150_000, 1_000_000, 3.5)     # 前日終値 0 は不合格
+    zero_float = StockData("NOFL", 100.0, 103.5, 150_000, 0, 3.5)        # Float 0 → Rotation 0
+    stocks = [GOOD, BAD_GAP, BAD_VOL, BAD_ROT, BAD_SENT, zero_prev, zero_float]
+
+    out = screen_frame(to_frame(stocks))
+    assert list(out["symbol"]) == [s.symbol for s in screen_stocks(stocks)] == ["GOOD"]
+    assert out["gap_pct"].iloc[0] == pytest.approx(3.5)
+    assert out["float_rotation"].iloc[0] == pytest.approx(15.0)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.mock_server import MockMarketServer
+from sdk.http_pool import get_session, pool_stats, reset_pool_stats
+
+
+def test_session_reuses_connections():
+    with MockMarketServer(latency=0) as url:
+        reset_pool_stats()
+        sess = get_session()
+        assert sess is get_session()
+        for _ in range(20):
+            r = sess.get(f"{url}/v2/stocks/quotes/latest", params={"symbols": "AAPL"}, timeout=5)
+            assert r.status_code == 200
+        (st,) = pool_stats().values()
+        assert st["calls"] == 20
+        assert st["connections"] == 1           # 逐次呼び出しなら 1 本を使い回す
+        assert st["reused"] == 19
@@ -2,36 +2,32 @@
 
 - logs/ ディレクトリが無い場合でも自動生成されるか
 - 1 行追記でファイルサイズ（行数）が +1 になるか
+- EventLogger はファイルを開きっぱなしでまとめ書きする（速さの比較は benchmarks/bench_logger.py）
 """
 
-import os
 import csv
-import shutil
 from pathlib import Path
 
-from gap_bot.utils.logger import append_csv, LOG_DIR
+from gap_bot.utils import logger as logger_mod
+from gap_bot.utils.logger import append_csv
 
 
-def setup_function():
-    """テスト前処理： logs/ を真っさらにする"""
-    if LOG_DIR.exists():
-        shutil.rmtree(LOG_DIR)  # 完全削除（空ディレクトリから検証）
-
-
-def test_append_creates_dir_and_file():
-    # まだ logs/ もファイルも無い状態
+def test_append_creates_dir_and_file(tmp_path, monkeypatch):
+    # まだ logs/ もファイルも無い状態（リポジトリの logs/ には触れず、一時ディレクトリで検証）
+    log_dir = tmp_path / "logs"
+    monkeypatch.setattr(logger_mod, "LOG_DIR", log_dir)
     target = "unit_test.csv"
-    assert not LOG_DIR.exists()
+    assert not log_dir.exists()
 
     # 1 行追記
     append_csv(target, ["foo", "bar", 123])
 
     # ── 検証 ──────────────────────────────
     # ① logs/ ディレクトリが生成された
-    assert LOG_DIR.exists() and LOG_DIR.is_dir()
+    assert log_dir.exists() and log_dir.is_dir()
 
     # ② ファイルが生成された
-    fpath = LOG_DIR / target
+    fpath = log_dir / target
     assert fpath.exists()
 
     # ③ 行数が 1 行
@@ -39,3 +35,58 @@ def test_append_creates_dir_and_file():
         reader = csv.reader(f)
         rows = list(reader)
     assert len(rows) == 1 and rows[0] == ["foo", "bar", "123"]  # csv は str 型
+
+
+# ── EventLogger（まとめ書き・日次ローテーション） ─────────
+import datetime as dt
+import time
+
+from gap_bot.utils.logger import EventLogger, read_events
+
+
+def test_event_logger_schema_and_rotation(tmp_path):
+    day = [dt.date(2025, 1, 2)]
+    log = EventLogger("order", log_dir=tmp_path, flush_rows=100, flush_sec=60, today=lambda: day[0])
+    log.log(symbol="AAPL", qty=10.0, limit=190.5, tp=203.8, sl=185.7, order_id=123)
+    assert not (tmp_path / "order_20250102.csv").read_text().splitlines()[1:]   # まだバッファの中（ヘッダのみ）
+
+    day[0] = dt.date(2025, 1, 3)                                # 日付が変わったら前日分を書いて次のファイルへ
+    log.log(symbol="TSLA", qty=5, limit=250.0, order_id="X")
+    log.close()
+
+    d1 = read_events("order", dt.date(2025, 1, 2), tmp_path)
+    d2 = read_events("order", dt.date(2025, 1, 3), tmp_path)
+    assert d1[0]["symbol"] == "AAPL" and d1[0]["qty"] == 10 and d1[0]["order_id"] == "123"
+    assert d2[0]["symbol"] == "TSLA" and d2[0]["tp"] is None and d2[0]["ts"]
+
+    try:
+        log.log(symbol="X", bogus=1)
+        raise AssertionError("unknown field should be rejected")
+    except ValueError:
+        pass
+
+
+def test_event_logger_batches_file_io(tmp_path, monkeypatch):
+    """1 行ごとに open/close する append_csv と違い、ファイルは 1 回だけ開き、flush_rows 行ごとにまとめて書く"""
+    n = 5_000
+    monkeypatch.setattr("gap_bot.utils.logger.LOG_DIR", tmp_path)
+    opens = []
+    real_open = Path.open
+
+    def counting_open(self, *a, **kw):
+        opens.append(self.name)
+        return real_open(self, *a, **kw)
+
+    monkeypatch.setattr(Path, "open", counting_open)
+    for i in range(n):
+        append_csv("raw.csv", ["", f"S{i}", 1.0, 1.1, 100])
+    assert opens.count("raw.csv") == n
+
+    opens.clear()
+    log = EventLogger("screen", log_dir=tmp_path / "ev", flush_rows=500, flush_sec=3600)
+    for i in range(n):
+        log.log(symbol=f"S{i}", prev_close=1.0, pre_price=1.1, pre_volume=100)
+    log.close()
+    assert len(opens) == 1                                      # 開きっぱなし
+    assert log.flushes == n // 500 and log.rows == n            # 書き込みは 500 行ずつ
+    assert len(read_events("screen", dt.date.today(), tmp_path / "ev")) == n
@@ -0,0 +1,45 @@
+"""
+market_calendar の取引日判定テスト
+
+- 月曜の前営業日は金曜（datetime.utcnow() - 1 day だと日曜になる）
+- 祝日・振替休日・Good Friday を跨いで遡れるか
+- 引け後はスクリーニング対象が翌営業日に進むか
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from gap_bot.utils.market_calendar import (
+    ET,
+    is_trading_day,
+    previous_trading_day,
+    screen_session,
+)
+
+
+@pytest.mark.parametrize(
+    "day, expected",
+    [
+        (date(2025, 8, 4), date(2025, 8, 1)),     # 月曜 → 金曜
+        (date(2025, 5, 27), date(2025, 5, 23)),   # Memorial Day 翌日 → 前週金曜
+        (date(2024, 4, 1), date(2024, 3, 28)),    # Good Friday を跨ぐ
+        (date(2024, 1, 2), date(2023, 12, 29)),   # 元日
+        (date(2023, 7, 5), date(2023, 7, 3)),     # 独立記念日
+        (date(2022, 6, 21), date(2022, 6, 17)),   # Juneteenth 振替 (6/20 月)
+        (date(2025, 1, 10), date(2025, 1, 8)),    # 臨時休場 (国葬)
+    ],
+)
+def test_previous_trading_day(day, expected):
+    assert previous_trading_day(day) == expected
+
+
+def test_saturday_new_year_not_observed_on_friday():
+    """元日が土曜の年は前年 12/31 (金) を休場にしない"""
+    assert is_trading_day(date(2021, 12, 31))
+
+
+def test_screen_session_rolls_after_close():
+    """金曜の引け後は翌月曜が対象、月曜の寄り前は当日が対象"""
+    assert screen_session(datetime(2025, 8, 1, 17, 0, tzinfo=ET)) == date(2025, 8, 4)
+    assert screen_session(datetime(2025, 8, 4, 4, 0, tzinfo=ET)) == date(2025, 8, 4)
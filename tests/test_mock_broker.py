@@ -0,0 +1,97 @@
+"""
+benchmarks.mock_broker / mock_ws / mock_server（ネットワークなしの負荷テスト用スタブ）の検証
+
+・指値 → ブラケット（TP / SL の OCO）→ 逆指値の約定が気配の動きどおりに起きる
+・サーバ側のレート上限: 超えた呼び出しは RateLimited、run_entry のバケットが守れば弾かれない
+・台本フィードは start_quote_stream と同じ呼び出し方で、REST モックの 1 分足と同じ値動きを流す
+"""
+
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+
+import scripts.run_entry as re
+from benchmarks.mock_broker import MockBroker, RateLimited
+from benchmarks.mock_server import MockMarketServer, mock_day_path
+from benchmarks.mock_ws import QuoteFeed, scripted_ticks
+from gap_bot.utils.rate_limit import TokenBucket
+from scripts import run_live
+from sdk.quote_table import LatestQuotes
+
+
+def test_limit_bracket_oco_and_position():
+    b = MockBroker()
+    b.set_quote("AAPL", 10.00, 10.05)
+    pid = b.place_limit_order(symbol="AAPL", side="buy", qty=100, price=10.02)["orderId"]
+    assert b.order(pid)["status"] == "Working"                       # ask 10.05 > 指値
+    b.attach_bracket(parent_order_id=pid, take_profit=10.70, stop_loss=9.75, break_even_distance=0.035)
+    assert b.find_orders("AAPL", kind="tp") == []                    # 親が約定するまで子注文は出ない
+
+    b.set_quote("AAPL", 9.99, 10.01)
+    assert b.order(pid)["status"] == "Filled" and b.fills[-1]["price"] == 10.01
+    assert b.get_positions() == [{"symbol": "AAPL", "position": 100, "avgPrice": 10.01, "orderId": pid}]
+    assert {o["orderType"] for o in b.find_orders("AAPL", side="sell")} == {"TP", "SL"}
+    sl = b.find_orders("AAPL", kind="sl")[0]
+
+    b.set_quote("AAPL", 10.40, 10.41)
+    b.modify_bracket(order_id=pid, stop_loss=10.01)                    # 建値へ
+    assert b.order(sl["orderId"])["stopPrice"] == 10.01 and b.order(sl["orderId"])["status"] == "Working"
+    b.set_quote("AAPL", 10.80, 10.81)
+    assert [f["orderType"] for f in b.fills] == ["LIMIT", "TP"] and b.fills[-1]["price"] == 10.80
+    assert b.get_active_orders() == [] and b.get_positions() == []
+    assert b.order(sl["orderId"])["status"] == "Cancelled"            # SL は OCO で取消
+
+
+def test_run_live_stop_is_triggered():
+    b = MockBroker()
+    b.seed_position("TSLA", 10, 100.0)
+    b.set_quote("TSLA", 104.0)
+    pos = {"symbol": "TSLA", "entry": 100.0, "side": "long", "sl": 97.5, "tp_pct": 0.07, "qty": 10}
+    run_live.HALF_TP_DONE.clear()
+    run_live.on_quote(pos, b.get_quote("TSLA"), client=b, tp=0.07, paper=False)
+    assert b.get_positions()[0]["position"] == 5                      # 半分利確（成行）
+    stop = b.find_orders("TSLA", side="sell", kind="stop")[0]
+    assert stop["stopPrice"] == 100.0                                 # 建値の逆指値
+    b.set_quote("TSLA", 99.9)
+    assert b.order(stop["orderId"])["status"] == "Filled" and b.get_positions() == []
+    run_live.HALF_TP_DONE.clear()
+
+
+def test_rate_limit_rejects_and_entry_bucket_respects(monkeypatch):
+    b = MockBroker(rate=5, burst=2)
+    b.get_quote("A"), b.get_quote("A")
+    with pytest.raises(RateLimited):
+        b.get_quote("A")
+    assert b.throttled == 1
+
+    monkeypatch.setattr(re, "get_event_logger", lambda name: SimpleNamespace(log=lambda **kw: None))
+    b = MockBroker(latency=0.01, rate=25, burst=4)
+    args = SimpleNamespace(tp=0.07, sl=0.025)
+    plans = [re.price_plan(f"S{i}", 10, b.quote(f"S{i}")[1], args) for i in range(6)]
+    out = re.submit_all(b, plans, workers=4, bucket=TokenBucket(rate=20, capacity=4))
+    assert [r["status"] for r in out] == ["ok"] * 6 and b.throttled == 0
+    assert len(b.get_positions()) == 6                                # 仲値より上の指値 → 即約定 → TP / SL
+    assert len(b.find_orders("S0")) == 2
+
+
+def test_scripted_feed_matches_minute_aggs(monkeypatch):
+    for k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+        monkeypatch.setenv(k, "test")
+    from sdk import quotes_polygon
+
+    day = dt.date(2025, 3, 3)
+    ticks = list(scripted_ticks(["AAA", "BBB"], minutes=5, per_minute=2, day=day))
+    assert len(ticks) == 20 and ticks[0]["timestamp"] < ticks[-1]["timestamp"]
+    assert [t["askPrice"] for t in ticks if t["symbol"] == "AAA"][1::2] == [b["close"] for b in mock_day_path("AAA", 5)]
+
+    table, b = LatestQuotes(), MockBroker()
+    feed = QuoteFeed(ticks)
+    feed.start_quote_stream(["AAA"], lambda q: (table.update(q), b.on_quote(q)))
+    assert feed.join(timeout=5) and feed.sent == 10                   # BBB は購読していない
+    assert table.get("AAA")["askPrice"] == b.quote("AAA")[1] == mock_day_path("AAA", 5)[-1]["close"]
+
+    with MockMarketServer() as url:
+        monkeypatch.setattr(quotes_polygon, "_BASE", url)
+        bars = quotes_polygon.get_minute_bars("AAA", day)
+    assert len(bars) == 390 and bars[:5] == mock_day_path("AAA", 5)
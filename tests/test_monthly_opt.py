@@ -0,0 +1,76 @@
+"""
+run_monthly_opt（バックテストでのパラメータ探索）の検証
+
+・候補ごとの成績は実際のバックテストの日次 R（直列でもプロセス並列でも同じ）
+・walk-forward は前の区間で選んだパラメータを次の区間で評価する
+・Kelly は勝率と平均損益比から出し、範囲に収める
+"""
+
+import datetime as dt
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from gap_bot.backtest import STAT_COLUMNS, Params, run_backtest
+from gap_bot.screened_io import save_universe
+from gap_bot.store import EventStore
+from scripts.run_monthly_opt import KELLY_RANGE, candidates, kelly_fraction, optimise, score, walk_forward
+
+BASE = Params(gap=3.0, min_volume=0, min_rotation=0, min_sentiment=0, kelly=1.0, tp=0.10, sl=0.05)
+
+
+def _stats(daily_r):
+    """daily_r: (パラメータ, 日付) → STAT_COLUMNS の配列（1 日 1 取引）"""
+    r = np.asarray(daily_r, dtype=float)
+    s = np.zeros(r.shape + (len(STAT_COLUMNS),))
+    s[..., STAT_COLUMNS.index("total_R")] = r
+    s[..., STAT_COLUMNS.index("trades")] = 1
+    s[..., STAT_COLUMNS.index("wins")] = r > 0
+    s[..., STAT_COLUMNS.index("win_R")] = np.where(r > 0, r, 0)
+    return s
+
+
+def test_score_penalises_drawdown_and_walk_forward():
+    steady = [1, 1, 1, 1, 1, 1]
+    swingy = [4, -3, 4, -3, 4, -3]            # 合計 3 だがドローダウン 3
+    late = [-1, -1, -1, 3, 3, 3]
+    s = _stats([steady, swingy, late])
+    assert np.argmax(score(s)) == 0
+    wf = walk_forward(s, folds=2)
+    assert [f["train_days"] for f in wf] == [2, 4] and [f["test_days"] for f in wf] == [2, 2]
+    assert all(f["best"] == 0 and f["out_R"] == 2 for f in wf)
+
+
+def test_kelly_fraction_clipped():
+    assert kelly_fraction(_stats([1, -1, 1, -1])) == KELLY_RANGE[0]          # W=0.5, b=1 → 0
+    assert kelly_fraction(_stats([3, 3, 3, -1])) == KELLY_RANGE[1]           # 0.75 − 0.25/3 → 上限
+    assert kelly_fraction(_stats([2, -1, 2, -1])) == 0.25
+
+
+def test_candidates():
+    grid = candidates("grid", base=BASE)
+    assert len(grid) == 270 and len(set(grid)) == 270
+    assert all(c.min_volume == 0 for c in grid)
+    rnd = candidates("random", samples=50, seed=1)
+    assert len(rnd) == 50 and rnd == candidates("random", samples=50, seed=1)
+    assert all(1.5 <= c.gap <= 8.0 and c.gap * 2 == int(c.gap * 2) for c in rnd)
+
+
+def test_optimise_uses_backtest(tmp_path):
+    from tests.test_backtest import DAY, PATHS, _bars, _universe
+
+    store = EventStore(tmp_path / "store")
+    days = [DAY + dt.timedelta(days=i) for i in range(4)]
+    for d in days:
+        save_universe(_universe(list(PATHS)), d, tmp_path / "universe")
+        store.append("bars", pd.concat([_bars(s, p) for s, p in PATHS.items()], ignore_index=True), date=d)
+
+    cands = [replace(BASE, tp=tp, sl=sl) for tp in (0.05, 0.10) for sl in (0.02, 0.05)]
+    kw = dict(universe_root=tmp_path / "universe", store_root=tmp_path / "store")
+    res = optimise(days, cands, workers=2, folds=1, **kw)
+    assert res == {**optimise(days, cands, workers=1, folds=1, **kw), "elapsed": res["elapsed"]}
+    assert res["days"] == 4 and res["evals"] == 4 and len(res["walk_forward"]) == 1
+    trades = run_backtest(days, res["params"], **kw)
+    assert res["total_R"] == trades["R"].sum() and res["trades"] == len(trades)
+    assert optimise([], cands, workers=1, folds=1, **kw) == {}
@@ -0,0 +1,77 @@
+"""
+gap_bot.utils.notify の DiscordNotifier（裏スレッド送信）の検証
+
+・send は Webhook が遅くてもブロックしない
+・溜まったメッセージは 2000 文字以内の投稿にまとめる
+・キュー満杯は捨てて数える / 429 は retry_after 後に再送 / close で送り切る
+"""
+
+import threading
+import time
+
+from gap_bot.utils.notify import DiscordNotifier, pack_messages
+
+
+class Resp:
+    def __init__(self, status_code=204, retry_after=None):
+        self.status_code = status_code
+        self._retry = retry_after
+    def json(self):
+        return {"retry_after": self._retry}
+
+
+class Webhook:
+    """受けた投稿を記録するモック。delay 秒かけて応答する"""
+    def __init__(self, delay=0.0, statuses=()):
+        self.delay = delay
+        self.statuses = list(statuses)
+        self.bodies = []
+        self.gate = threading.Event()
+        self.gate.set()
+    def post(self, url, json, timeout):
+        self.gate.wait()
+        time.sleep(self.delay)
+        self.bodies.append(json["content"])
+        if self.statuses:
+            return self.statuses.pop(0)
+        return Resp()
+
+
+def test_pack_messages_respects_limit():
+    msgs = ["a" * 900, "b" * 900, "c" * 900, "d" * 4500]
+    out = pack_messages(msgs)
+    assert all(len(b) <= 2000 for b in out)
+    assert out[0] == "a" * 900 + "\n" + "b" * 900
+    assert "".join(out).replace("\n", "") == "".join(msgs)
+
+
+def test_send_never_blocks_and_batches():
+    hook = Webhook(delay=0.3)
+    n = DiscordNotifier("http://x", post=hook.post, rate=1_000, burst=100, linger=0.05)
+    t0 = time.perf_counter()
+    for i in range(50):
+        assert n.send(f"msg {i}")
+    assert time.perf_counter() - t0 < 0.05                   # 遅い Webhook に引きずられない
+    n.close(timeout=5)
+    assert n.stats()["sent"] == 50 and n.stats()["queued"] == 0
+    assert n.stats()["batches"] < 5                          # 1 件ずつではなくまとめて投稿
+    assert "\n".join(hook.bodies).splitlines() == [f"msg {i}" for i in range(50)]
+
+
+def test_full_queue_drops():
+    hook = Webhook()
+    hook.gate.clear()                                        # 送信スレッドを止めておく
+    n = DiscordNotifier("http://x", post=hook.post, maxsize=3, linger=0)
+    results = [n.send(str(i)) for i in range(10)]
+    assert results.count(False) >= 6 and n.stats()["dropped"] == results.count(False)
+    hook.gate.set()
+    n.close(timeout=5)
+
+
+def test_429_is_retried():
+    hook = Webhook(statuses=[Resp(429, retry_after=0.05)])
+    n = DiscordNotifier("http://x", post=hook.post, rate=1_000, linger=0)
+    n.send("hello")
+    assert n.flush(timeout=5)
+    assert hook.bodies == ["hello", "hello"] and n.stats()["sent"] == 1
+    n.close()
@@ -0,0 +1,167 @@
+"""
+sdk.order_book（注文台帳キャッシュ）と WebullClient への組み込みの検証
+
+・symbol / side / kind の索引で引ける（キー名の揺れは normalize で吸収）
+・ブローカー一覧との突き合わせで差分（約定・他端末発注・価格変更）を数える
+・自分の発注 / 取消で即時更新し、台帳が新しいうちは一覧 API を呼ばない
+・ブラケットの子注文と逆指値も発注時に台帳へ入る（SL を続けて動かしても STOP が重複しない）
+"""
+
+import importlib.util
+from pathlib import Path
+
+from sdk.order_book import OrderBookCache, normalize
+from sdk.webull_session import SessionKeeper
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STOP = {"orderId": "1", "symbol": "aapl", "action": "SELL", "orderType": "STOP", "stopPrice": 189.5, "qty": 10}
+LMT = {"id": "2", "ticker": "AAPL", "side": "buy", "type": "limit", "limitPrice": 190.0, "qty": 10}
+TSLA = {"orderId": "3", "symbol": "TSLA", "side": "sell", "orderType": "STOP_LIMIT", "stop_price": 240.0}
+
+
+def test_normalize_and_index():
+    o = normalize(STOP)
+    assert (o["oid"], o["symbol"], o["side"], o["kind"], o["stop"]) == ("1", "AAPL", "sell", "stop", 189.5)
+
+    book = OrderBookCache()
+    assert book.reconcile([STOP, LMT, TSLA]) == 3          # 空の台帳からは全件が差分
+    assert [o["oid"] for o in book.find("AAPL", side="sell", kind="stop")] == ["1"]
+    assert {o["oid"] for o in book.find("aapl")} == {"1", "2"}
+    assert [o["oid"] for o in book.find("TSLA", kind="stop")] == ["3"]
+    assert book.find("AAPL", side="buy", kind="stop") == []
+
+
+def test_reconcile_counts_drift():
+    book = OrderBookCache()
+    book.reconcile([STOP, LMT])
+    moved = dict(STOP, stopPrice=190.0)                      # 価格変更
+    assert book.reconcile([moved, TSLA]) == 3                # 変更 1 + 消えた 1 + 増えた 1
+    assert book.get("2") is None and book.get("1")["stop"] == 190.0
+    assert book.stats()["drift"] == 5 and book.stats()["reconciles"] == 2
+
+
+def test_events_and_own_orders():
+    book = OrderBookCache()
+    book.on_placed(LMT)
+    book.apply_event(STOP)
+    assert len(book) == 2
+    book.apply_event(dict(LMT, status="Filled"))            # 終了ステータスは台帳から外す
+    book.on_canceled("1")
+    assert len(book) == 0 and book.stats()["events"] == 2
+
+
+def test_stale():
+    book = OrderBookCache(reconcile_sec=30)
+    assert book.stale()                                      # 未同期
+    book.reconcile([])
+    assert not book.stale()
+    assert book.stale(now=book.last_reconcile + 30)
+
+
+def _load_wrapper():
+    spec = importlib.util.spec_from_file_location("webull_sdk_wrapper_real", ROOT / "sdk" / "webull_sdk_wrapper.py")
+    wb = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(wb)
+    return wb
+
+
+def _client(wb, trade):
+    client = wb.WebullClient.__new__(wb.WebullClient)
+    client.trade, client.account_id, client._instrument_ids = trade, "ACC", {}
+    client.orders = OrderBookCache(reconcile_sec=60)
+    client.session = SessionKeeper(client._relogin)
+    client._resolve_adapters()
+    return client
+
+
+def test_client_uses_book_between_reconciles():
+    wb = _load_wrapper()
+
+    class Trade:
+        def __init__(self):
+            self.listed = 0
+            self.open = [dict(TSLA)]
+        def get_active_orders(self):
+            self.listed += 1
+            return list(self.open)
+        def place_order(self, symbol, action, order_type, limit_price, qty, time_in_force,
+                        extended_hours, take_profit, stop_loss):
+            return {"orderId": "9"}
+        def cancel_order(self, order_id):
+            return {"status": "ok"}
+
+    trade = Trade()
+    client = _client(wb, trade)
+
+    assert [o["orderId"] for o in client.find_orders("TSLA", side="sell", kind="stop")] == ["3"]
+    client.place_limit_order("AAPL", "buy", 10, 190.0)
+    assert [o["orderId"] for o in client.find_orders("AAPL", side="buy", kind="limit")] == ["9"]
+    assert client.cancel_order("3")
+    assert client.find_orders("TSLA") == [] and len(client.open_orders()) == 1
+    assert trade.listed == 1                                 # 台帳が新しいうちは一覧を取り直さない
+
+
+def test_bracket_and_stop_legs_are_recorded():
+    from scripts.run_live import ensure_stop_at_sl
+
+    wb = _load_wrapper()
+
+    class Trade:
+        def __init__(self):
+            self.listed = 0
+            self.working = {}
+            self.seq = 0
+        def get_active_orders(self):
+            self.listed += 1
+            return list(self.working.values())
+        def place_order(self, symbol, action, order_type, qty, time_in_force, limit_price=None,
+                        stop_price=None, extended_hours=False, take_profit=None, stop_loss=None):
+            self.seq += 1
+            oid = f"o{self.seq}"
+            self.working[oid] = {"orderId": oid, "symbol": symbol, "action": action,
+                                 "orderType": order_type, "stopPrice": stop_price, "qty": qty}
+            return {"orderId": oid}
+        def attach_bracket_order(self, parent_order_id, take_profit, stop_loss, break_even_distance):
+            return {"data": {"takeProfitOrderId": "tp1", "stopLossOrderId": "sl1"}}
+        def cancel_order(self, order_id):
+            self.working.pop(order_id, None)
+            return {"status": "ok"}
+
+    trade = Trade()
+    client = _client(wb, trade)
+    assert client._adapters["place_stop_order"].name == "trade.place_order[symbol/action/stop_price]"
+    client.find_orders("AAPL")                               # 台帳を同期（一覧 1 回）
+
+    parent = client.place_limit_order("AAPL", "buy", 10, 190.0)["orderId"]
+    client.attach_bracket(parent_order_id=parent, take_profit=200.0, stop_loss=185.0, break_even_distance=0)
+    assert [o["orderId"] for o in client.find_orders("AAPL", side="sell", kind="tp")] == ["tp1"]
+    assert client.find_orders("AAPL", side="sell", kind="sl")[0]["stopPrice"] == 185.0
+
+    pos = {"symbol": "AAPL", "side": "long", "qty": 10, "sl": 188.0}
+    assert ensure_stop_at_sl(pos, client)
+    pos["sl"] = 190.0                                        # 同じ突き合わせ間隔のうちに 2 回目の SL 移動
+    assert ensure_stop_at_sl(pos, client)
+    stops = client.find_orders("AAPL", side="sell", kind="stop")
+    assert [o["stopPrice"] for o in stops] == [190.0]        # 1 本目は取り消され、STOP は 1 本だけ
+    assert [o["stopPrice"] for o in trade.working.values() if o["orderType"] == "stop"] == [190.0]
+    assert trade.listed == 1                                 # 一覧を取り直さずに台帳だけで判断できている
+
+
+def test_bracket_without_leg_ids_forces_reconcile():
+    wb = _load_wrapper()
+
+    class Trade:
+        listed = 0
+        def get_active_orders(self):
+            self.listed += 1
+            return [dict(TSLA)]
+        def attach_bracket_order(self, parent_order_id, take_profit, stop_loss, break_even_distance):
+            return {"success": True}
+
+    trade = Trade()
+    client = _client(wb, trade)
+    client.find_orders("TSLA")
+    client.attach_bracket(parent_order_id="3", take_profit=250.0, stop_loss=235.0, break_even_distance=0)
+    client.find_orders("TSLA")
+    assert trade.listed == 2                                 # 子注文IDが返らなければ次の参照で一覧を取り直す
@@ -0,0 +1,57 @@
+"""
+前日終値（sdk.quotes_polygon）の検証
+
+・grouped-aggs が空 / 別の日のバーしか返さないときは遡らず {}（古い終値をその日の値としてキャッシュしない）
+"""
+
+import importlib
+import os
+from datetime import date, datetime
+
+import pytest
+
+for _k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+    os.environ.setdefault(_k, "test")
+quotes_polygon = importlib.import_module("sdk.quotes_polygon")
+from gap_bot.utils import refcache  # noqa: E402
+
+SESSION = date(2030, 8, 6)          # 火曜 → 前営業日は 8/5（月）。キャッシュが期限切れにならない先の日付
+PREV = date(2030, 8, 5)
+
+
+def _ms(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time(), tzinfo=quotes_polygon._ET).timestamp() * 1000)
+
+
+@pytest.fixture()
+def cache(monkeypatch, tmp_path):
+    c = refcache.RefCache(tmp_path / "ref.sqlite")
+    monkeypatch.setattr(refcache, "_cache", c)
+    quotes_polygon.clear_prev_close_cache()
+    yield c
+    quotes_polygon.clear_prev_close_cache()
+
+
+@pytest.mark.parametrize("results", [
+    [],                                                          # 引け直後でまだ公開前
+    [{"T": "AAA", "c": 9.0, "t": _ms(date(2030, 8, 2))}],        # 別の日のバー
+])
+def test_grouped_does_not_step_back_or_cache_other_days(cache, monkeypatch, results):
+    paths = []
+
+    def fake_get(path, params=None):
+        paths.append(path)
+        return {"results": results}
+
+    monkeypatch.setattr(quotes_polygon, "_get", fake_get)
+    assert quotes_polygon.prefetch_prev_closes(SESSION) == {}
+    assert paths == [f"/v2/aggs/grouped/locale/us/market/stocks/{PREV}"]          # 前の日へ遡らない
+    assert cache.get("prev_close", "AAA") is None
+    assert cache.get("prev_close_map", SESSION.isoformat()) is None
+
+
+def test_grouped_map_for_requested_day_is_cached(cache, monkeypatch):
+    monkeypatch.setattr(quotes_polygon, "_get", lambda path, params=None: {
+        "results": [{"T": "AAA", "c": 10.0, "t": _ms(PREV)}, {"T": "BBB", "c": 0}]})
+    assert quotes_polygon.prefetch_prev_closes(SESSION) == {"AAA": 10.0}
+    assert cache.get("prev_close", "AAA") == 10.0
@@ -0,0 +1,231 @@
+"""
+sdk.quote_bus の検証
+
+・遅い購読者でも publish（= ソケット読み出し）が止まらないこと
+・銘柄ごとの conflation / maxsize 超過時の dropped
+・複数購読者への配信と、参照カウントによる動的 subscribe / unsubscribe
+・AlpacaQuoteSource: 受信中の subscribe / unsubscribe でイベントループが止まらない
+・run_live.monitor(bus=...) がバスの気配をポジションの判定へ回す
+"""
+
+import asyncio
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sdk.quote_bus import AlpacaQuoteSource, QuoteBus
+
+
+class FakeSource:
+    """subscribe/unsubscribe を記録し、run() で与えた気配を流すだけのソース"""
+
+    def __init__(self, quotes=()):
+        self.quotes = list(quotes)
+        self.subscribed = []
+        self.unsubscribed = []
+
+    def subscribe(self, symbols):
+        self.subscribed.append(sorted(symbols))
+
+    def unsubscribe(self, symbols):
+        self.unsubscribed.append(sorted(symbols))
+
+    async def run(self, publish):
+        for q in self.quotes:
+            publish(dict(q))
+            await asyncio.sleep(0)          # 受信ループと同じく 1 件ごとに制御を返す
+
+
+def _q(sym, px):
+    return {"symbol": sym, "bidPrice": px, "askPrice": px + 0.01}
+
+
+def test_slow_consumer_does_not_block_and_conflates():
+    quotes = [_q("AAA" if i % 2 else "BBB", float(i)) for i in range(1000)]
+    src = FakeSource(quotes)
+    bus = QuoteBus(src)
+
+    async def main():
+        sub = bus.subscribe(["AAA", "BBB"])
+        seen = []
+
+        async def consumer():
+            async for q in sub:
+                seen.append(q)
+                await asyncio.sleep(0.01)   # Discord 投稿のような遅い処理
+
+        task = asyncio.create_task(consumer())
+        t0 = time.perf_counter()
+        await bus.run()
+        publish_sec = time.perf_counter() - t0
+        await asyncio.sleep(0.05)
+        sub.close()
+        await task
+        return publish_sec, seen, sub
+
+    publish_sec, seen, sub = asyncio.run(main())
+    assert publish_sec < 0.5                                  # 1000 件 × 10ms を待っていない
+    assert len(seen) < 20
+    assert seen[-1]["bidPrice"] in (998.0, 999.0)             # 最後は最新値
+    assert sub.delivered + sub.conflated == len(quotes)
+    assert bus.stats()["published"] == len(quotes)
+
+
+def test_multiple_subscribers_and_dynamic_symbols():
+    src = FakeSource()
+    bus = QuoteBus(src)
+
+    async def main():
+        a = bus.subscribe(["AAA"])
+        b = bus.subscribe(["AAA", "BBB"])
+        everything = bus.subscribe()                           # 全銘柄
+        assert src.subscribed == [["AAA"], ["BBB"]]            # 0→1 のときだけソースへ
+
+        bus.publish(_q("aaa", 1.0))
+        bus.publish(_q("BBB", 2.0))
+        assert (await a.get())["bidPrice"] == 1.0
+        assert set(await b.get_batch()) == {"AAA", "BBB"}
+        assert set(await everything.get_batch()) == {"AAA", "BBB"}
+
+        a.add(["CCC"])
+        b.remove(["BBB"])
+        assert src.subscribed[-1] == ["CCC"]
+        assert src.unsubscribed == [["BBB"]]
+        a.close()
+        assert src.unsubscribed[-1] == ["CCC"]                 # AAA は b がまだ購読中
+        assert bus.symbols == {"AAA"}
+
+        bus.publish(_q("ZZZ", 9.0))                            # everything だけが受け取る
+        assert (await everything.get())["symbol"] == "ZZZ"
+        assert b.depth == 0
+
+    asyncio.run(main())
+
+
+def test_maxsize_drops_new_symbols():
+    bus = QuoteBus(FakeSource(), maxsize=2)
+
+    async def main():
+        sub = bus.subscribe()
+        for sym in ("A", "B", "C", "A"):
+            bus.publish(_q(sym, 1.0))
+        return sub
+
+    sub = asyncio.run(main())
+    assert sub.depth == 2 and sub.dropped == 1 and sub.conflated == 1
+    st = bus.stats()
+    assert st["dropped"] == 1 and st["max_depth"] == 2
+
+
+class LoopStream:
+    """
+    alpaca-py の StockDataStream と同じループの作り
+    run() は asyncio.run で自前のループを回し、接続中の subscribe / unsubscribe は
+    run_coroutine_threadsafe(...).result() でそのループ上の送信を待つ
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._running = False
+        self._loop = None
+        self._stop = threading.Event()
+        self.inbox = queue.Queue()
+        self.sent = []
+
+    async def _send(self, action, symbols):
+        await asyncio.sleep(0)
+        self.sent.append((action, sorted(symbols)))
+
+    def subscribe_quotes(self, handler, *symbols):
+        for s in symbols:
+            self._handlers[s] = handler
+        if self._running:
+            asyncio.run_coroutine_threadsafe(self._send("subscribe", symbols), self._loop).result()
+
+    def unsubscribe_quotes(self, *symbols):
+        if self._running:
+            asyncio.run_coroutine_threadsafe(self._send("unsubscribe", symbols), self._loop).result()
+        for s in symbols:
+            del self._handlers[s]
+
+    async def _run_forever(self):
+        self._loop = asyncio.get_running_loop()
+        await self._send("subscribe", list(self._handlers))
+        self._running = True
+        while not self._stop.is_set():
+            try:
+                q = self.inbox.get_nowait()
+            except queue.Empty:
+                await asyncio.sleep(0.001)
+                continue
+            handler = self._handlers.get(q["symbol"])
+            if handler:
+                await handler(q)
+        self._running = False
+
+    def run(self):
+        asyncio.run(self._run_forever())
+
+    def stop(self):
+        self._stop.set()
+
+
+def test_alpaca_source_dynamic_subscribe_while_streaming(monkeypatch):
+    monkeypatch.setattr(sys.modules["sdk.alpaca_ws"], "quote_to_dict", dict, raising=False)
+    stream = LoopStream()
+    src = AlpacaQuoteSource(stream)
+    bus = QuoteBus(src)
+
+    async def main():
+        sub = bus.subscribe(["AAA"])
+        task = asyncio.create_task(bus.run())
+        while not stream._running:                            # 接続（スレッド起動）待ち
+            await asyncio.sleep(0.001)
+        stream.inbox.put(_q("AAA", 1.0))
+        assert (await asyncio.wait_for(sub.get(), 2))["bidPrice"] == 1.0
+
+        sub.add(["BBB"])                                       # 受信中に購読追加（同じループなら固まる）
+        sub.remove(["AAA"])
+        stream.inbox.put(_q("AAA", 2.0))
+        stream.inbox.put(_q("BBB", 3.0))
+        assert (await asyncio.wait_for(sub.get(), 2))["symbol"] == "BBB"
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    errors = []
+
+    def target():
+        try:
+            asyncio.run(main())
+        except BaseException as e:
+            errors.append(e)
+
+    th = threading.Thread(target=target, daemon=True)           # 固まってもテスト自体は 10 秒で失敗させる
+    th.start()
+    th.join(10)
+    assert not th.is_alive(), "event loop deadlocked on subscribe"
+    assert not errors, errors
+    assert stream.sent == [("subscribe", ["AAA"]), ("subscribe", ["BBB"]), ("unsubscribe", ["AAA"])]
+    assert not stream._running and src._thread is None
+    assert bus.stats()["published"] == 2
+
+
+def test_run_live_monitor_reads_from_bus(monkeypatch):
+    from scripts import run_live
+
+    seen = []
+    monkeypatch.setattr(run_live, "on_quote", lambda pos, q, **kw: seen.append((pos["symbol"], q["bidPrice"])))
+    monkeypatch.setattr(run_live, "poll_halts", lambda client, lock=None: None)
+    monkeypatch.setattr(run_live, "cancel_unfilled", lambda client, lock=None: None)
+    src = FakeSource([_q("AAA", 1.0), _q("BBB", 2.0), _q("ZZZ", 3.0), _q("AAA", 4.0)])
+    bus = QuoteBus(src)
+    args = SimpleNamespace(tp=0.07, paper=True, workers=2, loop=30.0, record=None)
+    now = datetime.now(tz=timezone.utc)
+    asyncio.run(run_live.monitor(args, None, [{"symbol": "AAA"}, {"symbol": "BBB"}], None, None,
+                                 now + timedelta(hours=1), now + timedelta(seconds=0.3), bus=bus))
+    assert src.subscribed == [["AAA", "BBB"]] and src.unsubscribed == [["AAA", "BBB"]]
+    assert ("AAA", 4.0) in seen and ("BBB", 2.0) in seen               # 最新値で判定し、持っていない銘柄は来ない
+    assert {sym for sym, _ in seen} == {"AAA", "BBB"}
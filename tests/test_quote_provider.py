@@ -44,3 +44,20 @@ def test_alpaca_path(monkeypatch):
     out = qf("AAPL")
     assert called["flag"]
     assert out["bidPrice"] == 123
+
+
+def test_many_uses_single_batch_call(monkeypatch):
+    """.many() は 20 銘柄でも一括 API を 1 回だけ呼ぶか"""
+    calls = []
+
+    def fake_alpaca_many(syms):
+        calls.append(list(syms))
+        return {s: {"bidPrice": 1, "askPrice": 2} for s in syms}
+
+    monkeypatch.setattr(re, "alpaca_quotes", fake_alpaca_many, raising=False)
+
+    qf = re.make_quote_func("alpaca")
+    syms = [f"S{i}" for i in range(20)]
+    out = qf.many(syms + syms[:5])                 # 重複は 1 回にまとめる
+    assert len(calls) == 1 and calls[0] == syms
+    assert set(out) == set(syms)
@@ -0,0 +1,40 @@
+"""
+refcache（参照データの永続キャッシュ）の基本動作テスト
+
+- 期限内は値が返り、期限切れは None になるか
+- 別インスタンス（= 別プロセス相当）から読めるか
+- prev_close の期限が対象セッションの引けになっているか
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+from gap_bot.utils.market_calendar import ET
+from gap_bot.utils.refcache import RefCache, prev_close_expiry
+
+
+def test_put_get_and_expiry(tmp_path, monkeypatch):
+    cache = RefCache(tmp_path / "ref.sqlite")
+    cache.put("float_shares", "AAPL", 15e9)
+    cache.put("sentiment", "AAPL", 0.7, ttl=timedelta(seconds=60))
+    assert cache.get("float_shares", "AAPL") == 15e9
+    assert cache.get("sentiment", "AAPL") == 0.7
+
+    # 2 分後: sentiment (60 s) は切れ、float (数日) は残る
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("sentiment", "AAPL") is None
+    assert cache.get("float_shares", "AAPL") == 15e9
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "ref.sqlite"
+    RefCache(path).put_many("prev_close", {"A": 1.0, "B": 2.0}, ttl=timedelta(hours=1))
+    again = RefCache(path)
+    assert again.get_many("prev_close") == {"A": 1.0, "B": 2.0}
+    assert again.get_many("prev_close", ["B", "ZZZ"]) == {"B": 2.0}
+
+
+def test_prev_close_expires_at_session_close():
+    exp = prev_close_expiry(date(2025, 8, 4))
+    assert datetime.fromtimestamp(exp, tz=ET) == datetime(2025, 8, 4, 16, 0, tzinfo=ET)
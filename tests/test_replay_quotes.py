@@ -0,0 +1,49 @@
+"""
+WebSocket 気配モードのリプレイ検証
+
+記録済み気配を LatestQuotes 経由で run_live.on_quote に流し、
+半分利確・SL 建値移動が気配の到着で発火することと、遅延が集計されることを確認する。
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from scripts import replay_quotes
+from sdk.quote_table import LatestQuotes, load_recorded, recording
+
+
+def _quotes(sym: str, prices):
+    t0 = datetime(2025, 8, 1, 13, 30, tzinfo=timezone.utc)
+    return [{"symbol": sym, "bidPrice": p, "askPrice": p + 0.01, "timestamp": t0 + timedelta(seconds=i)}
+            for i, p in enumerate(prices)]
+
+
+def test_replay_fires_half_tp_and_sl(monkeypatch):
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL", raising=False)
+    replay_quotes.run_live.HALF_TP_DONE.clear()
+    quotes = _quotes("AAA", [10.0, 10.1, 10.2, 10.4, 10.5])       # +5% → TP(7%)/2 を超える
+    positions = replay_quotes.positions_from_quotes(quotes, tp=0.07)
+    st = replay_quotes.replay(quotes, positions, speed=0, tp=0.07)
+
+    assert st["decisions"].get("half_tp") == 1
+    assert st["decisions"].get("sl") == 1
+    assert positions[0]["sl"] == 10.0                             # 建値へ移動
+    assert positions[0]["qty"] == 50
+    assert 1 <= st["processed"] <= len(quotes)
+    assert st["processed"] + st["conflated"] == len(quotes)
+    assert st["max_ms"] >= st["p50_ms"] >= 0
+
+
+def test_table_conflates_and_records(tmp_path):
+    path = tmp_path / "q.jsonl"
+    table = LatestQuotes()
+    handler = recording(table.update, path)
+    for q in _quotes("BBB", [1.0, 1.1, 1.2]):
+        handler(q)
+
+    fresh = table.wait_updates(timeout=0)
+    assert fresh["BBB"]["bidPrice"] == 1.2                        # 最新だけ残る
+    assert table.conflated == 2
+    assert table.wait_updates(timeout=0) == {}
+    back = list(load_recorded(path))
+    assert [q["bidPrice"] for q in back] == [1.0, 1.1, 1.2]
+    assert isinstance(back[0]["timestamp"], datetime)
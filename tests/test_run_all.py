@@ -0,0 +1,41 @@
+"""
+benchmarks.run_all（全段ベンチマーク + ベースライン比較）の検証
+
+・悪化率と最小差の両方を超えた段だけ regressed（揺らぎ程度の差は ok）
+・小さい件数で回して JSON を書き、基準より遅ければ終了コード 1
+"""
+
+import json
+
+from benchmarks.run_all import compare, main
+
+
+def test_compare_threshold_and_min_delta():
+    base = {"a": {"ms": 100.0}, "b": {"ms": 100.0}, "c": {"ms": 2.0}, "d": {"ms": 100.0}}
+    cur = {"a": {"ms": 140.0}, "b": {"ms": 110.0}, "c": {"ms": 4.0}, "d": {"ms": 50.0}, "e": {"ms": 1.0}}
+    rows = {r["stage"]: r for r in compare(cur, base, threshold=0.25, min_delta_ms=5.0)}
+    assert {k: r["status"] for k, r in rows.items()} == {
+        "a": "regressed", "b": "ok", "c": "ok",            # c は 2 倍でも差 2ms なので揺らぎ扱い
+        "d": "improved", "e": "new"}
+    assert rows["a"]["ratio"] == 1.4 and rows["e"]["base_ms"] is None
+
+
+def test_run_writes_json_and_fails_on_regression(tmp_path, monkeypatch):
+    for k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+        monkeypatch.setenv(k, "test")
+    monkeypatch.chdir(tmp_path)                             # main は一時ディレクトリへ移るので戻せるようにしておく
+    base, out = tmp_path / "baseline.json", tmp_path / "out.json"
+    argv = ["--stages", "filter", "entry", "live_tick", "--sizes", "20", "--positions", "5",
+            "--repeat", "1", "--latency", "0", "--baseline", str(base), "--out", str(out)]
+
+    assert main(argv + ["--update-baseline"]) == 0
+    saved = json.loads(base.read_text())["results"]
+    assert set(saved) == {"filter/20", "entry/20", "live_tick/5"}
+    assert saved["entry/20"]["ok"] == 20 and saved["live_tick/5"]["calls"] == 11
+
+    saved["entry/20"]["ms"] = saved["entry/20"]["ms"] / 100 - 10    # 基準を極端に速く書き換える → regressed
+    base.write_text(json.dumps({"results": saved}))
+    assert main(argv) == 1
+    report = json.loads(out.read_text())
+    status = {r["stage"]: r["status"] for r in report["comparison"]}
+    assert status["entry/20"] == "regressed" and report["meta"]["repeat"] == 1
@@ -0,0 +1,153 @@
+"""
+gap_bot.utils.scheduler（run_live の監視タスク）の検証
+
+・blocking=True の遅いタスクが他タスクとイベントループを待たせない
+・間に合わなかった回は skipped に数える / at は 1 回だけ / 例外は記録して続行
+・run_live.QuoteDispatcher は銘柄ごとに並行し（スレッド数は有界）、処理中の気配は最新 1 件にまとめる
+・Halt 取消は同じ銘柄の STOP 取消→再発注の途中に割り込まない（銘柄ごとのロックを共有）
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from gap_bot.utils.scheduler import Scheduler
+
+
+def _run(sch: Scheduler, sec: float) -> None:
+    asyncio.run(sch.run(until=datetime.now(tz=timezone.utc) + timedelta(seconds=sec)))
+
+
+def test_slow_blocking_task_does_not_delay_others():
+    sch = Scheduler()
+    ticks = []
+    sch.every("slow", 0.05, lambda: time.sleep(0.25), blocking=True)
+    sch.every("fast", 0.02, lambda: ticks.append(time.monotonic()))
+    _run(sch, 0.6)
+    st = sch.stats
+    assert st["fast"].runs >= 20
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1      # 遅い同期 I/O に引きずられない
+    assert st["slow"].runs >= 2 and st["slow"].skipped >= 4         # 取りこぼした回は詰めずに飛ばす
+    assert st["slow"].max_ms >= 250
+    assert st["loop_lag"].lag_max_ms < 100
+
+
+def test_at_runs_once_and_errors_are_recorded():
+    sch = Scheduler()
+    fired = []
+    sch.at("once", datetime.now(tz=timezone.utc) + timedelta(seconds=0.1), lambda: fired.append(1))
+    sch.every("boom", 0.05, lambda: 1 / 0)
+    _run(sch, 0.4)
+    assert fired == [1] and sch.stats["once"].lag_max_ms < 100
+    assert sch.stats["boom"].errors == sch.stats["boom"].runs >= 3
+    assert "ZeroDivisionError" in sch.stats["boom"].last_error
+    assert len(sch.report()) == 3                                   # loop_lag + once + boom
+
+
+def test_quote_dispatcher_parallel_and_conflates():
+    from scripts.run_live import QuoteDispatcher
+
+    seen = []
+    lock = threading.Lock()
+
+    def handle(pos, q):
+        time.sleep(0.1)
+        with lock:
+            seen.append((pos["symbol"], q["p"]))
+
+    async def scenario():
+        d = QuoteDispatcher(handle)
+        a, b = {"symbol": "AAPL"}, {"symbol": "TSLA"}
+        t0 = time.perf_counter()
+        for px in (1, 2, 3, 4):
+            d.submit(a, {"p": px})                 # 1 が処理中 → 2, 3 は 4 に上書きされる
+        d.submit(b, {"p": 9})
+        await d.drain()
+        d.close()
+        return d, time.perf_counter() - t0
+
+    d, elapsed = asyncio.run(scenario())
+    assert [p for s, p in seen if s == "AAPL"] == [1, 4]
+    assert ("TSLA", 9) in seen and elapsed < 0.3                    # TSLA は AAPL を待たない
+    assert d.handled == 3 and d.conflated == 2
+
+
+def test_quote_dispatcher_bounded_and_ordered_per_symbol():
+    from scripts.run_live import QuoteDispatcher
+
+    lock = threading.Lock()
+    running, peak, per_symbol, overlap = [0], [0], {}, []
+
+    def handle(pos, q):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            per_symbol[pos["symbol"]] = per_symbol.get(pos["symbol"], 0) + 1
+            if per_symbol[pos["symbol"]] > 1:
+                overlap.append(pos["symbol"])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+            per_symbol[pos["symbol"]] -= 1
+
+    async def scenario():
+        d = QuoteDispatcher(handle, workers=3)
+        positions = [{"symbol": f"S{i}"} for i in range(9)]
+        for px in range(3):
+            for pos in positions:
+                d.submit(pos, {"p": px})
+            await asyncio.sleep(0.01)
+        await d.drain()
+        d.close()
+        return d
+
+    d = asyncio.run(scenario())
+    assert peak[0] == 3                                     # workers で頭打ち
+    assert overlap == []                                    # 同じ銘柄が同時に走らない
+    assert d.handled + d.conflated == 27
+
+
+def test_halt_cancel_waits_for_symbol_worker(monkeypatch):
+    from scripts import run_live
+
+    class Client:
+        def __init__(self):
+            self.working = {"s1": {"orderId": "s1", "symbol": "AAPL", "side": "sell", "orderType": "STOP",
+                                   "stopPrice": 185.0, "status": "Working"}}
+            self.placing, self.go = threading.Event(), threading.Event()
+        def find_orders(self, symbol, side=None, kind=None):
+            return [o for o in list(self.working.values())
+                    if o["symbol"] == symbol and kind in (None, "stop") and side in (None, o["side"])]
+        def cancel_order(self, oid):
+            self.working.pop(oid, None)
+            return True
+        def place_stop_order(self, symbol, qty, stop_price, side):
+            self.placing.set()
+            self.go.wait(5)                        # 取消→再発注の途中で止めておく
+            self.working["s2"] = {"orderId": "s2", "symbol": symbol, "side": side, "orderType": "STOP",
+                                  "stopPrice": stop_price, "status": "Working"}
+            return {"orderId": "s2", "success": True}
+
+    client = Client()
+    monkeypatch.setattr(run_live, "halt_state", {})
+    monkeypatch.setattr(run_live, "fetch_halt_status", lambda: {"AAPL"})
+    monkeypatch.setattr(run_live, "send_discord_message", lambda msg: None)
+    pos = {"symbol": "AAPL", "side": "long", "qty": 10, "sl": 190.0}
+
+    async def scenario():
+        d = run_live.QuoteDispatcher(lambda pos, q: run_live.ensure_stop_at_sl(pos, client))
+        d.submit(pos, {"p": 191.0})
+        assert await asyncio.to_thread(client.placing.wait, 5)
+        halt = threading.Thread(target=run_live.poll_halts, args=(client, d.lock))
+        halt.start()
+        await asyncio.sleep(0.1)
+        assert halt.is_alive() and client.working == {}    # 判定が終わるまで取消は待つ
+        client.go.set()
+        await d.drain()
+        await asyncio.to_thread(halt.join, 5)
+        d.close()
+
+    asyncio.run(scenario())
+    assert client.working == {}                              # 判定中に出た STOP も取り消されている
+    assert run_live.on_quote(pos, {"p": 191.0}, client=client, tp=0.07, paper=False) == []   # HALT 中は出し直さない
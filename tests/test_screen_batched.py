@@ -0,0 +1,72 @@
+"""
+バッチ取得モードの回帰テスト
+
+ローカルのモック Alpaca サーバに対して
+・1 銘柄ずつの取得 (batch_size=0)
+・複数銘柄まとめての取得 (batch_size>0, ページングあり)
+を実行し、出力される StockData が完全に一致することを確認する。
+寄り前の形（日足に当日の bar がまだ無い）でも、前日終値は前営業日の bar から取る。
+"""
+
+import asyncio
+import importlib
+import os
+
+import pytest
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.requests import StockLatestQuoteRequest
+
+from benchmarks.mock_server import MockMarketServer, mock_prev_close
+from gap_bot.utils import refcache
+
+for _k in ("POLYGON_API_KEY", "ALPACA_API_KEY", "ALPACA_SECRET_KEY"):
+    os.environ.setdefault(_k, "test")
+rs = importlib.import_module("scripts.run_screen")
+quotes_polygon = importlib.import_module("sdk.quotes_polygon")
+
+SYMBOLS = [f"T{i:03d}" for i in range(45)]
+
+
+@pytest.fixture(params=[False, True], ids=["regular", "premarket"])
+def mock_alpaca(request, monkeypatch, tmp_path):
+    """run_screen が使う全クライアントをモックサーバへ向ける"""
+    monkeypatch.chdir(tmp_path)                      # logs/ を tmp に書かせる
+    monkeypatch.delenv("FINNHUB_API_KEY", raising=False)
+    monkeypatch.setattr(refcache, "_cache", None)    # _run ごとに作り直す（終了時に元へ戻す）
+    # 1 分足 30 本 × 45 銘柄 → 複数ページ / grouped-aggs に載らない 15 銘柄はフォールバック経路
+    server = MockMarketServer(page_size=100, universe=SYMBOLS[:30], premarket=request.param)
+    url = server.start()
+    mock = StockHistoricalDataClient("test", "test", url_override=url)
+
+    def _quote(sym):
+        q = mock.get_stock_latest_quote(StockLatestQuoteRequest(symbol_or_symbols=sym))
+        return rs._quote_dict(q[sym])
+
+    monkeypatch.setattr(rs, "client", mock)
+    monkeypatch.setattr(quotes_polygon, "_alp", mock)
+    monkeypatch.setattr(quotes_polygon, "_BASE", url)
+    monkeypatch.setattr(rs, "alpaca_quote", _quote)
+    monkeypatch.setattr(rs, "get_float_shares", lambda s: 500_000)
+    monkeypatch.setattr(rs, "filters", {k: (lambda v: True) for k in ("gap_ok", "vol_ok", "rot_ok", "sent_ok")})
+    quotes_polygon.clear_prev_close_cache()
+    yield server
+    quotes_polygon.clear_prev_close_cache()
+    server.stop()
+
+
+def _run(batch_size: int):
+    quotes_polygon.clear_prev_close_cache()
+    refcache._cache = refcache.RefCache(":memory:")   # 1 回目の前日終値を 2 回目に持ち越さない
+    return asyncio.run(rs.fetch_premarket_alpaca_async(
+        SYMBOLS, rate=10_000, burst=100, concurrency=8, batch_size=batch_size))
+
+
+def test_batched_matches_per_symbol(mock_alpaca):
+    per_symbol = _run(0)
+    served = mock_alpaca.requests
+    batched = _run(20)
+
+    assert len(per_symbol) == len(SYMBOLS)
+    assert batched == per_symbol                     # 値・順序とも一致
+    assert [s.previous_close for s in batched] == [mock_prev_close(s) for s in SYMBOLS]   # 2 営業日前の値ではない
+    assert mock_alpaca.requests - served < served / 5   # ページングを含めてもリクエスト数は大幅減
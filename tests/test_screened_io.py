@@ -0,0 +1,62 @@
+"""
+gap_bot.screened_io の読み書き検証
+・JSONL（ヘッダ + 配列行）の往復で値と列が保たれる
+・旧形式（list[dict] の .json）も読める
+・ユニバーススナップショットの保存 / 読込
+"""
+
+import json
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from gap_bot.filters import StockData, screen_frame, to_frame
+from gap_bot.screened_io import (
+    load_universe,
+    read_frame,
+    read_header,
+    read_screened,
+    save_universe,
+    write_screened,
+)
+
+STOCKS = [
+    StockData("AAA", 10.0, 10.5, 150_000, 1_000_000, 3.5),
+    StockData("BBB", 20.0, 19.0, 5_000, 2_000_000, 1.0),
+]
+
+
+def test_roundtrip_stockdata(tmp_path):
+    path = write_screened(tmp_path / "s.jsonl", STOCKS, session=date(2025, 8, 4))
+    head = read_header(path)
+    assert head["version"] == 1 and head["rows"] == 2 and head["session"] == "2025-08-04"
+    assert read_screened(path) == STOCKS
+
+
+def test_frame_extra_columns_kept(tmp_path):
+    out = screen_frame(to_frame(STOCKS))                  # gap_pct / float_rotation 付き
+    path = write_screened(tmp_path / "s.jsonl", out)
+    back = read_frame(path)
+    assert list(back.columns) == list(out.columns)
+    assert back["gap_pct"].iloc[0] == pytest.approx(5.0)
+    assert [s.symbol for s in read_screened(path)] == ["AAA"]
+
+
+def test_legacy_json(tmp_path):
+    from dataclasses import asdict
+    path = tmp_path / "screened_old.json"
+    path.write_text(json.dumps([asdict(s) for s in STOCKS], indent=2))
+    assert read_header(path)["version"] == 0
+    assert read_screened(path) == STOCKS
+    (tmp_path / "empty.json").write_text("[]")
+    assert read_screened(tmp_path / "empty.json") == []
+
+
+def test_universe_snapshot(tmp_path):
+    df = to_frame(STOCKS * 1000)
+    path = save_universe(df, date(2025, 8, 4), root=tmp_path)
+    assert path.name == "universe_20250804.jsonl"
+    back = load_universe(date(2025, 8, 4), root=tmp_path)
+    pd.testing.assert_frame_equal(back, df)
+    assert read_header(path)["kind"] == "universe"
@@ -0,0 +1,142 @@
+"""
+gap_bot.store（日付パーティションの列指向ストア）の検証
+
+・行の日付ごとに part ファイルを作り、型をスキーマに揃える
+・範囲読み出しは該当日のパーティションだけを開く
+・EventLogger からの追記（close を待たず store_sec ごとに裏スレッドで。log() は Parquet の書き込みを待たない）
+  日付が変わったとき / close 時にその日の part を 1 ファイルへ compact
+・旧 CSV の取り込み / 旧 strategy.csv へのフォールバック
+"""
+
+import datetime as dt
+import threading
+import time
+
+import pandas as pd
+
+import gap_bot.store as store_mod
+from gap_bot.store import EventStore, ingest_csv_logs, load_strategy
+from gap_bot.utils.logger import EventLogger
+
+D1, D2, D3 = dt.date(2025, 3, 3), dt.date(2025, 3, 4), dt.date(2025, 3, 5)
+
+
+def test_append_partitions_and_types(tmp_path):
+    st = EventStore(tmp_path)
+    st.append("order", [
+        {"ts": "2025-03-03T13:30:01", "symbol": "AAPL", "qty": 10, "limit": 190.5, "sl": 185.7, "order_id": 1},
+        {"ts": "2025-03-04T13:30:02", "symbol": "TSLA", "qty": "5", "limit": 250},
+    ])
+    assert st.partitions("order") == [D1, D2]
+    df = st.read("order")
+    assert list(df["symbol"]) == ["AAPL", "TSLA"]
+    assert str(df["qty"].dtype) == "Int64" and df["order_id"].iloc[0] == "1"
+    assert df["tp"].isna().all() and list(df["date"].dt.date) == [D1, D2]
+
+
+def test_range_read_opens_only_needed_partitions(tmp_path, monkeypatch):
+    st = EventStore(tmp_path)
+    for d in (D1, D2, D3):
+        st.append("strategy", [{"date": d.isoformat(), "total_R": 1.0, "winrate_%": 50.0, "avg_R": 0.5}])
+    opened = []
+    real = pd.read_parquet
+    monkeypatch.setattr(store_mod.pd, "read_parquet", lambda f, **kw: opened.append(f) or real(f, **kw))
+    df = st.read("strategy", start=D2, end=D2, columns=["date", "total_R"])
+    assert len(opened) == 1 and list(df.columns) == ["date", "total_R"] and len(df) == 1
+
+
+def test_event_logger_sinks_to_store(tmp_path):
+    st = EventStore(tmp_path / "store")
+    day = [D1]
+    log = EventLogger("close", log_dir=tmp_path / "logs", today=lambda: day[0], store=st)
+    log.log(symbol="AAPL", qty=10, order_id="a")
+    day[0] = D2
+    log.log(symbol="TSLA", qty=3)
+    log.close()
+    assert st.partitions("close") == [D1, D2]
+    assert st.read("close", start=D2)["order_id"].isna().all()
+
+
+def test_event_logger_compacts_day_on_rollover_and_close(tmp_path):
+    st = EventStore(tmp_path / "store")
+    day = [D1]
+    log = EventLogger("close", log_dir=tmp_path / "logs", flush_sec=0.02, store_sec=0.02,
+                      today=lambda: day[0], store=st)
+    for i in range(5):
+        log.log(symbol=f"S{i}", qty=1)
+        time.sleep(0.05)                                # 追記のたびに part が増える
+    day[0] = D2
+    log.log(symbol="TSLA", qty=3)
+    log.close()
+    parts = {d: len(list(st._part_dir("close", d).glob("*.parquet"))) for d in (D1, D2)}
+    assert parts == {D1: 1, D2: 1}                      # 前日は日付の切替後、当日は close で 1 ファイルに
+    assert st.read("close", start=D1, end=D1)["symbol"].tolist() == [f"S{i}" for i in range(5)]
+
+
+def test_event_logger_does_not_wait_for_store(tmp_path):
+    """ストアの書き込みが遅くても log() は止まらない（Parquet は裏スレッドでロックの外で書く）"""
+    release, callers = threading.Event(), []
+
+    class SlowStore(EventStore):
+        def append(self, table, data, *, date=None):
+            callers.append(threading.current_thread().name)
+            release.wait()
+            return super().append(table, data, date=date)
+
+    st = SlowStore(tmp_path / "store")
+    log = EventLogger("order", log_dir=tmp_path / "logs", flush_rows=10, flush_sec=0.01, store_sec=0.01,
+                      today=lambda: D1, store=st)
+    log.log(symbol="A0", qty=1)
+    deadline = time.monotonic() + 5
+    while not callers and time.monotonic() < deadline:  # 裏スレッドが追記の途中で止まっている
+        time.sleep(0.01)
+
+    def burst():
+        for i in range(1, 100):
+            log.log(symbol=f"A{i}", qty=1)               # 10 行ごとに CSV へ書き出すが、ストアは待たない
+
+    t = threading.Thread(target=burst)
+    t.start()
+    t.join(5)
+    blocked = t.is_alive()
+    release.set()
+    t.join()
+    log.close()
+    assert callers[0] == "event-log-order" and not blocked
+    assert len(st.read("order", start=D1, end=D1)) == 100
+
+
+def test_event_logger_sinks_on_flush_cadence_without_close(tmp_path):
+    """close されずに落ちても、store_sec ごとに書き出した行はストアに入っている"""
+    st = EventStore(tmp_path / "store")
+    log = EventLogger("order", log_dir=tmp_path / "logs", flush_sec=0.05, store_sec=0.05, today=lambda: D1, store=st)
+    log.log(symbol="AAPL", qty=10, limit=190.5)
+    deadline = time.monotonic() + 5
+    while st.read("order", start=D1, end=D1).empty and time.monotonic() < deadline:   # 次の log() が来なくても裏で書く
+        time.sleep(0.01)
+    assert st.read("order", start=D1, end=D1)["symbol"].tolist() == ["AAPL"]
+    log.log(symbol="TSLA", qty=3)
+    log.close()
+    assert st.read("order", start=D1, end=D1)["symbol"].tolist() == ["AAPL", "TSLA"]   # 同じ行を二重に入れない
+
+
+def test_ingest_and_strategy_fallback(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    log = EventLogger("order", log_dir=logs, today=lambda: D1)
+    log.log(symbol="AAPL", qty=10, limit=190.5, sl=185.7)
+    log.close()
+    legacy = tmp_path / "strategy.csv"
+    legacy.write_text("date,total_R,winrate_%,avg_R\n2025-03-03,1.5,60.0,0.3\n")
+    monkeypatch.setattr(store_mod, "STRATEGY_CSV", legacy)
+
+    st = EventStore(tmp_path / "store")
+    assert load_strategy(store=st)["total_R"].tolist() == [1.5]        # ストアが空なら旧 CSV
+    st.append("strategy", [{"date": "2025-03-04", "total_R": -0.5, "winrate_%": 40.0, "avg_R": -0.1}])
+    df = load_strategy(store=st)                                        # ingest 前に run_daily が書いても履歴は残る
+    assert df["total_R"].tolist() == [1.5, -0.5]
+    assert df["date"].tolist() == [pd.Timestamp("2025-03-03"), pd.Timestamp("2025-03-04")]
+    counts = ingest_csv_logs(st, log_dir=logs, strategy_csv=legacy)
+    assert counts == {"order": 1, "strategy": 1}
+    assert ingest_csv_logs(st, log_dir=logs, strategy_csv=legacy) == {"strategy": 0}   # 2 回目は何もしない
+    assert load_strategy(store=st)["total_R"].tolist() == [1.5, -0.5]
+    assert st.read("order", start=D1, end=D1)["limit"].tolist() == [190.5]
@@ -0,0 +1,112 @@
+"""
+gap_bot.tape（気配・1 分足・注文イベントのバイナリ記録）の検証
+
+・書いた値が memmap の構造化配列 / dict / DataFrame で同じに読める（書きかけの末尾は捨てる）
+・1 件あたりの記録コストが µs オーダー
+・QuoteFunc / OrderBookCache から記録され、replay_quotes と mock_server で再生できる
+"""
+
+import datetime as dt
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.mock_server import MockMarketServer
+from gap_bot.tape import HEADER_SIZE, RECORDS, Tape, iter_quotes, read_bars, read_orders, read_tape
+from sdk.order_book import OrderBookCache
+from sdk.quote_func import QuoteFunc
+
+TS = dt.datetime(2025, 8, 1, 13, 30, 0, 123456, tzinfo=dt.timezone.utc)
+
+
+def _quote(sym, bid, ts=TS):
+    return {"symbol": sym, "bidPrice": bid, "askPrice": bid + 0.01, "bidSize": 3, "askSize": 5, "timestamp": ts}
+
+
+def _day(tmp_path):
+    return next(tmp_path.iterdir())
+
+
+def test_roundtrip_and_torn_tail(tmp_path):
+    tape = Tape(tmp_path)
+    tape.quote(_quote("AAPL", 10.0))
+    tape.quotes({"TSLA": _quote("TSLA", 20.0, ts="2025-08-01T13:30:01Z"), "NONE": None})
+    idx = pd.MultiIndex.from_product([["AAPL", "TSLA"], pd.date_range("2025-08-01 08:00", periods=3, freq="1min", tz="UTC")],
+                                     names=["symbol", "timestamp"])
+    tape.bars(pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 100.0, "vwap": 1.2}, index=idx))
+    tape.order("placed", {"oid": "OID-1", "symbol": "AAPL", "side": "buy", "kind": "limit", "qty": 10, "price": 10.02})
+    tape.close()
+
+    day = _day(tmp_path)
+    arr = read_tape(day / "quote.tape")
+    assert isinstance(arr, np.memmap) and arr.dtype == RECORDS["quote"] and len(arr) == 2
+    q = list(iter_quotes(day / "quote.tape"))
+    assert q[0] == dict(_quote("AAPL", 10.0), bidSize=3.0, askSize=5.0)
+    assert q[1]["symbol"] == "TSLA" and q[1]["timestamp"] == TS.replace(second=1, microsecond=0)
+
+    bars = read_bars(day / "bar.tape")
+    assert len(bars) == 6 and list(bars["symbol"]) == ["AAPL"] * 3 + ["TSLA"] * 3
+    assert bars["timestamp"].iloc[1] == pd.Timestamp("2025-08-01 08:01", tz="UTC") and bars["close"].eq(1.5).all()
+    o = read_orders(day / "order.tape").iloc[0]
+    assert (o["order_id"], o["event"], o["side"], o["kind"], o["qty"], o["price"]) == ("OID-1", "placed", "buy", "limit", 10, 10.02)
+    assert np.isnan(o["stop"])
+
+    # 途中で落ちて書きかけのレコードが残っても、読むときは捨て、次に開いたときに切り詰めて続きから書く
+    path = day / "quote.tape"
+    with path.open("ab") as f:
+        f.write(b"\x01" * 10)
+    assert len(read_tape(path)) == 2
+    tape = Tape(tmp_path)
+    tape.quote(_quote("MSFT", 30.0))
+    tape.close()
+    assert [x["symbol"] for x in iter_quotes(path)] == ["AAPL", "TSLA", "MSFT"]
+    assert (path.stat().st_size - HEADER_SIZE) % RECORDS["quote"].itemsize == 0
+
+
+def test_quote_overhead_is_microseconds(tmp_path):
+    tape = Tape(tmp_path)
+    q = _quote("AAPL", 10.0)
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(20_000):
+            tape.quote(q)
+        best = min(best, (time.perf_counter() - t0) / 20_000)
+    tape.close()
+    assert best < 20e-6, f"{best * 1e6:.1f}us/event"
+
+
+def test_sources_record_and_replay(tmp_path):
+    from scripts.replay_quotes import positions_from_quotes, replay
+
+    tape = Tape(tmp_path / "tape")
+    qf = QuoteFunc(lambda s: _quote(s, 100.0), record=tape.quotes)
+    qf.many(["AAPL", "TSLA"])
+    qf("AAPL")
+    for px in (103.0, 104.0):                                 # TP 7 % の半分を超える
+        tape.quote(_quote("AAPL", px, ts=TS + dt.timedelta(seconds=px - 100)))
+
+    book = OrderBookCache(on_event=tape.order)
+    book.on_placed({"orderId": "A", "symbol": "AAPL", "side": "SELL", "orderType": "STP", "stopPrice": 97.5, "qty": 10})
+    book.apply_event({"orderId": "A", "symbol": "AAPL", "side": "SELL", "orderType": "STP", "status": "Filled"})
+    book.on_placed({"orderId": "B", "symbol": "TSLA", "side": "BUY", "orderType": "LIMIT", "limitPrice": 1.0})
+    book.reconcile([])
+    tape.close()
+
+    day = _day(tmp_path / "tape")
+    assert list(read_orders(day / "order.tape")["event"]) == ["placed", "filled", "placed", "closed"]
+    quotes = list(iter_quotes(day / "quote.tape"))
+    assert [q["symbol"] for q in quotes] == ["AAPL", "TSLA", "AAPL", "AAPL", "AAPL"]
+    st = replay(quotes, positions_from_quotes(quotes, 0.07), speed=0)
+    assert st["quotes"] == 5 and st["decisions"].get("half_tp") == 1
+
+    # run_screen 向け: 記録した 1 分足 / 最新気配をモックサーバがそのまま返す
+    idx = pd.MultiIndex.from_product([["AAPL"], pd.date_range("2025-08-01 08:00", periods=2, freq="1min", tz="UTC")],
+                                     names=["symbol", "timestamp"])
+    tape = Tape(tmp_path / "tape")
+    tape.bars(pd.DataFrame({"open": 9.0, "high": 9.5, "low": 8.5, "close": [9.1, 9.2], "volume": 7.0}, index=idx))
+    tape.close()
+    server = MockMarketServer(tape=day)
+    assert [b["c"] for b in server.tape_bars["AAPL"]] == [9.1, 9.2] and server.tape_bars["AAPL"][0]["t"] == "2025-08-01T08:00:00Z"
+    assert server.tape_quotes["AAPL"]["bp"] == 104.0 and server.tape_quotes["TSLA"]["ap"] == 100.01
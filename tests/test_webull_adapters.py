@@ -0,0 +1,95 @@
+"""
+sdk.webull_adapters / WebullClient の SDK メソッド解決の検証
+
+・旧来の総当たりと同じ優先順で、シグネチャに合う呼び方を起動時に 1 つ選ぶ
+・発注は選ばれた SDK メソッドを 1 回呼ぶだけ（TypeError による再試行をしない）
+・インストール済みの公式 webullsdktrade API では trade.order / trade.account の公式メソッドが選ばれる
+
+conftest が sdk.webull_sdk_wrapper をスタブに差し替えているので、本物はファイルから直接読み込む。
+"""
+
+import importlib.util
+from pathlib import Path
+
+from webullsdkcore.client import ApiClient
+from webullsdktrade.api import API
+
+from sdk.order_book import OrderBookCache
+from sdk.webull_adapters import resolve_adapters
+from sdk.webull_session import SessionKeeper
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load_wrapper():
+    spec = importlib.util.spec_from_file_location("webull_sdk_wrapper_real", ROOT / "sdk" / "webull_sdk_wrapper.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class LegacyTrade:
+    """キーワード名が (B) 形式の submit_order だけを持つ旧 SDK 風の trade"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit_order(self, symbol, side, type, price, quantity, tif, ext, tp, sl):
+        self.calls.append(dict(symbol=symbol, side=side, price=price, quantity=quantity))
+        return {"data": {"orderId": "L1"}}
+
+    def get_open_orders(self):
+        return {"data": [{"orderId": "L1", "status": "Working"}, {"orderId": "L0", "status": "Filled"}]}
+
+    def cancel(self, orderId):
+        return {"status": "ok"}
+
+
+def test_legacy_signature_resolved_once():
+    trade = LegacyTrade()
+    ads = resolve_adapters(trade, "ACC")
+    assert ads["place_limit_order"].name == "trade.submit_order[symbol/side/price]"
+    assert ads["get_active_orders"].name == "trade.get_open_orders"
+    assert ads["cancel_order"].name == "trade.cancel[id]"             # 位置引数でも束縛できる
+    assert "get_positions" not in ads
+
+    ads["place_limit_order"].call("AAPL", "BUY", 10, 190.5, "DAY", True, None, None)
+    assert trade.calls == [dict(symbol="AAPL", side="BUY", price=190.5, quantity=10)]
+
+
+def test_official_sdk_through_wrapper():
+    wb = _load_wrapper()
+    api = API(ApiClient(app_key="x", app_secret="y"))         # 通信しない
+    sent = []
+
+    def place_order(account_id, qty, instrument_id, side, client_order_id, order_type,
+                    extended_hours_trading, tif, limit_price=None, stop_price=None,
+                    trailing_type=None, trailing_stop_step=None):
+        sent.append(dict(account_id=account_id, qty=qty, instrument_id=instrument_id,
+                         side=side, order_type=order_type, limit_price=limit_price))
+        return {"client_order_id": client_order_id}
+
+    api.order.place_order = place_order
+    api.instrument.get_instrument = lambda symbols, category: [{"instrument_id": "913256135", "symbol": symbols}]
+
+    client = wb.WebullClient.__new__(wb.WebullClient)          # QuotesClient の接続を避けて組み立てる
+    client.trade, client.account_id, client._instrument_ids = api, "ACC", {}
+    client.orders = OrderBookCache()
+    client.session = SessionKeeper(client._relogin)
+    client._resolve_adapters()
+
+    names = {op: ad.name for op, ad in client._adapters.items()}
+    assert names == {
+        "place_limit_order": "trade.order.place_order[official]",
+        "place_stop_order": "trade.order.place_order[official]",
+        "get_active_orders": "trade.order.list_open_orders[official]",
+        "cancel_order": "trade.order.cancel_order[official]",
+        "get_positions": "trade.account.get_account_position[official]",
+    }
+
+    res = client.place_limit_order("AAPL", "buy", 10, 190.456, extended=True)
+    assert res["success"] and res["orderId"]
+    assert sent == [dict(account_id="ACC", qty=10, instrument_id="913256135",
+                         side="BUY", order_type="LIMIT", limit_price=190.46)]
+    client.place_limit_order("AAPL", "sell", 5, 191.0)
+    assert client._instrument_ids == {"AAPL": "913256135"}     # instrument_id は 1 回だけ引く
@@ -0,0 +1,106 @@
+"""
+sdk.webull_session（トークン寿命の先回り更新）と WebullClient への組み込みの検証
+
+・期限の margin 前に更新し、発注経路では再認証しない
+・同時に認証切れになっても再認証は 1 回（single-flight）
+・認証切れの回数と更新にかかった時間を数える
+"""
+
+import importlib.util
+import time
+from pathlib import Path
+
+from sdk.order_book import OrderBookCache
+from sdk.webull_session import SessionKeeper
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+    def __call__(self):
+        return self.t
+
+
+def test_due_and_ensure_fresh():
+    clock, calls = Clock(), []
+    keeper = SessionKeeper(lambda: calls.append(clock.t) or True, ttl_sec=100, margin_sec=10, clock=clock)
+    assert not keeper.due()                      # 寿命不明のうちは何もしない
+    keeper.refresh()
+    assert keeper.expires_at == 1100.0
+
+    clock.t = 1089.0
+    keeper.ensure_fresh()
+    assert len(calls) == 1                       # まだ margin の外
+    clock.t = 1090.0
+    keeper.ensure_fresh()
+    assert len(calls) == 2 and keeper.expires_at == 1190.0
+
+    st = keeper.stats()
+    assert st["refreshes"] == 2 and st["refresh_failures"] == 0 and st["refresh_ms_max"] is not None
+
+
+def test_refresh_since_coalesces():
+    clock, calls = Clock(), []
+    keeper = SessionKeeper(lambda: calls.append(1) or True, clock=clock)
+    started = clock.t
+    clock.t += 1
+    keeper.refresh()                             # 別スレッドが先に更新した
+    assert keeper.refresh(since=started)         # 失敗した呼び出しより後の更新があれば再認証しない
+    assert len(calls) == 1
+
+
+def test_background_refresh_before_expiry():
+    keeper = SessionKeeper(lambda: True, ttl_sec=0.2, margin_sec=0.1)
+    keeper.refresh()
+    keeper.start()
+    time.sleep(0.45)
+    keeper.stop()
+    assert keeper.refreshes >= 3
+
+
+def _client(trade):
+    spec = importlib.util.spec_from_file_location("webull_sdk_wrapper_real", ROOT / "sdk" / "webull_sdk_wrapper.py")
+    wb = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(wb)
+    client = wb.WebullClient.__new__(wb.WebullClient)
+    client.trade, client.account_id, client._instrument_ids = trade, "ACC", {}
+    client.orders = OrderBookCache()
+    client.session = SessionKeeper(client._relogin, ttl_sec=100, margin_sec=10)
+    client._resolve_adapters()
+    return client
+
+
+class Trade:
+    """トークンの期限切れを expired フラグで表す旧 SDK 風の trade"""
+    def __init__(self):
+        self.expired = False
+        self.reauths = 0
+    def reauth(self):
+        self.reauths += 1
+        self.expired = False
+    def get_active_orders(self):
+        if self.expired:
+            raise RuntimeError("401 UNAUTHORIZED")
+        return []
+
+
+def test_client_retries_once_and_counts_auth_failure():
+    trade = Trade()
+    client = _client(trade)
+    trade.expired = True
+    assert client.get_active_orders() == []
+    assert trade.reauths == 1 and client.session.stats()["auth_failures"] == 1
+
+
+def test_warm_up_refreshes_ahead_of_expiry():
+    trade = Trade()
+    client = _client(trade)
+    client.warm_up(keepalive=False)
+    assert trade.reauths == 1 and client.session.expires_at is not None
+
+    client.session.expires_at = time.monotonic() + 5    # margin の内側 → 呼び出し前に更新する
+    trade.expired = True
+    client.get_active_orders()
+    assert trade.reauths == 2 and client.session.auth_failures == 0